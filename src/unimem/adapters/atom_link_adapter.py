@@ -5,7 +5,7 @@
 参考架构：A-Mem（原子笔记网络 + 记忆演化）
 
 工业级特性：
-- 嵌入向量缓存（减少重复计算）
+- 嵌入向量缓存（减少重复计算，可选磁盘二级缓存跨进程/重启复用）
 - 批量操作支持（提高性能）
 - 配置验证和错误处理
 - 类型安全
@@ -15,9 +15,14 @@ import os
 import json
 import uuid
 import logging
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import replace
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Set
-from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple
+
+import numpy as np
 
 try:
     from qdrant_client.models import PointIdsList
@@ -41,35 +46,253 @@ from .base import (
 )
 from ..memory_types import Entity, Memory
 from ..chat import ark_deepseek_v3_2
+from ..disk_cache import DiskCache, content_key
+from ..vector_index import LocalVectorClient, VectorPoint, VectorSearchRequest
+from ..embedding_batcher import EmbeddingBatcher
+from ..link_graph import LinkGraph
+from ..link_evolution import (
+    BatchedLinkEvaluator,
+    LinkDecision,
+    LinkDecisionCache,
+    PendingLinkEvaluation,
+    decision_key,
+    format_neighbors,
+    truncate_to_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# 支持的嵌入模型推理后端
+EMBEDDING_BACKENDS = ("torch", "onnx", "int8")
+
+# 链接演化模式：sync 在 retain 中同步评估；batched 合并多条记忆后台异步评估
+LINK_EVOLUTION_MODES = ("sync", "batched")
+
+
+def load_sentence_transformer(model_name_or_path: str, backend: str = "torch") -> Any:
+    """
+    加载 SentenceTransformer 模型
+    
+    Args:
+        model_name_or_path: 本地路径或 HuggingFace 模型名
+        backend: 推理后端
+            - torch: 默认 PyTorch 模型
+            - onnx: ONNX Runtime 导出（需要 sentence-transformers>=3.2 和 optimum[onnxruntime]）
+            - int8: PyTorch 动态 int8 量化（Linear 层），CPU 推理更快、内存更小
+            
+    Returns:
+        SentenceTransformer 实例（onnx 不可用时回退到 torch）
+    """
+    logger.info(f"Loading embedding model: {model_name_or_path} (backend={backend})")
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name_or_path, backend="onnx")
+        except (TypeError, ImportError, ValueError) as e:
+            logger.warning(f"ONNX backend unavailable ({e}), falling back to torch")
+            return SentenceTransformer(model_name_or_path)
+    
+    model = SentenceTransformer(model_name_or_path, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
 class EmbeddingCache:
-    """嵌入向量缓存"""
-    cache: Dict[str, List[float]] = field(default_factory=dict)
-    max_size: int = 1000
-    
-    def get(self, key: str) -> Optional[List[float]]:
-        """获取缓存的嵌入向量"""
-        return self.cache.get(key)
-    
-    def set(self, key: str, value: List[float]) -> None:
-        """设置缓存的嵌入向量"""
-        if len(self.cache) >= self.max_size:
-            # 简单策略：删除最早的条目（FIFO）
-            oldest_key = next(iter(self.cache))
-            del self.cache[oldest_key]
-        self.cache[key] = value
+    """
+    嵌入向量缓存
+    
+    内存层按文本内容哈希索引，向量存放在预分配的 float32 矩阵（slab）中，
+    OrderedDict 维护 键 -> 槽位 的 LRU 顺序，淘汰时复用槽位；容量同时受条目数
+    和字节数限制（slab 在首次写入、维度确定后按上限一次分配）。
+    
+    读取返回 slab 行的只读 NumPy 视图（不复制）。视图在该槽位被淘汰复用前有效，
+    需要长期持有时调用方应自行复制。
+    
+    配置 disk_cache 时作为第二级持久化缓存，以 float32 字节存储，
+    命名空间包含模型标识，不同模型的向量互不干扰。
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        disk_cache: Optional[DiskCache] = None,
+        namespace: str = "embedding",
+    ):
+        """
+        初始化嵌入缓存
+        
+        Args:
+            max_size: 最大条目数（默认 1000）
+            max_bytes: slab 字节数上限（默认 64MB），None 表示只按条目数限制
+            disk_cache: 磁盘二级缓存（可选）
+            namespace: 磁盘缓存命名空间
+        """
+        self.max_size = max(int(max_size), 1)
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.namespace = namespace
+        
+        self._lock = threading.Lock()
+        self._slab: Optional[np.ndarray] = None
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # 内容哈希 -> 槽位，按 LRU 排列
+        self._free_slots: List[int] = []
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    @staticmethod
+    def _key(text: str) -> str:
+        """文本内容哈希键"""
+        return content_key(text)
+    
+    @property
+    def capacity(self) -> int:
+        """slab 槽位数（维度确定前为 max_size）"""
+        return self._slab.shape[0] if self._slab is not None else self.max_size
+    
+    def _view(self, slot: int) -> np.ndarray:
+        view = self._slab[slot]
+        view.flags.writeable = False
+        return view
+    
+    def _remember(self, key: str, vector: np.ndarray) -> Optional[np.ndarray]:
+        """写入 slab（调用方持有锁），返回槽位视图；维度不一致时不缓存"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self._slab is None:
+            capacity = self.max_size
+            if self.max_bytes is not None:
+                capacity = max(min(capacity, self.max_bytes // max(vector.nbytes, 1)), 1)
+            self._slab = np.zeros((capacity, vector.shape[0]), dtype=np.float32)
+            self._free_slots = list(range(capacity - 1, -1, -1))
+        elif vector.shape[0] != self._slab.shape[1]:
+            logger.warning(
+                f"Embedding dimension changed ({self._slab.shape[1]} -> {vector.shape[0]}), skipping cache"
+            )
+            return None
+        
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                # 淘汰最久未使用的条目并复用其槽位
+                _, slot = self._slots.popitem(last=False)
+                self._evictions += 1
+        self._slab[slot] = vector
+        self._slots[key] = slot
+        return self._view(slot)
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """获取缓存的嵌入向量（只读视图；内存未命中时回查磁盘）"""
+        key = self._key(text)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._slots.move_to_end(key)
+                self._hits += 1
+                return self._view(slot)
+        data = self.disk_cache.get(self.namespace, key) if self.disk_cache is not None else None
+        with self._lock:
+            if data is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return self._remember(key, np.frombuffer(data, dtype=np.float32))
+    
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        批量获取缓存的嵌入向量（内存未命中的一次性回查磁盘）
+        
+        Returns:
+            命中的文本到只读向量视图的映射
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for text in texts:
+                key = self._key(text)
+                slot = self._slots.get(key)
+                if slot is not None:
+                    self._slots.move_to_end(key)
+                    found[text] = self._view(slot)
+                else:
+                    missing[key] = text
+        if missing and self.disk_cache is not None:
+            loaded = self.disk_cache.get_many(self.namespace, list(missing))
+            with self._lock:
+                for key, data in loaded.items():
+                    view = self._remember(key, np.frombuffer(data, dtype=np.float32))
+                    if view is not None:
+                        found[missing[key]] = view
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(texts) - len(found)
+        return found
+    
+    def set(self, text: str, value: Any) -> None:
+        """设置缓存的嵌入向量（同时写入磁盘层）"""
+        self.set_many([(text, value)])
+    
+    def set_many(self, items: List[tuple]) -> None:
+        """批量设置缓存的嵌入向量，磁盘层单事务写入"""
+        disk_items = []
+        with self._lock:
+            for text, value in items:
+                key = self._key(text)
+                vector = np.asarray(value, dtype=np.float32).reshape(-1)
+                self._remember(key, vector)
+                if self.disk_cache is not None:
+                    disk_items.append((key, vector.tobytes()))
+        if disk_items:
+            self.disk_cache.put_many(self.namespace, disk_items)
+    
+    def warm_up(self, limit: Optional[int] = None) -> int:
+        """
+        从磁盘层预热内存层（启动时调用）
+        
+        Args:
+            limit: 最多加载条目数（默认 slab 容量）
+            
+        Returns:
+            加载的条目数
+        """
+        if self.disk_cache is None:
+            return 0
+        loaded = list(self.disk_cache.iter_recent(self.namespace, limit or self.capacity))
+        with self._lock:
+            # 最近使用的最后写入，淘汰时最后被淘汰
+            for key, data in reversed(loaded):
+                self._remember(key, np.frombuffer(data, dtype=np.float32))
+        return len(loaded)
     
     def clear(self) -> None:
-        """清空缓存"""
-        self.cache.clear()
+        """清空缓存（仅内存层，slab 保留复用）"""
+        with self._lock:
+            self._slots.clear()
+            if self._slab is not None:
+                self._free_slots = list(range(self._slab.shape[0] - 1, -1, -1))
     
     def size(self) -> int:
         """获取缓存大小"""
-        return len(self.cache)
+        return len(self._slots)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._slots),
+                "capacity": self.capacity,
+                "bytes": int(self._slab.nbytes) if self._slab is not None else 0,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "evictions": self._evictions,
+            }
 
 
 class AtomLinkAdapter(BaseAdapter):
@@ -101,22 +324,80 @@ class AtomLinkAdapter(BaseAdapter):
         self.memory_store: Dict[str, Memory] = {}
         # ID 映射：memory.id -> qdrant_point_id (用于处理非 UUID 格式的 ID)
         self.id_mapping: Dict[str, Any] = {}
-        
-        # 初始化嵌入缓存
+        # 反向映射：str(qdrant_point_id) -> memory.id（检索结果 O(1) 解析）
+        self.point_id_mapping: Dict[str, str] = {}
+        # 链接网络的 CSR 邻接（子图链接检索的多跳 PPR 打分）
+        self.link_graph = LinkGraph()
+        self.subgraph_damping = float(self.config.get("subgraph_damping", 0.5))
+        self.subgraph_max_nodes = int(self.config.get("subgraph_max_nodes", 200))
+        self.subgraph_max_hops = int(self.config.get("subgraph_max_hops", 3))
+        
+        # 初始化嵌入缓存（可选磁盘二级缓存，按模型标识隔离）
         cache_size = int(self.config.get("embedding_cache_size", 1000))
-        self.embedding_cache = EmbeddingCache(max_size=cache_size)
+        cache_max_bytes = self.config.get("embedding_cache_max_bytes", 64 * 1024 * 1024)
+        self.embedding_model_id = str(
+            self.config.get("local_model_path") or self.config.get("model_name", "intfloat/multilingual-e5-small")
+        )
+        embedding_disk_cache = None
+        disk_cache_path = self.config.get("embedding_disk_cache_path")
+        if disk_cache_path:
+            try:
+                embedding_disk_cache = DiskCache(
+                    str(disk_cache_path),
+                    max_bytes=int(self.config.get("embedding_disk_cache_max_bytes", 512 * 1024 * 1024)),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to open embedding disk cache {disk_cache_path}: {e}, using memory only")
+        self.embedding_cache = EmbeddingCache(
+            max_size=cache_size,
+            max_bytes=int(cache_max_bytes) if cache_max_bytes is not None else None,
+            disk_cache=embedding_disk_cache,
+            namespace=f"embedding:{self.embedding_model_id}",
+        )
         
         # 批量操作配置
         self.batch_size = int(self.config.get("batch_size", 100))
         self.embedding_batch_size = int(self.config.get("embedding_batch_size", 32))
         
+        # 嵌入微批处理：合并多线程并发的编码请求（模型调用集中在一个后台线程）
+        self.embedding_batcher: Optional[EmbeddingBatcher] = None
+        if self.config.get("embedding_micro_batching", True):
+            self.embedding_batcher = EmbeddingBatcher(
+                self._encode_texts,
+                max_batch_size=self.embedding_batch_size,
+                linger_ms=float(self.config.get("embedding_linger_ms", 5.0)),
+            )
+
+        # 链接演化：决策缓存 + 邻居内容 token 预算；batched 模式下多条记忆合并为一次 LLM 请求异步评估
+        self.link_evolution_mode = str(self.config.get("link_evolution_mode", "sync")).lower()
+        if self.link_evolution_mode not in LINK_EVOLUTION_MODES:
+            raise AdapterConfigurationError(
+                f"Invalid link_evolution_mode: {self.link_evolution_mode} (must be one of {LINK_EVOLUTION_MODES})",
+                adapter_name=self.__class__.__name__
+            )
+        self.link_neighbor_token_budget = int(self.config.get("link_neighbor_token_budget", 1500))
+        self.link_decision_cache = LinkDecisionCache(max_size=int(self.config.get("link_decision_cache_size", 2048)))
+        self._link_callback: Optional[Callable[[Memory, Set[str]], None]] = None
+        self.link_evaluator: Optional[BatchedLinkEvaluator] = None
+        if self.link_evolution_mode == "batched":
+            self.link_evaluator = BatchedLinkEvaluator(
+                self._evaluate_links_batch,
+                self._on_link_decision,
+                cache=self.link_decision_cache,
+                max_batch_size=int(self.config.get("link_evolution_batch_size", 8)),
+                linger_ms=float(self.config.get("link_evolution_linger_ms", 200.0)),
+            )
+
         # 初始化属性（确保即使失败也有默认值）
         self.qdrant_client = None
-        self.embedding_model = None
+        self._embedding_model = None
+        self._embedding_model_loader: Optional[Callable[[], Any]] = None
+        self._embedding_model_lock = threading.Lock()
         self.collection_name = None
         self.embedding_dimension = None
         
-        # 向量存储：使用 Qdrant
+        # 向量存储：Qdrant，或进程内本地索引（vector_backend = "local"）
+        self.vector_backend = str(self.config.get("vector_backend", "qdrant")).lower()
         qdrant_host = str(self.config.get("qdrant_host", "localhost"))
         qdrant_port = int(self.config.get("qdrant_port", 6333))
         collection_name = str(self.config.get("collection_name", "unimem_memories"))
@@ -133,8 +414,29 @@ class AtomLinkAdapter(BaseAdapter):
                 adapter_name=self.__class__.__name__
             )
         
-        # 初始化 Qdrant 客户端
-        if QDRANT_AVAILABLE:
+        # 初始化向量存储客户端
+        if self.vector_backend in ("local", "memory"):
+            # 本地索引与 Qdrant 客户端接口一致；memory 模式不持久化
+            try:
+                local_path = self.config.get("local_vector_path") if self.vector_backend == "local" else None
+                self.qdrant_client = LocalVectorClient(
+                    path=str(local_path) if local_path else None,
+                    quantization=self.config.get("local_vector_quantization"),
+                    index_type=str(self.config.get("local_vector_index_type", "flat")),
+                    autosave_every=int(self.config.get("local_vector_autosave_every", 100)),
+                )
+                self.qdrant_client.create_collection(
+                    collection_name, dimension=self.config.get("embedding_dimension")
+                )
+                self.embedding_dimension = int(self.config.get("embedding_dimension", 384))
+                logger.info(f"Using local vector index (path={local_path}, collection={collection_name})")
+            except ValueError as e:
+                raise AdapterConfigurationError(
+                    f"Invalid local vector index config: {e}",
+                    adapter_name=self.__class__.__name__
+                ) from e
+            self.collection_name = collection_name
+        elif QDRANT_AVAILABLE:
             try:
                 from qdrant_client import QdrantClient
                 from qdrant_client.models import Distance, VectorParams
@@ -201,45 +503,38 @@ class AtomLinkAdapter(BaseAdapter):
             self.qdrant_client = None
         
         # 嵌入模型：使用 sentence-transformers（独立于 Qdrant）
+        # 默认首次使用时加载，并可在后台线程预热，避免阻塞 UniMem 构造
+        self.embedding_backend = str(self.config.get("embedding_backend", "torch")).lower()
+        if self.embedding_backend not in EMBEDDING_BACKENDS:
+            raise AdapterConfigurationError(
+                f"Invalid embedding_backend: {self.embedding_backend} (must be one of {EMBEDDING_BACKENDS})",
+                adapter_name=self.__class__.__name__
+            )
+        self.model_load_seconds: Optional[float] = None
         if SENTENCE_TRANSFORMERS_AVAILABLE:
-            try:
-                local_model_path = self.config.get("local_model_path")
-                model_name = self.config.get("model_name", "intfloat/multilingual-e5-small")
-                
-                if local_model_path and os.path.exists(local_model_path):
-                    logger.info(f"Loading embedding model from local path: {local_model_path}")
-                    self.embedding_model = SentenceTransformer(local_model_path)
-                else:
-                    logger.info(f"Loading embedding model from HuggingFace: {model_name}")
-                    self.embedding_model = SentenceTransformer(model_name)
-                
-                self.embedding_dimension = self.embedding_model.get_sentence_embedding_dimension()
-                logger.info(f"Embedding model loaded successfully (dimension: {self.embedding_dimension})")
-                
-                # 如果 Qdrant 集合维度不匹配，警告
-                if self.qdrant_client and self.embedding_dimension:
-                    try:
-                        collection_info = self.qdrant_client.get_collection(collection_name)
-                        collection_dim = collection_info.config.params.vectors.size
-                        if collection_dim != self.embedding_dimension:
-                            logger.warning(
-                                f"Embedding dimension mismatch: model={self.embedding_dimension}, "
-                                f"collection={collection_dim}"
-                            )
-                    except Exception:
-                        pass
-            except ImportError:
-                logger.warning("sentence-transformers not available, semantic retrieval will be limited")
-                self.embedding_model = None
-            except Exception as e:
-                logger.error(f"Failed to load embedding model: {e}", exc_info=True)
-                self.embedding_model = None
+            local_model_path = self.config.get("local_model_path")
+            model_name = self.config.get("model_name", "intfloat/multilingual-e5-small")
+            model_source = local_model_path if local_model_path and os.path.exists(local_model_path) else model_name
+            self._embedding_model_loader = lambda: load_sentence_transformer(model_source, self.embedding_backend)
+            
+            if not self.config.get("embedding_lazy_load", True):
+                self._load_embedding_model()
+            elif self.config.get("embedding_warm_up", True):
+                threading.Thread(
+                    target=self._warm_up_embedding_model,
+                    name="unimem-embedding-warmup",
+                    daemon=True,
+                ).start()
         else:
             logger.warning("sentence-transformers not available, semantic retrieval will be limited")
-            self.embedding_model = None
         
-        # 检查是否有可用的组件
-        if not self.qdrant_client and not self.embedding_model:
+        # 启动预热：从磁盘缓存加载最近使用的嵌入向量
+        if embedding_disk_cache is not None and self.config.get("embedding_cache_warm_up", True):
+            warmed = self.embedding_cache.warm_up()
+            logger.info(f"Embedding cache warmed up {warmed} entries from {disk_cache_path}")
+        
+        # 检查是否有可用的组件（延迟加载的模型视为可用，不在此处触发加载）
+        if not self.qdrant_client and not self._has_embedding_model():
             logger.warning("Both Qdrant and embedding model unavailable, adapter will be limited")
             self._available = False
         else:
@@ -247,6 +542,68 @@ class AtomLinkAdapter(BaseAdapter):
         
         logger.info("Atom link adapter initialized (using A-Mem principles)")
     
+    @property
+    def embedding_model(self) -> Any:
+        """嵌入模型（延迟加载：首次访问时加载，加载失败时为 None）"""
+        if self._embedding_model is None and self._embedding_model_loader is not None:
+            return self._load_embedding_model()
+        return self._embedding_model
+    
+    @embedding_model.setter
+    def embedding_model(self, model: Any) -> None:
+        # 显式设置模型（如测试注入）时取消延迟加载
+        self._embedding_model = model
+        self._embedding_model_loader = None
+    
+    def _has_embedding_model(self) -> bool:
+        """模型已加载或可延迟加载（不触发加载）"""
+        return self._embedding_model is not None or self._embedding_model_loader is not None
+    
+    def _load_embedding_model(self) -> Any:
+        """加载嵌入模型（线程安全，只加载一次；失败后不再重试）"""
+        with self._embedding_model_lock:
+            if self._embedding_model is not None or self._embedding_model_loader is None:
+                return self._embedding_model
+            loader = self._embedding_model_loader
+            started = time.perf_counter()
+            try:
+                model = loader()
+            except Exception as e:
+                logger.error(f"Failed to load embedding model: {e}", exc_info=True)
+                self._embedding_model_loader = None
+                return None
+            self.model_load_seconds = time.perf_counter() - started
+            self.embedding_dimension = model.get_sentence_embedding_dimension()
+            self._embedding_model = model
+            self._embedding_model_loader = None
+            logger.info(
+                f"Embedding model loaded in {self.model_load_seconds:.2f}s "
+                f"(backend={self.embedding_backend}, dimension: {self.embedding_dimension})"
+            )
+        
+        # 如果 Qdrant 集合维度不匹配，警告
+        if self.qdrant_client is not None and self.embedding_dimension and self.collection_name:
+            try:
+                collection_info = self.qdrant_client.get_collection(self.collection_name)
+                collection_dim = collection_info.config.params.vectors.size
+                if collection_dim != self.embedding_dimension:
+                    logger.warning(
+                        f"Embedding dimension mismatch: model={self.embedding_dimension}, "
+                        f"collection={collection_dim}"
+                    )
+            except Exception:
+                pass
+        return model
+    
+    def _warm_up_embedding_model(self) -> None:
+        """后台预热：加载模型并执行一次编码（分配推理所需内存）"""
+        try:
+            if self.embedding_model is not None:
+                self._encode_texts(["warm up"])
+                logger.info("Embedding model warm-up finished")
+        except Exception as e:
+            logger.warning(f"Embedding model warm-up failed: {e}")
+    
     def semantic_retrieval(self, query: str, top_k: int = 10) -> List[Memory]:
         """
         语义检索
@@ -314,7 +671,7 @@ class AtomLinkAdapter(BaseAdapter):
         """
         return {
             "available": self.is_available(),
-            "semantic_retrieval": self.embedding_model is not None,
+            "semantic_retrieval": self._has_embedding_model(),
             "vector_storage": self.qdrant_client is not None,
             "batch_operations": True,
             "embedding_cache": True,
@@ -335,6 +692,9 @@ class AtomLinkAdapter(BaseAdapter):
         1. 先进行语义检索找到初始记忆
         2. 通过链接网络遍历子图，找到相关记忆
         
+        以语义检索结果为种子、向量相似度为重启权重，在链接图上计算个性化 PageRank，
+        按分数降序返回（结果顺序即 RRF 融合使用的排名）。
+        
         Args:
             query: 查询文本
             top_k: 返回结果数量，默认 10
@@ -349,30 +709,39 @@ class AtomLinkAdapter(BaseAdapter):
             logger.warning("Empty query provided for subgraph_link_retrieval")
             return []
         
-        # 1. 语义检索找到初始记忆
-        initial_memories = self._search_similar_memories(query, top_k=top_k)
+        # 1. 语义检索找到种子记忆，向量相似度作为重启权重
+        seeds = self._search_scored_memories(query, top_k=top_k)
         
-        if not initial_memories:
+        if not seeds:
             return []
         
-        # 2. 通过链接扩散
-        all_memories = []
-        seen_ids = set()
+        candidates: Dict[str, Memory] = {}
+        restart: Dict[str, float] = {}
+        for mem, score in seeds:
+            candidates.setdefault(mem.id, mem)
+            restart[mem.id] = max(restart.get(mem.id, 0.0), score)
+            # 进程重启后从 payload 重建的种子，其链接尚未登记
+            if mem.links and not self.link_graph.has_links(mem.id):
+                self.link_graph.set_links(mem.id, mem.links)
+        
+        # 2. 在节点预算内沿链接多跳扩展，个性化 PageRank 打分
+        ranking = self.link_graph.personalized_pagerank(
+            restart,
+            damping=self.subgraph_damping,
+            max_nodes=max(self.subgraph_max_nodes, top_k),
+            max_hops=self.subgraph_max_hops,
+        )
         
-        for mem in initial_memories:
-            if mem.id not in seen_ids:
-                all_memories.append(mem)
-                seen_ids.add(mem.id)
-            
-            # 通过链接查找相关记忆
-            for link_id in mem.links:
-                if link_id in self.memory_store and link_id not in seen_ids:
-                    all_memories.append(self.memory_store[link_id])
-                    seen_ids.add(link_id)
-                    if len(all_memories) >= top_k * 2:
-                        break
+        result = []
+        for memory_id, score in ranking:
+            mem = candidates.get(memory_id) or self.memory_store.get(memory_id)
+            if mem is None:
+                continue
+            # 分数写入浅拷贝的 metadata，不修改 memory_store 中共享的记忆对象
+            result.append(replace(mem, metadata={**(mem.metadata or {}), "subgraph_score": score}))
+            if len(result) >= top_k:
+                break
         
-        result = all_memories[:top_k]
         logger.debug(f"Subgraph link retrieval found {len(result)} memories")
         return result
     
@@ -559,16 +928,34 @@ class AtomLinkAdapter(BaseAdapter):
             logger.error(f"Error analyzing content: {e}")
             return {"keywords": [], "context": "General", "tags": []}
     
-    def _get_embedding(self, text: str, use_cache: bool = True) -> Optional[List[float]]:
+    def _get_embedding(self, text: str, use_cache: bool = True) -> Optional[np.ndarray]:
         """
         获取文本的向量嵌入（带缓存）
         
+        与 _get_embedding_array 相同，但返回独立副本（不引用缓存 slab），可长期持有或修改。
+        
         Args:
             text: 输入文本
             use_cache: 是否使用缓存，默认 True
         
         Returns:
-            向量嵌入列表，如果失败返回 None
+            float32 向量嵌入，如果失败返回 None
+        """
+        embedding = self._get_embedding_array(text, use_cache=use_cache)
+        return np.array(embedding, dtype=np.float32) if embedding is not None else None
+    
+    def _get_embedding_array(self, text: str, use_cache: bool = True) -> Optional[np.ndarray]:
+        """
+        获取文本的向量嵌入（float32 NumPy 数组，供向量计算直接使用）
+        
+        缓存命中时返回缓存 slab 的只读视图（不复制），需要长期持有时请复制。
+        
+        Args:
+            text: 输入文本
+            use_cache: 是否使用缓存，默认 True
+        
+        Returns:
+            向量嵌入，如果失败返回 None
         """
         if self.embedding_model is None:
             return None
@@ -581,7 +968,11 @@ class AtomLinkAdapter(BaseAdapter):
                 return cached_embedding
         
         try:
-            embedding = self.embedding_model.encode(text, show_progress_bar=False).tolist()
+            if self.embedding_batcher is not None:
+                embedding = self.embedding_batcher.encode(text)
+            else:
+                embedding = self._encode_texts([text])[0]
+            embedding = np.asarray(embedding, dtype=np.float32)
             # 保存到缓存
             if use_cache:
                 self.embedding_cache.set(text, embedding)
@@ -590,7 +981,27 @@ class AtomLinkAdapter(BaseAdapter):
             logger.error(f"Error generating embedding: {e}", exc_info=True)
             return None
     
-    def _get_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> List[Optional[List[float]]]:
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """直接调用嵌入模型批量编码，返回 float32 矩阵（每行一个文本）"""
+        embeddings = np.asarray(self.embedding_model.encode(
+            texts,
+            batch_size=self.embedding_batch_size,
+            show_progress_bar=False
+        ), dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        return embeddings
+    
+    def get_embedding_statistics(self) -> Dict[str, Any]:
+        """获取嵌入缓存和微批处理统计信息"""
+        stats: Dict[str, Any] = {"cache": self.embedding_cache.get_statistics()}
+        if self.embedding_cache.disk_cache is not None:
+            stats["disk_cache"] = self.embedding_cache.disk_cache.get_statistics()
+        if self.embedding_batcher is not None:
+            stats["micro_batching"] = self.embedding_batcher.get_statistics()
+        return stats
+    
+    def _get_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> List[Optional[np.ndarray]]:
         """
         批量获取文本的向量嵌入（带缓存和批处理优化）
         
@@ -599,7 +1010,7 @@ class AtomLinkAdapter(BaseAdapter):
             use_cache: 是否使用缓存，默认 True
         
         Returns:
-            向量嵌入列表，对应输入的每个文本（失败时为 None）
+            float32 向量嵌入列表（独立副本），对应输入的每个文本（失败时为 None）
         """
         if self.embedding_model is None:
             return [None] * len(texts)
@@ -611,13 +1022,13 @@ class AtomLinkAdapter(BaseAdapter):
         texts_to_encode = []
         indices_to_encode = []
         
-        # 检查缓存
+        # 检查缓存（内存未命中的一次性回查磁盘）
+        cached = self.embedding_cache.get_many(texts) if use_cache else {}
         for idx, text in enumerate(texts):
-            if use_cache:
-                cached_embedding = self.embedding_cache.get(text)
-                if cached_embedding is not None:
-                    results.append((idx, cached_embedding))
-                    continue
+            cached_embedding = cached.get(text)
+            if cached_embedding is not None:
+                results.append((idx, np.array(cached_embedding, dtype=np.float32)))
+                continue
             
             texts_to_encode.append(text)
             indices_to_encode.append(idx)
@@ -625,17 +1036,16 @@ class AtomLinkAdapter(BaseAdapter):
         # 批量编码未缓存的文本
         if texts_to_encode:
             try:
-                embeddings = self.embedding_model.encode(
-                    texts_to_encode,
-                    batch_size=self.embedding_batch_size,
-                    show_progress_bar=False
-                ).tolist()
+                if self.embedding_batcher is not None:
+                    embeddings = self.embedding_batcher.encode_many(texts_to_encode)
+                else:
+                    embeddings = self._encode_texts(texts_to_encode)
                 
                 # 保存到缓存并添加到结果
-                for i, (idx, embedding) in enumerate(zip(indices_to_encode, embeddings)):
-                    if use_cache:
-                        self.embedding_cache.set(texts_to_encode[i], embedding)
-                    results.append((idx, embedding))
+                for idx, embedding in zip(indices_to_encode, embeddings):
+                    results.append((idx, np.array(embedding, dtype=np.float32)))
+                if use_cache:
+                    self.embedding_cache.set_many(list(zip(texts_to_encode, embeddings)))
             except Exception as e:
                 logger.error(f"Error generating embeddings batch: {e}", exc_info=True)
                 # 为失败的索引添加 None
@@ -829,6 +1239,19 @@ class AtomLinkAdapter(BaseAdapter):
         Returns:
             相似记忆列表
         """
+        return [memory for memory, _ in self._search_scored_memories(query, top_k=top_k)]
+    
+    def _search_scored_memories(self, query: str, top_k: int = 10) -> List[Tuple[Memory, float]]:
+        """
+        搜索相似记忆并返回相似度分数
+        
+        Args:
+            query: 查询文本
+            top_k: 返回结果数量
+            
+        Returns:
+            (记忆, 相似度) 列表，按相似度降序
+        """
         if not self.is_available() or self.embedding_model is None:
             return []
         
@@ -844,52 +1267,193 @@ class AtomLinkAdapter(BaseAdapter):
                 return []
             
             # 在 Qdrant 中搜索（使用 search API）
+            # 已知点通过反向映射解析，无需传输 payload
             search_results = self.qdrant_client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,  # 查询向量
                 limit=top_k,
+                with_payload=False,
             )
             
-            # 转换为 Memory 对象
-            memories = []
             # Qdrant search API 返回 ScoredPoint 列表
             points = search_results if isinstance(search_results, list) else []
-            for point in points:
-                # 获取 point ID（ScoredPoint 对象）
-                point_id = point.id
-                # Qdrant 返回的 ID 可能是 UUID 对象，需要转换为字符串
-                if isinstance(point_id, uuid.UUID):
-                    point_id_str = str(point_id)
-                else:
-                    point_id_str = str(point_id)
-                
-                # 查找对应的记忆
-                memory = None
-                # 首先尝试通过 ID 映射查找
-                for mem_id, qdrant_id in self.id_mapping.items():
-                    if str(qdrant_id) == point_id_str or qdrant_id == point_id:
-                        if mem_id in self.memory_store:
-                            memory = self.memory_store[mem_id]
-                            break
-                
-                # 如果没找到，尝试直接匹配
-                if not memory and point_id_str in self.memory_store:
-                    memory = self.memory_store[point_id_str]
-                
-                # 如果还是没找到，尝试从 payload 中获取 original_id
-                if not memory and hasattr(point, 'payload'):
-                    original_id = point.payload.get('original_id') if point.payload else None
-                    if original_id and original_id in self.memory_store:
-                        memory = self.memory_store[original_id]
-                
-                if memory:
-                    memories.append(memory)
-            
-            return memories
+            return self._resolve_scored_points(points)
         except Exception as e:
             logger.error(f"Error searching similar memories: {e}")
             return []
     
+    def _search_scored_memories_batch(self, queries: List[str], top_k: int = 10) -> List[List[Tuple[Memory, float]]]:
+        """
+        批量搜索相似记忆：一次批量编码 + 一次多向量检索（search_batch）
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询的返回数量
+            
+        Returns:
+            每个查询的 (记忆, 相似度) 列表，与输入顺序一致
+        """
+        results: List[List[Tuple[Memory, float]]] = [[] for _ in queries]
+        if not queries or not self.is_available() or self.embedding_model is None or self.qdrant_client is None:
+            return results
+        
+        try:
+            vectors = self._get_embeddings_batch(queries)
+            positions = [i for i, vector in enumerate(vectors) if vector is not None]
+            if not positions:
+                return results
+            if hasattr(self.qdrant_client, "search_batch"):
+                batches = self.qdrant_client.search_batch(
+                    collection_name=self.collection_name,
+                    requests=[self._make_search_request(vectors[i], top_k) for i in positions],
+                )
+            else:
+                batches = [
+                    self.qdrant_client.search(
+                        collection_name=self.collection_name,
+                        query_vector=vectors[i],
+                        limit=top_k,
+                        with_payload=False,
+                    )
+                    for i in positions
+                ]
+            for position, points in zip(positions, batches):
+                results[position] = self._resolve_scored_points(points if isinstance(points, list) else [])
+        except Exception as e:
+            logger.error(f"Error in batch similar memory search: {e}")
+        return results
+    
+    def _make_search_request(self, vector: np.ndarray, limit: int) -> Any:
+        """构造批量检索请求（Qdrant 使用 SearchRequest，本地索引使用 VectorSearchRequest，直接使用数组）"""
+        if isinstance(self.qdrant_client, LocalVectorClient):
+            return VectorSearchRequest(vector=vector, limit=limit, with_payload=False)
+        from qdrant_client.models import SearchRequest
+        return SearchRequest(vector=np.asarray(vector, dtype=np.float32).tolist(), limit=limit, with_payload=False)
+    
+    def _make_point(self, point_id: Any, vector: np.ndarray, payload: Dict[str, Any]) -> Any:
+        """构造向量点（Qdrant 使用 PointStruct，本地索引使用 VectorPoint，直接使用数组）"""
+        if isinstance(self.qdrant_client, LocalVectorClient):
+            return VectorPoint(id=point_id, vector=vector, payload=payload)
+        from qdrant_client.models import PointStruct
+        # Qdrant 模型的向量字段只接受列表，在序列化边界转换
+        return PointStruct(id=point_id, vector=np.asarray(vector, dtype=np.float32).tolist(), payload=payload)
+    
+    def _map_point_id(self, memory_id: str, point_id: Any) -> None:
+        """记录 memory.id 与 Qdrant 点 ID 的双向映射"""
+        old_point_id = self.id_mapping.get(memory_id)
+        if old_point_id is not None:
+            self.point_id_mapping.pop(str(old_point_id), None)
+        self.id_mapping[memory_id] = point_id
+        self.point_id_mapping[str(point_id)] = memory_id
+    
+    def _unmap_point_id(self, memory_id: str) -> None:
+        """删除 memory.id 的双向映射"""
+        point_id = self.id_mapping.pop(memory_id, None)
+        if point_id is not None:
+            self.point_id_mapping.pop(str(point_id), None)
+    
+    def _memory_from_payload(self, point_id: str, payload: Optional[Dict[str, Any]]) -> Optional[Memory]:
+        """
+        根据 Qdrant payload 重建记忆（用于不在内存存储中的点，如进程重启后）
+        
+        Args:
+            point_id: Qdrant 点 ID（字符串）
+            payload: 点的 payload
+            
+        Returns:
+            记忆对象，payload 不完整时返回 None
+        """
+        if not payload or not payload.get("content"):
+            return None
+        memory_id = payload.get("original_id") or self.point_id_mapping.get(point_id) or point_id
+        try:
+            timestamp = datetime.fromisoformat(payload["timestamp"]) if payload.get("timestamp") else datetime.now()
+        except (TypeError, ValueError):
+            timestamp = datetime.now()
+        try:
+            return Memory(
+                id=memory_id,
+                content=payload["content"],
+                timestamp=timestamp,
+                keywords=list(payload.get("keywords") or []),
+                tags=list(payload.get("tags") or []),
+                context=payload.get("context") or None,
+                links=set(payload.get("links") or []),
+            )
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Invalid payload for point {point_id}: {e}")
+            return None
+    
+    def _resolve_points(self, points: List[Any]) -> List[Memory]:
+        """
+        将 Qdrant 检索结果解析为记忆（保持检索顺序）
+        
+        Args:
+            points: ScoredPoint 列表
+            
+        Returns:
+            记忆列表
+        """
+        return [memory for memory, _ in self._resolve_scored_points(points)]
+    
+    def _resolve_scored_points(self, points: List[Any]) -> List[Tuple[Memory, float]]:
+        """
+        将 Qdrant 检索结果解析为 (记忆, 分数)（保持检索顺序）
+        
+        依次尝试反向映射、直接 ID 匹配和 payload 中的 original_id；
+        仍无法解析的点通过一次批量 retrieve 获取 payload 重建记忆，而不是丢弃。
+        
+        Args:
+            points: ScoredPoint 列表
+            
+        Returns:
+            (记忆, 分数) 列表
+        """
+        resolved: List[Optional[Memory]] = []
+        unresolved: Dict[str, int] = {}  # 点 ID -> 结果位置
+        for point in points:
+            # Qdrant 返回的 ID 可能是 UUID 对象，需要转换为字符串
+            point_id_str = str(point.id)
+            
+            memory_id = self.point_id_mapping.get(point_id_str, point_id_str)
+            memory = self.memory_store.get(memory_id)
+            
+            if memory is None:
+                payload = getattr(point, "payload", None)
+                original_id = payload.get("original_id") if payload else None
+                if original_id:
+                    memory = self.memory_store.get(original_id)
+                if memory is None:
+                    memory = self._memory_from_payload(point_id_str, payload)
+            
+            if memory is None and point_id_str not in unresolved:
+                unresolved[point_id_str] = len(resolved)
+            resolved.append(memory)
+        
+        if unresolved:
+            try:
+                fetched = self.qdrant_client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=list(unresolved),
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                for record in fetched or []:
+                    point_id_str = str(record.id)
+                    position = unresolved.get(point_id_str)
+                    if position is not None:
+                        resolved[position] = self._memory_from_payload(point_id_str, record.payload)
+            except Exception as e:
+                logger.warning(f"Failed to fetch payloads for {len(unresolved)} points: {e}")
+        
+        scores = []
+        for point in points:
+            try:
+                scores.append(float(getattr(point, "score", 0.0) or 0.0))
+            except (TypeError, ValueError):
+                scores.append(0.0)
+        return [(memory, score) for memory, score in zip(resolved, scores) if memory is not None]
+    
     def _build_evolution_prompt(
         self,
         memory: Memory,
@@ -948,6 +1512,191 @@ class AtomLinkAdapter(BaseAdapter):
 
         return evolution_prompt
 
+    def _build_batch_evolution_prompt(self, batch: List[PendingLinkEvaluation]) -> str:
+        """
+        构建批量链接演化提示词（多条新记忆及各自的候选邻居合并为一次请求）
+        
+        Args:
+            batch: 待评估的新记忆
+            
+        Returns:
+            提示词字符串
+        """
+        sections = []
+        for index, pending in enumerate(batch, 1):
+            note = pending.note
+            sections.append(
+                f"### 新记忆 {index}\n"
+                f"- note_id：{note.id}\n"
+                f"- 上下文：{note.context}\n"
+                f"- 内容：{truncate_to_tokens(note.content, self.link_neighbor_token_budget)}\n"
+                f"- 关键词：{', '.join(note.keywords[:10])}\n"
+                f"邻居记忆列表（每行以 memory_id 开头）：\n"
+                f"{format_neighbors(pending.neighbors, self.link_neighbor_token_budget)}"
+            )
+        notes_text = "\n".join(sections)
+        
+        return f"""你是一个专业的记忆演化代理，负责管理和演化知识库中的记忆。
+
+以下是 {len(batch)} 条新记忆，每条附带各自的邻居记忆。请对每条新记忆分别判断：
+1. 是否需要演化（should_evolve）
+2. 是否加强连接（strengthen），应该连接到哪些记忆？只能使用该条新记忆自己的邻居列表中的 memory_id。
+3. 这条新记忆更新后的标签
+
+{notes_text}
+
+请以 JSON 格式返回你的决策，results 中每条新记忆一项，结构如下：
+{{
+    "results": [
+        {{
+            "note_id": "新记忆的 note_id",
+            "should_evolve": true 或 false,
+            "actions": ["strengthen"],
+            "suggested_connections": ["memory_id_1", "memory_id_2", ...],
+            "tags_to_update": ["标签1", "标签2", ...]
+        }}
+    ]
+}}"""
+    
+    @staticmethod
+    def _decision_from_response(response_json: Dict[str, Any], neighbor_ids: Set[str]) -> LinkDecision:
+        """
+        将单条记忆的 LLM 演化决策转换为 LinkDecision
+        
+        Args:
+            response_json: 单条记忆的决策 JSON
+            neighbor_ids: 候选邻居 ID（建议连接限定在其中）
+            
+        Returns:
+            LinkDecision
+        """
+        decision = LinkDecision()
+        if response_json.get("should_evolve", False) and "strengthen" in response_json.get("actions", []):
+            decision.links = [
+                str(memory_id) for memory_id in response_json.get("suggested_connections", [])
+                if str(memory_id) in neighbor_ids
+            ]
+            decision.tags = list(response_json.get("tags_to_update", []) or [])
+        return decision
+    
+    def _evaluate_links(self, new_note: Memory, neighbors: List[Memory]) -> LinkDecision:
+        """
+        同步评估单条新记忆的链接（一次 LLM 请求）
+        
+        Args:
+            new_note: 新记忆
+            neighbors: 候选邻居
+            
+        Returns:
+            LinkDecision（响应无法解析时回退为全部候选邻居）
+        """
+        neighbors_text = format_neighbors(neighbors, self.link_neighbor_token_budget)
+        prompt = self._build_evolution_prompt(new_note, neighbors_text, len(neighbors))
+        
+        messages = [
+            {"role": "system", "content": "你是一个专业的记忆关系分析助手，擅长分析记忆之间的关联并做出演化决策。请始终以有效的 JSON 格式返回结果。"},
+            {"role": "user", "content": prompt}
+        ]
+        
+        _, response_text = ark_deepseek_v3_2(messages, max_new_tokens=2048)
+        
+        response_json = self._parse_json_response(response_text)
+        if response_json is None:
+            logger.warning("Failed to parse evolution response, using fallback")
+            # 回退：返回全部候选邻居的 ID
+            return LinkDecision(links=[mem.id for mem in neighbors], fallback=True)
+        return self._decision_from_response(response_json, {mem.id for mem in neighbors})
+    
+    def _evaluate_links_batch(self, batch: List[PendingLinkEvaluation]) -> Dict[str, LinkDecision]:
+        """
+        批量评估多条新记忆的链接（一次 LLM 请求，由 BatchedLinkEvaluator 在后台线程调用）
+        
+        Args:
+            batch: 待评估的新记忆
+            
+        Returns:
+            note.id -> LinkDecision（响应中缺失的记忆回退为全部候选邻居）
+        """
+        if len(batch) == 1:
+            pending = batch[0]
+            return {pending.note.id: self._evaluate_links(pending.note, pending.neighbors)}
+        
+        prompt = self._build_batch_evolution_prompt(batch)
+        messages = [
+            {"role": "system", "content": "你是一个专业的记忆关系分析助手，擅长分析记忆之间的关联并做出演化决策。请始终以有效的 JSON 格式返回结果。"},
+            {"role": "user", "content": prompt}
+        ]
+        # 输出长度随批次大小增长
+        _, response_text = ark_deepseek_v3_2(messages, max_new_tokens=min(512 * len(batch), 8192))
+        
+        response_json = self._parse_json_response(response_text) or {}
+        results = response_json.get("results", [])
+        by_note = {
+            str(item.get("note_id")): item
+            for item in results if isinstance(item, dict) and item.get("note_id") is not None
+        }
+        
+        decisions: Dict[str, LinkDecision] = {}
+        for pending in batch:
+            neighbor_ids = {mem.id for mem in pending.neighbors}
+            item = by_note.get(str(pending.note.id))
+            if item is None:
+                logger.warning(f"Batched evolution response missing note {pending.note.id}, using fallback")
+                decisions[pending.note.id] = LinkDecision(links=list(neighbor_ids), fallback=True)
+            else:
+                decisions[pending.note.id] = self._decision_from_response(item, neighbor_ids)
+        return decisions
+    
+    def set_link_callback(self, callback: Optional[Callable[[Memory, Set[str]], None]]) -> None:
+        """
+        注册异步链接回调（batched 模式下评估完成后调用，负责持久化链接和触发更新）
+        
+        Args:
+            callback: callback(memory, links)
+        """
+        self._link_callback = callback
+    
+    def _on_link_decision(self, note: Memory, decision: LinkDecision) -> None:
+        """batched 模式：应用后台评估得到的链接决策（标签或链接有变化时持久化）"""
+        tags_changed = bool(decision.tags) and list(decision.tags) != list(note.tags or [])
+        if tags_changed:
+            note.tags = list(decision.tags)
+        new_links = set(decision.links) - set(note.links or set())
+        if new_links and self._link_callback is not None:
+            # 回调合并链接并持久化（包括上面更新的标签）
+            self._link_callback(note, new_links)
+        elif new_links:
+            note.links = set(note.links or set()) | new_links
+            self.update_memory_in_vector_store(note)
+        elif tags_changed:
+            self.update_memory_in_vector_store(note)
+    
+    def flush_link_evaluations(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待后台链接评估完成（batched 模式）
+        
+        Args:
+            timeout: 最长等待时间（秒）
+            
+        Returns:
+            是否全部完成
+        """
+        if self.link_evaluator is None:
+            return True
+        return self.link_evaluator.flush(timeout=timeout)
+    
+    def get_link_evolution_statistics(self) -> Dict[str, Any]:
+        """获取链接演化统计（决策缓存、批处理）"""
+        stats: Dict[str, Any] = {
+            "mode": self.link_evolution_mode,
+            "neighbor_token_budget": self.link_neighbor_token_budget,
+            "decision_cache": self.link_decision_cache.get_statistics(),
+            "link_graph": self.link_graph.get_statistics(),
+        }
+        if self.link_evaluator is not None:
+            stats["batcher"] = self.link_evaluator.get_statistics()
+        return stats
+
     def generate_links(self, new_note: Memory, top_k: int = 10) -> Set[str]:
         """
         为新记忆生成动态链接
@@ -956,6 +1705,9 @@ class AtomLinkAdapter(BaseAdapter):
         1. 搜索相似记忆
         2. 使用 LLM 判断是否应该链接（process_memory 中的 strengthen 逻辑）
         3. 返回链接的记忆 ID 集合
+        
+        决策按 (内容哈希, 邻居集合哈希) 缓存。batched 模式下未命中缓存的记忆提交给
+        后台批量评估并立即返回空集合，链接通过 set_link_callback 注册的回调异步应用。
         """
         if not self.is_available():
             return set()
@@ -963,48 +1715,26 @@ class AtomLinkAdapter(BaseAdapter):
         try:
             # 1. 搜索相似记忆
             similar_memories = self._search_similar_memories(new_note.content, top_k=top_k * 2)
+            neighbors = [mem for mem in similar_memories if mem.id != new_note.id][:top_k]
             
-            if not similar_memories:
+            if not neighbors:
                 return set()
             
-            # 2. 使用 LLM 判断是否应该链接
-            # 构建提示词
-            neighbors_text = ""
-            memory_ids = []
-            for mem in similar_memories[:top_k]:
-                neighbors_text += f"memory_id:{mem.id}\ttimestamp:{mem.timestamp.isoformat()}\tcontent: {mem.content}\tcontext: {mem.context}\tkeywords: {str(mem.keywords)}\ttags: {str(mem.tags)}\n"
-                memory_ids.append(mem.id)
-            
-            prompt = self._build_evolution_prompt(new_note, neighbors_text, len(memory_ids))
-            
-            messages = [
-                {"role": "system", "content": "你是一个专业的记忆关系分析助手，擅长分析记忆之间的关联并做出演化决策。请始终以有效的 JSON 格式返回结果。"},
-                {"role": "user", "content": prompt}
-            ]
-            
-            _, response_text = ark_deepseek_v3_2(messages, max_new_tokens=2048)
+            # 2. 决策缓存：相同内容面对相同邻居时复用 LLM 决策
+            key = decision_key(new_note, neighbors)
+            decision = self.link_decision_cache.get(key)
             
-            # 解析响应
-            response_json = self._parse_json_response(response_text)
-            if response_json is None:
-                logger.warning("Failed to parse evolution response, using fallback")
-                # 回退：返回前 top_k 个相似记忆的 ID
-                return set(mem.id for mem in similar_memories[:top_k])
+            if decision is None:
+                if self.link_evaluator is not None:
+                    self.link_evaluator.submit(new_note, neighbors, key=key)
+                    return set()
+                # 3. 使用 LLM 判断是否应该链接
+                decision = self._evaluate_links(new_note, neighbors)
+                self.link_decision_cache.put(key, decision)
             
-            # 处理 strengthen 操作
-            links = set()
-            if response_json.get("should_evolve", False):
-                actions = response_json.get("actions", [])
-                if "strengthen" in actions:
-                    suggested_connections = response_json.get("suggested_connections", [])
-                    links.update(suggested_connections)
-                    
-                    # 更新标签
-                    tags_to_update = response_json.get("tags_to_update", [])
-                    if tags_to_update:
-                        new_note.tags = tags_to_update
-            
-            return links
+            if decision.tags:
+                new_note.tags = list(decision.tags)
+            return set(decision.links)
         except Exception as e:
             logger.error(f"Error generating links: {e}")
             return set()
@@ -1039,6 +1769,46 @@ class AtomLinkAdapter(BaseAdapter):
         
         return related[:top_k]
     
+    def find_related_memories_batch(self, memories: List[Memory], top_k: int = 10) -> List[List[Memory]]:
+        """
+        批量查找相关记忆（语义与 find_related_memories 相同）
+        
+        链接查找在内存中完成，链接不足 top_k 的记忆合并为一次多向量检索，
+        避免每条记忆各发起一次向量查询。
+        
+        Args:
+            memories: 记忆列表
+            top_k: 每条记忆的返回数量
+            
+        Returns:
+            每条记忆的相关记忆列表，与输入顺序一致
+        """
+        if not memories or not self.is_available():
+            return [[] for _ in memories]
+        
+        related: List[List[Memory]] = []
+        seen: List[Set[str]] = []
+        for memory in memories:
+            found = []
+            seen_ids = {memory.id}
+            for link_id in memory.links:
+                if link_id in self.memory_store and link_id not in seen_ids:
+                    found.append(self.memory_store[link_id])
+                    seen_ids.add(link_id)
+            related.append(found)
+            seen.append(seen_ids)
+        
+        pending = [i for i, found in enumerate(related) if len(found) < top_k]
+        if pending:
+            semantic = self._search_scored_memories_batch([memories[i].content for i in pending], top_k=top_k * 2)
+            for i, scored in zip(pending, semantic):
+                for mem, _ in scored:
+                    if mem.id not in seen[i] and len(related[i]) < top_k:
+                        related[i].append(mem)
+                        seen[i].add(mem.id)
+        
+        return [found[:top_k] for found in related]
+    
     def evolve_memory(self, memory: Memory, related: List[Memory], new_context: str) -> Memory:
         """
         演化记忆
@@ -1133,12 +1903,12 @@ class AtomLinkAdapter(BaseAdapter):
                         # 如果不是有效的 UUID，使用原始字符串
                         point_id = str(memory.id)
                     # 保存映射
-                    self.id_mapping[memory.id] = point_id
+                    self._map_point_id(memory.id, point_id)
                 original_id = None
             except Exception:
                 # 如果以上都失败，生成一个新的 UUID 字符串并保存映射
                 point_id = str(uuid.uuid4())
-                self.id_mapping[memory.id] = point_id
+                self._map_point_id(memory.id, point_id)
                 original_id = memory.id
             
             # 添加到 Qdrant
@@ -1148,26 +1918,19 @@ class AtomLinkAdapter(BaseAdapter):
                 "keywords": memory.keywords,
                 "tags": memory.tags,
                 "timestamp": memory.timestamp.isoformat(),
+                "links": sorted(memory.links or []),
             }
             if original_id:
                 payload["original_id"] = original_id
             
-            # 使用PointStruct格式（Qdrant客户端要求）
-            from qdrant_client.models import PointStruct
-            
             self.qdrant_client.upsert(
                 collection_name=self.collection_name,
-                points=[
-                    PointStruct(
-                        id=point_id,
-                        vector=embedding,
-                        payload=payload
-                    )
-                ]
+                points=[self._make_point(point_id, embedding, payload)]
             )
             
-            # 更新内存存储
+            # 更新内存存储和链接图
             self.memory_store[memory.id] = memory
+            self.link_graph.set_links(memory.id, memory.links or [])
             
             logger.debug(f"Added memory {memory.id} to vector store")
             return True
@@ -1203,20 +1966,23 @@ class AtomLinkAdapter(BaseAdapter):
                     # 仍然从内存存储中删除
                     if memory_id in self.memory_store:
                         del self.memory_store[memory_id]
-                    if memory_id in self.id_mapping:
-                        del self.id_mapping[memory_id]
+                    self._unmap_point_id(memory_id)
+                    self.link_graph.remove(memory_id)
                     return False
             
-            # 使用正确的格式删除
-            from qdrant_client.models import PointIdsList
+            # 使用正确的格式删除（本地索引直接接受 ID 列表）
+            if isinstance(self.qdrant_client, LocalVectorClient):
+                points_selector = [point_id]
+            else:
+                points_selector = PointIdsList(points=[point_id])
             self.qdrant_client.delete(
                 collection_name=self.collection_name,
-                points_selector=PointIdsList(points=[point_id])
+                points_selector=points_selector
             )
             
-            # 清理映射
-            if memory_id in self.id_mapping:
-                del self.id_mapping[memory_id]
+            # 清理映射和链接图
+            self._unmap_point_id(memory_id)
+            self.link_graph.remove(memory_id)
             
             # 从内存存储中删除
             if memory_id in self.memory_store:
@@ -13,10 +13,15 @@
 - 线程安全（RLock）
 - 配置验证
 - 完善的错误处理
+- 内存 FoA：增量 token 计数、O(1) FIFO 淘汰和移除、按会话的子队列
+- 内存 DA：会话/类型/标签二级索引，按时间戳的最小堆清理过期记忆
 """
 
 from typing import Dict, List, Optional
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from itertools import islice
+import heapq
 import threading
 import logging
 import os
@@ -36,11 +41,15 @@ try:
         add_to_foa as redis_add_to_foa,
         get_from_foa as redis_get_from_foa,
         remove_from_foa as redis_remove_from_foa,
+        get_foa_memories as redis_get_foa_memories,
         get_foa_memories_by_session as redis_get_foa_by_session,
         add_to_da as redis_add_to_da,
         get_from_da as redis_get_from_da,
         remove_from_da as redis_remove_from_da,
+        get_many_from_da as redis_get_many_from_da,
         get_da_memories_by_session as redis_get_da_by_session,
+        get_da_memories_by_type as redis_get_da_by_type,
+        get_da_memories_by_tag as redis_get_da_by_tag,
         get_redis_client,
         REDIS_AVAILABLE,
     )
@@ -49,17 +58,24 @@ except ImportError:
     redis_add_to_foa = None
     redis_get_from_foa = None
     redis_remove_from_foa = None
+    redis_get_foa_memories = None
     redis_get_foa_by_session = None
     redis_add_to_da = None
     redis_get_from_da = None
     redis_remove_from_da = None
+    redis_get_many_from_da = None
     redis_get_da_by_session = None
+    redis_get_da_by_type = None
+    redis_get_da_by_tag = None
     get_redis_client = None
 
 try:
     from ..neo4j import (
         create_memory as neo4j_create_memory,
         get_memory as neo4j_get_memory,
+        get_recent_memories as neo4j_get_recent_memories,
+        get_memories as neo4j_get_memories,
+        search_memories_by_text as neo4j_search_memories_by_text,
         update_memory as neo4j_update_memory,
         delete_memory as neo4j_delete_memory,
         get_graph,
@@ -69,10 +85,22 @@ except ImportError:
     NEO4J_AVAILABLE = False
     neo4j_create_memory = None
     neo4j_get_memory = None
+    neo4j_get_recent_memories = None
+    neo4j_get_memories = None
+    neo4j_search_memories_by_text = None
     neo4j_update_memory = None
     neo4j_delete_memory = None
     get_graph = None
 
+try:
+    from .. import sqlite_graph
+    SQLITE_GRAPH_AVAILABLE = sqlite_graph.SQLITE_GRAPH_AVAILABLE
+except ImportError:
+    SQLITE_GRAPH_AVAILABLE = False
+    sqlite_graph = None
+
+from ..ltm_write_behind import LTMWriteBehindQueue
+
 
 class LayeredStorageAdapter(BaseAdapter):
     """
@@ -106,6 +134,7 @@ class LayeredStorageAdapter(BaseAdapter):
         
         # 验证后端配置
         valid_backends = {"memory", "redis", "neo4j"}
+        valid_ltm_backends = valid_backends | {"sqlite"}
         if self.foa_backend not in valid_backends:
             raise AdapterConfigurationError(
                 f"Invalid FoA backend: {self.foa_backend}. Valid options: {valid_backends}",
@@ -116,9 +145,9 @@ class LayeredStorageAdapter(BaseAdapter):
                 f"Invalid DA backend: {self.da_backend}. Valid options: {valid_backends}",
                 adapter_name=self.__class__.__name__
             )
-        if self.ltm_backend not in valid_backends:
+        if self.ltm_backend not in valid_ltm_backends:
             raise AdapterConfigurationError(
-                f"Invalid LTM backend: {self.ltm_backend}. Valid options: {valid_backends}",
+                f"Invalid LTM backend: {self.ltm_backend}. Valid options: {valid_ltm_backends}",
                 adapter_name=self.__class__.__name__
             )
         
@@ -137,8 +166,48 @@ class LayeredStorageAdapter(BaseAdapter):
                 logger.warning(f"Neo4j backend configured but not available, falling back to memory")
                 self.ltm_backend = "memory"
         
+        # 如果使用 SQLite 图存储，打开数据库（路径：sqlite_graph_path 或环境变量 UNIMEM_SQLITE_GRAPH_PATH）
+        if self.ltm_backend == "sqlite":
+            if not SQLITE_GRAPH_AVAILABLE:
+                logger.warning(f"SQLite graph backend configured but FTS5 is not available, falling back to memory")
+                self.ltm_backend = "memory"
+            else:
+                try:
+                    sqlite_graph.get_graph(self.config.get("sqlite_graph_path"))
+                except Exception as e:
+                    logger.warning(f"Failed to open SQLite graph: {e}, falling back to memory")
+                    self.ltm_backend = "memory"
+        
+        # 图数据库 LTM 的写后队列（ltm_write_behind=True 时启用）：写入先追加到本地日志，由后台线程批量写入图存储
+        self.ltm_queue: Optional[LTMWriteBehindQueue] = None
+        if self.config.get("ltm_write_behind", False) and self.ltm_backend in ("neo4j", "sqlite"):
+            if self.ltm_backend == "sqlite":
+                graph_store = sqlite_graph
+            else:
+                from .. import neo4j as graph_store
+            self.ltm_queue = LTMWriteBehindQueue(
+                graph_store,
+                path=self.config.get("ltm_journal_path"),
+                batch_size=int(self.config.get("ltm_write_behind_batch_size", 100)),
+                flush_interval=float(self.config.get("ltm_write_behind_interval", 0.2)),
+            )
+        
         # 初始化内存存储（作为后备或主要存储）
-        self.foa_storage: List[Memory] = []
+        # FoA：按插入顺序排列的 OrderedDict（双向链表 + 索引），队首淘汰和按 ID 移除均为 O(1)
+        self.foa_storage: "OrderedDict[str, Memory]" = OrderedDict()
+        self._foa_sessions: Dict[str, "OrderedDict[str, Memory]"] = {}  # 会话 ID -> 该会话的 FoA 子队列
+        self._foa_token_counts: Dict[str, int] = {}  # 记忆 ID -> 入队时估算的 token 数
+        self._foa_session_of: Dict[str, str] = {}  # 记忆 ID -> 入队时的会话 ID，记忆对象被修改后仍能准确移除
+        self._foa_tokens = 0  # FoA token 总数（增量维护）
+        # DA 二级索引（与 Redis 的 da:session / da:type / da:tag 集合对应），值为按插入顺序排列的 ID
+        self._da_by_session: Dict[str, "OrderedDict[str, None]"] = {}
+        self._da_by_type: Dict[str, "OrderedDict[str, None]"] = {}
+        self._da_by_tag: Dict[str, "OrderedDict[str, None]"] = {}
+        self._da_index_entries: Dict[str, List[tuple]] = {}  # 记忆 ID -> 写入时登记的 (索引, 键)，记忆对象被修改后仍能准确移除
+        # DA 过期最小堆：(时间戳, 序号, 记忆 ID)；记忆移除或重新添加后旧条目惰性丢弃
+        self._da_expiry_heap: List[tuple] = []
+        self._da_expiry_seq: Dict[str, int] = {}  # 记忆 ID -> 当前有效堆条目的序号
+        self._da_seq = 0
         self.da_storage: Dict[str, Memory] = {}
         self.ltm_storage: Dict[str, Memory] = {}
         
@@ -190,12 +259,99 @@ class LayeredStorageAdapter(BaseAdapter):
         return len(text) // 4
     
     def _get_foa_tokens(self) -> int:
-        """计算当前 FoA 的 token 总数（线程安全）"""
+        """获取当前 FoA 的 token 总数（线程安全）"""
         with self._foa_lock:
-            total = 0
-            for memory in self.foa_storage:
-                total += self._estimate_tokens(memory.content)
-            return total
+            return self._foa_tokens
+    
+    @staticmethod
+    def _session_of(memory: Memory) -> Optional[str]:
+        """记忆所属的会话 ID（来自 metadata）"""
+        return (getattr(memory, "metadata", None) or {}).get("session_id")
+    
+    def _foa_append(self, memory: Memory, tokens: int) -> None:
+        """追加到 FoA 队尾并更新会话子队列和 token 计数（调用方持有锁）"""
+        self.foa_storage[memory.id] = memory
+        self._foa_token_counts[memory.id] = tokens
+        self._foa_tokens += tokens
+        session_id = self._session_of(memory)
+        if session_id:
+            self._foa_sessions.setdefault(session_id, OrderedDict())[memory.id] = memory
+            self._foa_session_of[memory.id] = session_id
+    
+    def _foa_discard(self, memory_id: str) -> Optional[Memory]:
+        """从 FoA 移除记忆并更新会话子队列和 token 计数（调用方持有锁）"""
+        memory = self.foa_storage.pop(memory_id, None)
+        if memory is None:
+            return None
+        self._foa_tokens -= self._foa_token_counts.pop(memory_id, 0)
+        session_id = self._foa_session_of.pop(memory_id, None)
+        if session_id:
+            queue = self._foa_sessions.get(session_id)
+            if queue is not None:
+                queue.pop(memory_id, None)
+                if not queue:
+                    del self._foa_sessions[session_id]
+        return memory
+    
+    @staticmethod
+    def _da_index_keys(memory: Memory) -> List[tuple]:
+        """记忆在 DA 二级索引中的 (索引, 键) 列表"""
+        session_id = LayeredStorageAdapter._session_of(memory)
+        memory_type = getattr(memory, "memory_type", None)
+        keys = []
+        if session_id:
+            keys.append(("session", session_id))
+        if memory_type is not None:
+            keys.append(("type", getattr(memory_type, "value", str(memory_type))))
+        for tag in dict.fromkeys(memory.tags or []):
+            keys.append(("tag", tag))
+        return keys
+    
+    def _da_index(self, kind: str) -> Dict[str, "OrderedDict[str, None]"]:
+        """获取指定类型的 DA 二级索引"""
+        return {"session": self._da_by_session, "type": self._da_by_type, "tag": self._da_by_tag}[kind]
+    
+    def _da_put(self, memory: Memory) -> None:
+        """写入 DA 并维护二级索引和过期堆（调用方持有锁）"""
+        self._da_discard(memory.id)
+        self.da_storage[memory.id] = memory
+        index_keys = self._da_index_keys(memory)
+        self._da_index_entries[memory.id] = index_keys
+        for kind, key in index_keys:
+            self._da_index(kind).setdefault(key, OrderedDict())[memory.id] = None
+        if memory.timestamp:
+            self._da_seq += 1
+            self._da_expiry_seq[memory.id] = self._da_seq
+            heapq.heappush(self._da_expiry_heap, (memory.timestamp.timestamp(), self._da_seq, memory.id))
+            # 惰性删除累积的失效条目过多时重建堆
+            if len(self._da_expiry_heap) > 2 * len(self.da_storage) + 64:
+                self._da_expiry_heap = [
+                    entry for entry in self._da_expiry_heap
+                    if self._da_expiry_seq.get(entry[2]) == entry[1]
+                ]
+                heapq.heapify(self._da_expiry_heap)
+    
+    def _da_discard(self, memory_id: str) -> Optional[Memory]:
+        """从 DA 移除记忆并维护二级索引（调用方持有锁，过期堆条目惰性丢弃）"""
+        memory = self.da_storage.pop(memory_id, None)
+        if memory is None:
+            return None
+        self._da_expiry_seq.pop(memory_id, None)
+        for kind, key in self._da_index_entries.pop(memory_id, []):
+            index = self._da_index(kind)
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(memory_id, None)
+                if not ids:
+                    del index[key]
+        return memory
+    
+    def _da_lookup(self, kind: str, key: str, top_k: int) -> List[Memory]:
+        """按二级索引读取 DA 记忆（调用方持有锁）"""
+        ids = self._da_index(kind).get(key)
+        if not ids:
+            return []
+        return [self.da_storage[memory_id] for memory_id in islice(ids, max(int(top_k), 0))]
     
     def add_to_foa(self, memory: Memory) -> bool:
         """
@@ -235,20 +391,19 @@ class LayeredStorageAdapter(BaseAdapter):
                         self.foa_backend = "memory"
                 
                 # 使用内存存储（默认或降级）
-                # 估算新记忆的 token 数
+                # 估算新记忆的 token 数；重复添加的记忆移到队尾
                 memory_tokens = self._estimate_tokens(memory.content)
-                current_tokens = sum(self._estimate_tokens(m.content) for m in self.foa_storage)
+                self._foa_discard(memory.id)
                 
                 # 如果超过 token 预算或记忆数量限制，移除最旧的记忆（FIFO）
-                while (current_tokens + memory_tokens > self.foa_max_tokens or 
+                while (self._foa_tokens + memory_tokens > self.foa_max_tokens or 
                        len(self.foa_storage) >= self.foa_max_memories) and self.foa_storage:
-                    removed = self.foa_storage.pop(0)
-                    removed_tokens = self._estimate_tokens(removed.content)
-                    current_tokens -= removed_tokens
-                    logger.debug(f"Removed memory {removed.id[:8]}... from FoA due to token budget")
+                    oldest_id = next(iter(self.foa_storage))
+                    self._foa_discard(oldest_id)
+                    logger.debug(f"Removed memory {oldest_id[:8]}... from FoA due to token budget")
                 
-                self.foa_storage.append(memory)
-                logger.debug(f"Added memory {memory.id[:8]}... to FoA (tokens: {memory_tokens}, total: {current_tokens + memory_tokens})")
+                self._foa_append(memory, memory_tokens)
+                logger.debug(f"Added memory {memory.id[:8]}... to FoA (tokens: {memory_tokens}, total: {self._foa_tokens})")
                 return True
         except Exception as e:
             logger.error(f"Error adding memory to FoA: {e}", exc_info=True)
@@ -291,7 +446,7 @@ class LayeredStorageAdapter(BaseAdapter):
                         self.da_backend = "memory"
                 
                 # 使用内存存储（默认或降级）
-                self.da_storage[memory.id] = memory
+                self._da_put(memory)
                 logger.debug(f"Added memory {memory.id[:8]}... to DA")
                 return True
         except Exception as e:
@@ -316,6 +471,7 @@ class LayeredStorageAdapter(BaseAdapter):
         Note:
             - 线程安全
             - 根据配置使用 Neo4j 或内存存储
+            - 启用写后队列（ltm_write_behind）时只追加到本地日志，不等待图数据库
         """
         if not memory:
             logger.warning("Cannot add None memory to LTM")
@@ -327,6 +483,11 @@ class LayeredStorageAdapter(BaseAdapter):
         
         try:
             with self._ltm_lock:
+                if self.ltm_queue is not None:
+                    # 写后队列：追加到本地日志即返回，后台线程批量写入图存储
+                    self.ltm_queue.enqueue_upsert(memory)
+                    logger.debug(f"Queued memory {memory.id[:8]}... for LTM write-behind")
+                    return True
                 if self.ltm_backend == "neo4j":
                     # 使用 Neo4j 后端
                     if NEO4J_AVAILABLE and neo4j_create_memory:
@@ -349,6 +510,9 @@ class LayeredStorageAdapter(BaseAdapter):
                     else:
                         logger.warning("Neo4j backend not available, falling back to memory")
                         self.ltm_backend = "memory"
+                elif self.ltm_backend == "sqlite":
+                    # 使用 SQLite 图存储（create_memory 对已存在的记忆执行更新）
+                    return sqlite_graph.create_memory(memory)
                 
                 # 使用内存存储（默认或降级）
                 self.ltm_storage[memory.id] = memory
@@ -358,6 +522,75 @@ class LayeredStorageAdapter(BaseAdapter):
             logger.error(f"Error adding memory to LTM: {e}", exc_info=True)
             return False
     
+    def update_in_ltm(self, memory: Memory, memory_type: MemoryType) -> bool:
+        """
+        更新 LTM 中的记忆
+        
+        各后端的写入均为按 ID 覆盖（Neo4j/SQLite 对已存在的记忆执行更新），
+        因此直接复用 add_to_ltm，不再先删除再添加（启用写后队列时只追加一条日志）。
+        
+        Args:
+            memory: 要更新的记忆
+            memory_type: 记忆类型
+            
+        Returns:
+            bool: 是否成功更新
+        """
+        return self.add_to_ltm(memory, memory_type)
+    
+    def get_many_from_ltm(self, memory_ids: List[str]) -> List[Memory]:
+        """
+        按 ID 批量读取 LTM 中的记忆（不存在的 ID 被忽略）
+        
+        Args:
+            memory_ids: 记忆 ID 列表
+            
+        Returns:
+            List[Memory]: 记忆列表
+            
+        Note:
+            - Neo4j/SQLite 后端一次查询返回全部记忆
+            - 启用写后队列时，尚未写入图存储的记忆直接从覆盖层返回，待删除的记忆被忽略
+        """
+        if not memory_ids or not self.is_available():
+            return []
+        
+        try:
+            with self._ltm_lock:
+                pending: List[Memory] = []
+                remaining = list(dict.fromkeys(memory_ids))
+                if self.ltm_queue is not None:
+                    pending = [m for m in (self.ltm_queue.get(i) for i in remaining) if m is not None]
+                    pending_ids = {m.id for m in pending}
+                    remaining = [i for i in remaining if i not in pending_ids and not self.ltm_queue.is_deleted(i)]
+                
+                if self.ltm_backend == "neo4j" and NEO4J_AVAILABLE and neo4j_get_memories:
+                    return pending + neo4j_get_memories(remaining)
+                if self.ltm_backend == "sqlite":
+                    return pending + sqlite_graph.get_memories(remaining)
+                
+                # 使用内存存储（默认或降级）
+                return pending + [self.ltm_storage[i] for i in remaining if i in self.ltm_storage]
+        except Exception as e:
+            logger.error(f"Error reading memories from LTM: {e}", exc_info=True)
+            return []
+    
+    def get_ltm_write_behind_statistics(self) -> Dict[str, object]:
+        """写后队列统计信息（未启用时返回空字典）"""
+        return self.ltm_queue.get_statistics() if self.ltm_queue is not None else {}
+    
+    def replay_ltm_dead_letter(self) -> int:
+        """把写后队列死信表中的操作放回日志重新写入（未启用时返回 0）"""
+        return self.ltm_queue.replay_dead_letter() if self.ltm_queue is not None else 0
+    
+    def reset(self) -> None:
+        """重置适配器状态（关闭写后队列，未写入的操作保留在日志中）"""
+        queue = getattr(self, "ltm_queue", None)
+        if queue is not None:
+            queue.close()
+            self.ltm_queue = None
+        super().reset()
+    
     def search_foa(self, query: str, top_k: int = 10, context: Optional[Context] = None) -> List[Memory]:
         """
         在 FoA 中搜索；当 context.session_id 存在时优先按会话检索（会话级工作记忆）。
@@ -389,20 +622,18 @@ class LayeredStorageAdapter(BaseAdapter):
                             if session_id and redis_get_foa_by_session:
                                 memories = redis_get_foa_by_session(session_id, limit=top_k, client=client)
                                 return memories[:top_k]
-                            list_key = "foa:memories"
-                            memory_ids = client.lrange(list_key, 0, top_k - 1)
-                            memories = []
-                            for memory_id in memory_ids:
-                                memory = redis_get_from_foa(memory_id) if redis_get_from_foa else None
-                                if memory:
-                                    memories.append(memory)
-                            return memories
+                            # LRANGE + MGET 批量读取（固定往返次数）
+                            return redis_get_foa_memories(limit=top_k, client=client) if redis_get_foa_memories else []
                 
-                # 使用内存存储：有 session_id 时只返回该会话的 FoA
+                # 使用内存存储：有 session_id 时只读取该会话的子队列
                 if session_id:
-                    by_session = [m for m in self.foa_storage if (getattr(m, "metadata", None) or {}).get("session_id") == session_id]
-                    return by_session[-top_k:].copy()
-                return self.foa_storage[-top_k:].copy()
+                    queue = self._foa_sessions.get(session_id)
+                    if not queue:
+                        return []
+                else:
+                    queue = self.foa_storage
+                # 从队尾取最近的 top_k 条，按插入顺序返回
+                return list(islice(reversed(queue.values()), max(int(top_k), 0)))[::-1]
         except Exception as e:
             logger.error(f"Error searching FoA: {e}", exc_info=True)
             return []
@@ -439,64 +670,112 @@ class LayeredStorageAdapter(BaseAdapter):
                                 return memories[:top_k]
                             set_key = "da:memories"
                             memory_ids = list(client.smembers(set_key))[:top_k]
-                            memories = []
-                            for memory_id in memory_ids:
-                                memory = redis_get_from_da(memory_id) if redis_get_from_da else None
-                                if memory:
-                                    memories.append(memory)
-                            return memories
+                            return redis_get_many_from_da(memory_ids, client=client) if redis_get_many_from_da else []
                 
-                # 使用内存存储：有 session_id 时只返回该会话的 DA
+                # 使用内存存储：有 session_id 时通过会话索引读取
                 if session_id:
-                    by_session = [m for m in self.da_storage.values() if (getattr(m, "metadata", None) or {}).get("session_id") == session_id]
-                    return by_session[:top_k]
-                return list(self.da_storage.values())[:top_k]
+                    return self._da_lookup("session", session_id, top_k)
+                return list(islice(self.da_storage.values(), max(int(top_k), 0)))
         except Exception as e:
             logger.error(f"Error searching DA: {e}", exc_info=True)
             return []
     
+    def search_da_by_type(self, memory_type: MemoryType, top_k: int = 10) -> List[Memory]:
+        """
+        按记忆类型读取 DA 记忆
+        
+        Args:
+            memory_type: 记忆类型
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Memory]: 该类型的 DA 记忆（按加入顺序）
+            
+        Note:
+            - 线程安全
+            - Redis 下使用 da:type:{type} 集合，内存下使用类型索引
+        """
+        if not self.is_available() or memory_type is None:
+            return []
+        
+        try:
+            with self._da_lock:
+                if self.da_backend == "redis" and REDIS_AVAILABLE and redis_get_da_by_type:
+                    return redis_get_da_by_type(memory_type, limit=top_k)[:top_k]
+                return self._da_lookup("type", getattr(memory_type, "value", str(memory_type)), top_k)
+        except Exception as e:
+            logger.error(f"Error searching DA by type: {e}", exc_info=True)
+            return []
+    
+    def search_da_by_tag(self, tag: str, top_k: int = 10) -> List[Memory]:
+        """
+        按标签读取 DA 记忆
+        
+        Args:
+            tag: 标签
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Memory]: 带有该标签的 DA 记忆（按加入顺序）
+            
+        Note:
+            - 线程安全
+            - Redis 下使用 da:tag:{tag} 集合，内存下使用标签索引
+        """
+        if not self.is_available() or not tag:
+            return []
+        
+        try:
+            with self._da_lock:
+                if self.da_backend == "redis" and REDIS_AVAILABLE and redis_get_da_by_tag:
+                    return redis_get_da_by_tag(tag, limit=top_k)[:top_k]
+                return self._da_lookup("tag", tag, top_k)
+        except Exception as e:
+            logger.error(f"Error searching DA by tag: {e}", exc_info=True)
+            return []
+    
     def search_ltm(self, query: str, top_k: int = 10) -> List[Memory]:
         """
         在 LTM 中搜索
         
         Args:
-            query: 查询字符串（当前未使用，保留用于接口一致性）
+            query: 查询字符串（为空时返回最近的记忆）
             top_k: 返回结果数量
             
         Returns:
-            List[Memory]: LTM 中的记忆列表
+            List[Memory]: LTM 中的记忆列表（按相关度降序）
             
         Note:
             - 线程安全
-            - 当前实现为简单实现（返回所有记忆），实际应该实现语义搜索
-            - 根据配置使用 Neo4j 或内存存储
+            - Neo4j 后端使用全文索引检索（一次往返，分数见 metadata["fulltext_score"]）
+            - SQLite 后端使用 FTS5 全文索引检索（分数同样写入 metadata["fulltext_score"]）
+            - 启用写后队列时，尚未写入图存储的匹配记忆排在结果前面
+            - 内存后端为简单实现（返回前 top_k 条记忆）
         """
         if not self.is_available():
             return []
         
         try:
             with self._ltm_lock:
+                results = None
                 if self.ltm_backend == "neo4j":
-                    # 使用 Neo4j 后端（通过 Cypher 查询）
-                    if NEO4J_AVAILABLE and get_graph:
-                        graph = get_graph()
-                        if graph:
-                            # 查询最近的记忆
-                            cypher_query = f"""
-                            MATCH (m:Memory)
-                            RETURN m
-                            ORDER BY m.timestamp DESC
-                            LIMIT {top_k}
-                            """
-                            results = graph.run(cypher_query).data()
-                            memories = []
-                            for result in results:
-                                node = result.get("m")
-                                if node:
-                                    memory = neo4j_get_memory(node["id"]) if neo4j_get_memory else None
-                                    if memory:
-                                        memories.append(memory)
-                            return memories
+                    # 使用 Neo4j 后端（一次查询返回带实体/链接的完整记忆）
+                    if NEO4J_AVAILABLE and query and query.strip() and neo4j_search_memories_by_text:
+                        results = neo4j_search_memories_by_text(query, limit=top_k)
+                    elif NEO4J_AVAILABLE and neo4j_get_recent_memories:
+                        results = neo4j_get_recent_memories(limit=top_k)
+                elif self.ltm_backend == "sqlite":
+                    # 使用 SQLite 图存储（FTS5 全文索引，空查询返回最近记忆）
+                    if query and query.strip():
+                        results = sqlite_graph.search_memories_by_text(query, limit=top_k)
+                    else:
+                        results = sqlite_graph.get_recent_memories(limit=top_k)
+                
+                if results is not None:
+                    # 合并写后队列中尚未写入图存储的记忆（read-your-writes）
+                    if self.ltm_queue is not None:
+                        return self.ltm_queue.apply_overlay(results, query, limit=top_k)
+                    return results
                 
                 # 使用内存存储（默认或降级）
                 return list(self.ltm_storage.values())[:top_k]
@@ -563,14 +842,16 @@ class LayeredStorageAdapter(BaseAdapter):
             cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
             
             # 清理 DA 中的旧记忆（FoA 通过 token 预算自动管理，LTM 通常不清理）
+            # 从过期最小堆顶部弹出早于截止时间的条目，无需扫描全部 DA
+            cutoff = cutoff_time.timestamp()
             cleaned_da = 0
             with self._da_lock:
-                da_to_remove = [
-                    memory_id for memory_id, memory in self.da_storage.items()
-                    if memory.timestamp and memory.timestamp < cutoff_time
-                ]
-                for memory_id in da_to_remove:
-                    del self.da_storage[memory_id]
+                heap = self._da_expiry_heap
+                while heap and heap[0][0] < cutoff:
+                    _, seq, memory_id = heapq.heappop(heap)
+                    if self._da_expiry_seq.get(memory_id) != seq:
+                        continue  # 已移除或已重新添加
+                    self._da_discard(memory_id)
                     cleaned_da += 1
             
             if cleaned_da > 0:
@@ -605,10 +886,7 @@ class LayeredStorageAdapter(BaseAdapter):
                         return redis_remove_from_foa(memory_id)
                 
                 # 使用内存存储（默认或降级）
-                original_count = len(self.foa_storage)
-                self.foa_storage = [m for m in self.foa_storage if m.id != memory_id]
-                removed = len(self.foa_storage) < original_count
-                if removed:
+                if self._foa_discard(memory_id) is not None:
                     logger.debug(f"Removed memory {memory_id[:8]}... from FoA")
                 return True
         except Exception as e:
@@ -640,8 +918,7 @@ class LayeredStorageAdapter(BaseAdapter):
                         return redis_remove_from_da(memory_id)
                 
                 # 使用内存存储（默认或降级）
-                if memory_id in self.da_storage:
-                    del self.da_storage[memory_id]
+                if self._da_discard(memory_id) is not None:
                     logger.debug(f"Removed memory {memory_id[:8]}... from DA")
                     return True
                 return False
@@ -662,16 +939,23 @@ class LayeredStorageAdapter(BaseAdapter):
         Note:
             - 线程安全
             - 根据配置使用 Neo4j 或内存存储
+            - 启用写后队列（ltm_write_behind）时只追加到本地日志，不等待图数据库
         """
         if not memory_id:
             return False
         
         try:
             with self._ltm_lock:
+                if self.ltm_queue is not None:
+                    # 写后队列：删除追加到日志，由后台线程执行
+                    self.ltm_queue.enqueue_delete(memory_id)
+                    return True
                 if self.ltm_backend == "neo4j":
                     # 使用 Neo4j 后端
                     if NEO4J_AVAILABLE and neo4j_delete_memory:
                         return neo4j_delete_memory(memory_id)
+                elif self.ltm_backend == "sqlite":
+                    return sqlite_graph.delete_memory(memory_id)
                 
                 # 使用内存存储（默认或降级）
                 if memory_id in self.ltm_storage:
@@ -86,6 +86,30 @@ class UniMemConfig:
                 "qdrant_host": "localhost",
                 "qdrant_port": 6333,
                 "collection_name": "unimem_memories",
+                # 嵌入模型加载：首次使用时加载，启动时后台预热
+                "embedding_backend": "torch",         # torch / onnx / int8（动态量化）
+                "embedding_lazy_load": True,
+                "embedding_warm_up": True,
+                # 嵌入缓存：float32 slab + LRU，同时受条目数和字节数限制
+                "embedding_cache_size": 1000,
+                "embedding_cache_max_bytes": 64 * 1024 * 1024,
+                # 嵌入微批处理：合并多线程并发的编码请求
+                "embedding_micro_batching": True,
+                "embedding_linger_ms": 5.0,           # 凑批最长等待时间（毫秒）
+                # 链接演化：sync 在 retain 中评估；batched 合并多条新记忆为一次 LLM 请求后台评估
+                "link_evolution_mode": "sync",
+                "link_evolution_batch_size": 8,
+                "link_evolution_linger_ms": 200.0,
+                "link_neighbor_token_budget": 1500,  # 邻居内容 token 预算
+                "link_decision_cache_size": 2048,    # 按 (内容哈希, 邻居集合哈希) 缓存决策
+                # 子图链接检索：以语义检索结果为种子在链接图上做个性化 PageRank
+                "subgraph_damping": 0.5,             # 沿链接继续游走的概率
+                "subgraph_max_nodes": 200,           # 局部子图节点预算
+                "subgraph_max_hops": 3,
+                # 本地向量索引（vector.backend = "local" 时使用）
+                "local_vector_path": None,            # 持久化目录，None 表示仅内存
+                "local_vector_quantization": None,    # None / "float16" / "int8"
+                "local_vector_index_type": "flat",    # flat / hnsw（需要 hnswlib）
             },
             "retrieval": {
                 "top_k": 10,
@@ -93,6 +117,26 @@ class UniMemConfig:
                 # 记忆重要性评分（用于 recall 重排序）
                 "importance_weight": 0.3,   # 与检索分数融合时重要性权重，0=仅检索分，1=仅重要性
                 "importance_decay_days": 30, # 时间衰减：超过 N 天未访问的记忆重要性衰减
+                # 自适应检索器选择：按查询类别跳过/延后低产出检索器
+                "adaptive_retrievers": {
+                    "enabled": True,
+                    "min_samples": 20,       # 判定低产出前的最少调用次数
+                    "min_yield": 0.05,       # 结果进入 Top-K 的比例低于此值则延后
+                    "exploration_rate": 0.1, # 随机探索概率（全量执行）
+                    "explore_every": 50,     # 每 N 次查询强制全量执行一次
+                },
+                # 检索结果缓存（RetrievalOptimizer）：默认关闭。
+                # 仅经本进程 StorageManager 的写入（retain/update/cleanup）会使其失效，
+                # 向量库直接写入、涟漪/演化写入、异步链接决策及其他进程的写入不会，
+                # 只在这些写入可以容忍 ttl_seconds 内的旧结果时启用
+                "cache": {
+                    "enabled": False,
+                    "max_size": 1000,
+                    "ttl_seconds": 3600,
+                    "disk_path": None,          # 磁盘二级缓存路径，None 表示仅内存
+                    "semantic": {"enabled": False},  # 语义相似查询缓存（需要嵌入模型）
+                    "prefetch": False,          # 后台预取预测的后续查询
+                },
             },
             "update": {
                 "sleep_interval": 3600,  # 1小时
@@ -101,6 +145,11 @@ class UniMemConfig:
             "ripple": {
                 "max_depth": 3,
                 "decay_factor": 0.5,
+                # 传播模式：sync 在 retain 中同步传播；async 由后台线程合并触发后批量传播
+                "mode": "async",
+                "coalesce_window": 0.5,        # 合并窗口（秒），窗口内同一记忆的触发合并为一次
+                "max_batch_size": 16,          # 单批最多触发数
+                "max_nodes_per_trigger": 50,   # 每次触发最多涉及的节点数（三波合计）
             },
         }
     
@@ -220,7 +269,7 @@ class UniMemConfig:
         # 验证 graph 配置
         if "graph" in self.config:
             graph_config = self.config["graph"]
-            valid_backends = ["neo4j", "networkx"]
+            valid_backends = ["neo4j", "sqlite", "networkx"]
             if graph_config.get("backend") not in valid_backends:
                 errors.append(f"Invalid graph backend: {graph_config.get('backend')}. Must be one of {valid_backends}")
             
@@ -234,7 +283,7 @@ class UniMemConfig:
         # 验证 vector 配置
         if "vector" in self.config:
             vector_config = self.config["vector"]
-            valid_backends = ["qdrant", "faiss", "milvus"]
+            valid_backends = ["qdrant", "faiss", "milvus", "local", "memory"]
             if vector_config.get("backend") not in valid_backends:
                 errors.append(f"Invalid vector backend: {vector_config.get('backend')}. Must be one of {valid_backends}")
         
@@ -246,6 +295,29 @@ class UniMemConfig:
                 port = network_config["qdrant_port"]
                 if not isinstance(port, int) or not (1 <= port <= 65535):
                     errors.append(f"Invalid qdrant_port: {port}. Must be an integer between 1 and 65535")
+            if network_config.get("local_vector_quantization") not in (None, "float16", "int8"):
+                errors.append(
+                    f"Invalid local_vector_quantization: {network_config.get('local_vector_quantization')}. "
+                    f"Must be one of None, 'float16', 'int8'"
+                )
+            if network_config.get("embedding_backend", "torch") not in ("torch", "onnx", "int8"):
+                errors.append(
+                    f"Invalid embedding_backend: {network_config.get('embedding_backend')}. "
+                    f"Must be one of 'torch', 'onnx', 'int8'"
+                )
+            damping = network_config.get("subgraph_damping", 0.5)
+            if not isinstance(damping, (int, float)) or not (0.0 <= damping < 1.0):
+                errors.append(f"Invalid subgraph_damping: {damping}. Must be in [0, 1)")
+            if network_config.get("link_evolution_mode", "sync") not in ("sync", "batched"):
+                errors.append(
+                    f"Invalid link_evolution_mode: {network_config.get('link_evolution_mode')}. "
+                    f"Must be 'sync' or 'batched'"
+                )
+            if network_config.get("local_vector_index_type", "flat") not in ("flat", "hnsw"):
+                errors.append(
+                    f"Invalid local_vector_index_type: {network_config.get('local_vector_index_type')}. "
+                    f"Must be 'flat' or 'hnsw'"
+                )
             # 验证 Qdrant 主机
             if "qdrant_host" in network_config:
                 host = network_config["qdrant_host"]
@@ -279,6 +351,17 @@ class UniMemConfig:
                 d = retrieval_config["importance_decay_days"]
                 if not isinstance(d, (int, float)) or d <= 0:
                     errors.append(f"Invalid importance_decay_days: {d}. Must be positive")
+            adaptive_config = retrieval_config.get("adaptive_retrievers") or {}
+            for key in ("min_yield", "exploration_rate"):
+                if key in adaptive_config:
+                    v = adaptive_config[key]
+                    if not isinstance(v, (int, float)) or not (0.0 <= v <= 1.0):
+                        errors.append(f"Invalid adaptive_retrievers.{key}: {v}. Must be between 0.0 and 1.0")
+            cache_config = retrieval_config.get("cache") or {}
+            if "max_size" in cache_config:
+                v = cache_config["max_size"]
+                if not isinstance(v, int) or v <= 0:
+                    errors.append(f"Invalid retrieval.cache.max_size: {v}. Must be a positive integer")
         
         # 验证 ripple 配置
         if "ripple" in self.config:
@@ -291,6 +374,12 @@ class UniMemConfig:
                 decay_factor = ripple_config["decay_factor"]
                 if not isinstance(decay_factor, (int, float)) or not (0.0 <= decay_factor <= 1.0):
                     errors.append(f"Invalid decay_factor: {decay_factor}. Must be between 0.0 and 1.0")
+            if ripple_config.get("mode", "sync") not in ("sync", "async"):
+                errors.append(f"Invalid ripple mode: {ripple_config.get('mode')}. Must be 'sync' or 'async'")
+            if "max_nodes_per_trigger" in ripple_config:
+                max_nodes = ripple_config["max_nodes_per_trigger"]
+                if not isinstance(max_nodes, int) or max_nodes < 1:
+                    errors.append(f"Invalid max_nodes_per_trigger: {max_nodes}. Must be a positive integer")
         
         if errors:
             error_msg = "Configuration validation failed:\n" + "\n".join(f"  - {err}" for err in errors)
@@ -22,6 +22,7 @@ UniMem 核心实现
 """
 
 import logging
+import os
 import time
 from typing import List, Optional, Dict, Any, Set, Tuple
 from datetime import datetime, timedelta
@@ -46,7 +47,7 @@ from .adapters.base import (
     AdapterNotAvailableError,
 )
 from .storage import StorageManager
-from .retrieval import RetrievalEngine
+from .retrieval import RetrievalEngine, AdaptiveRetrieverPolicy, RetrievalOptimizer
 from .update import UpdateManager
 from .config import UniMemConfig
 
@@ -145,8 +146,8 @@ class UniMem:
         Args:
             config: 配置字典
             storage_backend: 存储后端（redis/mongodb/postgresql）
-            graph_backend: 图数据库后端（neo4j/networkx）
-            vector_backend: 向量数据库后端（qdrant/faiss/milvus）
+            graph_backend: 图数据库后端（neo4j/networkx；sqlite 为嵌入式图存储，见 sqlite_graph.py）
+            vector_backend: 向量数据库后端（qdrant/faiss/milvus；local 为进程内本地索引，memory 为不持久化的本地索引）
             max_concurrent_operations: 最大并发操作数（限流）
         """
         # 加载配置
@@ -204,12 +205,30 @@ class UniMem:
             atom_link_adapter=self.network_adapter,
             retrieval_adapter=self.retrieval_adapter,
             storage_manager=self.storage,
+            retriever_policy=AdaptiveRetrieverPolicy.from_config(
+                self.config.get("retrieval", {}).get("adaptive_retrievers")
+            ),
         )
+        # 检索结果缓存（默认关闭，见 config.retrieval.cache）：订阅存储写入，retain/update/cleanup 后自动失效
+        cache_config = dict(self.config.get("retrieval", {}).get("cache") or {})
+        self.retrieval_optimizer: Optional[RetrievalOptimizer] = None
+        if cache_config.pop("enabled", False):
+            cache_config.setdefault("store_id", self._store_identity())
+            self.retrieval_optimizer = RetrievalOptimizer(
+                retrieval_engine=self.retrieval,
+                enable_prefetch=cache_config.pop("prefetch", False),
+                cache_config=cache_config,
+            )
+            self.retrieval_optimizer.subscribe(self.storage)
         self.update_manager = UpdateManager(
             graph_adapter=self.graph_adapter,
             atom_link_adapter=self.network_adapter,
             update_adapter=self.update_adapter,
+            ripple_config=self.config.get("ripple"),
         )
+        # 链接演化 batched 模式：后台评估完成的链接通过回调持久化并触发涟漪更新
+        if hasattr(self.network_adapter, "set_link_callback"):
+            self.network_adapter.set_link_callback(self._apply_async_links)
         
         # 性能指标（使用数据类，线程安全）
         self.metrics = {
@@ -254,11 +273,11 @@ class UniMem:
         if self.storage_backend not in valid_storage_backends:
             logger.warning(f"Unknown storage backend: {self.storage_backend}")
         
-        valid_graph_backends = ["neo4j", "networkx", "memory"]
+        valid_graph_backends = ["neo4j", "sqlite", "networkx", "memory"]
         if self.graph_backend not in valid_graph_backends:
             logger.warning(f"Unknown graph backend: {self.graph_backend}, will use degraded mode")
         
-        valid_vector_backends = ["qdrant", "faiss", "milvus", "memory"]
+        valid_vector_backends = ["qdrant", "faiss", "milvus", "local", "memory"]
         if self.vector_backend not in valid_vector_backends:
             logger.warning(f"Unknown vector backend: {self.vector_backend}, will use degraded mode")
         
@@ -269,6 +288,41 @@ class UniMem:
                 adapter_name="UniMem"
             )
     
+    def _graph_store(self):
+        """
+        LTM 图存储模块（与分层存储适配器实际使用的 LTM 后端一致）
+
+        Returns:
+            sqlite_graph 模块（LTM 后端为 sqlite 时）或 neo4j 模块，两者函数接口相同
+        """
+        backend = getattr(getattr(self, "storage_adapter", None), "ltm_backend", self.graph_backend)
+        if backend == "sqlite":
+            from . import sqlite_graph
+            return sqlite_graph
+        from . import neo4j
+        return neo4j
+
+    def _store_identity(self) -> str:
+        """
+        存储标识（LTM 后端 + 数据库地址 + 向量后端），用于区分共享同一磁盘缓存的不同存储
+        
+        内存 LTM 不跨进程共享，标识包含进程号。
+        """
+        backend = getattr(getattr(self, "storage_adapter", None), "ltm_backend", self.graph_backend)
+        graph_config = self.config.get("graph", {})
+        if backend == "neo4j":
+            location = f"{graph_config.get('neo4j_uri')}/{graph_config.get('neo4j_database')}"
+        elif backend == "sqlite":
+            from . import sqlite_graph
+            path = (
+                {**self.config.get("layered_storage", {}), **self.config.get("storage", {})}.get("sqlite_graph_path")
+                or os.getenv("UNIMEM_SQLITE_GRAPH_PATH", sqlite_graph.DEFAULT_PATH)
+            )
+            location = os.path.abspath(os.path.expanduser(path))
+        else:
+            location = f"pid{os.getpid()}"
+        return f"{backend}:{location}:{self.vector_backend}"
+    
     def _init_adapters(self) -> None:
         """
         初始化功能适配器（带优雅降级）
@@ -300,7 +354,7 @@ class UniMem:
             ("layered_storage", LayeredStorageAdapter, storage_cfg, True),  # 必需
             ("memory_type", MemoryTypeAdapter, self.config.get("memory_type", {}), False),  # 可选
             ("graph", GraphAdapter, {**self.config.get("graph", {}), "backend": self.graph_backend}, False),  # 可选
-            ("network", AtomLinkAdapter, self.config.get("network", {}), False),  # 可选
+            ("network", AtomLinkAdapter, {**self.config.get("network", {}), "vector_backend": self.vector_backend}, False),  # 可选
             ("retrieval", RetrievalAdapter, self.config.get("retrieval", {}), False),  # 可选
             ("update", UpdateAdapter, self.config.get("update", {}), False),  # 可选
         ]
@@ -841,9 +895,10 @@ class UniMem:
                 # Fallback: 如果memory对象没有decision_trace，尝试从Neo4j读取
                 if not decision_trace_for_event:
                     try:
-                        from .neo4j import get_memory
-                        # 从Neo4j读取完整的memory节点（使用已修复的读取逻辑）
-                        neo4j_memory = get_memory(memory.id)
+                        get_memory = self._graph_store().get_memory
+                        # 从Neo4j读取完整的memory节点（使用已修复的读取逻辑；写后队列中尚未写入的记忆优先）
+                        ltm_queue = getattr(getattr(self, "storage_adapter", None), "ltm_queue", None)
+                        neo4j_memory = (ltm_queue.get(memory.id) if ltm_queue is not None else None) or get_memory(memory.id)
                         if neo4j_memory and neo4j_memory.decision_trace and isinstance(neo4j_memory.decision_trace, dict):
                             decision_trace_for_event = neo4j_memory.decision_trace
                             if not reasoning_for_event and neo4j_memory.reasoning:
@@ -882,9 +937,23 @@ class UniMem:
                 logger.debug(f"RETAIN: DecisionEvent creation check for memory {memory.id} - should_create_event: {should_create_event}, decision_trace_for_event: {decision_trace_for_event is not None}")
                 
                 # 创建DecisionEvent节点
-                if should_create_event and decision_trace_for_event:
+                ltm_queue = getattr(getattr(self, "storage_adapter", None), "ltm_queue", None)
+                if should_create_event and decision_trace_for_event and ltm_queue is not None:
+                    # 写后队列：决策事件追加到日志，与记忆节点同批写入（节点先于事件写入，无需等待节点可见）
                     try:
-                        from .neo4j import create_decision_event, get_memory
+                        ltm_queue.enqueue_decision_event(
+                            memory_id=memory.id,
+                            decision_trace=decision_trace_for_event,
+                            reasoning=reasoning_for_event,
+                            related_entity_ids=memory.entities if memory.entities else [],
+                        )
+                        logger.debug(f"Queued decision event for memory {memory.id}")
+                    except Exception as e:
+                        logger.warning(f"Failed to queue decision event for memory {memory.id}: {e}", exc_info=True)
+                elif should_create_event and decision_trace_for_event:
+                    try:
+                        graph_store = self._graph_store()
+                        create_decision_event, get_memory = graph_store.create_decision_event, graph_store.get_memory
                         
                         # 确保Memory节点已存在于Neo4j（仅在非skip_storage情况下需要检查）
                         if not skip_storage:
@@ -996,10 +1065,36 @@ class UniMem:
                 self.storage_adapter.remove_from_da(memory_id)
             if hasattr(self.storage_adapter, 'remove_from_ltm'):
                 self.storage_adapter.remove_from_ltm(memory_id)
+            self.storage.notify_write(memory_id)
             logger.debug(f"Rolled back storage for memory {memory_id}")
         except Exception as e:
             logger.error(f"Failed to rollback storage for {memory_id}: {e}")
     
+    def _apply_async_links(self, memory: Memory, links: Set[str]) -> None:
+        """
+        应用后台批量评估得到的链接（AtomLinkAdapter batched 模式回调，在后台线程执行）
+        
+        与 retain 中同步生成链接后的处理一致：合并链接、更新向量存储和存储层、触发涟漪更新。
+        """
+        new_links = set(links) - set(memory.links or set())
+        if not new_links:
+            return
+        memory.links = set(memory.links or set()) | new_links
+        
+        if hasattr(self.network_adapter, 'update_memory_in_vector_store'):
+            self.network_adapter.update_memory_in_vector_store(memory)
+        try:
+            self._record_adapter_call("LayeredStorageAdapter", "update_memory_links")
+            if hasattr(self.storage, 'update_memory'):
+                self.storage.update_memory(memory)
+        except Exception as e:
+            logger.warning(f"Failed to update async links for memory {memory.id}: {e}")
+        try:
+            self._record_adapter_call("UpdateAdapter", "trigger_ripple")
+            self.update_manager.trigger_ripple(center=memory, entities=[], relations=[], links=memory.links)
+        except Exception as e:
+            logger.warning(f"Ripple effect update failed: {e}")
+    
     def _rollback_entities(self, entities):
         """回滚实体添加操作"""
         # TODO: 实现实体回滚逻辑（需要适配器支持）
@@ -1105,12 +1200,20 @@ class UniMem:
                     logger.debug(f"FoA retrieved {len(foa_results)} results, returning early")
                     return self._filter_results(foa_results, memory_type, tags_include)[:top_k]
                 
-                # 2. 多维检索引擎：并行检索并融合
-                multi_results = self.retrieval.multi_dimensional_retrieval(
-                    query=query,
-                    context=context,
-                    top_k=top_k * 2,  # 获取更多结果以便过滤
-                )
+                # 2. 多维检索引擎：并行检索并融合（启用缓存时经检索优化器，存储写入后失效）
+                if self.retrieval_optimizer is not None:
+                    multi_results = self.retrieval_optimizer.retrieve(
+                        query,
+                        top_k=top_k * 2,  # 获取更多结果以便过滤
+                        enable_prefetch=False,
+                        context=context,
+                    )
+                else:
+                    multi_results = self.retrieval.multi_dimensional_retrieval(
+                        query=query,
+                        context=context,
+                        top_k=top_k * 2,  # 获取更多结果以便过滤
+                    )
                 
                 logger.debug(f"Multi-dimensional retrieval: {len(multi_results)} results")
                 
@@ -1520,6 +1623,48 @@ class UniMem:
             logger.error(f"Sleep update failed: {e}", exc_info=True)
             return 0
     
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待后台任务处理完：链接评估（batched 模式）、涟漪传播（async 模式）和 LTM 写后队列
+        
+        链接评估完成后会触发涟漪传播，因此按该顺序依次等待，共用同一截止时间。
+        
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+            
+        Returns:
+            是否全部处理完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        
+        drained = True
+        network_adapter = getattr(self, "network_adapter", None)
+        if network_adapter is not None and hasattr(network_adapter, "flush_link_evaluations"):
+            drained = network_adapter.flush_link_evaluations(timeout=remaining()) and drained
+        drained = self.update_manager.flush_ripples(timeout=remaining()) and drained
+        ltm_queue = getattr(getattr(self, "storage_adapter", None), "ltm_queue", None)
+        if ltm_queue is not None:
+            drained = ltm_queue.flush(timeout=remaining()) and drained
+        if not drained:
+            logger.warning(f"UniMem flush timed out after {timeout}s")
+        return drained
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        关闭 UniMem：先 flush 排队的后台任务，再停止涟漪传播线程和检索预取线程
+        
+        Args:
+            timeout: flush 的最长等待时间（秒），None 表示一直等待
+        """
+        self.flush(timeout=timeout)
+        self.update_manager.shutdown(wait=True)
+        if self.retrieval_optimizer is not None:
+            self.retrieval_optimizer.shutdown()
+        logger.info("UniMem closed")
+    
     def get_adapter_status(self) -> Dict[str, Any]:
         """
         获取所有适配器的状态（线程安全）
@@ -1578,6 +1723,23 @@ class UniMem:
                 "adapter_calls": self.metrics.get("adapter_calls", {}).copy(),
             }
         
+        # 自适应检索器策略及各检索器产出统计
+        result["retrieval_policy"] = self.retrieval.get_policy_statistics()
+        
+        # 嵌入缓存与微批处理统计（批次填充率、排队延迟）
+        network_adapter = getattr(self, "network_adapter", None)
+        if network_adapter is not None and hasattr(network_adapter, "get_embedding_statistics"):
+            result["embedding"] = network_adapter.get_embedding_statistics()
+        if network_adapter is not None and hasattr(network_adapter, "get_link_evolution_statistics"):
+            result["link_evolution"] = network_adapter.get_link_evolution_statistics()
+        
+        # 涟漪传播统计（队列深度、排队延迟）
+        result["ripple"] = self.update_manager.get_ripple_statistics()
+        
+        # 检索缓存统计（命中率、失效次数）
+        if self.retrieval_optimizer is not None:
+            result["retrieval_cache"] = self.retrieval_optimizer.get_statistics()
+        
         return result
     
     def _metrics_to_dict(self, metrics: Optional[OperationMetrics]) -> Dict[str, Any]:
@@ -0,0 +1,371 @@
+"""
+UniMem 磁盘缓存层
+
+基于 SQLite 的持久化键值缓存，作为进程内缓存（RetrievalCache、EmbeddingCache）
+的第二级，用于：
+- 后端重启或新工作进程启动后无需冷启动（避免重复编码相同章节文本）
+- 多进程共享同一缓存文件
+
+设计特点：
+- 按命名空间（namespace）隔离不同用途的数据，键由调用方基于内容哈希 + 模型标识生成
+- WAL 模式：读写并发，多进程共享
+- 按总字节数限制大小，超出时按最近访问时间淘汰
+- 代际（generation）存放在元数据表中，跨进程共享失效信号
+- 启动预热：按最近访问顺序批量读取条目
+
+工业级特性：
+- 线程安全（连接由锁保护）
+- 失败降级（磁盘错误只记录日志，不影响调用方）
+- 操作统计
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import hashlib
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 访问时间更新的最小间隔（秒），避免每次读取都写库
+_TOUCH_INTERVAL = 60.0
+
+
+def content_key(*parts: str) -> str:
+    """
+    基于内容生成缓存键（SHA-256）
+
+    Args:
+        *parts: 参与哈希的字符串（如模型标识、文本）
+
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    SQLite 磁盘缓存
+
+    值为字节串，序列化由调用方负责。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        evict_check_interval: int = 100,
+    ):
+        """
+        初始化磁盘缓存
+
+        Args:
+            path: SQLite 文件路径（目录不存在时自动创建）
+            max_bytes: 缓存值总字节数上限（默认 512MB）
+            evict_check_interval: 每写入 N 次检查一次大小（默认 100）
+        """
+        self.path = path
+        self.max_bytes = max(int(max_bytes), 1)
+        self.evict_check_interval = max(int(evict_check_interval), 1)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                generation INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_meta (namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+
+        self._puts_since_check = 0
+        self._stats = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0, "errors": 0}
+
+        logger.info(f"DiskCache initialized: path={path}, max_bytes={self.max_bytes}")
+
+    def get(self, namespace: str, key: str, generation: Optional[int] = None) -> Optional[bytes]:
+        """
+        读取缓存值
+
+        Args:
+            namespace: 命名空间
+            key: 键
+            generation: 期望的代际（可选），不一致时视为未命中
+
+        Returns:
+            值字节串，未命中返回 None
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, accessed_at, generation FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row is None or (generation is not None and row[2] != generation):
+                    self._stats["misses"] += 1
+                    return None
+                if now - row[1] > _TOUCH_INTERVAL:
+                    self._conn.execute(
+                        "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key),
+                    )
+                self._stats["hits"] += 1
+                return bytes(row[0])
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache get failed: {e}")
+            return None
+
+    def get_many(self, namespace: str, keys: List[str]) -> Dict[str, bytes]:
+        """
+        批量读取缓存值
+
+        Args:
+            namespace: 命名空间
+            keys: 键列表
+
+        Returns:
+            命中的键到值的映射
+        """
+        found: Dict[str, bytes] = {}
+        if not keys:
+            return found
+        try:
+            with self._lock:
+                # SQLite 默认最多 999 个参数
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, value FROM cache_entries WHERE namespace = ? AND key IN ({placeholders})",
+                        (namespace, *chunk),
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = bytes(value)
+                self._stats["hits"] += len(found)
+                self._stats["misses"] += len(keys) - len(found)
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache get_many failed: {e}")
+        return found
+
+    def put(self, namespace: str, key: str, value: bytes, generation: int = 0) -> None:
+        """
+        写入缓存值
+
+        Args:
+            namespace: 命名空间
+            key: 键
+            value: 值字节串
+            generation: 写入时的代际
+        """
+        self.put_many(namespace, [(key, value)], generation=generation)
+
+    def put_many(self, namespace: str, items: List[Tuple[str, bytes]], generation: int = 0) -> None:
+        """
+        批量写入缓存值（单个事务）
+
+        Args:
+            namespace: 命名空间
+            items: (键, 值) 列表
+            generation: 写入时的代际
+        """
+        if not items:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache_entries "
+                        "(namespace, key, value, size, created_at, accessed_at, generation) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (namespace, key, sqlite3.Binary(value), len(value), now, now, generation)
+                            for key, value in items
+                        ],
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._stats["puts"] += len(items)
+                self._puts_since_check += len(items)
+                if self._puts_since_check >= self.evict_check_interval:
+                    self._puts_since_check = 0
+                    self._evict_locked()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache put failed: {e}")
+
+    def _evict_locked(self) -> int:
+        """超过字节上限时按最近访问时间淘汰到上限的 90%（调用方持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * 0.9)
+        removed, freed = 0, 0
+        rows = self._conn.execute(
+            "SELECT namespace, key, size FROM cache_entries ORDER BY accessed_at ASC"
+        )
+        victims = []
+        for namespace, key, size in rows:
+            victims.append((namespace, key))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        removed = len(victims)
+        self._stats["evictions"] += removed
+        logger.debug(f"DiskCache evicted {removed} entries ({freed} bytes)")
+        return removed
+
+    def evict(self) -> int:
+        """立即检查大小并淘汰，返回淘汰条目数"""
+        try:
+            with self._lock:
+                return self._evict_locked()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache evict failed: {e}")
+            return 0
+
+    def iter_recent(self, namespace: str, limit: int, generation: Optional[int] = None) -> Iterator[Tuple[str, bytes]]:
+        """
+        按最近访问顺序遍历条目（用于启动预热）
+
+        Args:
+            namespace: 命名空间
+            limit: 最多返回条目数
+            generation: 只返回该代际的条目（可选）
+
+        Yields:
+            (键, 值)
+        """
+        try:
+            with self._lock:
+                if generation is None:
+                    rows = self._conn.execute(
+                        "SELECT key, value FROM cache_entries WHERE namespace = ? "
+                        "ORDER BY accessed_at DESC LIMIT ?",
+                        (namespace, int(limit)),
+                    ).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT key, value FROM cache_entries WHERE namespace = ? AND generation = ? "
+                        "ORDER BY accessed_at DESC LIMIT ?",
+                        (namespace, generation, int(limit)),
+                    ).fetchall()
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache iter_recent failed: {e}")
+            return
+        for key, value in rows:
+            yield key, bytes(value)
+
+    def get_generation(self, namespace: str) -> int:
+        """获取命名空间的共享代际"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT generation FROM cache_meta WHERE namespace = ?", (namespace,)
+                ).fetchone()
+                return int(row[0]) if row else 0
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache get_generation failed: {e}")
+            return 0
+
+    def bump_generation(self, namespace: str) -> int:
+        """
+        递增命名空间的共享代际（所有进程的旧条目随之失效），并删除旧代际条目
+
+        Returns:
+            新代际
+        """
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute(
+                        "INSERT INTO cache_meta (namespace, generation) VALUES (?, 1) "
+                        "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+                        (namespace,),
+                    )
+                    generation = self._conn.execute(
+                        "SELECT generation FROM cache_meta WHERE namespace = ?", (namespace,)
+                    ).fetchone()[0]
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND generation < ?",
+                        (namespace, generation),
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                return int(generation)
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache bump_generation failed: {e}")
+            return 0
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """清空缓存（可按命名空间）"""
+        try:
+            with self._lock:
+                if namespace is None:
+                    self._conn.execute("DELETE FROM cache_entries")
+                else:
+                    self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            logger.warning(f"DiskCache clear failed: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        try:
+            with self._lock:
+                count, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+                ).fetchone()
+                stats = dict(self._stats)
+        except sqlite3.Error as e:
+            logger.warning(f"DiskCache get_statistics failed: {e}")
+            count, total, stats = 0, 0, dict(self._stats)
+        stats.update({"path": self.path, "entries": count, "bytes": total, "max_bytes": self.max_bytes})
+        return stats
+
+    def close(self) -> None:
+        """关闭连接"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
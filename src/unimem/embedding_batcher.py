@@ -0,0 +1,283 @@
+"""
+UniMem 嵌入微批处理
+
+将多个线程并发发起的单条文本编码请求合并为批次，交给嵌入模型一次编码。
+SentenceTransformer.encode 对批量输入的吞吐远高于逐条调用，而 retain_batch、
+recall_batch、RetrievalOptimizer.batch_retrieve 等路径会在多个线程中同时请求嵌入。
+
+设计特点：
+- 调用方的请求（单条或多条文本）进入队列，由单个后台线程收集请求、组批、编码
+- 批次达到 max_batch_size 或等待超过 linger_ms 时立即编码
+- 自适应等待：只有存在其他正在请求的调用方时才等待凑批，单线程调用不增加延迟
+- 同一批次内的重复文本只编码一次
+- 模型调用集中在一个线程，避免多线程同时占用模型
+
+工业级特性：
+- 线程安全
+- 编码失败时异常传递给该批次的所有调用方
+- 统计批次填充率和排队延迟
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _EmbeddingRequest:
+    """一次编码请求（单条 submit 或一次 encode_many）"""
+    texts: List[str]
+    future: Future
+    submitted_at: float
+    single: bool = False
+
+
+class EmbeddingBatcher:
+    """
+    嵌入微批处理器
+
+    encode_func 接收文本列表，返回等长的向量列表。
+    """
+
+    def __init__(
+        self,
+        encode_func: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        linger_ms: float = 5.0,
+        max_queue_size: int = 4096,
+    ):
+        """
+        初始化微批处理器
+
+        Args:
+            encode_func: 批量编码函数
+            max_batch_size: 单批最大文本数（默认 32）
+            linger_ms: 凑批最长等待时间（毫秒，默认 5）
+            max_queue_size: 等待队列的请求数上限（默认 4096，队满时提交阻塞）
+        """
+        self.encode_func = encode_func
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.linger_seconds = max(float(linger_ms), 0.0) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_EmbeddingRequest]]" = queue.Queue(maxsize=max(int(max_queue_size), 1))
+        self._lock = threading.Lock()
+        # 串行化入队与关闭：关闭信号之后不会再有请求入队（后台线程不获取此锁，入队阻塞时不会死锁）
+        self._submit_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        # 正在等待结果的调用方数量（encode_many 调用 + 未完成的 submit Future，
+        # 用于判断是否值得等待凑批）
+        self._active_callers = 0
+
+        # 统计信息
+        self._requests = 0
+        self._served = 0
+        self._texts = 0
+        self._batches = 0
+        self._encoded_texts = 0
+        self._errors = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+        self._encode_time_total = 0.0
+
+        logger.info(
+            f"EmbeddingBatcher initialized: max_batch_size={self.max_batch_size}, "
+            f"linger_ms={self.linger_seconds * 1000:.1f}"
+        )
+
+    def _ensure_worker(self) -> None:
+        """按需启动后台线程"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is shut down")
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="unimem-embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _enqueue(self, texts: List[str], single: bool) -> Future:
+        request = _EmbeddingRequest(texts=list(texts), future=Future(), submitted_at=time.monotonic(), single=single)
+        with self._submit_lock:
+            self._ensure_worker()
+            with self._lock:
+                self._requests += 1
+                self._texts += len(texts)
+            self._queue.put(request)
+        return request.future
+
+    def submit(self, text: str) -> Future:
+        """
+        提交单条文本（不等待结果）
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            结果为向量的 Future
+        """
+        # 未完成的 Future 计为一个等待中的调用方，完成时回调减计数
+        with self._lock:
+            self._active_callers += 1
+        try:
+            future = self._enqueue([text], single=True)
+        except BaseException:
+            self._release_caller()
+            raise
+        future.add_done_callback(self._release_caller)
+        return future
+
+    def _release_caller(self, _future: Optional[Future] = None) -> None:
+        """一个调用方不再等待结果"""
+        with self._lock:
+            self._active_callers -= 1
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """
+        编码单条文本（阻塞等待所在批次完成）
+
+        Args:
+            text: 输入文本
+            timeout: 等待超时（秒）
+
+        Returns:
+            向量
+        """
+        return self.encode_many([text], timeout=timeout)[0]
+
+    def encode_many(self, texts: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        编码多条文本（作为一个请求入队，与其他线程的请求合并组批）
+
+        Args:
+            texts: 输入文本列表
+            timeout: 等待超时（秒）
+
+        Returns:
+            与输入等长的向量列表
+        """
+        if not texts:
+            return []
+        with self._lock:
+            self._active_callers += 1
+        try:
+            return self._enqueue(texts, single=False).result(timeout=timeout)
+        finally:
+            self._release_caller()
+
+    def _collect(self, first: _EmbeddingRequest) -> List[_EmbeddingRequest]:
+        """以 first 为首收集一批请求"""
+        batch = [first]
+        size = len(first.texts)
+        deadline = time.monotonic() + self.linger_seconds
+        while size < self.max_batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                # 只有还有其他调用方在等待结果时才值得凑批，单线程调用不等待
+                with self._lock:
+                    waiting_others = self._active_callers > len(batch)
+                remaining = deadline - time.monotonic()
+                if not waiting_others or remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if request is None:
+                # 关闭信号放回队列，当前批次处理完后退出
+                self._queue.put(None)
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self) -> None:
+        """后台线程：收集并编码批次"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._encode_batch(self._collect(first))
+
+    def _encode_batch(self, batch: List[_EmbeddingRequest]) -> None:
+        """编码一组请求并设置 Future 结果"""
+        started = time.monotonic()
+        # 批次内去重
+        unique_texts: Dict[str, int] = {}
+        for request in batch:
+            for text in request.texts:
+                unique_texts.setdefault(text, len(unique_texts))
+        texts = list(unique_texts)
+
+        embeddings: List[List[float]] = []
+        error: Optional[Exception] = None
+        calls = 0
+        try:
+            # 超大请求按 max_batch_size 分块编码
+            for offset in range(0, len(texts), self.max_batch_size):
+                chunk = texts[offset:offset + self.max_batch_size]
+                vectors = self.encode_func(chunk)
+                if len(vectors) != len(chunk):
+                    raise ValueError(f"encode_func returned {len(vectors)} vectors for {len(chunk)} texts")
+                embeddings.extend(vectors)
+                calls += 1
+        except Exception as e:
+            error = e
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+        finished = time.monotonic()
+
+        with self._lock:
+            self._batches += calls
+            self._encoded_texts += len(embeddings)
+            self._encode_time_total += finished - started
+            self._served += len(batch)
+            for request in batch:
+                delay = started - request.submitted_at
+                self._queue_delay_total += delay
+                self._queue_delay_max = max(self._queue_delay_max, delay)
+            if error is not None:
+                self._errors += 1
+
+        for request in batch:
+            if error is not None:
+                request.future.set_exception(error)
+                continue
+            vectors = [embeddings[unique_texts[text]] for text in request.texts]
+            request.future.set_result(vectors[0] if request.single else vectors)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止后台线程（已提交的请求会被处理完，之后的提交抛出 RuntimeError）"""
+        with self._submit_lock:
+            with self._lock:
+                if self._closed:
+                    return
+                self._closed = True
+                worker = self._worker
+            if worker is not None:
+                self._queue.put(None)
+        if worker is not None and wait:
+            worker.join()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            avg_batch = self._encoded_texts / self._batches if self._batches else 0.0
+            return {
+                "requests": self._requests,
+                "texts": self._texts,
+                "batches": self._batches,
+                "encoded_texts": self._encoded_texts,
+                "errors": self._errors,
+                "max_batch_size": self.max_batch_size,
+                "linger_ms": self.linger_seconds * 1000.0,
+                "avg_batch_size": avg_batch,
+                "batch_fill_ratio": avg_batch / self.max_batch_size,
+                "avg_queue_delay_ms": self._queue_delay_total / self._served * 1000.0 if self._served else 0.0,
+                "max_queue_delay_ms": self._queue_delay_max * 1000.0,
+                "avg_encode_ms": self._encode_time_total / self._batches * 1000.0 if self._batches else 0.0,
+            }
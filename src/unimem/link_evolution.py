@@ -0,0 +1,386 @@
+"""
+UniMem 链接演化批处理
+
+AtomLinkAdapter.generate_links 对每条新记忆都发起一次 LLM 请求（提示词包含全部邻居
+的完整内容），是 retain 路径上最慢的一步。本模块提供：
+- 链接决策缓存：按 (新记忆内容哈希, 邻居集合哈希) 缓存 LLM 决策，重复 retain 不再付费
+- 邻居内容截断：按 token 预算截断邻居内容，控制提示词长度
+- 批量异步评估：多条待处理新记忆及其候选邻居合并为一次 LLM 请求，
+  在后台线程中执行，不阻塞 retain
+
+设计特点：
+- 决策以 LinkDecision 表示，评估函数由适配器提供（负责构建提示词和解析响应）
+- 后台线程收集待处理记忆，达到 max_batch_size 或等待超过 linger_ms 时提交一批
+- 队列中相同决策键的记忆合并，只评估一次
+- 评估完成后写入决策缓存，并通过回调把链接交给调用方应用
+
+工业级特性：
+- 线程安全
+- 评估失败只记录日志，不影响 retain 主流程
+- 统计批次大小、缓存命中率和排队延迟
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional, Sequence
+
+from .disk_cache import content_key
+from .memory_types import Memory
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本 token 数量（字符数 / 4，与 LayeredStorageAdapter 一致）"""
+    if not text:
+        return 0
+    return len(text) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    按 token 预算截断文本
+
+    Args:
+        text: 输入文本
+        max_tokens: token 上限
+
+    Returns:
+        截断后的文本（被截断时以 "…" 结尾）
+    """
+    if not text:
+        return ""
+    max_chars = max(int(max_tokens), 1) * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + "…"
+
+
+def format_neighbors(neighbors: Sequence[Memory], token_budget: int) -> str:
+    """
+    构建邻居记忆的文本表示（每行以 memory_id 开头）
+
+    内容按 token 预算在邻居间平均分配后截断，元数据字段保留。
+
+    Args:
+        neighbors: 邻居记忆
+        token_budget: 全部邻居内容的 token 预算
+
+    Returns:
+        邻居文本
+    """
+    if not neighbors:
+        return ""
+    per_neighbor = max(int(token_budget) // len(neighbors), 16)
+    lines = []
+    for mem in neighbors:
+        lines.append(
+            f"memory_id:{mem.id}\ttimestamp:{mem.timestamp.isoformat()}\t"
+            f"content: {truncate_to_tokens(mem.content, per_neighbor)}\tcontext: {mem.context}\t"
+            f"keywords: {str(mem.keywords)}\ttags: {str(mem.tags)}\n"
+        )
+    return "".join(lines)
+
+
+def decision_key(note: Memory, neighbors: Sequence[Memory]) -> str:
+    """
+    生成链接决策缓存键
+
+    Args:
+        note: 新记忆
+        neighbors: 候选邻居
+
+    Returns:
+        (新记忆内容哈希, 邻居集合哈希) 组合后的键
+    """
+    neighbor_hash = content_key(*sorted(str(mem.id) for mem in neighbors))
+    return content_key(note.content or "", neighbor_hash)
+
+
+@dataclass
+class LinkDecision:
+    """一次链接演化决策"""
+    links: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    fallback: bool = False  # LLM 响应无法解析时的回退结果
+
+
+class LinkDecisionCache:
+    """
+    链接决策缓存（LRU）
+
+    同一条记忆内容面对同一组邻居时，LLM 的链接决策可以直接复用。
+    """
+
+    def __init__(self, max_size: int = 2048):
+        """
+        初始化决策缓存
+
+        Args:
+            max_size: 最大条目数（默认 2048）
+        """
+        self.max_size = max(int(max_size), 1)
+        self._entries: "OrderedDict[str, LinkDecision]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[LinkDecision]:
+        """读取决策（线程安全）"""
+        with self._lock:
+            decision = self._entries.get(key)
+            if decision is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return decision
+
+    def put(self, key: str, decision: LinkDecision) -> None:
+        """写入决策（线程安全），回退结果不缓存"""
+        if decision.fallback:
+            return
+        with self._lock:
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+@dataclass
+class PendingLinkEvaluation:
+    """一条等待评估的新记忆"""
+    note: Memory
+    neighbors: List[Memory]
+    key: str
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class BatchedLinkEvaluator:
+    """
+    批量异步链接评估器
+
+    evaluate_func 接收一批 PendingLinkEvaluation，返回 note.id -> LinkDecision；
+    on_decision(note, decision) 在后台线程中被调用。
+    """
+
+    def __init__(
+        self,
+        evaluate_func: Callable[[List[PendingLinkEvaluation]], Dict[str, LinkDecision]],
+        on_decision: Callable[[Memory, LinkDecision], None],
+        cache: Optional[LinkDecisionCache] = None,
+        max_batch_size: int = 8,
+        linger_ms: float = 200.0,
+        max_queue_size: int = 1024,
+    ):
+        """
+        初始化评估器
+
+        Args:
+            evaluate_func: 批量评估函数（一次 LLM 请求）
+            on_decision: 决策回调
+            cache: 决策缓存（评估结果写入其中）
+            max_batch_size: 单批最多记忆数（默认 8）
+            linger_ms: 凑批最长等待时间（毫秒，默认 200）
+            max_queue_size: 等待队列上限（默认 1024，队满时提交阻塞）
+        """
+        self.evaluate_func = evaluate_func
+        self.on_decision = on_decision
+        self.cache = cache
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.linger_seconds = max(float(linger_ms), 0.0) / 1000.0
+
+        self._queue: "queue.Queue[Optional[PendingLinkEvaluation]]" = queue.Queue(maxsize=max(int(max_queue_size), 1))
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._in_flight = 0
+
+        # 统计信息
+        self._submitted = 0
+        self._batches = 0
+        self._evaluated = 0
+        self._deduplicated = 0
+        self._errors = 0
+        self._queue_delay_total = 0.0
+
+    def _ensure_worker(self) -> None:
+        """按需启动后台线程"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchedLinkEvaluator is shut down")
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="unimem-link-evaluator", daemon=True)
+                self._worker.start()
+
+    def submit(self, note: Memory, neighbors: List[Memory], key: Optional[str] = None) -> None:
+        """
+        提交一条新记忆（立即返回）
+
+        Args:
+            note: 新记忆
+            neighbors: 候选邻居
+            key: 决策缓存键（默认由 decision_key 生成）
+        """
+        self._ensure_worker()
+        pending = PendingLinkEvaluation(note=note, neighbors=list(neighbors), key=key or decision_key(note, neighbors))
+        with self._lock:
+            self._submitted += 1
+            self._in_flight += 1
+        self._queue.put(pending)
+
+    def _collect(self, first: PendingLinkEvaluation) -> List[PendingLinkEvaluation]:
+        """以 first 为首收集一批请求"""
+        batch = [first]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is None:
+                # 关闭信号放回队列，当前批次处理完后退出
+                self._queue.put(None)
+                break
+            batch.append(pending)
+        return batch
+
+    def _run(self) -> None:
+        """后台线程：收集并评估批次"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            self._evaluate_batch(self._collect(first))
+
+    def _evaluate_batch(self, batch: List[PendingLinkEvaluation]) -> None:
+        """评估一批记忆并分发决策"""
+        started = time.monotonic()
+        # 相同决策键只评估一次（如同一内容被重复 retain）
+        groups: "OrderedDict[str, List[PendingLinkEvaluation]]" = OrderedDict()
+        for pending in batch:
+            groups.setdefault(pending.key, []).append(pending)
+
+        # 入队后其他批次可能已产生相同键的决策
+        decisions: Dict[str, LinkDecision] = {}
+        to_evaluate: List[PendingLinkEvaluation] = []
+        for key, members in groups.items():
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                decisions[key] = cached
+            else:
+                to_evaluate.append(members[0])
+
+        error = False
+        if to_evaluate:
+            try:
+                results = self.evaluate_func(to_evaluate) or {}
+                for pending in to_evaluate:
+                    decision = results.get(pending.note.id)
+                    if decision is None:
+                        continue
+                    decisions[pending.key] = decision
+                    if self.cache is not None:
+                        self.cache.put(pending.key, decision)
+            except Exception as e:
+                error = True
+                logger.error(f"Batched link evaluation of {len(to_evaluate)} notes failed: {e}")
+
+        for key, members in groups.items():
+            decision = decisions.get(key)
+            if decision is None:
+                continue
+            for pending in members:
+                try:
+                    self.on_decision(pending.note, decision)
+                except Exception as e:
+                    logger.warning(f"Applying links for memory {pending.note.id} failed: {e}")
+
+        with self._lock:
+            self._batches += 1 if to_evaluate else 0
+            self._evaluated += len(to_evaluate)
+            self._deduplicated += len(batch) - len(groups)
+            self._in_flight -= len(batch)
+            for pending in batch:
+                self._queue_delay_total += started - pending.submitted_at
+            if error:
+                self._errors += 1
+
+    def pending(self) -> int:
+        """已提交但尚未处理完的记忆数"""
+        with self._lock:
+            return self._in_flight
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的记忆处理完
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否全部处理完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending() > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止后台线程（已提交的记忆会被处理完）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(None)
+            if wait:
+                worker.join()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            processed = self._submitted - self._in_flight
+            stats = {
+                "submitted": self._submitted,
+                "pending": self._in_flight,
+                "batches": self._batches,
+                "evaluated": self._evaluated,
+                "deduplicated": self._deduplicated,
+                "errors": self._errors,
+                "max_batch_size": self.max_batch_size,
+                "avg_batch_size": self._evaluated / self._batches if self._batches else 0.0,
+                "avg_queue_delay_ms": self._queue_delay_total / processed * 1000.0 if processed else 0.0,
+            }
+        if self.cache is not None:
+            stats["decision_cache"] = self.cache.get_statistics()
+        return stats
@@ -0,0 +1,281 @@
+"""
+UniMem 链接图
+
+A-Mem 链接网络（memory.links）的压缩稀疏行（CSR）邻接结构，以及在其上的
+个性化 PageRank（Personalized PageRank，PPR）多跳打分，用于子图链接检索。
+
+设计特点：
+- 记忆 ID 映射为稳定的整数节点编号，删除的节点保留编号（行为空）
+- 链接视为无向边：新记忆链接到旧记忆后，从旧记忆出发也能走到新记忆
+- 增量更新：链接变化只把受影响的节点记入增量缓冲（delta），查询时这些节点的邻居行
+  从邻接集合按需计算，其余节点直接读 CSR 数组（indptr / indices）；增量节点超过阈值
+  （compact_min_nodes 与节点数 × compact_ratio 的较大者）时才合并重建 CSR
+- 未登记的种子（没有链接的记忆）不分配节点编号，作为孤立节点参与打分
+- 节点预算：PPR 只在种子出发按跳数扩展、不超过 max_nodes 的局部子图上迭代，
+  查询代价与全图规模无关
+- 种子的向量相似度作为重启（restart）权重
+
+工业级特性：
+- 线程安全（使用锁保护邻接和 CSR 数组）
+- 纯 numpy 实现（稀疏矩阵乘法通过 bincount 完成），不依赖 scipy
+- 统计信息（节点数、边数、重建次数）
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LinkGraph:
+    """
+    记忆链接图（CSR 邻接 + 个性化 PageRank）
+    """
+
+    def __init__(self, compact_min_nodes: int = 1024, compact_ratio: float = 0.1):
+        """
+        初始化空图
+
+        Args:
+            compact_min_nodes: 增量节点数超过该值（且超过节点数 × compact_ratio）时合并重建 CSR
+            compact_ratio: 增量节点占节点总数的比例阈值
+        """
+        self.compact_min_nodes = max(int(compact_min_nodes), 0)
+        self.compact_ratio = max(float(compact_ratio), 0.0)
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}     # 记忆 ID -> 节点编号
+        self._ids: List[str] = []            # 节点编号 -> 记忆 ID
+        self._out: List[Set[int]] = []       # 记忆自身声明的链接
+        self._in: List[Set[int]] = []        # 指向该记忆的链接
+        # 增量缓冲：CSR 中已过期（或尚未收录）的节点 -> 按需计算的邻居行（None 表示待计算）
+        self._delta: Dict[int, Optional[np.ndarray]] = {}
+
+        # CSR 数组（增量节点超过阈值时合并重建）
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._rebuilds = 0
+
+    def _node(self, memory_id: str) -> int:
+        """获取或分配节点编号（调用方持有锁）"""
+        node = self._index.get(memory_id)
+        if node is None:
+            node = len(self._ids)
+            self._index[memory_id] = node
+            self._ids.append(memory_id)
+            self._out.append(set())
+            self._in.append(set())
+            self._delta[node] = None
+        return node
+
+    def has_links(self, memory_id: str) -> bool:
+        """记忆是否已登记链接"""
+        with self._lock:
+            node = self._index.get(memory_id)
+            return node is not None and bool(self._out[node])
+
+    def set_links(self, memory_id: str, links: Iterable[str]) -> None:
+        """
+        设置记忆的链接（替换原有链接）
+
+        Args:
+            memory_id: 记忆 ID
+            links: 链接到的记忆 ID
+        """
+        with self._lock:
+            node = self._node(memory_id)
+            targets = {self._node(str(link)) for link in links if link and str(link) != memory_id}
+            previous = self._out[node]
+            if targets == previous:
+                return
+            for target in previous - targets:
+                self._in[target].discard(node)
+                self._delta[target] = None
+            for target in targets - previous:
+                self._in[target].add(node)
+                self._delta[target] = None
+            self._out[node] = targets
+            self._delta[node] = None
+
+    def remove(self, memory_id: str) -> None:
+        """
+        删除记忆及其所有边（节点编号保留）
+
+        Args:
+            memory_id: 记忆 ID
+        """
+        with self._lock:
+            node = self._index.get(memory_id)
+            if node is None:
+                return
+            for target in self._out[node]:
+                self._in[target].discard(node)
+                self._delta[target] = None
+            for source in self._in[node]:
+                self._out[source].discard(node)
+                self._delta[source] = None
+            self._out[node] = set()
+            self._in[node] = set()
+            self._delta[node] = None
+
+    def _neighbors(self, node: int) -> np.ndarray:
+        """节点的邻居行（无向，已排序）：增量节点从邻接集合计算并缓存，其余读 CSR（调用方持有锁）"""
+        if node in self._delta:
+            row = self._delta[node]
+            if row is None:
+                neighbors = self._out[node] | self._in[node]
+                row = np.fromiter(sorted(neighbors), dtype=np.int64, count=len(neighbors))
+                self._delta[node] = row
+            return row
+        return self._indices[self._indptr[node]:self._indptr[node + 1]]
+
+    def _compact_locked(self, force: bool = False) -> None:
+        """增量节点超过阈值时将其合并进 CSR 数组（调用方持有锁）"""
+        if not self._delta:
+            return
+        threshold = max(self.compact_min_nodes, int(len(self._ids) * self.compact_ratio))
+        if not force and len(self._delta) <= threshold:
+            return
+        rows = [self._neighbors(node) for node in range(len(self._ids))]
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        self._indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        self._indptr = indptr
+        self._delta.clear()
+        self._rebuilds += 1
+
+    def compact(self) -> None:
+        """立即将所有增量节点合并进 CSR 数组"""
+        with self._lock:
+            self._compact_locked(force=True)
+
+    def _expand(self, seeds: List[int], max_nodes: int, max_hops: int) -> np.ndarray:
+        """从种子按跳数广度优先扩展局部子图（调用方持有锁）"""
+        selected: Dict[int, None] = dict.fromkeys(seeds)
+        frontier = list(selected)
+        for _ in range(max_hops):
+            if len(selected) >= max_nodes or not frontier:
+                break
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._neighbors(node).tolist():
+                    if neighbor not in selected:
+                        selected[neighbor] = None
+                        next_frontier.append(neighbor)
+                        if len(selected) >= max_nodes:
+                            break
+                if len(selected) >= max_nodes:
+                    break
+            frontier = next_frontier
+        return np.fromiter(selected, dtype=np.int64, count=len(selected))
+
+    def personalized_pagerank(
+        self,
+        seeds: Dict[str, float],
+        damping: float = 0.5,
+        max_nodes: int = 200,
+        max_hops: int = 3,
+        max_iter: int = 50,
+        tol: float = 1e-6,
+    ) -> List[Tuple[str, float]]:
+        """
+        以种子为重启分布计算个性化 PageRank
+
+        Args:
+            seeds: 种子记忆 ID -> 重启权重（如向量相似度）；未登记的种子作为孤立节点，不写入图
+            damping: 沿链接继续游走的概率（默认 0.5，种子保持主导）
+            max_nodes: 局部子图节点预算（默认 200）
+            max_hops: 最大扩展跳数（默认 3）
+            max_iter: 最大迭代次数（默认 50）
+            tol: 收敛阈值（L1，默认 1e-6）
+
+        Returns:
+            (记忆 ID, 分数) 列表，按分数降序
+        """
+        if not seeds:
+            return []
+        with self._lock:
+            seed_weights: Dict[int, float] = {}
+            isolated: Dict[str, float] = {}
+            for memory_id, weight in seeds.items():
+                memory_id, weight = str(memory_id), max(float(weight), 0.0)
+                node = self._index.get(memory_id)
+                if node is None:
+                    isolated[memory_id] = isolated.get(memory_id, 0.0) + weight
+                else:
+                    seed_weights[node] = seed_weights.get(node, 0.0) + weight
+            self._compact_locked()
+            # 权重高的种子优先占用节点预算
+            ordered = sorted(seed_weights, key=lambda n: seed_weights[n], reverse=True)
+            local = self._expand(ordered, max(int(max_nodes), len(ordered)), max(int(max_hops), 0))
+
+            # 局部子图的边（只保留两端都在子图内的边）
+            rows = [self._neighbors(node) for node in local.tolist()]
+            degrees = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+            targets = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+            ids = [self._ids[node] for node in local.tolist()] + list(isolated)
+
+        # 孤立种子排在局部子图节点之后（没有边）
+        known = len(local)
+        n = known + len(isolated)
+        sources = np.repeat(np.arange(known, dtype=np.int64), degrees)
+        destinations = np.zeros(0, dtype=np.int64)
+        if len(targets):
+            order = np.argsort(local)
+            positions = np.minimum(np.searchsorted(local, targets, sorter=order), known - 1)
+            mapped = order[positions]
+            inside = local[mapped] == targets
+            sources, destinations = sources[inside], mapped[inside]
+        out_degree = np.bincount(sources, minlength=n).astype(np.float64)
+
+        restart = np.zeros(n, dtype=np.float64)
+        restart[:len(ordered)] = [seed_weights[node] for node in ordered]
+        restart[known:] = list(isolated.values())
+        total = restart.sum()
+        if total <= 0.0:
+            restart[:len(ordered)] = 1.0
+            restart[known:] = 1.0
+            total = float(len(ordered) + len(isolated))
+        restart /= total
+
+        damping = min(max(float(damping), 0.0), 1.0)
+        scores = restart.copy()
+        dangling = out_degree == 0
+        edge_weight = np.zeros(len(sources), dtype=np.float64)
+        if len(sources):
+            edge_weight = 1.0 / out_degree[sources]
+        for _ in range(max(int(max_iter), 1)):
+            spread = np.bincount(destinations, weights=scores[sources] * edge_weight, minlength=n)
+            # 无出边节点的概率质量回到重启分布
+            updated = damping * (spread + scores[dangling].sum() * restart) + (1.0 - damping) * restart
+            delta = float(np.abs(updated - scores).sum())
+            scores = updated
+            if delta < tol:
+                break
+
+        ranking = np.argsort(-scores, kind="stable")
+        return [(ids[i], float(scores[i])) for i in ranking.tolist()]
+
+    def clear(self) -> None:
+        """清空图"""
+        with self._lock:
+            self._index.clear()
+            self._ids.clear()
+            self._out.clear()
+            self._in.clear()
+            self._delta.clear()
+            self._indptr = np.zeros(1, dtype=np.int64)
+            self._indices = np.zeros(0, dtype=np.int64)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            return {
+                "nodes": len(self._index),
+                "edges": sum(len(out) for out in self._out),
+                "delta_nodes": len(self._delta),
+                "rebuilds": self._rebuilds,
+            }
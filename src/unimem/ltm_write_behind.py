@@ -0,0 +1,606 @@
+"""
+UniMem LTM 写后队列（write-behind）
+
+retain 到达 LTM 时，create_memory、实体连接和决策事件都在调用线程上同步写入图数据库，
+小说流水线每章之后都要等待图数据库延迟。本模块在 LTM 写入前增加一个持久化的本地队列：
+- 调用方只把操作追加到本地 SQLite 日志（journal）即返回
+- 后台线程按批次读取日志，调用图存储的批量写入（MERGE 语义）后删除已完成的日志行
+- 尚未写入图数据库的记忆保存在内存覆盖层中，retain 之后立即 recall 仍能读到（read-your-writes）
+
+设计特点：
+- 日志按序号严格顺序消费，同一批内按记忆 ID 合并（最后一次操作生效）：
+  先批量写入记忆节点，再写入决策事件，最后删除
+- 图存储写入均为幂等操作（记忆按 ID MERGE，决策事件 ID 由记忆 ID 决定），
+  批次失败后重试不会产生重复节点
+- 失败分两类：
+  - 图存储不可用（连接错误、超时、健康检查失败）：整个队列按上限退避无限重试，不计入各行尝试次数
+  - 其他错误：二分拆批定位出错的行，只有该行计入尝试次数，超过上限后移入死信表；
+    排在它之后的行等它重试成功或进入死信表后再写入，保持顺序
+- 进程重启后从日志重放覆盖层，未完成的写入继续由后台线程完成
+- 图存储为 neo4j.py 或 sqlite_graph.py 模块（两者函数接口相同）
+
+工业级特性：
+- 持久化（WAL 模式 SQLite，enqueue 返回时操作已落盘）
+- 指数退避重试；死信表中的记忆仍保留在覆盖层中可读，replay_dead_letter() 重新放回日志
+- 线程安全
+- 统计待写入数量、批次、失败次数和最早待写入操作的滞后时间
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .memory_codec import encode_memory, decode_memory
+from .memory_types import Memory
+from .text_terms import bigram_terms
+from .adapters.base import AdapterNotAvailableError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".unimem", "ltm_journal.db")
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+OP_DECISION_EVENT = "decision_event"
+
+# 表示图存储不可用的异常类名（neo4j / py2neo 驱动），按名称匹配以免引入可选依赖
+_UNAVAILABLE_ERROR_NAMES = frozenset({
+    "ServiceUnavailable", "SessionExpired", "TransientError", "DatabaseUnavailable",
+    "ConnectionUnavailable", "ConnectionBroken",
+})
+
+
+def _is_unavailable(error: Exception) -> bool:
+    """异常是否表示图存储暂时不可用（应无限重试而不是计入尝试次数）"""
+    if isinstance(error, (OSError, TimeoutError, AdapterNotAvailableError)):
+        return True
+    if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+        return True
+    return any(cls.__name__ in _UNAVAILABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ltm_journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    payload BLOB,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS ltm_dead_letter (
+    seq INTEGER PRIMARY KEY,
+    op TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    payload BLOB,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class LTMWriteBehindQueue:
+    """
+    LTM 写后队列
+
+    store 为图存储模块（unimem.neo4j 或 unimem.sqlite_graph），需提供
+    create_memories_batch / create_decision_event / delete_memory。
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        path: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+        max_attempts: int = 10,
+        start: bool = True,
+    ):
+        """
+        初始化队列（打开日志并重放未完成的操作）
+
+        Args:
+            store: 图存储模块
+            path: 日志文件路径（默认 ~/.unimem/ltm_journal.db）
+            batch_size: 单批最多消费的日志行数（默认 100）
+            flush_interval: 后台线程空闲时的轮询间隔（秒，默认 0.2）
+            retry_delay: 首次重试延迟（秒，默认 0.5，之后指数增长）
+            max_retry_delay: 重试延迟上限（秒，默认 30）
+            max_attempts: 单行的最大尝试次数，超过后移入死信表（默认 10；图存储不可用时不计数）
+            start: 是否立即启动后台线程
+        """
+        self.store = store
+        self.path = path or DEFAULT_PATH
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = max(float(flush_interval), 0.01)
+        self.retry_delay = max(float(retry_delay), 0.0)
+        self.max_retry_delay = max(float(max_retry_delay), self.retry_delay)
+        self.max_attempts = max(int(max_attempts), 1)
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._lock = threading.RLock()
+        self._drain_lock = threading.Lock()  # 同一时刻只有一个批次在写入图存储
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+        # 覆盖层：记忆 ID -> (最新日志序号, 待写入的记忆；None 表示待删除)
+        self._overlay: Dict[str, Tuple[int, Optional[Memory]]] = {}
+
+        # 统计信息
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._dead_lettered = 0
+        self._coalesced = 0
+        
+        # 图存储不可用时的队列级退避
+        self._outage_failures = 0
+        self._outage_since: Optional[float] = None
+        self._retry_at = 0.0
+
+        self._replay()
+        if start:
+            self.start()
+
+    # ==================== 日志 ====================
+
+    def _replay(self) -> None:
+        """由日志和死信表重建覆盖层（进程重启后未完成的写入）"""
+        rows = self._conn.execute(
+            """
+            SELECT seq, op, memory_id, payload FROM ltm_journal WHERE op != ?
+            UNION ALL
+            SELECT seq, op, memory_id, payload FROM ltm_dead_letter WHERE op != ?
+            ORDER BY seq
+            """,
+            (OP_DECISION_EVENT, OP_DECISION_EVENT),
+        ).fetchall()
+        for seq, op, memory_id, payload in rows:
+            try:
+                self._overlay[memory_id] = (seq, decode_memory(payload) if op == OP_UPSERT else None)
+            except Exception as e:
+                logger.warning(f"Failed to replay journal entry {seq} for memory {memory_id}: {e}")
+        if rows:
+            logger.info(f"Replayed {len(rows)} pending LTM writes from {self.path}")
+
+    def _append(self, op: str, memory_id: str, payload: Any) -> int:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LTMWriteBehindQueue is closed")
+            seq = self._conn.execute(
+                "INSERT INTO ltm_journal (op, memory_id, payload, enqueued_at) VALUES (?, ?, ?, ?)",
+                (op, memory_id, payload, time.time()),
+            ).lastrowid
+            self._enqueued += 1
+        self._wakeup.set()
+        return seq
+
+    def enqueue_upsert(self, memory: Memory) -> int:
+        """
+        追加记忆写入（创建或更新，立即对覆盖层可见）
+
+        Args:
+            memory: 记忆对象
+
+        Returns:
+            日志序号
+        """
+        with self._lock:
+            seq = self._append(OP_UPSERT, memory.id, encode_memory(memory))
+            self._overlay[memory.id] = (seq, memory)
+        return seq
+
+    def enqueue_delete(self, memory_id: str) -> int:
+        """
+        追加记忆删除（立即对覆盖层可见）
+
+        Args:
+            memory_id: 记忆ID
+
+        Returns:
+            日志序号
+        """
+        with self._lock:
+            seq = self._append(OP_DELETE, memory_id, None)
+            self._overlay[memory_id] = (seq, None)
+        return seq
+
+    def enqueue_decision_event(
+        self,
+        memory_id: str,
+        decision_trace: Dict[str, Any],
+        reasoning: Optional[str] = None,
+        related_entity_ids: Optional[List[str]] = None,
+    ) -> int:
+        """
+        追加决策事件写入（在同一批次的记忆节点写入之后执行）
+
+        Args:
+            memory_id: 关联的记忆ID
+            decision_trace: 决策痕迹字典
+            reasoning: 决策理由（可选）
+            related_entity_ids: 相关实体ID列表（可选）
+
+        Returns:
+            日志序号
+        """
+        payload = json.dumps(
+            {"decision_trace": decision_trace, "reasoning": reasoning, "related_entity_ids": related_entity_ids or []},
+            ensure_ascii=False,
+            default=str,
+        )
+        return self._append(OP_DECISION_EVENT, memory_id, payload)
+
+    # ==================== 覆盖层（read-your-writes） ====================
+
+    def get(self, memory_id: str) -> Optional[Memory]:
+        """尚未写入图存储的记忆（没有待写入的记忆或待删除时返回 None）"""
+        with self._lock:
+            entry = self._overlay.get(memory_id)
+        return entry[1] if entry else None
+
+    def is_deleted(self, memory_id: str) -> bool:
+        """记忆是否有尚未执行的删除"""
+        with self._lock:
+            entry = self._overlay.get(memory_id)
+        return entry is not None and entry[1] is None
+
+    def apply_overlay(self, memories: List[Memory], query: str = "", limit: Optional[int] = None) -> List[Memory]:
+        """
+        将覆盖层合并到图存储的查询结果中
+
+        - 待删除的记忆从结果中移除
+        - 有待写入新版本的记忆替换为新版本
+        - 尚未写入且与查询匹配的记忆排在结果前面（按时间倒序）
+
+        Args:
+            memories: 图存储返回的记忆
+            query: 查询文本（为空时所有待写入记忆都匹配）
+            limit: 返回数量限制
+
+        Returns:
+            合并后的记忆列表
+        """
+        with self._lock:
+            overlay = dict(self._overlay)
+        if not overlay:
+            return memories[:limit] if limit is not None else memories
+
+        merged = []
+        seen = set()
+        for memory in memories:
+            entry = overlay.get(memory.id)
+            if entry is not None:
+                if entry[1] is None:
+                    continue
+                memory = entry[1]
+            merged.append(memory)
+            seen.add(memory.id)
+
+        terms = set(bigram_terms(query))
+        pending = [
+            memory for memory_id, (_, memory) in overlay.items()
+            if memory is not None and memory_id not in seen and self._matches(memory, terms)
+        ]
+        pending.sort(key=lambda memory: memory.timestamp, reverse=True)
+        results = pending + merged
+        return results[:limit] if limit is not None else results
+
+    @staticmethod
+    def _matches(memory: Memory, terms: set) -> bool:
+        if not terms:
+            return True
+        return not terms.isdisjoint(bigram_terms(f"{memory.content} {' '.join(memory.keywords or [])}"))
+
+    # ==================== 消费 ====================
+
+    def _fetch_batch(self) -> List[Tuple[int, str, str, Any, int, float]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, op, memory_id, payload, attempts, next_attempt_at FROM ltm_journal ORDER BY seq LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+
+    def _apply_batch(self, rows: List[Tuple[int, str, str, Any, int, float]]) -> int:
+        """
+        把一批日志行写入图存储（失败时抛出异常，整批重试）
+
+        Returns:
+            合并掉的记忆写入/删除数量
+        """
+        # 按记忆 ID 合并：每条记忆只保留最后一次写入/删除
+        final: Dict[str, Tuple[str, Any]] = {}
+        events = []
+        coalesced = 0
+        for seq, op, memory_id, payload, _, _ in rows:
+            if op == OP_DECISION_EVENT:
+                events.append((memory_id, json.loads(payload)))
+            else:
+                coalesced += memory_id in final
+                final[memory_id] = (op, payload)
+
+        upserts = [decode_memory(payload) for op, payload in final.values() if op == OP_UPSERT]
+        if upserts:
+            written = self.store.create_memories_batch(upserts, chunk_size=len(upserts))
+            if written < len(upserts):
+                raise RuntimeError(f"create_memories_batch wrote {written}/{len(upserts)} memories")
+
+        for memory_id, event in events:
+            if final.get(memory_id, (None,))[0] == OP_DELETE:
+                continue
+            if not self.store.create_decision_event(
+                memory_id=memory_id,
+                decision_trace=event["decision_trace"],
+                reasoning=event.get("reasoning"),
+                related_entity_ids=event.get("related_entity_ids") or [],
+            ):
+                raise RuntimeError(f"create_decision_event failed for memory {memory_id}")
+
+        for memory_id, (op, _) in final.items():
+            if op == OP_DELETE:
+                # 删除不存在的记忆同样视为成功（幂等）
+                self.store.delete_memory(memory_id)
+        return coalesced
+
+    def drain_once(self) -> int:
+        """
+        消费一批日志（后台线程调用，也可在测试中同步调用）
+
+        Returns:
+            成功写入的日志行数（队首批次处于退避期或失败时为 0）
+        """
+        with self._drain_lock:
+            if time.time() < self._retry_at:
+                return 0
+            rows = self._fetch_batch()
+            if not rows or rows[0][5] > time.time():
+                return 0
+            written_before = self._written
+            try:
+                self._drain_rows(rows)
+            except Exception as e:
+                self._record_outage(e)
+            else:
+                with self._lock:
+                    if self._outage_since is not None:
+                        logger.info(f"Graph store available again after {time.time() - self._outage_since:.1f}s")
+                    self._outage_failures = 0
+                    self._outage_since = None
+            return self._written - written_before
+
+    def _drain_rows(self, rows: List[Tuple[int, str, str, Any, int, float]]) -> bool:
+        """
+        写入一段日志行；出错时二分拆分定位出错的行
+
+        图存储不可用时抛出异常（由 drain_once 做队列级退避）。
+
+        Returns:
+            是否被仍在重试中的行阻塞（其后的行本次不再写入，以保持顺序）
+        """
+        try:
+            coalesced = self._apply_batch(rows)
+        except Exception as e:
+            if _is_unavailable(e) or not self._store_available():
+                raise
+            with self._lock:
+                self._failed_batches += 1
+            if len(rows) == 1:
+                return not self._record_row_failure(rows[0], e)
+            middle = len(rows) // 2
+            return self._drain_rows(rows[:middle]) or self._drain_rows(rows[middle:])
+        self._commit(rows, coalesced)
+        return False
+
+    def _store_available(self) -> bool:
+        """通过图存储的 health_check 判断其是否可用（无 health_check 时视为可用）"""
+        health_check = getattr(self.store, "health_check", None)
+        if not callable(health_check):
+            return True
+        try:
+            return bool(health_check().get("available", True))
+        except Exception:
+            return False
+
+    def _commit(self, rows: List[Tuple[int, str, str, Any, int, float]], coalesced: int) -> None:
+        """删除已写入的日志行，移除已落地的覆盖层条目和被取代的死信行"""
+        seqs = [row[0] for row in rows]
+        last_seq = seqs[-1]
+        memory_ids = list({row[2] for row in rows if row[1] != OP_DECISION_EVENT})
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(f"DELETE FROM ltm_journal WHERE seq IN ({', '.join('?' for _ in seqs)})", seqs)
+            if memory_ids:
+                # 同一记忆更新的写入已落地，较早的死信写入/删除不应再重放
+                self._conn.execute(
+                    f"""
+                    DELETE FROM ltm_dead_letter
+                    WHERE op != ? AND seq < ? AND memory_id IN ({', '.join('?' for _ in memory_ids)})
+                    """,
+                    [OP_DECISION_EVENT, last_seq] + memory_ids,
+                )
+            self._conn.execute("COMMIT")
+            for memory_id in memory_ids:
+                entry = self._overlay.get(memory_id)
+                if entry is not None and entry[0] <= last_seq:
+                    del self._overlay[memory_id]
+            self._written += len(rows)
+            self._batches += 1
+            self._coalesced += coalesced
+        logger.debug(f"Wrote {len(rows)} LTM journal entries to graph store")
+
+    def _record_outage(self, error: Exception) -> None:
+        """图存储不可用：队列级指数退避（有上限），无限重试，不计入各行尝试次数"""
+        with self._lock:
+            self._failed_batches += 1
+            self._outage_failures += 1
+            if self._outage_since is None:
+                self._outage_since = time.time()
+            delay = min(self.retry_delay * (2 ** (self._outage_failures - 1)), self.max_retry_delay)
+            self._retry_at = time.time() + delay
+        logger.warning(
+            f"Graph store unavailable (failure {self._outage_failures}), retrying LTM writes in {delay:.2f}s: {error}"
+        )
+
+    def _record_row_failure(self, row: Tuple[int, str, str, Any, int, float], error: Exception) -> bool:
+        """
+        单行写入失败：该行退避重试，超过最大尝试次数后移入死信表
+
+        死信行对应的覆盖层条目保留（记忆仍可读），直到同一记忆更新的写入落地。
+
+        Returns:
+            是否已移入死信表
+        """
+        seq, op, memory_id = row[0], row[1], row[2]
+        attempts = row[4] + 1
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO ltm_dead_letter
+                        (seq, op, memory_id, payload, enqueued_at, attempts, last_error, failed_at)
+                    SELECT seq, op, memory_id, payload, enqueued_at, ?, ?, ?
+                    FROM ltm_journal WHERE seq = ?
+                    """,
+                    (attempts, str(error), time.time(), seq),
+                )
+                self._conn.execute("DELETE FROM ltm_journal WHERE seq = ?", (seq,))
+                self._conn.execute("COMMIT")
+                self._dead_lettered += 1
+                logger.error(
+                    f"Moved LTM journal entry {seq} ({op} {memory_id}) to dead letter after {attempts} attempts: {error}"
+                )
+                return True
+            delay = min(self.retry_delay * (2 ** (attempts - 1)), self.max_retry_delay)
+            self._conn.execute(
+                "UPDATE ltm_journal SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE seq = ?",
+                (attempts, time.time() + delay, str(error), seq),
+            )
+        logger.warning(
+            f"LTM journal entry {seq} ({op} {memory_id}) failed (attempt {attempts}), retrying in {delay:.2f}s: {error}"
+        )
+        return False
+
+    def replay_dead_letter(self) -> int:
+        """
+        把死信表中的操作放回日志重新写入（保留原序号，尝试次数清零）
+
+        Returns:
+            放回日志的行数
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            count = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO ltm_journal (seq, op, memory_id, payload, enqueued_at, attempts, next_attempt_at)
+                SELECT seq, op, memory_id, payload, enqueued_at, 0, 0 FROM ltm_dead_letter
+                """
+            ).rowcount
+            self._conn.execute("DELETE FROM ltm_dead_letter")
+            self._conn.execute("COMMIT")
+        self._wakeup.set()
+        if count:
+            logger.info(f"Replayed {count} dead-lettered LTM journal entries")
+        return count
+
+    def _run(self) -> None:
+        """后台线程：有积压时连续消费，空闲或退避时等待唤醒"""
+        while not self._closed:
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                logger.error(f"LTM write-behind worker error: {e}", exc_info=True)
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """启动后台线程"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LTMWriteBehindQueue is closed")
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="unimem-ltm-write-behind", daemon=True)
+                self._worker.start()
+
+    def pending(self) -> int:
+        """日志中尚未写入图存储的行数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ltm_journal").fetchone()[0]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待日志全部写入图存储
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否全部写入
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending() > 0:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if self._worker is None or not self._worker.is_alive():
+                self.drain_once()
+            self._wakeup.set()
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        停止后台线程并关闭日志（未写入的操作保留在日志中，下次打开时继续）
+
+        Args:
+            timeout: 关闭前等待积压写入的最长时间（秒，0 表示不等待）
+        """
+        if self._closed:
+            return
+        if timeout:
+            self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+        self._wakeup.set()
+        if worker is not None:
+            worker.join()
+        with self._drain_lock, self._lock:
+            self._conn.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            pending, oldest = self._conn.execute("SELECT COUNT(*), MIN(enqueued_at) FROM ltm_journal").fetchone()
+            dead_letter = self._conn.execute("SELECT COUNT(*) FROM ltm_dead_letter").fetchone()[0]
+            return {
+                "pending": pending,
+                "overlay_size": len(self._overlay),
+                "lag_seconds": time.time() - oldest if oldest else 0.0,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "coalesced": self._coalesced,
+                "failed_batches": self._failed_batches,
+                "dead_lettered": self._dead_lettered,
+                "dead_letter_size": dead_letter,
+                "store_unavailable_seconds": time.time() - self._outage_since if self._outage_since else 0.0,
+            }
@@ -0,0 +1,304 @@
+"""
+UniMem 记忆编解码
+
+Redis 中 FoA/DA 记忆的值编码层。早期实现将每条 Memory 存为 JSON 字符串（字段名、
+ISO 时间戳全部以文本存储），解析开销在高负载下主导 FoA/DA 读取路径，也占用较多内存。
+
+设计特点：
+- 可插拔：编解码器按名称注册，写入时使用当前编码器
+- 版本化：二进制值以一个头字节标识格式，读取时按头字节分派；
+  以 "{" 开头的值按旧 JSON 格式解码，已有键无需迁移
+- msgpack 格式按固定字段顺序存为数组（不重复存储字段名），无时区时间戳存为浮点秒
+- 超过阈值的值使用 zstd 压缩（需要 zstandard），以独立的头字节区分
+
+工业级特性：
+- 可选依赖（msgpack / zstandard）不可用时自动回退到 JSON
+- 元数据中无法直接序列化的值（datetime、set、Enum）按 JSON 编码时的规则转换
+"""
+
+import os
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union
+
+from .memory_types import Memory, MemoryType, MemoryLayer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+# 头字节（JSON 值以 "{" 即 0x7B 开头，不与以下取值冲突）
+HEADER_MSGPACK = 0x01
+HEADER_MSGPACK_ZSTD = 0x02
+_JSON_PREFIX = ord("{")
+
+# msgpack 数组的字段顺序（格式版本 1，新增字段只能追加在末尾）
+_FIELDS = (
+    "id", "content", "timestamp", "memory_type", "layer", "keywords", "tags", "context",
+    "links", "entities", "retrieval_count", "last_accessed", "metadata", "reasoning", "decision_trace",
+)
+
+
+def _jsonable(value: Any) -> Any:
+    """将 datetime / set / Enum / dataclass 转换为可序列化的值"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return str(value)
+
+
+def memory_to_dict(memory: Memory) -> Dict[str, Any]:
+    """将 Memory 对象转换为字典（用于 JSON 序列化）"""
+    result = {}
+    for key, value in asdict(memory).items():
+        if isinstance(value, datetime):
+            result[key] = value.isoformat()
+        elif isinstance(value, (set, frozenset)):
+            result[key] = list(value)
+        elif isinstance(value, Enum):
+            result[key] = value.value
+        elif is_dataclass(value):
+            result[key] = memory_to_dict(value)
+        else:
+            result[key] = value
+    return result
+
+
+def dict_to_memory(data: Dict[str, Any]) -> Memory:
+    """将字典转换为 Memory 对象"""
+    # 处理 timestamp
+    if "timestamp" in data and isinstance(data["timestamp"], str):
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+
+    # 处理 last_accessed
+    if "last_accessed" in data and isinstance(data["last_accessed"], str):
+        data["last_accessed"] = datetime.fromisoformat(data["last_accessed"])
+
+    # 处理 memory_type
+    if "memory_type" in data and isinstance(data["memory_type"], str):
+        try:
+            data["memory_type"] = MemoryType(data["memory_type"])
+        except ValueError:
+            data["memory_type"] = None
+
+    # 处理 layer
+    if "layer" in data and isinstance(data["layer"], str):
+        try:
+            data["layer"] = MemoryLayer(data["layer"])
+        except ValueError:
+            data["layer"] = MemoryLayer.LTM
+
+    # 处理 links (list -> set)
+    if "links" in data and isinstance(data["links"], list):
+        data["links"] = set(data["links"])
+
+    return Memory(**data)
+
+
+def _pack_time(value: Optional[datetime]) -> Union[None, float, str]:
+    """无时区时间存为浮点秒，带时区时间存为 ISO 字符串"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.timestamp()
+    return value.isoformat()
+
+
+def _unpack_time(value: Union[None, float, str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime.fromtimestamp(value)
+
+
+class MemoryCodec(ABC):
+    """编解码器基类（子类须实现 encode / decode）"""
+
+    name = "base"
+
+    @abstractmethod
+    def encode(self, memory: Memory) -> Union[str, bytes]:
+        """将记忆编码为存储格式"""
+
+    @abstractmethod
+    def decode(self, raw: Union[str, bytes]) -> Memory:
+        """将存储格式解码为记忆"""
+
+
+class JSONMemoryCodec(MemoryCodec):
+    """JSON 编解码（旧格式）"""
+
+    name = "json"
+
+    def encode(self, memory: Memory) -> str:
+        return json.dumps(memory_to_dict(memory), ensure_ascii=False, default=_jsonable)
+
+    def decode(self, raw: Union[str, bytes]) -> Memory:
+        return dict_to_memory(json.loads(raw))
+
+
+class MsgpackMemoryCodec(MemoryCodec):
+    """msgpack 编解码（按字段顺序的数组，可选 zstd 压缩）"""
+
+    name = "msgpack"
+
+    def __init__(self, compress_threshold: Optional[int] = 1024, compress_level: int = 3):
+        """
+        初始化编解码器
+
+        Args:
+            compress_threshold: 编码后超过该字节数时使用 zstd 压缩（None 表示不压缩）
+            compress_level: zstd 压缩级别
+        """
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack is required for MsgpackMemoryCodec")
+        self.compress_threshold = compress_threshold if ZSTD_AVAILABLE else None
+        self._compressor = zstandard.ZstdCompressor(level=compress_level) if ZSTD_AVAILABLE else None
+        self._decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+    def encode(self, memory: Memory) -> bytes:
+        row = [
+            memory.id,
+            memory.content,
+            _pack_time(memory.timestamp),
+            memory.memory_type.value if memory.memory_type else None,
+            memory.layer.value if memory.layer else None,
+            memory.keywords,
+            memory.tags,
+            memory.context,
+            list(memory.links),
+            memory.entities,
+            memory.retrieval_count,
+            _pack_time(memory.last_accessed),
+            memory.metadata,
+            memory.reasoning,
+            memory.decision_trace,
+        ]
+        body = msgpack.packb(row, use_bin_type=True, default=_jsonable)
+        if self.compress_threshold is not None and len(body) > self.compress_threshold:
+            return bytes((HEADER_MSGPACK_ZSTD,)) + self._compressor.compress(body)
+        return bytes((HEADER_MSGPACK,)) + body
+
+    def decode(self, raw: Union[str, bytes]) -> Memory:
+        header, body = raw[0], raw[1:]
+        if header == HEADER_MSGPACK_ZSTD:
+            if self._decompressor is None:
+                raise ValueError("zstd-compressed memory value but zstandard is not installed")
+            body = self._decompressor.decompress(body)
+        elif header != HEADER_MSGPACK:
+            raise ValueError(f"Unknown memory codec header: {header:#x}")
+        row = msgpack.unpackb(body, raw=False, strict_map_key=False)
+        values = dict(zip(_FIELDS, row))
+        memory_type = values.get("memory_type")
+        layer = values.get("layer")
+        try:
+            memory_type = MemoryType(memory_type) if memory_type else None
+        except ValueError:
+            memory_type = None
+        try:
+            layer = MemoryLayer(layer) if layer else MemoryLayer.LTM
+        except ValueError:
+            layer = MemoryLayer.LTM
+        return Memory(
+            id=values["id"],
+            content=values["content"],
+            timestamp=_unpack_time(values["timestamp"]),
+            memory_type=memory_type,
+            layer=layer,
+            keywords=list(values.get("keywords") or []),
+            tags=list(values.get("tags") or []),
+            context=values.get("context"),
+            links=set(values.get("links") or []),
+            entities=list(values.get("entities") or []),
+            retrieval_count=values.get("retrieval_count") or 0,
+            last_accessed=_unpack_time(values.get("last_accessed")),
+            metadata=values.get("metadata") or {},
+            reasoning=values.get("reasoning"),
+            decision_trace=values.get("decision_trace"),
+        )
+
+
+_CODECS: Dict[str, MemoryCodec] = {"json": JSONMemoryCodec()}
+if MSGPACK_AVAILABLE:
+    _CODECS["msgpack"] = MsgpackMemoryCodec()
+    _CODECS["msgpack-raw"] = MsgpackMemoryCodec(compress_threshold=None)
+
+
+def register_codec(name: str, codec: MemoryCodec) -> None:
+    """注册编解码器（解码仍按头字节分派，自定义编码器应复用已有头字节格式或 JSON）"""
+    _CODECS[name] = codec
+
+
+def available_codecs() -> List[str]:
+    """已注册的编解码器名称"""
+    return list(_CODECS)
+
+
+def get_codec(name: Optional[str] = None) -> MemoryCodec:
+    """
+    获取编解码器
+
+    Args:
+        name: 名称；None 时读取环境变量 REDIS_MEMORY_CODEC，
+              未设置时 msgpack 可用则使用 msgpack，否则使用 json
+
+    Returns:
+        编解码器
+    """
+    name = name or os.getenv("REDIS_MEMORY_CODEC") or ("msgpack" if MSGPACK_AVAILABLE else "json")
+    codec = _CODECS.get(name)
+    if codec is None:
+        logger.warning(f"Memory codec {name} not available, falling back to json")
+        codec = _CODECS["json"]
+    return codec
+
+
+def encode_memory(memory: Memory, codec: Optional[MemoryCodec] = None) -> Union[str, bytes]:
+    """使用指定（默认当前）编解码器编码记忆"""
+    return (codec or get_codec()).encode(memory)
+
+
+def decode_memory(raw: Union[str, bytes]) -> Memory:
+    """
+    按头字节解码记忆值（兼容旧 JSON 值）
+
+    Args:
+        raw: Redis 返回的值（str 或 bytes）
+
+    Returns:
+        Memory 对象
+    """
+    if isinstance(raw, str):
+        return _CODECS["json"].decode(raw)
+    if not raw:
+        raise ValueError("Empty memory value")
+    header = raw[0]
+    if header == _JSON_PREFIX:
+        return _CODECS["json"].decode(raw)
+    if header in (HEADER_MSGPACK, HEADER_MSGPACK_ZSTD):
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack-encoded memory value but msgpack is not installed")
+        return _CODECS["msgpack-raw"].decode(raw) if header == HEADER_MSGPACK else _CODECS["msgpack"].decode(raw)
+    raise ValueError(f"Unknown memory codec header: {header:#x}")
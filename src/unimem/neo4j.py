@@ -57,6 +57,26 @@ _node_matcher: Optional[Any] = None
 _relationship_matcher: Optional[Any] = None
 _graph_lock = threading.Lock()
 
+# 重试配置（_execute_with_retry 使用）
+_max_retries = 3
+_retry_delay = 0.1  # 秒
+
+# 批量写入的默认块大小（每块一个事务）
+BULK_CHUNK_SIZE = 500
+
+# 全文索引（连接建立时由 create_memory_indexes 幂等创建；cjk 分析器按二元组切分中日韩文本）
+MEMORY_FULLTEXT_INDEX = "memory_fulltext"
+ENTITY_FULLTEXT_INDEX = "entity_fulltext"
+FULLTEXT_ANALYZER = os.getenv("NEO4J_FULLTEXT_ANALYZER", "cjk")
+
+# Lucene 查询语法中的特殊字符（用户文本按字面匹配，需要转义）
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+# Lucene 布尔运算符（仅大写形式生效，小写后作为普通词项匹配）
+_LUCENE_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+# 已告警过全文索引不可用的索引名（每个索引只告警一次，之后降为 debug）
+_fulltext_fallback_warned: set = set()
+
 
 def get_graph(
     uri: Optional[str] = None,
@@ -107,6 +127,8 @@ def get_graph(
                 node_matcher = _node_matcher
                 relationship_matcher = _relationship_matcher
                 logger.info(f"Neo4j connected: {uri}/{database}")
+                # 每次建立连接时幂等地创建索引（IF NOT EXISTS），保证全文检索不依赖外部脚本
+                create_memory_indexes()
             except (ServiceUnavailable, ClientError) as e:
                 _graph = _node_matcher = _relationship_matcher = None
                 raise AdapterNotAvailableError(f"Failed to connect to Neo4j: {e}", adapter_name="Neo4jClient", cause=e) from e
@@ -246,6 +268,21 @@ def get_current_time(format_string="%Y-%m-%d-%H-%M-%S"):
     return time.strftime(format_string, time.localtime())
 
 
+def _fulltext_query(text: str) -> str:
+    """将用户文本转换为全文索引查询（转义 Lucene 语法并小写布尔运算符，按字面匹配）"""
+    escaped = _LUCENE_SPECIAL.sub(r"\\\1", text.strip())
+    return _LUCENE_OPERATORS.sub(lambda m: m.group(1).lower(), escaped)
+
+
+def _log_fulltext_fallback(index_name: str, error: Exception) -> None:
+    """记录全文索引退化为 CONTAINS 扫描（每个索引只告警一次，避免每次查询刷屏）"""
+    if index_name in _fulltext_fallback_warned:
+        logger.debug(f"Fulltext index {index_name} unavailable, using CONTAINS: {error}")
+        return
+    _fulltext_fallback_warned.add(index_name)
+    logger.warning(f"Fulltext index {index_name} unavailable, falling back to CONTAINS: {error}")
+
+
 # ==================== 实体操作 ====================
 
 def create_entity(entity: Entity) -> bool:
@@ -623,41 +660,278 @@ def get_entity_relations(entity_id: str, direction: str = "both") -> List[Relati
 
 
 # ==================== 批量操作 ====================
+#
+# 批量写入使用参数化的 UNWIND $rows AS row MERGE ...，每块行数据在一个事务中提交，
+# 一块一次往返；瞬时错误（ServiceUnavailable / TransientError）按块重试，
+# 失败的块不影响其他块。MERGE 保证重复导入是幂等的。
+
+_ENTITY_BULK_QUERY = """
+UNWIND $rows AS row
+MERGE (e:Entity {id: row.id})
+ON CREATE SET e.created_at = $now
+ON MATCH SET e.updated_at = $now
+SET e.name = row.name,
+    e.entity_type = row.entity_type,
+    e.description = row.description,
+    e.retrieval_key = row.retrieval_key,
+    e.retrieval_value = row.retrieval_value
+RETURN count(e) AS count
+"""
+
+_RELATION_BULK_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Entity {id: row.source})
+MATCH (t:Entity {id: row.target})
+MERGE (s)-[r:RELATED_TO]->(t)
+ON CREATE SET r.created_at = $now
+ON MATCH SET r.updated_at = $now
+SET r.description = row.description,
+    r.keywords = row.keywords,
+    r.retrieval_key = row.retrieval_key,
+    r.retrieval_value = row.retrieval_value
+RETURN count(r) AS count
+"""
+
+# 记忆节点（类型标签来自 MemoryType 枚举，按类型分组后写入查询文本）
+_MEMORY_BULK_QUERY = """
+UNWIND $rows AS row
+MERGE (m:Memory {{id: row.id}})
+ON CREATE SET m.created_at = $now
+SET m += row.props{label}
+RETURN count(m) AS count
+"""
+
+# 记忆的实体/链接边：替换为本次给定的集合（与 update_memory 一致）
+_MEMORY_MENTIONS_BULK_QUERY = """
+UNWIND $rows AS row
+MATCH (m:Memory {id: row.id})
+OPTIONAL MATCH (m)-[old:MENTIONS]->(:Entity)
+DELETE old
+WITH DISTINCT m, row
+UNWIND row.entities AS entity_id
+MATCH (e:Entity {id: entity_id})
+MERGE (m)-[:MENTIONS]->(e)
+"""
+
+_MEMORY_LINKS_BULK_QUERY = """
+UNWIND $rows AS row
+MATCH (m:Memory {id: row.id})
+OPTIONAL MATCH (m)-[old:RELATED_TO]->(:Memory)
+DELETE old
+WITH DISTINCT m, row
+UNWIND row.links AS linked_id
+MATCH (l:Memory {id: linked_id})
+WHERE l <> m
+MERGE (m)-[:RELATED_TO]->(l)
+"""
+
+
+def _chunks(rows: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    """按块大小切分行数据"""
+    chunk_size = max(int(chunk_size), 1)
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
 
-def create_entities_batch(entities: List[Entity]) -> int:
+
+def _run_in_transaction(statements: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """在一个显式事务中执行多条语句（失败时回滚）"""
+    tx = graph.begin()
+    try:
+        for query, parameters in statements:
+            tx.run(query, parameters)
+    except Exception:
+        # py2neo 2021 使用 graph.rollback(tx) / graph.commit(tx)，旧版本使用 tx 上的方法
+        if hasattr(graph, "rollback"):
+            graph.rollback(tx)
+        else:
+            tx.rollback()
+        raise
+    if hasattr(graph, "commit"):
+        graph.commit(tx)
+    else:
+        tx.commit()
+
+
+def _run_chunks(
+    chunked_statements: List[List[Tuple[str, Dict[str, Any]]]],
+    row_counts: List[int],
+    operation_name: str,
+) -> int:
     """
-    批量创建实体
+    逐块执行（每块一个事务，瞬时错误按块重试）
+    
+    Args:
+        chunked_statements: 每块要执行的语句列表
+        row_counts: 每块的行数
+        operation_name: 操作名称（日志）
+        
+    Returns:
+        成功写入的行数
+    """
+    written = 0
+    for index, (statements, rows) in enumerate(zip(chunked_statements, row_counts)):
+        try:
+            _execute_with_retry(
+                lambda statements=statements: _run_in_transaction(statements),
+                operation_name=f"{operation_name} chunk {index + 1}/{len(row_counts)}",
+            )
+            written += rows
+        except (AdapterError, AdapterNotAvailableError) as e:
+            logger.error(f"{operation_name}: chunk {index + 1} ({rows} rows) failed: {e}")
+    return written
+
+
+def _entity_row(entity: Entity) -> Dict[str, Any]:
+    return {
+        "id": entity.id,
+        "name": entity.name,
+        "entity_type": entity.entity_type,
+        "description": entity.description,
+        "retrieval_key": entity.retrieval_key,
+        "retrieval_value": entity.retrieval_value,
+    }
+
+
+def _relation_row(relation: Relation) -> Dict[str, Any]:
+    return {
+        "source": relation.source,
+        "target": relation.target,
+        "description": relation.description,
+        "keywords": ",".join(relation.keywords) if relation.keywords else "",
+        "retrieval_key": relation.retrieval_key,
+        "retrieval_value": relation.retrieval_value,
+    }
+
+
+def _memory_properties(memory: Memory) -> Dict[str, Any]:
+    """记忆节点属性（与 create_memory 写入的属性一致）"""
+    metadata = memory.metadata if isinstance(memory.metadata, dict) else {}
+    return {
+        "content": memory.content,
+        "timestamp": memory.timestamp.isoformat() if memory.timestamp else get_current_time(),
+        "memory_type": memory.memory_type.value if memory.memory_type else "",
+        "layer": memory.layer.value if memory.layer else "ltm",
+        "keywords": ",".join(memory.keywords) if memory.keywords else "",
+        "tags": ",".join(memory.tags) if memory.tags else "",
+        "context": memory.context or "",
+        "retrieval_count": memory.retrieval_count,
+        "last_accessed": memory.last_accessed.isoformat() if memory.last_accessed else "",
+        "metadata": json.dumps(memory.metadata, ensure_ascii=False) if memory.metadata else "{}",
+        "source": metadata.get("source", ""),
+        "reasoning": memory.reasoning or "",
+        "decision_trace": json.dumps(memory.decision_trace, ensure_ascii=False) if memory.decision_trace else "",
+    }
+
+
+def create_entities_batch(entities: List[Entity], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    批量创建实体（UNWIND + MERGE，每块一个事务）
     
     Args:
         entities: 实体列表
+        chunk_size: 每个事务写入的实体数（默认500）
         
     Returns:
-        成功创建的数量
+        成功写入的数量（已存在的实体按 MERGE 更新，同样计入）
     """
-    success_count = 0
-    for entity in entities:
-        if create_entity(entity):
-            success_count += 1
-    logger.info(f"Created {success_count}/{len(entities)} entities")
-    return success_count
-
-
-def create_relations_batch(relations: List[Relation]) -> int:
+    if not entities:
+        return 0
+    _ensure_initialized()
+    
+    start_time = time.time()
+    now = get_current_time()
+    chunks = _chunks([_entity_row(entity) for entity in entities], chunk_size)
+    written = _run_chunks(
+        [[(_ENTITY_BULK_QUERY, {"rows": chunk, "now": now})] for chunk in chunks],
+        [len(chunk) for chunk in chunks],
+        "create_entities_batch",
+    )
+    duration = time.time() - start_time
+    logger.info(f"Created {written}/{len(entities)} entities in {len(chunks)} chunks ({duration:.3f}s)")
+    return written
+
+
+def create_relations_batch(relations: List[Relation], chunk_size: int = BULK_CHUNK_SIZE) -> int:
     """
-    批量创建关系
+    批量创建关系（UNWIND + MERGE，每块一个事务）
+    
+    源/目标实体不存在的关系会被跳过（MATCH 不到），调用方应先写入实体。
     
     Args:
         relations: 关系列表
+        chunk_size: 每个事务写入的关系数（默认500）
         
     Returns:
-        成功创建的数量
+        成功提交的关系数量
+    """
+    if not relations:
+        return 0
+    _ensure_initialized()
+    
+    start_time = time.time()
+    now = get_current_time()
+    chunks = _chunks([_relation_row(relation) for relation in relations], chunk_size)
+    written = _run_chunks(
+        [[(_RELATION_BULK_QUERY, {"rows": chunk, "now": now})] for chunk in chunks],
+        [len(chunk) for chunk in chunks],
+        "create_relations_batch",
+    )
+    duration = time.time() - start_time
+    logger.info(f"Created {written}/{len(relations)} relations in {len(chunks)} chunks ({duration:.3f}s)")
+    return written
+
+
+def create_memories_batch(memories: List[Memory], chunk_size: int = BULK_CHUNK_SIZE) -> int:
     """
-    success_count = 0
-    for relation in relations:
-        if create_relation(relation):
-            success_count += 1
-    logger.info(f"Created {success_count}/{len(relations)} relations")
-    return success_count
+    批量创建记忆节点及其实体（MENTIONS）/链接（RELATED_TO）边
+    
+    分两个阶段：先写入所有记忆节点，再写入边，批内记忆之间的链接不受块顺序影响。
+    已存在的记忆按 MERGE 更新属性，其 MENTIONS / RELATED_TO 边替换为本次给定的集合。
+    
+    Args:
+        memories: 记忆列表
+        chunk_size: 每个事务写入的记忆数（默认500）
+        
+    Returns:
+        成功写入的记忆节点数量
+    """
+    if not memories:
+        return 0
+    _ensure_initialized()
+    
+    start_time = time.time()
+    now = get_current_time()
+    
+    # 阶段 1：记忆节点（类型标签不能参数化，按类型分组）
+    statements, row_counts = [], []
+    by_label: Dict[str, List[Dict[str, Any]]] = {}
+    for memory in memories:
+        label = memory.memory_type.value.upper() if memory.memory_type else ""
+        by_label.setdefault(label, []).append({"id": memory.id, "props": _memory_properties(memory)})
+    for label, rows in by_label.items():
+        query = _MEMORY_BULK_QUERY.format(label=f"\nSET m:`{label}`" if label else "")
+        for chunk in _chunks(rows, chunk_size):
+            statements.append([(query, {"rows": chunk, "now": now})])
+            row_counts.append(len(chunk))
+    written = _run_chunks(statements, row_counts, "create_memories_batch")
+    
+    # 阶段 2：实体和链接边（同一块的两类边在一个事务中）
+    edge_rows = [
+        {"id": memory.id, "entities": list(memory.entities or []), "links": [str(l) for l in memory.links or ()]}
+        for memory in memories
+    ]
+    edge_chunks = _chunks(edge_rows, chunk_size)
+    _run_chunks(
+        [
+            [(_MEMORY_MENTIONS_BULK_QUERY, {"rows": chunk}), (_MEMORY_LINKS_BULK_QUERY, {"rows": chunk})]
+            for chunk in edge_chunks
+        ],
+        [len(chunk) for chunk in edge_chunks],
+        "create_memories_batch edges",
+    )
+    
+    duration = time.time() - start_time
+    logger.info(f"Created {written}/{len(memories)} memories in {len(statements)} chunks ({duration:.3f}s)")
+    return written
 
 
 # ==================== 图查询操作 ====================
@@ -730,23 +1004,42 @@ def search_entities_by_text(text: str, limit: int = 10) -> List[Entity]:
     """
     通过文本搜索实体（在名称和描述中搜索）
     
+    优先使用全文索引（entity_fulltext，按相关度排序）；索引不存在时退化为参数化的 CONTAINS 扫描。
+    
     Args:
         text: 搜索文本
         limit: 返回数量限制
         
     Returns:
-        实体列表
+        实体列表（按相关度降序）
     """
+    if not text or not text.strip():
+        return []
     try:
-        query = f"""
-        MATCH (e:Entity)
-        WHERE e.name CONTAINS '{text}' OR e.description CONTAINS '{text}'
-        RETURN e
-        LIMIT {limit}
-        """
-        result = graph.run(query).data()
+        _ensure_initialized()
+        try:
+            records = graph.run(
+                """
+                CALL db.index.fulltext.queryNodes($index, $query) YIELD node AS e, score
+                RETURN e, score
+                ORDER BY score DESC
+                LIMIT $limit
+                """,
+                {"index": ENTITY_FULLTEXT_INDEX, "query": _fulltext_query(text), "limit": limit},
+            ).data()
+        except Exception as e:
+            _log_fulltext_fallback(ENTITY_FULLTEXT_INDEX, e)
+            records = graph.run(
+                """
+                MATCH (e:Entity)
+                WHERE e.name CONTAINS $text OR e.description CONTAINS $text
+                RETURN e
+                LIMIT $limit
+                """,
+                {"text": text, "limit": limit},
+            ).data()
         entities = []
-        for record in result:
+        for record in records:
             node = record["e"]
             entity = Entity(
                 id=node["id"],
@@ -877,6 +1170,196 @@ def create_memory(memory: Memory) -> bool:
         return False
 
 
+def _hydrate_memory(node: Any, entities: List[str], links: List[str]) -> Memory:
+    """
+    由记忆节点属性和已收集的实体/链接 ID 构造 Memory（共享的结果转换）
+    
+    Args:
+        node: Memory 节点（py2neo Node 或属性字典）
+        entities: MENTIONS 指向的实体 ID
+        links: RELATED_TO 指向的记忆 ID
+        
+    Returns:
+        Memory 对象
+    """
+    entities = [entity_id for entity_id in entities or [] if entity_id is not None]
+    links = {memory_id for memory_id in links or [] if memory_id is not None}
+    
+    # 解析 keywords 和 tags
+    keywords_str = node.get("keywords", "")
+    keywords = keywords_str.split(",") if keywords_str else []
+    
+    tags_str = node.get("tags", "")
+    tags = tags_str.split(",") if tags_str else []
+    
+    # 解析 metadata
+    metadata_str = node.get("metadata", "{}")
+    try:
+        metadata = json.loads(metadata_str) if isinstance(metadata_str, str) else metadata_str
+    except:
+        metadata = {}
+    
+    # 解析时间戳
+    timestamp_str = node.get("timestamp", "")
+    timestamp = datetime.fromisoformat(timestamp_str) if timestamp_str else datetime.now()
+    
+    last_accessed_str = node.get("last_accessed", "")
+    last_accessed = datetime.fromisoformat(last_accessed_str) if last_accessed_str else None
+    
+    # 解析 memory_type
+    memory_type_str = node.get("memory_type", "")
+    memory_type = None
+    if memory_type_str:
+        try:
+            memory_type = MemoryType(memory_type_str)
+        except:
+            pass
+    
+    # 解析 layer
+    layer_str = node.get("layer", "ltm")
+    layer = None
+    try:
+        layer = MemoryLayer(layer_str)
+    except:
+        pass
+    
+    # 解析 reasoning 和 decision_trace（Context Graph增强）
+    reasoning = node.get("reasoning") or None
+    decision_trace = None
+    decision_trace_str = node.get("decision_trace", "")
+    
+    # 增强decision_trace反序列化逻辑
+    if decision_trace_str:
+        # 如果已经是dict，直接使用
+        if isinstance(decision_trace_str, dict):
+            decision_trace = decision_trace_str
+        # 如果是字符串，尝试解析JSON
+        elif isinstance(decision_trace_str, str):
+            # 检查是否为空字符串或"None"/"null"
+            if decision_trace_str.strip() and decision_trace_str.strip().lower() not in ["none", "null", ""]:
+                try:
+                    decision_trace = json.loads(decision_trace_str)
+                except json.JSONDecodeError as e:
+                    # 记录解析失败，但不影响其他字段的读取
+                    logger.warning(f"Failed to parse decision_trace JSON for memory {node.get('id', 'unknown')}: {e}")
+                    logger.debug(f"decision_trace_str (first 200 chars): {decision_trace_str[:200]}")
+                    # 尝试修复常见的JSON错误
+                    try:
+                        # 尝试修复单引号、尾随逗号等常见错误
+                        fixed = decision_trace_str.replace("'", '"')
+                        # 移除尾随逗号
+                        fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
+                        decision_trace = json.loads(fixed)
+                        logger.debug(f"Successfully parsed decision_trace after fixing")
+                    except:
+                        decision_trace = None
+                except Exception as e:
+                    logger.warning(f"Unexpected error parsing decision_trace for memory {node.get('id', 'unknown')}: {e}")
+                    decision_trace = None
+    
+    # Fallback: 如果节点的decision_trace字段为空，尝试从metadata中读取
+    if not decision_trace and metadata:
+        decision_trace_from_metadata = metadata.get("decision_trace")
+        if decision_trace_from_metadata:
+            if isinstance(decision_trace_from_metadata, dict):
+                decision_trace = decision_trace_from_metadata
+                logger.debug(f"Retrieved decision_trace from metadata for memory {node.get('id', 'unknown')}")
+            elif isinstance(decision_trace_from_metadata, str):
+                try:
+                    decision_trace = json.loads(decision_trace_from_metadata)
+                    logger.debug(f"Parsed decision_trace from metadata JSON for memory {node.get('id', 'unknown')}")
+                except:
+                    pass
+    
+    # Fallback: 如果仍然没有decision_trace，从metadata中构建
+    if not decision_trace and metadata:
+        has_trace_fields = any([
+            metadata.get("inputs"),
+            metadata.get("rules_applied") or metadata.get("rules"),
+            metadata.get("exceptions"),
+            metadata.get("approvals")
+        ])
+        if has_trace_fields:
+            decision_trace = {
+                "inputs": metadata.get("inputs", []),
+                "rules_applied": metadata.get("rules_applied") or metadata.get("rules", []),
+                "exceptions": metadata.get("exceptions", []),
+                "approvals": metadata.get("approvals", []),
+                "timestamp": metadata.get("timestamp") or node.get("timestamp", ""),
+                "operation_id": metadata.get("operation_id", ""),
+            }
+            logger.debug(f"Constructed decision_trace from metadata fields for memory {node.get('id', 'unknown')}")
+    
+    # Fallback: 如果reasoning为空，也从metadata中读取
+    if not reasoning and metadata:
+        reasoning_from_metadata = metadata.get("reasoning")
+        if reasoning_from_metadata:
+            reasoning = reasoning_from_metadata
+            logger.debug(f"Retrieved reasoning from metadata for memory {node.get('id', 'unknown')}")
+    
+    memory = Memory(
+        id=node["id"],
+        content=node.get("content", ""),
+        timestamp=timestamp,
+        memory_type=memory_type,
+        layer=layer,
+        keywords=keywords,
+        tags=tags,
+        context=node.get("context"),
+        links=links,
+        entities=entities,
+        retrieval_count=node.get("retrieval_count", 0),
+        last_accessed=last_accessed,
+        metadata=metadata,
+        reasoning=reasoning,  # 新增：决策理由
+        decision_trace=decision_trace,  # 新增：决策痕迹
+    )
+    return memory
+
+
+def _hydrating_query(match: str, order_by: str = "m.timestamp DESC", carry: Tuple[str, ...] = ()) -> str:
+    """
+    构造一次往返返回完整记忆的查询
+    
+    先按 match 子句选出记忆节点（变量名 m）并排序截断到 $limit，再用
+    OPTIONAL MATCH ... collect() 收集每条记忆的实体和链接 ID，避免逐条 get_memory。
+    
+    Args:
+        match: 选出记忆节点 m 的子句（可引入需要保留的变量，如 score）
+        order_by: 排序表达式（只能引用 m 和 carry 中的变量）
+        carry: 需要随结果返回的额外变量
+        
+    Returns:
+        Cypher 查询（参数 $limit 和 match 中使用的参数）
+    """
+    extra = "".join(f", {name}" for name in carry)
+    return f"""
+    {match}
+    WITH m{extra}
+    ORDER BY {order_by}
+    LIMIT $limit
+    OPTIONAL MATCH (m)-[:MENTIONS]->(e:Entity)
+    WITH m{extra}, collect(DISTINCT e.id) AS entities
+    OPTIONAL MATCH (m)-[:RELATED_TO]->(l:Memory)
+    RETURN m{extra}, entities, collect(DISTINCT l.id) AS links
+    ORDER BY {order_by}
+    """
+
+
+def _run_hydrated(cypher: str, **parameters: Any) -> List[Tuple[Memory, Dict[str, Any]]]:
+    """执行 _hydrating_query 构造的查询，返回 (记忆, 原始记录) 列表"""
+    results = []
+    for record in graph.run(cypher, parameters).data():
+        node = record.get("m")
+        if node is None:
+            continue
+        try:
+            results.append((_hydrate_memory(node, record.get("entities"), record.get("links")), record))
+        except Exception as e:
+            logger.warning(f"Failed to hydrate memory {node.get('id', 'unknown')}: {e}")
+    return results
+
+
 def get_memory(memory_id: str) -> Optional[Memory]:
     """
     获取记忆节点
@@ -899,150 +1382,11 @@ def get_memory(memory_id: str) -> Optional[Memory]:
             logger.error("Neo4j node_matcher or graph not initialized")
             return None
         
-        node = node_matcher.match("Memory", id=memory_id).first()
-        if not node:
-            return None
-        
-        # 获取关联的实体
-        entities = []
-        for rel in graph.match((node, None), "MENTIONS"):
-            entities.append(rel.end_node["id"])
-        
-        # 获取关联的记忆（links）
-        links = set()
-        for rel in graph.match((node, None), "RELATED_TO"):
-            links.add(rel.end_node["id"])
-        
-        # 解析 keywords 和 tags
-        keywords_str = node.get("keywords", "")
-        keywords = keywords_str.split(",") if keywords_str else []
-        
-        tags_str = node.get("tags", "")
-        tags = tags_str.split(",") if tags_str else []
-        
-        # 解析 metadata
-        metadata_str = node.get("metadata", "{}")
-        try:
-            metadata = json.loads(metadata_str) if isinstance(metadata_str, str) else metadata_str
-        except:
-            metadata = {}
-        
-        # 解析时间戳
-        timestamp_str = node.get("timestamp", "")
-        timestamp = datetime.fromisoformat(timestamp_str) if timestamp_str else datetime.now()
-        
-        last_accessed_str = node.get("last_accessed", "")
-        last_accessed = datetime.fromisoformat(last_accessed_str) if last_accessed_str else None
-        
-        # 解析 memory_type
-        memory_type_str = node.get("memory_type", "")
-        memory_type = None
-        if memory_type_str:
-            try:
-                memory_type = MemoryType(memory_type_str)
-            except:
-                pass
-        
-        # 解析 layer
-        layer_str = node.get("layer", "ltm")
-        layer = None
-        try:
-            layer = MemoryLayer(layer_str)
-        except:
-            pass
-        
-        # 解析 reasoning 和 decision_trace（Context Graph增强）
-        reasoning = node.get("reasoning") or None
-        decision_trace = None
-        decision_trace_str = node.get("decision_trace", "")
-        
-        # 增强decision_trace反序列化逻辑
-        if decision_trace_str:
-            # 如果已经是dict，直接使用
-            if isinstance(decision_trace_str, dict):
-                decision_trace = decision_trace_str
-            # 如果是字符串，尝试解析JSON
-            elif isinstance(decision_trace_str, str):
-                # 检查是否为空字符串或"None"/"null"
-                if decision_trace_str.strip() and decision_trace_str.strip().lower() not in ["none", "null", ""]:
-                    try:
-                        decision_trace = json.loads(decision_trace_str)
-                    except json.JSONDecodeError as e:
-                        # 记录解析失败，但不影响其他字段的读取
-                        logger.warning(f"Failed to parse decision_trace JSON for memory {node.get('id', 'unknown')}: {e}")
-                        logger.debug(f"decision_trace_str (first 200 chars): {decision_trace_str[:200]}")
-                        # 尝试修复常见的JSON错误
-                        try:
-                            # 尝试修复单引号、尾随逗号等常见错误
-                            fixed = decision_trace_str.replace("'", '"')
-                            # 移除尾随逗号
-                            fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
-                            decision_trace = json.loads(fixed)
-                            logger.debug(f"Successfully parsed decision_trace after fixing")
-                        except:
-                            decision_trace = None
-                    except Exception as e:
-                        logger.warning(f"Unexpected error parsing decision_trace for memory {node.get('id', 'unknown')}: {e}")
-                        decision_trace = None
-        
-        # Fallback: 如果节点的decision_trace字段为空，尝试从metadata中读取
-        if not decision_trace and metadata:
-            decision_trace_from_metadata = metadata.get("decision_trace")
-            if decision_trace_from_metadata:
-                if isinstance(decision_trace_from_metadata, dict):
-                    decision_trace = decision_trace_from_metadata
-                    logger.debug(f"Retrieved decision_trace from metadata for memory {node.get('id', 'unknown')}")
-                elif isinstance(decision_trace_from_metadata, str):
-                    try:
-                        decision_trace = json.loads(decision_trace_from_metadata)
-                        logger.debug(f"Parsed decision_trace from metadata JSON for memory {node.get('id', 'unknown')}")
-                    except:
-                        pass
-        
-        # Fallback: 如果仍然没有decision_trace，从metadata中构建
-        if not decision_trace and metadata:
-            has_trace_fields = any([
-                metadata.get("inputs"),
-                metadata.get("rules_applied") or metadata.get("rules"),
-                metadata.get("exceptions"),
-                metadata.get("approvals")
-            ])
-            if has_trace_fields:
-                decision_trace = {
-                    "inputs": metadata.get("inputs", []),
-                    "rules_applied": metadata.get("rules_applied") or metadata.get("rules", []),
-                    "exceptions": metadata.get("exceptions", []),
-                    "approvals": metadata.get("approvals", []),
-                    "timestamp": metadata.get("timestamp") or node.get("timestamp", ""),
-                    "operation_id": metadata.get("operation_id", ""),
-                }
-                logger.debug(f"Constructed decision_trace from metadata fields for memory {node.get('id', 'unknown')}")
-        
-        # Fallback: 如果reasoning为空，也从metadata中读取
-        if not reasoning and metadata:
-            reasoning_from_metadata = metadata.get("reasoning")
-            if reasoning_from_metadata:
-                reasoning = reasoning_from_metadata
-                logger.debug(f"Retrieved reasoning from metadata for memory {node.get('id', 'unknown')}")
-        
-        memory = Memory(
-            id=node["id"],
-            content=node.get("content", ""),
-            timestamp=timestamp,
-            memory_type=memory_type,
-            layer=layer,
-            keywords=keywords,
-            tags=tags,
-            context=node.get("context"),
-            links=links,
-            entities=entities,
-            retrieval_count=node.get("retrieval_count", 0),
-            last_accessed=last_accessed,
-            metadata=metadata,
-            reasoning=reasoning,  # 新增：决策理由
-            decision_trace=decision_trace,  # 新增：决策痕迹
+        # 一次查询返回节点及其实体/链接 ID
+        results = _run_hydrated(
+            _hydrating_query("MATCH (m:Memory {id: $memory_id})"), memory_id=memory_id, limit=1
         )
-        return memory
+        return results[0][0] if results else None
     except Exception as e:
         logger.error(f"Failed to get memory {memory_id}: {e}", exc_info=True)
         return None
@@ -1180,6 +1524,46 @@ def delete_memory(memory_id: str) -> bool:
         return False
 
 
+def get_memories(memory_ids: List[str]) -> List[Memory]:
+    """
+    按 ID 批量获取记忆（一次查询返回完整记忆，不存在的 ID 被忽略）
+    
+    Args:
+        memory_ids: 记忆ID列表
+        
+    Returns:
+        记忆列表（按时间倒序）
+    """
+    memory_ids = list(dict.fromkeys(memory_ids or []))
+    if not memory_ids:
+        return []
+    try:
+        _ensure_initialized()
+        query = _hydrating_query("MATCH (m:Memory) WHERE m.id IN $memory_ids")
+        return [memory for memory, _ in _run_hydrated(query, memory_ids=memory_ids, limit=len(memory_ids))]
+    except Exception as e:
+        logger.error(f"Failed to get {len(memory_ids)} memories: {e}", exc_info=True)
+        return []
+
+
+def get_recent_memories(limit: int = 100) -> List[Memory]:
+    """
+    获取最近的记忆（按时间倒序，一次查询返回完整记忆）
+    
+    Args:
+        limit: 返回数量限制
+        
+    Returns:
+        记忆列表
+    """
+    try:
+        _ensure_initialized()
+        return [memory for memory, _ in _run_hydrated(_hydrating_query("MATCH (m:Memory)"), limit=limit)]
+    except Exception as e:
+        logger.error(f"Failed to get recent memories: {e}", exc_info=True)
+        return []
+
+
 def search_memories_by_type(memory_type: MemoryType, limit: int = 100) -> List[Memory]:
     """
     根据类型查询记忆
@@ -1192,21 +1576,9 @@ def search_memories_by_type(memory_type: MemoryType, limit: int = 100) -> List[M
         记忆列表
     """
     try:
-        type_value = memory_type.value
-        query = f"""
-        MATCH (m:Memory)
-        WHERE m.memory_type = '{type_value}'
-        RETURN m
-        ORDER BY m.timestamp DESC
-        LIMIT {limit}
-        """
-        result = graph.run(query).data()
-        memories = []
-        for record in result:
-            memory = get_memory(record["m"]["id"])
-            if memory:
-                memories.append(memory)
-        return memories
+        _ensure_initialized()
+        query = _hydrating_query("MATCH (m:Memory) WHERE m.memory_type = $memory_type")
+        return [memory for memory, _ in _run_hydrated(query, memory_type=memory_type.value, limit=limit)]
     except Exception as e:
         logger.error(f"Failed to search memories by type '{memory_type}': {e}", exc_info=True)
         return []
@@ -1224,19 +1596,9 @@ def search_memories_by_entity(entity_id: str, limit: int = 100) -> List[Memory]:
         记忆列表
     """
     try:
-        query = f"""
-        MATCH (e:Entity {{id: '{entity_id}'}})<-[:MENTIONS]-(m:Memory)
-        RETURN m
-        ORDER BY m.timestamp DESC
-        LIMIT {limit}
-        """
-        result = graph.run(query).data()
-        memories = []
-        for record in result:
-            memory = get_memory(record["m"]["id"])
-            if memory:
-                memories.append(memory)
-        return memories
+        _ensure_initialized()
+        query = _hydrating_query("MATCH (:Entity {id: $entity_id})<-[:MENTIONS]-(m:Memory)")
+        return [memory for memory, _ in _run_hydrated(query, entity_id=entity_id, limit=limit)]
     except Exception as e:
         logger.error(f"Failed to search memories by entity '{entity_id}': {e}", exc_info=True)
         return []
@@ -1255,20 +1617,13 @@ def search_memories_by_time_range(start_time: str, end_time: str, limit: int = 1
         记忆列表
     """
     try:
-        query = f"""
-        MATCH (m:Memory)
-        WHERE m.timestamp >= '{start_time}' AND m.timestamp <= '{end_time}'
-        RETURN m
-        ORDER BY m.timestamp DESC
-        LIMIT {limit}
-        """
-        result = graph.run(query).data()
-        memories = []
-        for record in result:
-            memory = get_memory(record["m"]["id"])
-            if memory:
-                memories.append(memory)
-        return memories
+        _ensure_initialized()
+        query = _hydrating_query(
+            "MATCH (m:Memory) WHERE m.timestamp >= $start_time AND m.timestamp <= $end_time"
+        )
+        return [
+            memory for memory, _ in _run_hydrated(query, start_time=start_time, end_time=end_time, limit=limit)
+        ]
     except Exception as e:
         logger.error(f"Failed to search memories by time range: {e}", exc_info=True)
         return []
@@ -1276,29 +1631,39 @@ def search_memories_by_time_range(start_time: str, end_time: str, limit: int = 1
 
 def search_memories_by_text(text: str, limit: int = 100) -> List[Memory]:
     """
-    通过文本搜索记忆（在内容中搜索）
+    通过文本搜索记忆（在内容和关键词中搜索）
+    
+    优先使用全文索引（memory_fulltext，按相关度排序，分数写入 metadata["fulltext_score"]）；
+    索引不存在时退化为参数化的 CONTAINS 扫描（按时间倒序）。
     
     Args:
-        text: 搜索文本
+        text: 搜索文本（按字面匹配，Lucene 语法字符会被转义）
         limit: 返回数量限制
         
     Returns:
         记忆列表
     """
+    if not text or not text.strip():
+        return []
     try:
-        query = f"""
-        MATCH (m:Memory)
-        WHERE m.content CONTAINS '{text}'
-        RETURN m
-        ORDER BY m.timestamp DESC
-        LIMIT {limit}
-        """
-        result = graph.run(query).data()
+        _ensure_initialized()
+        try:
+            query = _hydrating_query(
+                "CALL db.index.fulltext.queryNodes($index, $query) YIELD node AS m, score",
+                order_by="score DESC, m.timestamp DESC",
+                carry=("score",),
+            )
+            results = _run_hydrated(query, index=MEMORY_FULLTEXT_INDEX, query=_fulltext_query(text), limit=limit)
+        except Exception as e:
+            _log_fulltext_fallback(MEMORY_FULLTEXT_INDEX, e)
+            query = _hydrating_query(
+                "MATCH (m:Memory) WHERE m.content CONTAINS $text OR m.keywords CONTAINS $text"
+            )
+            return [memory for memory, _ in _run_hydrated(query, text=text, limit=limit)]
         memories = []
-        for record in result:
-            memory = get_memory(record["m"]["id"])
-            if memory:
-                memories.append(memory)
+        for memory, record in results:
+            memory.metadata["fulltext_score"] = float(record.get("score") or 0.0)
+            memories.append(memory)
         return memories
     except Exception as e:
         logger.error(f"Failed to search memories by text '{text}': {e}", exc_info=True)
@@ -1336,6 +1701,9 @@ def create_memory_indexes() -> bool:
     """
     创建 Memory 节点的索引（提升查询性能）
     
+    包括属性索引，以及记忆内容/关键词和实体名称/描述上的全文索引
+    （分析器由 NEO4J_FULLTEXT_ANALYZER 指定，默认 cjk）。
+    
     Returns:
         是否成功创建索引
     """
@@ -1355,6 +1723,25 @@ def create_memory_indexes() -> bool:
             except Exception as e:
                 logger.warning(f"Index on {label}.{property_name} may already exist: {e}")
         
+        # 全文索引（search_memories_by_text / search_entities_by_text 使用）
+        fulltext_indexes = [
+            (MEMORY_FULLTEXT_INDEX, "Memory", ["content", "keywords"]),
+            (ENTITY_FULLTEXT_INDEX, "Entity", ["name", "description"]),
+        ]
+        analyzer = FULLTEXT_ANALYZER if re.fullmatch(r"[A-Za-z0-9_\-]+", FULLTEXT_ANALYZER) else "cjk"
+        for index_name, label, properties in fulltext_indexes:
+            try:
+                fields = ", ".join(f"n.{property_name}" for property_name in properties)
+                query = (
+                    f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS "
+                    f"FOR (n:{label}) ON EACH [{fields}] "
+                    f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{analyzer}'}}}}"
+                )
+                graph.run(query)
+                logger.info(f"Created fulltext index {index_name} ({analyzer})")
+            except Exception as e:
+                logger.warning(f"Fulltext index {index_name} may already exist: {e}")
+        
         return True
     except Exception as e:
         logger.error(f"Failed to create memory indexes: {e}", exc_info=True)
@@ -15,17 +15,20 @@ UniMem Redis 数据库操作
 - 线程安全（连接池线程安全）
 - 统一异常处理（使用适配器异常体系）
 - 性能监控（操作耗时统计）
+- 紧凑二进制编码（msgpack / zstd，见 memory_codec），兼容旧 JSON 值
+
+兼容性：需要 Redis >= 2.6（准入、删除与访问统计写回均使用 Lua 脚本，
+不依赖 6.0 才引入的 SET ... KEEPTTL）；不支持 Redis Cluster 跨槽执行。
 """
 
 import os
-import json
 import time
 import logging
 import threading
+import weakref
 from typing import List, Optional, Dict, Any, Set
 from datetime import datetime
-from dataclasses import asdict, is_dataclass, dataclass, field
-from enum import Enum
+from dataclasses import dataclass, field
 
 try:
     import redis
@@ -41,6 +44,7 @@ except ImportError:
     TimeoutError = Exception
 
 from .memory_types import Memory, MemoryType, MemoryLayer, Context
+from .memory_codec import memory_to_dict, dict_to_memory, encode_memory, decode_memory
 from .adapters.base import (
     AdapterError,
     AdapterNotAvailableError,
@@ -226,57 +230,289 @@ def get_current_time() -> str:
     return datetime.now().isoformat()
 
 
-def _memory_to_dict(memory: Memory) -> Dict[str, Any]:
-    """将 Memory 对象转换为字典（用于 JSON 序列化）"""
-    result = {}
-    for key, value in asdict(memory).items():
-        if isinstance(value, datetime):
-            result[key] = value.isoformat()
-        elif isinstance(value, (set, frozenset)):
-            result[key] = list(value)
-        elif isinstance(value, Enum):
-            result[key] = value.value
-        elif is_dataclass(value):
-            result[key] = _memory_to_dict(value)
-        else:
-            result[key] = value
-    return result
+# 序列化辅助函数保留在本模块命名空间（兼容旧调用方）
+_memory_to_dict = memory_to_dict
+_dict_to_memory = dict_to_memory
 
+# 二进制孪生客户端缓存（按连接池）
+_binary_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_binary_clients_lock = threading.Lock()
 
-def _dict_to_memory(data: Dict[str, Any]) -> Memory:
-    """将字典转换为 Memory 对象"""
-    # 处理 timestamp
-    if "timestamp" in data and isinstance(data["timestamp"], str):
-        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
-    
-    # 处理 last_accessed
-    if "last_accessed" in data and isinstance(data["last_accessed"], str):
-        data["last_accessed"] = datetime.fromisoformat(data["last_accessed"])
+
+def _binary_client(client: Any) -> Any:
+    """
+    获取与 client 共享同一服务器、但不自动解码响应的客户端
     
-    # 处理 memory_type
-    if "memory_type" in data and isinstance(data["memory_type"], str):
-        try:
-            data["memory_type"] = MemoryType(data["memory_type"])
-        except ValueError:
-            data["memory_type"] = None
+    记忆值可能是二进制编码（msgpack / zstd），decode_responses=True 的客户端
+    读取时会按 UTF-8 解码失败，因此读取记忆值时使用二进制孪生客户端；
+    写入时 bytes 值可直接经由原客户端发送。
     
-    # 处理 layer
-    if "layer" in data and isinstance(data["layer"], str):
-        try:
-            data["layer"] = MemoryLayer(data["layer"])
-        except ValueError:
-            data["layer"] = MemoryLayer.LTM
+    Args:
+        client: Redis 客户端
+        
+    Returns:
+        decode_responses=False 的客户端（按连接池缓存）
+    """
+    pool = getattr(client, "connection_pool", None)
+    if pool is None or not pool.connection_kwargs.get("decode_responses"):
+        return client
+    with _binary_clients_lock:
+        binary = _binary_clients.get(pool)
+        if binary is None:
+            kwargs = dict(pool.connection_kwargs)
+            kwargs["decode_responses"] = False
+            binary_pool = redis.ConnectionPool(
+                connection_class=pool.connection_class,
+                max_connections=pool.max_connections,
+                **kwargs
+            )
+            binary = redis.Redis(connection_pool=binary_pool)
+            _binary_clients[pool] = binary
+        return binary
+
+
+def _encode_memory(memory: Memory) -> Any:
+    """序列化记忆（存入 Redis 的值，格式由 REDIS_MEMORY_CODEC 决定）"""
+    return encode_memory(memory)
+
+
+def _decode_memory(raw: Any) -> Memory:
+    """反序列化 Redis 中的记忆值（按头字节分派，兼容旧 JSON 值）"""
+    return decode_memory(raw)
+
+
+def _get_many(layer: str, memory_ids: List[str], client: Any, refresh_access: bool = True) -> List[Memory]:
+    """
+    批量读取某一层的记忆（一次 MGET + 一次脚本调用写回访问统计）
     
-    # 处理 links (list -> set)
-    if "links" in data and isinstance(data["links"], list):
-        data["links"] = set(data["links"])
+    写回经 _REFRESH_ACCESS_LUA 在服务端比较后写入：读取后被其他进程改写、
+    删除或已过期的键保持不变，避免用旧快照覆盖较新的值。
     
-    return Memory(**data)
+    Args:
+        layer: 层前缀（foa / da）
+        memory_ids: 记忆 ID 列表（重复 ID 只读取一次）
+        client: Redis 客户端
+        refresh_access: 是否更新并写回访问统计（last_accessed / retrieval_count）
+        
+    Returns:
+        按输入顺序排列的记忆列表（已过期或不存在的跳过）
+    """
+    memory_ids = list(dict.fromkeys(memory_ids))
+    if not memory_ids:
+        return []
+    keys = [f"{layer}:memory:{memory_id}" for memory_id in memory_ids]
+    values = _binary_client(client).mget(keys)
+    
+    memories = []
+    now = datetime.now()
+    refresh_keys: List[str] = []
+    refresh_args: List[Any] = []
+    for key, value in zip(keys, values):
+        if not value:
+            continue
+        try:
+            memory = _decode_memory(value)
+        except Exception as e:
+            logger.warning(f"Failed to decode {key}: {e}")
+            continue
+        memories.append(memory)
+        if refresh_access:
+            memory.last_accessed = now
+            memory.retrieval_count += 1
+            refresh_keys.append(key)
+            refresh_args.extend([value, _encode_memory(memory)])
+    if refresh_keys:
+        _script(client, _REFRESH_ACCESS_LUA)(keys=refresh_keys, args=refresh_args)
+    return memories
+
+
+# 访问统计写回：仅当值仍等于读取时的快照才写入，并保留剩余过期时间
+# KEYS: memory_key...
+# ARGV: 每个键依次为 读取时的值, 新值
+_REFRESH_ACCESS_LUA = """
+local written = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[2 * i - 1] then
+        local pttl = redis.call('PTTL', key)
+        if pttl > 0 then
+            redis.call('SET', key, ARGV[2 * i], 'PX', pttl)
+            written = written + 1
+        elseif pttl == -1 then
+            redis.call('SET', key, ARGV[2 * i])
+            written = written + 1
+        end
+    end
+end
+return written
+"""
+
+
+# ==================== 原子准入脚本（Lua） ====================
+#
+# FoA/DA 的写入涉及记忆值、最近列表、会话/类型/标签索引和容量裁剪多个键，
+# 逐条命令执行时多个进程的写入会交错，留下指向已过期或已淘汰记忆的 ID。
+# 以下脚本在服务端一次执行完成：
+# - foa:expiry / da:expiry：ID -> 过期时间（有序集合），准入时先清理已过期的 ID
+# - foa:session_of：ID -> 会话（哈希），淘汰时据此从会话列表移除
+# - da:index:{id}：该记忆所在的索引集合键，淘汰/删除时据此清理索引
+# 脚本内按前缀拼接被淘汰记忆的键，适用于单实例 Redis（不支持 Cluster 跨槽）。
+
+_FOA_DROP_LUA = """
+local function drop(id)
+    redis.call('LREM', KEYS[2], 0, id)
+    local session = redis.call('HGET', KEYS[4], id)
+    if session then
+        redis.call('LREM', 'foa:session:' .. session, 0, id)
+        redis.call('HDEL', KEYS[4], id)
+    end
+    redis.call('ZREM', KEYS[3], id)
+    return redis.call('DEL', 'foa:memory:' .. id)
+end
+"""
+
+# KEYS: memory_key, list_key, expiry_key, session_of_key[, session_key]
+# ARGV: id, payload, ttl, now, max_memories, max_session_memories
+_FOA_ADMIT_LUA = _FOA_DROP_LUA + """
+local id, ttl, now = ARGV[1], tonumber(ARGV[3]), tonumber(ARGV[4])
+local max_memories, max_session = tonumber(ARGV[5]), tonumber(ARGV[6])
+local evicted = {}
+for _, expired in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+    if expired ~= id then
+        drop(expired)
+        table.insert(evicted, expired)
+    end
+end
+local previous = redis.call('HGET', KEYS[4], id)
+if previous then
+    redis.call('LREM', 'foa:session:' .. previous, 0, id)
+    redis.call('HDEL', KEYS[4], id)
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ttl)
+redis.call('LREM', KEYS[2], 0, id)
+redis.call('LPUSH', KEYS[2], id)
+redis.call('ZADD', KEYS[3], now + ttl, id)
+if KEYS[5] then
+    local session = string.sub(KEYS[5], string.len('foa:session:') + 1)
+    redis.call('HSET', KEYS[4], id, session)
+    redis.call('LPUSH', KEYS[5], id)
+    -- 超出会话容量被裁掉的 ID 同时删除其会话映射（记忆本身仍在 FoA 中）
+    for _, trimmed in ipairs(redis.call('LRANGE', KEYS[5], max_session, -1)) do
+        if redis.call('HGET', KEYS[4], trimmed) == session then
+            redis.call('HDEL', KEYS[4], trimmed)
+        end
+    end
+    redis.call('LTRIM', KEYS[5], 0, max_session - 1)
+    redis.call('EXPIRE', KEYS[5], ttl)
+end
+for _, victim in ipairs(redis.call('LRANGE', KEYS[2], max_memories, -1)) do
+    drop(victim)
+    table.insert(evicted, victim)
+end
+for i = 2, 4 do
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+return evicted
+"""
+
+# KEYS: memory_key, list_key, expiry_key, session_of_key
+# ARGV: id
+_FOA_REMOVE_LUA = _FOA_DROP_LUA + """
+return drop(ARGV[1])
+"""
+
+_DA_DROP_LUA = """
+local function drop(id)
+    local index_key = 'da:index:' .. id
+    for _, key in ipairs(redis.call('SMEMBERS', index_key)) do
+        redis.call('SREM', key, id)
+    end
+    redis.call('DEL', index_key)
+    redis.call('SREM', KEYS[2], id)
+    redis.call('ZREM', KEYS[3], id)
+    return redis.call('DEL', 'da:memory:' .. id)
+end
+"""
+
+# KEYS: memory_key, set_key, expiry_key, index_key, 索引集合键...
+# ARGV: id, payload, ttl, now, max_memories
+_DA_ADMIT_LUA = _DA_DROP_LUA + """
+local id, ttl, now = ARGV[1], tonumber(ARGV[3]), tonumber(ARGV[4])
+local max_memories = tonumber(ARGV[5])
+local evicted = {}
+for _, expired in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+    if expired ~= id then
+        drop(expired)
+        table.insert(evicted, expired)
+    end
+end
+-- 先清理旧索引（类型/标签可能已变化）
+for _, key in ipairs(redis.call('SMEMBERS', KEYS[4])) do
+    redis.call('SREM', key, id)
+end
+redis.call('DEL', KEYS[4])
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ttl)
+redis.call('SADD', KEYS[2], id)
+redis.call('ZADD', KEYS[3], now + ttl, id)
+for i = 5, #KEYS do
+    redis.call('SADD', KEYS[i], id)
+    redis.call('EXPIRE', KEYS[i], ttl)
+    redis.call('SADD', KEYS[4], KEYS[i])
+end
+redis.call('EXPIRE', KEYS[4], ttl)
+-- 超出容量时淘汰最早过期的记忆
+local overflow = redis.call('ZCARD', KEYS[3]) - max_memories
+if overflow > 0 then
+    for _, victim in ipairs(redis.call('ZRANGE', KEYS[3], 0, overflow - 1)) do
+        drop(victim)
+        table.insert(evicted, victim)
+    end
+end
+redis.call('EXPIRE', KEYS[2], ttl)
+redis.call('EXPIRE', KEYS[3], ttl)
+return evicted
+"""
+
+# KEYS: memory_key, set_key, expiry_key
+# ARGV: id
+_DA_REMOVE_LUA = _DA_DROP_LUA + """
+return drop(ARGV[1])
+"""
+
+FOA_MAX_MEMORIES = 1000
+FOA_MAX_SESSION_MEMORIES = 500
+DA_MAX_MEMORIES = 10000
+
+# 已注册脚本缓存（按连接池；Script 对象内部缓存 SHA，使用 EVALSHA 执行）
+_scripts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_scripts_lock = threading.Lock()
+
+
+def _script(client: Any, source: str) -> Any:
+    """获取在 client 上注册的 Lua 脚本"""
+    pool = client.connection_pool
+    with _scripts_lock:
+        registered = _scripts.setdefault(pool, {})
+        script = registered.get(source)
+        if script is None:
+            script = client.register_script(source)
+            registered[source] = script
+        return script
+
+
+def _decode_ids(values: List[Any]) -> List[str]:
+    """脚本返回的 ID 列表（客户端可能不自动解码）"""
+    return [value.decode("utf-8") if isinstance(value, bytes) else value for value in values]
 
 
 # ==================== FoA (Focus of Attention) 层操作 ====================
 
-def add_to_foa(memory: Memory, client: Optional[Any] = None, ttl: int = 3600) -> bool:
+def add_to_foa(
+    memory: Memory,
+    client: Optional[Any] = None,
+    ttl: int = 3600,
+    max_memories: int = FOA_MAX_MEMORIES,
+    max_session_memories: int = FOA_MAX_SESSION_MEMORIES,
+) -> bool:
     """
     添加记忆到 FoA（工作记忆层，带重试）
     
@@ -284,11 +520,14 @@ def add_to_foa(memory: Memory, client: Optional[Any] = None, ttl: int = 3600) ->
     - 临时存储，高频访问
     - 自动过期（默认1小时）
     - 使用列表存储最近访问的记忆
+    - 原子准入：写入、列表更新、容量淘汰（删除被淘汰记忆）在一个 Lua 脚本中完成
     
     Args:
         memory: Memory 对象
         client: Redis 客户端（可选，使用默认客户端）
         ttl: 过期时间（秒），默认3600秒（1小时）
+        max_memories: FoA 记忆数量上限（默认1000），超出时淘汰最旧的记忆
+        max_session_memories: 每个会话列表保留的记忆数量（默认500）
         
     Returns:
         是否成功添加
@@ -318,30 +557,21 @@ def add_to_foa(memory: Memory, client: Optional[Any] = None, ttl: int = 3600) ->
     
     try:
         def add_operation():
-            # 1. 存储记忆对象（JSON）
-            memory_key = f"foa:memory:{memory.id}"
-            memory_data = _memory_to_dict(memory)
-            client.setex(memory_key, ttl, json.dumps(memory_data, ensure_ascii=False))
-            
-            # 2. 添加到 FoA 记忆列表（最近访问的记忆）
-            list_key = "foa:memories"
-            client.lpush(list_key, memory.id)
-            client.expire(list_key, ttl)
-            
-            # 3. 限制列表长度（保留最近1000个）
-            client.ltrim(list_key, 0, 999)
-            
-            # 4. 如果有关联的会话，添加到会话列表
+            # 记忆值、最近列表、会话列表、容量裁剪在一个脚本中原子完成
+            keys = [f"foa:memory:{memory.id}", "foa:memories", "foa:expiry", "foa:session_of"]
             if memory.metadata.get("session_id"):
-                session_key = f"foa:session:{memory.metadata['session_id']}"
-                client.lpush(session_key, memory.id)
-                client.expire(session_key, ttl)
-                client.ltrim(session_key, 0, 499)  # 每个会话保留最近500个
+                keys.append(f"foa:session:{memory.metadata['session_id']}")
+            return _decode_ids(_script(client, _FOA_ADMIT_LUA)(
+                keys=keys,
+                args=[memory.id, _encode_memory(memory), int(ttl), time.time(),
+                      max_memories, max_session_memories],
+                client=client,
+            ))
         
-        _execute_with_retry(add_operation, operation_name="add_to_foa")
+        evicted = _execute_with_retry(add_operation, operation_name="add_to_foa")
         
         duration = time.time() - start_time
-        logger.debug(f"Added memory {memory.id} to FoA (time: {duration:.3f}s)")
+        logger.debug(f"Added memory {memory.id} to FoA, evicted {len(evicted)} (time: {duration:.3f}s)")
         return True
     except (AdapterError, AdapterNotAvailableError):
         raise
@@ -374,29 +604,40 @@ def get_from_foa(memory_id: str, client: Optional[Any] = None) -> Optional[Memor
         return None
     
     try:
-        memory_key = f"foa:memory:{memory_id}"
-        memory_data = client.get(memory_key)
-        if not memory_data:
-            return None
-        
-        data = json.loads(memory_data)
-        memory = _dict_to_memory(data)
-        
-        # 更新访问统计
-        memory.last_accessed = datetime.now()
-        memory.retrieval_count += 1
-        
-        # 更新存储
-        ttl = client.ttl(memory_key)
-        if ttl > 0:
-            client.setex(memory_key, ttl, json.dumps(_memory_to_dict(memory), ensure_ascii=False))
-        
-        return memory
+        # 读取并更新访问统计（保留剩余过期时间）
+        memories = _get_many("foa", [memory_id], client)
+        return memories[0] if memories else None
     except Exception as e:
         logger.error(f"Failed to get memory {memory_id} from FoA: {e}", exc_info=True)
         return None
 
 
+def get_many_from_foa(memory_ids: List[str], client: Optional[Any] = None, refresh_access: bool = True) -> List[Memory]:
+    """
+    批量从 FoA 获取记忆（MGET + 流水线写回，固定两次往返）
+    
+    Args:
+        memory_ids: 记忆ID列表
+        client: Redis 客户端（可选）
+        refresh_access: 是否更新访问统计
+        
+    Returns:
+        按输入顺序排列的记忆列表（不存在的跳过）
+    """
+    if not REDIS_AVAILABLE or not memory_ids:
+        return []
+    
+    client = client or get_redis_client()
+    if not client:
+        return []
+    
+    try:
+        return _get_many("foa", memory_ids, client, refresh_access=refresh_access)
+    except Exception as e:
+        logger.error(f"Failed to get {len(memory_ids)} memories from FoA: {e}", exc_info=True)
+        return []
+
+
 def remove_from_foa(memory_id: str, client: Optional[Any] = None) -> bool:
     """
     从 FoA 移除记忆
@@ -416,13 +657,12 @@ def remove_from_foa(memory_id: str, client: Optional[Any] = None) -> bool:
         return False
     
     try:
-        # 删除记忆对象
-        memory_key = f"foa:memory:{memory_id}"
-        client.delete(memory_key)
-        
-        # 从列表中移除
-        list_key = "foa:memories"
-        client.lrem(list_key, 0, memory_id)
+        # 原子删除记忆对象，并从最近列表和会话列表中移除
+        _script(client, _FOA_REMOVE_LUA)(
+            keys=[f"foa:memory:{memory_id}", "foa:memories", "foa:expiry", "foa:session_of"],
+            args=[memory_id],
+            client=client,
+        )
         
         logger.debug(f"Removed memory {memory_id} from FoA")
         return True
@@ -453,13 +693,7 @@ def get_foa_memories(limit: int = 100, client: Optional[Any] = None) -> List[Mem
         list_key = "foa:memories"
         memory_ids = client.lrange(list_key, 0, limit - 1)
         
-        memories = []
-        for memory_id in memory_ids:
-            memory = get_from_foa(memory_id, client)
-            if memory:
-                memories.append(memory)
-        
-        return memories
+        return get_many_from_foa(memory_ids, client)
     except Exception as e:
         logger.error(f"Failed to get FoA memories: {e}", exc_info=True)
         return []
@@ -488,13 +722,7 @@ def get_foa_memories_by_session(session_id: str, limit: int = 100, client: Optio
         session_key = f"foa:session:{session_id}"
         memory_ids = client.lrange(session_key, 0, limit - 1)
         
-        memories = []
-        for memory_id in memory_ids:
-            memory = get_from_foa(memory_id, client)
-            if memory:
-                memories.append(memory)
-        
-        return memories
+        return get_many_from_foa(memory_ids, client)
     except Exception as e:
         logger.error(f"Failed to get FoA memories for session {session_id}: {e}", exc_info=True)
         return []
@@ -528,12 +756,11 @@ def clear_foa(session_id: Optional[str] = None, client: Optional[Any] = None) ->
             client.delete(session_key)
             logger.info(f"Cleared FoA for session {session_id}")
         else:
-            # 清空所有 FoA 记忆
-            pattern = "foa:memory:*"
-            keys = client.keys(pattern)
+            # 清空所有 FoA 记忆（含会话列表和准入脚本的辅助键）
+            keys = client.keys("foa:memory:*") + client.keys("foa:session:*")
             if keys:
                 client.delete(*keys)
-            client.delete("foa:memories")
+            client.delete("foa:memories", "foa:expiry", "foa:session_of")
             logger.info("Cleared all FoA memories")
         return True
     except Exception as e:
@@ -543,7 +770,12 @@ def clear_foa(session_id: Optional[str] = None, client: Optional[Any] = None) ->
 
 # ==================== DA (Direct Access) 层操作 ====================
 
-def add_to_da(memory: Memory, client: Optional[Any] = None, ttl: int = 86400) -> bool:
+def add_to_da(
+    memory: Memory,
+    client: Optional[Any] = None,
+    ttl: int = 86400,
+    max_memories: int = DA_MAX_MEMORIES,
+) -> bool:
     """
     添加记忆到 DA（快速访问层）
     
@@ -551,11 +783,13 @@ def add_to_da(memory: Memory, client: Optional[Any] = None, ttl: int = 86400) ->
     - 会话关键记忆
     - 比 FoA 更长生命周期（默认24小时）
     - 支持按类型和标签索引
+    - 原子准入：写入、索引更新、容量淘汰（删除被淘汰记忆及其索引）在一个 Lua 脚本中完成
     
     Args:
         memory: Memory 对象
         client: Redis 客户端（可选）
         ttl: 过期时间（秒），默认86400秒（24小时）
+        max_memories: DA 记忆数量上限（默认10000），超出时淘汰最早过期的记忆
         
     Returns:
         是否成功添加
@@ -568,35 +802,20 @@ def add_to_da(memory: Memory, client: Optional[Any] = None, ttl: int = 86400) ->
         return False
     
     try:
-        # 1. 存储记忆对象
-        memory_key = f"da:memory:{memory.id}"
-        memory_data = _memory_to_dict(memory)
-        client.setex(memory_key, ttl, json.dumps(memory_data, ensure_ascii=False))
-        
-        # 2. 添加到 DA 记忆集合
-        set_key = "da:memories"
-        client.sadd(set_key, memory.id)
-        client.expire(set_key, ttl)
-        
-        # 3. 如果有关联的会话，添加到会话集合
+        # 记忆值、DA 集合、会话/类型/标签索引、容量淘汰在一个脚本中原子完成
+        keys = [f"da:memory:{memory.id}", "da:memories", "da:expiry", f"da:index:{memory.id}"]
         if memory.metadata.get("session_id"):
-            session_key = f"da:session:{memory.metadata['session_id']}"
-            client.sadd(session_key, memory.id)
-            client.expire(session_key, ttl)
-        
-        # 4. 按记忆类型索引
+            keys.append(f"da:session:{memory.metadata['session_id']}")
         if memory.memory_type:
-            type_key = f"da:type:{memory.memory_type.value}"
-            client.sadd(type_key, memory.id)
-            client.expire(type_key, ttl)
-        
-        # 5. 按标签索引
-        for tag in memory.tags:
-            tag_key = f"da:tag:{tag}"
-            client.sadd(tag_key, memory.id)
-            client.expire(tag_key, ttl)
+            keys.append(f"da:type:{memory.memory_type.value}")
+        keys.extend(f"da:tag:{tag}" for tag in dict.fromkeys(memory.tags))
+        evicted = _decode_ids(_script(client, _DA_ADMIT_LUA)(
+            keys=keys,
+            args=[memory.id, _encode_memory(memory), int(ttl), time.time(), max_memories],
+            client=client,
+        ))
         
-        logger.debug(f"Added memory {memory.id} to DA")
+        logger.debug(f"Added memory {memory.id} to DA, evicted {len(evicted)}")
         return True
     except Exception as e:
         logger.error(f"Failed to add memory {memory.id} to DA: {e}", exc_info=True)
@@ -622,29 +841,40 @@ def get_from_da(memory_id: str, client: Optional[Any] = None) -> Optional[Memory
         return None
     
     try:
-        memory_key = f"da:memory:{memory_id}"
-        memory_data = client.get(memory_key)
-        if not memory_data:
-            return None
-        
-        data = json.loads(memory_data)
-        memory = _dict_to_memory(data)
-        
-        # 更新访问统计
-        memory.last_accessed = datetime.now()
-        memory.retrieval_count += 1
-        
-        # 更新存储
-        ttl = client.ttl(memory_key)
-        if ttl > 0:
-            client.setex(memory_key, ttl, json.dumps(_memory_to_dict(memory), ensure_ascii=False))
-        
-        return memory
+        # 读取并更新访问统计（保留剩余过期时间）
+        memories = _get_many("da", [memory_id], client)
+        return memories[0] if memories else None
     except Exception as e:
         logger.error(f"Failed to get memory {memory_id} from DA: {e}", exc_info=True)
         return None
 
 
+def get_many_from_da(memory_ids: List[str], client: Optional[Any] = None, refresh_access: bool = True) -> List[Memory]:
+    """
+    批量从 DA 获取记忆（MGET + 流水线写回，固定两次往返）
+    
+    Args:
+        memory_ids: 记忆ID列表
+        client: Redis 客户端（可选）
+        refresh_access: 是否更新访问统计
+        
+    Returns:
+        按输入顺序排列的记忆列表（不存在的跳过）
+    """
+    if not REDIS_AVAILABLE or not memory_ids:
+        return []
+    
+    client = client or get_redis_client()
+    if not client:
+        return []
+    
+    try:
+        return _get_many("da", memory_ids, client, refresh_access=refresh_access)
+    except Exception as e:
+        logger.error(f"Failed to get {len(memory_ids)} memories from DA: {e}", exc_info=True)
+        return []
+
+
 def remove_from_da(memory_id: str, client: Optional[Any] = None) -> bool:
     """
     从 DA 移除记忆
@@ -664,28 +894,24 @@ def remove_from_da(memory_id: str, client: Optional[Any] = None) -> bool:
         return False
     
     try:
-        # 获取记忆信息（用于清理索引）
-        memory = get_from_da(memory_id, client)
-        
-        # 删除记忆对象
-        memory_key = f"da:memory:{memory_id}"
-        client.delete(memory_key)
+        # 准入脚本之前写入的记忆没有 da:index 记录，按记忆内容清理索引
+        legacy = None
+        if not client.exists(f"da:index:{memory_id}"):
+            legacy = _get_many("da", [memory_id], client, refresh_access=False)
         
-        # 从集合中移除
-        set_key = "da:memories"
-        client.srem(set_key, memory_id)
+        # 原子删除记忆对象，并从 DA 集合和所有索引集合中移除
+        _script(client, _DA_REMOVE_LUA)(
+            keys=[f"da:memory:{memory_id}", "da:memories", "da:expiry"], args=[memory_id], client=client
+        )
         
-        # 清理索引
-        if memory:
+        for memory in legacy or []:
+            index_keys = [f"da:tag:{tag}" for tag in memory.tags]
             if memory.metadata.get("session_id"):
-                session_key = f"da:session:{memory.metadata['session_id']}"
-                client.srem(session_key, memory_id)
+                index_keys.append(f"da:session:{memory.metadata['session_id']}")
             if memory.memory_type:
-                type_key = f"da:type:{memory.memory_type.value}"
-                client.srem(type_key, memory_id)
-            for tag in memory.tags:
-                tag_key = f"da:tag:{tag}"
-                client.srem(tag_key, memory_id)
+                index_keys.append(f"da:type:{memory.memory_type.value}")
+            for key in index_keys:
+                client.srem(key, memory_id)
         
         logger.debug(f"Removed memory {memory_id} from DA")
         return True
@@ -717,13 +943,7 @@ def get_da_memories_by_type(memory_type: MemoryType, limit: int = 100, client: O
         type_key = f"da:type:{memory_type.value}"
         memory_ids = list(client.smembers(type_key))[:limit]
         
-        memories = []
-        for memory_id in memory_ids:
-            memory = get_from_da(memory_id, client)
-            if memory:
-                memories.append(memory)
-        
-        return memories
+        return get_many_from_da(memory_ids, client)
     except Exception as e:
         logger.error(f"Failed to get DA memories by type {memory_type}: {e}", exc_info=True)
         return []
@@ -752,13 +972,7 @@ def get_da_memories_by_session(session_id: str, limit: int = 100, client: Option
         session_key = f"da:session:{session_id}"
         memory_ids = list(client.smembers(session_key))[:limit]
         
-        memories = []
-        for memory_id in memory_ids:
-            memory = get_from_da(memory_id, client)
-            if memory:
-                memories.append(memory)
-        
-        return memories
+        return get_many_from_da(memory_ids, client)
     except Exception as e:
         logger.error(f"Failed to get DA memories for session {session_id}: {e}", exc_info=True)
         return []
@@ -787,13 +1001,7 @@ def get_da_memories_by_tag(tag: str, limit: int = 100, client: Optional[Any] = N
         tag_key = f"da:tag:{tag}"
         memory_ids = list(client.smembers(tag_key))[:limit]
         
-        memories = []
-        for memory_id in memory_ids:
-            memory = get_from_da(memory_id, client)
-            if memory:
-                memories.append(memory)
-        
-        return memories
+        return get_many_from_da(memory_ids, client)
     except Exception as e:
         logger.error(f"Failed to get DA memories by tag {tag}: {e}", exc_info=True)
         return []
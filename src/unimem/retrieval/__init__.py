@@ -5,7 +5,11 @@
 """
 
 from .retrieval_engine import RetrievalEngine
+from .retriever_policy import AdaptiveRetrieverPolicy
+from .retrieval_optimizer import RetrievalOptimizer
 
 __all__ = [
     "RetrievalEngine",
+    "AdaptiveRetrieverPolicy",
+    "RetrievalOptimizer",
 ]
@@ -4,22 +4,113 @@
 实现检索结果的缓存和预取，提升检索性能。
 
 工业级特性：
+- 基于召回日志学习的查询预取（后台线程执行，不阻塞检索）
 - 线程安全（使用锁保护缓存）
-- LRU/TTL 淘汰策略
+- LRU/TTL 淘汰策略（OrderedDict 实现，get/put/evict 均为 O(1)）
+- 代际（generation）失效：存储写入时整体失效缓存，无需遍历
+- 按结果近似字节数限制内存占用
+- 可选的磁盘二级缓存（SQLite，多进程共享，重启后预热）
 - 缓存统计和监控
 """
 
+import re
+import json
+import time
 import logging
 import hashlib
 import threading
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
-from ..memory_types import RetrievalResult
+from ..memory_types import Memory, RetrievalResult
+from ..disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
+# 单条检索结果的固定开销估计（对象头、分数、时间戳、枚举等，字节）
+_RESULT_OVERHEAD_BYTES = 512
+
+
+def estimate_results_bytes(results: List[RetrievalResult]) -> int:
+    """
+    估算检索结果占用的内存字节数（近似值）
+    
+    按 UTF-8 编码长度统计内容、关键词、标签，再加上固定开销。
+    
+    Args:
+        results: 检索结果列表
+        
+    Returns:
+        近似字节数
+    """
+    total = 0
+    for result in results:
+        total += _RESULT_OVERHEAD_BYTES
+        memory = getattr(result, "memory", None)
+        if memory is None:
+            continue
+        total += len((memory.content or "").encode("utf-8"))
+        total += sum(len(k.encode("utf-8")) for k in (memory.keywords or []))
+        total += sum(len(t.encode("utf-8")) for t in (memory.tags or []))
+        if memory.context:
+            total += len(memory.context.encode("utf-8"))
+    return total
+
+
+def serialize_results(
+    results: List[RetrievalResult],
+    created_at: float,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """
+    将缓存的检索结果序列化为 JSON 字节串（用于磁盘缓存）
+    
+    Args:
+        results: 检索结果
+        created_at: 缓存创建时间（Unix 时间戳）
+        metadata: 缓存元数据
+        
+    Returns:
+        JSON 字节串
+    """
+    record = {
+        "created_at": created_at,
+        "metadata": metadata or {},
+        "results": [
+            {
+                "memory": r.memory.to_dict(),
+                "score": r.score,
+                "retrieval_method": r.retrieval_method,
+                "metadata": r.metadata,
+            }
+            for r in results
+        ],
+    }
+    return json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def deserialize_results(data: bytes) -> Tuple[List[RetrievalResult], float, Dict[str, Any]]:
+    """
+    从 JSON 字节串反序列化缓存的检索结果
+    
+    Returns:
+        (检索结果, 创建时间戳, 元数据)
+    """
+    record = json.loads(data.decode("utf-8"))
+    results = [
+        RetrievalResult(
+            memory=Memory.from_dict(item["memory"]),
+            score=item["score"],
+            retrieval_method=item["retrieval_method"],
+            metadata=item.get("metadata") or {},
+        )
+        for item in record["results"]
+    ]
+    return results, record["created_at"], record.get("metadata") or {}
+
 
 @dataclass
 class CacheEntry:
@@ -30,6 +121,8 @@ class CacheEntry:
     access_count: int = 0
     last_accessed: Optional[datetime] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    generation: int = 0  # 写入时的存储代际
+    size_bytes: int = 0  # 近似内存占用
     
     def access(self):
         """记录访问"""
@@ -42,16 +135,27 @@ class RetrievalCache:
     
     缓存检索结果，支持：
     - 查询结果缓存
-    - LRU 淘汰策略
+    - LRU 淘汰策略（OrderedDict 维护访问顺序，O(1) 淘汰）
     - TTL 过期策略
+    - 代际失效（invalidate() 使所有旧条目在下次访问时失效）
+    - 条目数和近似字节数双重上限
+    - 磁盘二级缓存（可选）：内存未命中时回查磁盘，代际在进程间共享
     - 缓存预取
     """
     
+    # 磁盘缓存命名空间前缀（按存储标识区分，不同存储后端的结果与代际互不影响）
+    DISK_NAMESPACE = "retrieval"
+    # 从磁盘刷新共享代际的最小间隔（秒）
+    GENERATION_REFRESH_SECONDS = 1.0
+    
     def __init__(
         self,
         max_size: int = 1000,
         ttl_seconds: Optional[int] = 3600,
-        enable_lru: bool = True
+        enable_lru: bool = True,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        disk_cache: Optional[DiskCache] = None,
+        store_id: Optional[str] = None,
     ):
         """
         初始化检索缓存
@@ -59,23 +163,107 @@ class RetrievalCache:
         Args:
             max_size: 最大缓存条目数（默认 1000）
             ttl_seconds: TTL（秒），如果为 None 则不过期（默认 3600）
-            enable_lru: 是否启用 LRU 淘汰（默认 True）
+            enable_lru: 是否启用 LRU 淘汰（默认 True，False 时为 FIFO）
+            max_bytes: 缓存结果的近似字节数上限（默认 64MB），None 表示不限制
+            disk_cache: 磁盘二级缓存（可选）
+            store_id: 存储标识（如后端与数据库地址），磁盘命名空间为 "retrieval:{store_id}"
         """
         self.max_size = max(max_size, 1)  # 确保至少为 1
         self.ttl_seconds = ttl_seconds
         self.enable_lru = enable_lru
+        self.max_bytes = max(max_bytes, 1) if max_bytes is not None else None
         
         # 线程安全锁
         self._lock = threading.RLock()
         
-        # 缓存存储（线程安全）
-        self._cache: Dict[str, CacheEntry] = {}
+        # 缓存存储（线程安全）：按访问/插入顺序排列，队首为最久未使用
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        
+        # 磁盘二级缓存
+        self.disk_cache = disk_cache
+        self.disk_namespace = f"{self.DISK_NAMESPACE}:{store_id}" if store_id else self.DISK_NAMESPACE
+        
+        # 存储代际：每次存储写入后递增，旧代际条目视为失效（有磁盘缓存时在进程间共享）
+        self._generation = disk_cache.get_generation(self.disk_namespace) if disk_cache else 0
+        self._generation_checked_at = time.monotonic()
         
         # 统计信息（线程安全）
         self._hits = 0
         self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._disk_hits = 0
         
-        logger.info(f"RetrievalCache initialized: max_size={self.max_size}, ttl={ttl_seconds}")
+        logger.info(
+            f"RetrievalCache initialized: max_size={self.max_size}, "
+            f"max_bytes={self.max_bytes}, ttl={ttl_seconds}"
+        )
+    
+    @property
+    def generation(self) -> int:
+        """当前存储代际"""
+        return self._generation
+    
+    def invalidate(self) -> int:
+        """
+        使所有已缓存结果失效（O(1)，线程安全）
+        
+        在存储写入（retain/update/delete）后调用。旧条目在下次访问
+        或被淘汰时移除，而不是立即遍历删除。
+        
+        Returns:
+            新的存储代际
+        """
+        with self._lock:
+            self._generation += 1
+            if self.disk_cache:
+                self._generation = max(self._generation, self.disk_cache.bump_generation(self.disk_namespace))
+            self._invalidations += 1
+            return self._generation
+    
+    def _refresh_generation(self) -> None:
+        """从磁盘读取其他进程递增的代际（节流，调用方持有锁）"""
+        if not self.disk_cache:
+            return
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.GENERATION_REFRESH_SECONDS:
+            return
+        self._generation_checked_at = now
+        self._generation = max(self._generation, self.disk_cache.get_generation(self.disk_namespace))
+    
+    def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        """从磁盘读取条目并放入内存（调用方持有锁）"""
+        data = self.disk_cache.get(self.disk_namespace, key, generation=self._generation)
+        if data is None:
+            return None
+        try:
+            results, created_at, metadata = deserialize_results(data)
+        except Exception as e:
+            logger.warning(f"Failed to decode disk cache entry {key}: {e}")
+            return None
+        entry = CacheEntry(
+            query_hash=key,
+            results=results,
+            created_at=datetime.fromtimestamp(created_at),
+            metadata=metadata,
+            generation=self._generation,
+            size_bytes=estimate_results_bytes(results),
+        )
+        if not self._is_valid(entry):
+            return None
+        self._insert(key, entry)
+        return entry
+    
+    def _insert(self, key: str, entry: CacheEntry) -> None:
+        """写入内存并按上限淘汰（调用方持有锁）"""
+        self._remove(key)
+        self._cache[key] = entry
+        self._total_bytes += entry.size_bytes
+        while len(self._cache) > self.max_size or (
+            self.max_bytes is not None and self._total_bytes > self.max_bytes
+        ):
+            self._evict()
     
     def _generate_key(self, query: str, **kwargs) -> str:
         """生成缓存键"""
@@ -87,6 +275,23 @@ class RetrievalCache:
         key_str = "|".join(key_parts)
         return hashlib.md5(key_str.encode()).hexdigest()
     
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        """移除缓存条目并更新字节计数（调用方持有锁）"""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size_bytes
+        return entry
+    
+    def _is_valid(self, entry: CacheEntry) -> bool:
+        """检查条目是否仍然有效：代际匹配且未过期（调用方持有锁）"""
+        if entry.generation != self._generation:
+            return False
+        if self.ttl_seconds:
+            age = (datetime.now() - entry.created_at).total_seconds()
+            if age > self.ttl_seconds:
+                return False
+        return True
+    
     def get(
         self,
         query: str,
@@ -102,7 +307,7 @@ class RetrievalCache:
             **kwargs: 其他检索参数
             
         Returns:
-            缓存的检索结果，如果不存在或已过期则返回 None
+            缓存的检索结果，如果不存在、已过期或已失效则返回 None
         """
         if not query or not query.strip():
             return None
@@ -110,23 +315,29 @@ class RetrievalCache:
         key = self._generate_key(query, top_k=top_k, **kwargs)
         
         with self._lock:
+            self._refresh_generation()
             entry = self._cache.get(key)
             
+            if not entry and self.disk_cache:
+                entry = self._load_from_disk(key)
+                if entry:
+                    self._disk_hits += 1
+            
             if not entry:
                 self._misses += 1
                 return None
             
-            # 检查是否过期
-            if self.ttl_seconds:
-                age = (datetime.now() - entry.created_at).total_seconds()
-                if age > self.ttl_seconds:
-                    del self._cache[key]
-                    self._misses += 1
-                    logger.debug(f"Cache entry expired: {key}")
-                    return None
+            # 检查代际和过期
+            if not self._is_valid(entry):
+                self._remove(key)
+                self._misses += 1
+                logger.debug(f"Cache entry expired or invalidated: {key}")
+                return None
             
-            # 记录访问
+            # 记录访问（LRU：移到队尾）
             entry.access()
+            if self.enable_lru:
+                self._cache.move_to_end(key)
             self._hits += 1
             
             # 如果 top_k 不同，需要截取
@@ -141,6 +352,7 @@ class RetrievalCache:
         results: List[RetrievalResult],
         top_k: Optional[int] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        generation: Optional[int] = None,
         **kwargs
     ) -> None:
         """
@@ -151,49 +363,100 @@ class RetrievalCache:
             results: 检索结果列表
             top_k: Top-K 参数
             metadata: 元数据
+            generation: 检索开始时的存储代际（可选）；若检索期间发生写入则不缓存
             **kwargs: 其他检索参数
         """
         if not query or not query.strip() or not results:
             return
         
         key = self._generate_key(query, top_k=top_k, **kwargs)
+        size_bytes = estimate_results_bytes(results)
         
         with self._lock:
-            # 检查是否需要淘汰
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._evict()
+            if generation is not None and generation != self._generation:
+                logger.debug(f"Skip caching stale result (generation {generation} != {self._generation})")
+                return
+            
+            if self.max_bytes is not None and size_bytes > self.max_bytes:
+                logger.debug(f"Skip caching oversized result: {size_bytes} bytes")
+                return
             
-            # 创建缓存条目
+            # 创建缓存条目（新条目位于队尾，超出上限时淘汰队首）
             entry = CacheEntry(
                 query_hash=key,
                 results=results,
-                metadata=metadata or {}
+                metadata=metadata or {},
+                generation=self._generation,
+                size_bytes=size_bytes,
             )
+            self._insert(key, entry)
+            generation = self._generation
             
-            self._cache[key] = entry
             logger.debug(f"Cached retrieval result: {key}")
+        
+        # 写入磁盘二级缓存（锁外执行，避免磁盘 IO 阻塞其他读取）
+        if self.disk_cache:
+            self.disk_cache.put(
+                self.disk_namespace,
+                key,
+                serialize_results(results, entry.created_at.timestamp(), entry.metadata),
+                generation=generation,
+            )
+    
+    def warm_up(self, limit: Optional[int] = None) -> int:
+        """
+        从磁盘缓存预热内存缓存（启动时调用）
+        
+        按最近访问顺序加载当前代际的条目，已过期的条目跳过。
+        
+        Args:
+            limit: 最多加载条目数（默认 max_size）
+            
+        Returns:
+            加载的条目数
+        """
+        if not self.disk_cache:
+            return 0
+        limit = limit or self.max_size
+        with self._lock:
+            self._generation = max(self._generation, self.disk_cache.get_generation(self.disk_namespace))
+            generation = self._generation
+        
+        loaded = []
+        for key, data in self.disk_cache.iter_recent(self.disk_namespace, limit, generation=generation):
+            try:
+                loaded.append((key, *deserialize_results(data)))
+            except Exception as e:
+                logger.warning(f"Failed to decode disk cache entry {key}: {e}")
+        
+        count = 0
+        with self._lock:
+            # 最近访问的条目最后插入，位于 LRU 队尾
+            for key, results, created_at, metadata in reversed(loaded):
+                entry = CacheEntry(
+                    query_hash=key,
+                    results=results,
+                    created_at=datetime.fromtimestamp(created_at),
+                    metadata=metadata,
+                    generation=generation,
+                    size_bytes=estimate_results_bytes(results),
+                )
+                if self._is_valid(entry):
+                    self._insert(key, entry)
+                    count += 1
+        
+        logger.info(f"RetrievalCache warmed up {count} entries from disk")
+        return count
     
     def _evict(self) -> None:
-        """淘汰缓存条目"""
+        """淘汰队首条目（LRU 模式下为最久未访问，FIFO 模式下为最早写入）"""
         if not self._cache:
             return
         
-        if self.enable_lru:
-            # LRU 策略：淘汰最久未访问的
-            lru_key = min(
-                self._cache.keys(),
-                key=lambda k: self._cache[k].last_accessed or self._cache[k].created_at
-            )
-            del self._cache[lru_key]
-            logger.debug(f"Evicted LRU entry: {lru_key}")
-        else:
-            # FIFO 策略：淘汰最早创建的
-            fifo_key = min(
-                self._cache.keys(),
-                key=lambda k: self._cache[k].created_at
-            )
-            del self._cache[fifo_key]
-            logger.debug(f"Evicted FIFO entry: {fifo_key}")
+        key, entry = self._cache.popitem(last=False)
+        self._total_bytes -= entry.size_bytes
+        self._evictions += 1
+        logger.debug(f"Evicted {'LRU' if self.enable_lru else 'FIFO'} entry: {key}")
     
     def prefetch(
         self,
@@ -213,20 +476,27 @@ class RetrievalCache:
             # 检查是否已缓存
             if self.get(query, **kwargs) is None:
                 try:
+                    generation = self.generation
                     # 执行检索
                     results = retrieval_func(query, **kwargs)
                     # 缓存结果
-                    self.put(query, results, **kwargs)
+                    self.put(query, results, generation=generation, **kwargs)
                     logger.debug(f"Prefetched query: {query}")
                 except Exception as e:
                     logger.warning(f"Prefetch failed for query '{query}': {e}")
     
     def clear(self) -> None:
-        """清空缓存（线程安全）"""
+        """清空缓存，包括磁盘二级缓存（线程安全）"""
+        if self.disk_cache:
+            self.disk_cache.clear(self.disk_namespace)
         with self._lock:
             self._cache.clear()
+            self._total_bytes = 0
             self._hits = 0
             self._misses = 0
+            self._evictions = 0
+            self._invalidations = 0
+            self._disk_hits = 0
             logger.info("Retrieval cache cleared")
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -238,23 +508,104 @@ class RetrievalCache:
             return {
                 "size": len(self._cache),
                 "max_size": self.max_size,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "generation": self._generation,
                 "hits": self._hits,
                 "misses": self._misses,
                 "hit_rate": hit_rate,
-                "total_requests": total_requests
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "disk_hits": self._disk_hits,
+                "total_requests": total_requests,
+                "disk": self.disk_cache.get_statistics() if self.disk_cache else None,
             }
 
 
+# 中文数字（用于把 "第十二章" 归一化为 "第12章"）
+_CN_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+              "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_UNITS = {"十": 10, "百": 100, "千": 1000}
+_CN_ORDINAL_RE = re.compile(r"第([零〇一二两三四五六七八九十百千]+)([章节集卷幕回部篇])")
+_NUMBER_RE = re.compile(r"\d+")
+_PLACEHOLDER = "{n}"
+
+
+def _cn_to_int(text: str) -> int:
+    """将中文数字（千以内）转换为整数"""
+    total, current = 0, 0
+    for char in text:
+        if char in _CN_DIGITS:
+            current = _CN_DIGITS[char]
+        elif char in _CN_UNITS:
+            total += (current or 1) * _CN_UNITS[char]
+            current = 0
+    return total + current
+
+
+def normalize_query_template(query: str) -> Tuple[str, Tuple[int, ...]]:
+    """
+    将查询归一化为模板和数字参数
+    
+    例如 "第十二章  人物 伏笔" -> ("第{n}章 人物 伏笔", (12,))
+    
+    Args:
+        query: 查询文本
+        
+    Returns:
+        (模板, 数字参数元组)
+    """
+    text = " ".join((query or "").split())
+    text = _CN_ORDINAL_RE.sub(lambda m: f"第{_cn_to_int(m.group(1))}{m.group(2)}", text)
+    numbers = tuple(int(n) for n in _NUMBER_RE.findall(text))
+    return _NUMBER_RE.sub(_PLACEHOLDER, text), numbers
+
+
+def _render_template(template: str, numbers: Sequence[int]) -> Optional[str]:
+    """用数字参数填充模板；参数个数不匹配时返回 None"""
+    parts = template.split(_PLACEHOLDER)
+    if len(parts) - 1 != len(numbers):
+        return None
+    rendered = parts[0]
+    for number, part in zip(numbers, parts[1:]):
+        if number < 0:
+            return None
+        rendered += f"{number}{part}"
+    return rendered
+
+
+@dataclass
+class _Transition:
+    """模板转移统计：次数及数字参数偏移分布"""
+    count: int = 0
+    deltas: Dict[Tuple[int, ...], int] = field(default_factory=dict)
+    literal: Optional[str] = None  # 目标模板无法由偏移推出时使用最近一次的原始查询
+
+
 class RetrievalPrefetcher:
     """检索预取器
     
-    基于查询模式预测可能的查询，提前执行检索并缓存结果。
+    从真实的召回日志中学习「查询 -> 下一个查询」的转移规律（按项目维护的
+    一阶马尔可夫模型，状态为归一化后的查询模板），预测下一个可能的查询并在
+    后台低优先级线程中提前执行检索、写入缓存。
+    
+    例如日志中反复出现 "第12章 人物 伏笔" -> "第12章 场景"、
+    "第13章 人物 伏笔" -> "第13章 场景"，则模板转移
+    "第{n}章 人物 伏笔" -> "第{n}章 场景"（偏移 0）会被学到，
+    收到 "第14章 人物 伏笔" 时预取 "第14章 场景"。
+    
+    预取精度 = 后续真实出现的预测查询数 / 发出的预测查询数。
     """
     
     def __init__(
         self,
         cache: RetrievalCache,
-        retrieval_func: callable
+        retrieval_func: callable,
+        max_predictions: int = 3,
+        min_transition_count: int = 2,
+        max_pending: int = 8,
+        prediction_window: int = 5,
+        max_templates: int = 1000,
     ):
         """
         初始化检索预取器
@@ -262,62 +613,248 @@ class RetrievalPrefetcher:
         Args:
             cache: 检索缓存实例
             retrieval_func: 检索函数
+            max_predictions: 每次最多预取的查询数（默认 3）
+            min_transition_count: 转移至少出现的次数才用于预测（默认 2）
+            max_pending: 后台队列中最多等待的预取任务数，超出时丢弃（默认 8）
+            prediction_window: 预测在之后多少次真实查询内命中算有效（默认 5）
+            max_templates: 每个项目最多记录的源模板数（默认 1000）
         """
         self.cache = cache
         self.retrieval_func = retrieval_func
+        self.max_predictions = max(max_predictions, 1)
+        self.min_transition_count = max(min_transition_count, 1)
+        self.max_pending = max(max_pending, 1)
+        self.prediction_window = max(prediction_window, 1)
+        self.max_templates = max(max_templates, 1)
+        
+        self._lock = threading.Lock()
+        
+        # 项目 -> 源模板 -> 目标模板 -> 转移统计
+        self._transitions: Dict[str, "OrderedDict[str, Dict[str, _Transition]]"] = {}
+        # 项目 -> 上一次查询（模板, 数字参数）
+        self._last_query: Dict[str, Tuple[str, Tuple[int, ...]]] = {}
+        # 项目 -> 待验证的预测查询 -> 剩余有效查询次数
+        self._outstanding: Dict[str, Dict[str, int]] = {}
+        
+        # 后台预取线程（单线程，排队任务数有上限，避免与前台检索争抢资源）
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
         
-        # 查询模式统计
-        self._query_patterns: Dict[str, int] = {}
+        # 统计信息
+        self._predictions = 0
+        self._useful_predictions = 0
+        self._prefetched = 0
+        self._dropped = 0
+        self._failed = 0
         
         logger.info("RetrievalPrefetcher initialized")
     
-    def record_query(self, query: str) -> None:
-        """记录查询模式"""
-        # 提取查询关键词（简化实现）
-        keywords = query.split()[:3]  # 取前3个词
-        for keyword in keywords:
-            self._query_patterns[keyword] = self._query_patterns.get(keyword, 0) + 1
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """懒创建后台线程池（调用方持有锁）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="unimem-prefetch")
+        return self._executor
     
-    def predict_queries(self, current_query: str, top_n: int = 5) -> List[str]:
+    def record_query(self, query: str, project: Optional[str] = None) -> None:
         """
-        预测可能的查询
+        记录一次真实查询：更新转移模型并核对之前的预测
+        
+        Args:
+            query: 查询文本
+            project: 项目标识（不同项目的查询模式分开学习）
+        """
+        if not query or not query.strip():
+            return
+        
+        project = project or "default"
+        template, numbers = normalize_query_template(query)
+        rendered = _render_template(template, numbers)
+        
+        with self._lock:
+            # 1. 核对之前的预测
+            outstanding = self._outstanding.setdefault(project, {})
+            if rendered in outstanding:
+                del outstanding[rendered]
+                self._useful_predictions += 1
+            for predicted in list(outstanding):
+                outstanding[predicted] -= 1
+                if outstanding[predicted] <= 0:
+                    del outstanding[predicted]
+            
+            # 2. 更新转移统计
+            previous = self._last_query.get(project)
+            self._last_query[project] = (template, numbers)
+            if previous is None:
+                return
+            
+            prev_template, prev_numbers = previous
+            project_transitions = self._transitions.setdefault(project, OrderedDict())
+            targets = project_transitions.get(prev_template)
+            if targets is None:
+                targets = {}
+                project_transitions[prev_template] = targets
+                if len(project_transitions) > self.max_templates:
+                    project_transitions.popitem(last=False)
+            else:
+                project_transitions.move_to_end(prev_template)
+            
+            transition = targets.setdefault(template, _Transition())
+            transition.count += 1
+            if len(numbers) == len(prev_numbers) and numbers:
+                delta = tuple(n - p for n, p in zip(numbers, prev_numbers))
+                transition.deltas[delta] = transition.deltas.get(delta, 0) + 1
+            transition.literal = rendered
+    
+    def fit(self, queries: List[str], project: Optional[str] = None) -> None:
+        """
+        从历史召回日志批量学习转移模型（不核对预测、不触发预取）
+        
+        Args:
+            queries: 按时间顺序排列的查询列表
+            project: 项目标识
+        """
+        project = project or "default"
+        with self._lock:
+            self._last_query.pop(project, None)
+            self._outstanding.pop(project, None)
+        for query in queries:
+            self.record_query(query, project=project)
+        with self._lock:
+            self._outstanding.pop(project, None)
+    
+    def predict_queries(
+        self,
+        current_query: str,
+        top_n: Optional[int] = None,
+        project: Optional[str] = None,
+    ) -> List[str]:
+        """
+        预测可能的下一个查询
         
         Args:
             current_query: 当前查询
-            top_n: 返回前N个预测查询
+            top_n: 返回前N个预测查询（默认 max_predictions）
+            project: 项目标识
             
         Returns:
-            预测的查询列表
+            预测的查询列表（按转移次数降序）
         """
-        # 简化实现：基于当前查询的关键词预测
-        keywords = current_query.split()[:3]
-        predicted = []
+        top_n = top_n or self.max_predictions
+        project = project or "default"
+        template, numbers = normalize_query_template(current_query)
+        current = _render_template(template, numbers)
         
-        for keyword in keywords:
-            # 查找包含此关键词的常见查询模式
-            similar_queries = [
-                f"{keyword} {k}" for k in self._query_patterns.keys()
-                if k != keyword
-            ][:top_n]
-            predicted.extend(similar_queries)
+        # 转移统计由 record_query 在其他线程中更新，持锁取快照（次数、最常见偏移、原始查询）
+        with self._lock:
+            targets = self._transitions.get(project, {}).get(template)
+            if not targets:
+                return []
+            candidates = sorted(
+                (
+                    (
+                        next_template,
+                        transition.count,
+                        max(transition.deltas.items(), key=lambda item: item[1])[0] if transition.deltas else None,
+                        transition.literal,
+                    )
+                    for next_template, transition in targets.items()
+                ),
+                key=lambda item: item[1],
+                reverse=True,
+            )
         
-        return predicted[:top_n]
+        predicted: List[str] = []
+        for next_template, count, delta, literal in candidates:
+            if count < self.min_transition_count:
+                break
+            query = None
+            if _PLACEHOLDER not in next_template:
+                query = next_template
+            elif delta is not None:
+                query = _render_template(next_template, [n + d for n, d in zip(numbers, delta)])
+            else:
+                query = literal
+            if query and query != current and query not in predicted:
+                predicted.append(query)
+            if len(predicted) >= top_n:
+                break
+        return predicted
     
-    def prefetch_related(self, query: str) -> None:
+    def prefetch_related(self, query: str, project: Optional[str] = None, **kwargs) -> int:
         """
-        预取相关查询
+        记录查询并在后台预取预测的后续查询（不阻塞调用方）
         
         Args:
             query: 当前查询
+            project: 项目标识
+            **kwargs: 检索参数（如 top_k）
+            
+        Returns:
+            提交到后台的预取查询数
         """
-        # 记录查询
-        self.record_query(query)
+        self.record_query(query, project=project)
+        predicted_queries = self.predict_queries(query, project=project)
+        if not predicted_queries:
+            return 0
         
-        # 预测相关查询
-        predicted_queries = self.predict_queries(query)
+        project = project or "default"
+        submitted = 0
+        with self._lock:
+            outstanding = self._outstanding.setdefault(project, {})
+            for predicted in predicted_queries:
+                if predicted in outstanding:
+                    continue
+                if self._pending >= self.max_pending:
+                    self._dropped += 1
+                    continue
+                outstanding[predicted] = self.prediction_window
+                self._predictions += 1
+                self._pending += 1
+                self._get_executor().submit(self._prefetch_one, predicted, kwargs)
+                submitted += 1
         
-        # 预取
-        if predicted_queries:
-            self.cache.prefetch(predicted_queries, self.retrieval_func)
-            logger.debug(f"Prefetched {len(predicted_queries)} related queries")
-
+        if submitted:
+            logger.debug(f"Scheduled {submitted} prefetch queries for: {query[:50]}")
+        return submitted
+    
+    def _prefetch_one(self, query: str, kwargs: Dict[str, Any]) -> None:
+        """后台执行单个预取"""
+        try:
+            if self.cache.get(query, **kwargs) is None:
+                generation = self.cache.generation
+                results = self.retrieval_func(query, **kwargs)
+                self.cache.put(query, results, generation=generation, **kwargs)
+                with self._lock:
+                    self._prefetched += 1
+                logger.debug(f"Prefetched query: {query}")
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            logger.warning(f"Prefetch failed for query '{query}': {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        with self._lock:
+            return {
+                "projects": len(self._transitions),
+                "templates": sum(len(t) for t in self._transitions.values()),
+                "predictions": self._predictions,
+                "useful_predictions": self._useful_predictions,
+                "precision": (
+                    self._useful_predictions / self._predictions if self._predictions > 0 else 0.0
+                ),
+                "prefetched": self._prefetched,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "pending": self._pending,
+            }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭后台预取线程"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -18,13 +18,15 @@
 """
 
 import logging
+import time
 import concurrent.futures
 from functools import wraps
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 from ..memory_types import RetrievalResult, Memory, Context
 from ..adapters import GraphAdapter, AtomLinkAdapter, RetrievalAdapter
 from ..adapters.base import AdapterError, AdapterNotAvailableError
+from .retriever_policy import AdaptiveRetrieverPolicy, classify_query
 
 logger = logging.getLogger(__name__)
 
@@ -60,12 +62,15 @@ class RetrievalEngine:
     - 存储层检索（CogMem）：FoA/DA/LTM 分层检索
     
     检索流程：
-    1. 并行执行多种检索方法
+    1. 并行执行多种检索方法（配置 retriever_policy 时跳过/延后低产出检索器）
     2. 使用 RRF (Reciprocal Rank Fusion) 融合结果
     3. 重排序结果
     4. 返回 Top-K 结果
     """
     
+    # 参与自适应选择的检索器（存储层检索始终执行）
+    RETRIEVER_NAMES = ("entity", "abstract", "semantic", "subgraph", "temporal")
+    
     def __init__(
         self,
         graph_adapter: GraphAdapter,
@@ -73,6 +78,7 @@ class RetrievalEngine:
         retrieval_adapter: RetrievalAdapter,
         storage_manager: Optional[Any] = None,
         max_workers: int = 5,
+        retriever_policy: Optional[AdaptiveRetrieverPolicy] = None,
     ):
         """
         初始化检索引擎
@@ -83,6 +89,7 @@ class RetrievalEngine:
             retrieval_adapter: 检索引擎适配器（参考各架构）
             storage_manager: 存储管理器（用于 FoA/DA/LTM 检索）
             max_workers: 并行执行的最大线程数（默认 5）
+            retriever_policy: 自适应检索器选择策略（可选，None 时每次执行全部检索器）
             
         Raises:
             AdapterError: 如果适配器无效
@@ -99,8 +106,78 @@ class RetrievalEngine:
         self.retrieval_adapter = retrieval_adapter
         self.storage_manager = storage_manager
         self.max_workers = max(max_workers, 1)  # 确保至少为 1
+        self.retriever_policy = retriever_policy
         
-        logger.info(f"RetrievalEngine initialized (max_workers={self.max_workers})")
+        logger.info(
+            f"RetrievalEngine initialized (max_workers={self.max_workers}, "
+            f"adaptive={retriever_policy is not None})"
+        )
+    
+    def _get_retrievers(self) -> Dict[str, Any]:
+        """检索器名称到检索方法的映射"""
+        return {
+            "entity": self.entity_retrieval,
+            "abstract": self.abstract_retrieval,
+            "semantic": self.semantic_retrieval,
+            "subgraph": self.subgraph_link_retrieval,
+            "temporal": self.temporal_retrieval,
+        }
+    
+    def _run_retrievers(
+        self,
+        names: List[str],
+        query: str,
+        top_k: int,
+    ) -> Dict[str, Tuple[List[Memory], float]]:
+        """
+        并行执行指定检索器
+        
+        Args:
+            names: 检索器名称列表
+            query: 查询字符串
+            top_k: 返回结果数量
+            
+        Returns:
+            检索器名称到 (结果列表, 耗时秒数) 的映射
+        """
+        retrievers = self._get_retrievers()
+        outputs: Dict[str, Tuple[List[Memory], float]] = {}
+        if not names:
+            return outputs
+        
+        def timed(name: str) -> Tuple[List[Memory], float]:
+            start = time.perf_counter()
+            results = retrievers[name](query, top_k) or []
+            return results, time.perf_counter() - start
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            futures: Dict[concurrent.futures.Future, str] = {
+                executor.submit(timed, name): name for name in names
+            }
+            
+            for future in concurrent.futures.as_completed(futures):
+                method_name = futures[future]
+                try:
+                    outputs[method_name] = future.result()
+                    logger.debug(f"{method_name} retrieval: {len(outputs[method_name][0])} results")
+                except Exception as e:
+                    logger.warning(f"{method_name} retrieval failed: {e}", exc_info=True)
+                    outputs[method_name] = ([], 0.0)  # 失败时记为空结果
+        
+        return outputs
+    
+    def get_policy_statistics(self) -> Dict[str, Any]:
+        """
+        获取自适应检索器策略的统计信息
+        
+        Returns:
+            策略统计字典；未启用策略时仅返回 {"enabled": False}
+        """
+        if not self.retriever_policy:
+            return {"enabled": False}
+        stats = self.retriever_policy.get_statistics()
+        stats["enabled"] = True
+        return stats
     
     @_safe_retrieval
     def entity_retrieval(self, query: str, top_k: int = 10) -> List[Memory]:
@@ -234,26 +311,31 @@ class RetrievalEngine:
         all_results: List[List[Memory]] = []
         
         # 1. 并行执行多种检索方法（图结构、语义、子图、时间）
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交检索任务
-            futures: Dict[concurrent.futures.Future, str] = {
-                executor.submit(self.entity_retrieval, query, top_k): "entity",
-                executor.submit(self.abstract_retrieval, query, top_k): "abstract",
-                executor.submit(self.semantic_retrieval, query, top_k): "semantic",
-                executor.submit(self.subgraph_link_retrieval, query, top_k): "subgraph",
-                executor.submit(self.temporal_retrieval, query, top_k): "temporal",
+        names = list(self.RETRIEVER_NAMES)
+        query_class = classify_query(query)
+        if self.retriever_policy:
+            active, deferred = self.retriever_policy.select(query_class, names)
+        else:
+            active, deferred = names, []
+        
+        retriever_outputs = self._run_retrievers(active, query, top_k)
+        
+        # 延后的低产出检索器：仅在首轮结果不足 top_k 时补跑
+        if deferred:
+            unique_ids = {
+                memory.id
+                for results, _ in retriever_outputs.values()
+                for memory in results if memory
             }
-            
-            # 收集结果
-            for future in concurrent.futures.as_completed(futures):
-                method_name = futures[future]
-                try:
-                    results = future.result() or []
-                    all_results.append(results)
-                    logger.debug(f"{method_name} retrieval: {len(results)} results")
-                except Exception as e:
-                    logger.warning(f"{method_name} retrieval failed: {e}", exc_info=True)
-                    all_results.append([])  # 失败时添加空列表
+            if len(unique_ids) < top_k:
+                logger.debug(f"Running deferred retrievers {deferred}: {len(unique_ids)} < {top_k}")
+                retriever_outputs.update(self._run_retrievers(deferred, query, top_k))
+            else:
+                deferred = []
+        
+        for name in names:
+            if name in retriever_outputs:
+                all_results.append(retriever_outputs[name][0])
         
         # 2. 存储层检索（如果 storage_manager 可用，串行执行以避免线程安全问题）
         if self.storage_manager:
@@ -310,8 +392,20 @@ class RetrievalEngine:
                 retrieval_method="multi_dimensional",
             ))
         
+        results = results[:top_k]
+        
+        # 6. 回报检索器产出（结果进入最终 Top-K 的数量）
+        if self.retriever_policy:
+            final_ids = {r.memory.id for r in results}
+            for name, (memories, latency) in retriever_outputs.items():
+                survived = sum(1 for m in memories if m and m.id in final_ids)
+                self.retriever_policy.record(
+                    query_class, name, latency, len(memories), survived,
+                    deferred=name in deferred,
+                )
+        
         logger.info(f"Multi-dimensional retrieval completed: {len(results)} results (requested {top_k})")
-        return results[:top_k]
+        return results
     
     def rrf_fusion(self, results_list: List[List[Memory]], k: int = 60) -> List[Memory]:
         """
@@ -9,12 +9,15 @@
 - 线程安全（并发控制）
 """
 
+import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Sequence
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .retrieval_cache import RetrievalCache, RetrievalPrefetcher
-from ..memory_types import RetrievalResult
+from .semantic_cache import SemanticRetrievalCache
+from ..disk_cache import DiskCache
+from ..memory_types import Context, RetrievalResult
 from ..adapters.base import AdapterError
 
 logger = logging.getLogger(__name__)
@@ -25,9 +28,11 @@ class RetrievalOptimizer:
     
     优化检索性能，包括：
     - 批量检索优化
-    - 检索结果缓存
+    - 检索结果缓存（精确查询缓存 + 语义相似查询缓存两级）
     - 检索预取
     - 并行检索
+    
+    通过 subscribe(storage_manager) 订阅存储写入，写入后缓存自动失效。
     """
     
     def __init__(
@@ -35,7 +40,8 @@ class RetrievalOptimizer:
         retrieval_engine: Any = None,
         enable_cache: bool = True,
         enable_prefetch: bool = True,
-        cache_config: Optional[Dict[str, Any]] = None
+        cache_config: Optional[Dict[str, Any]] = None,
+        embedding_func: Optional[Callable[[str], Optional[Sequence[float]]]] = None,
     ):
         """
         初始化检索优化器
@@ -44,38 +50,101 @@ class RetrievalOptimizer:
             retrieval_engine: 检索引擎实例
             enable_cache: 是否启用缓存
             enable_prefetch: 是否启用预取
-            cache_config: 缓存配置
+            cache_config: 缓存配置（semantic 子项配置语义缓存；disk_path 启用磁盘二级缓存；
+                store_id 为存储标识，区分共享同一磁盘缓存的不同存储后端）
+            embedding_func: 查询向量函数（用于语义缓存），默认使用检索引擎的原子链接适配器
         """
         self.retrieval_engine = retrieval_engine
         
         # 初始化缓存
         if enable_cache:
             cache_config = cache_config or {}
+            disk_cache = None
+            if cache_config.get("disk_path"):
+                try:
+                    disk_cache = DiskCache(
+                        cache_config["disk_path"],
+                        max_bytes=cache_config.get("disk_max_bytes", 512 * 1024 * 1024),
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to open retrieval disk cache: {e}, using memory only")
             self.cache = RetrievalCache(
                 max_size=cache_config.get("max_size", 1000),
                 ttl_seconds=cache_config.get("ttl_seconds", 3600),
-                enable_lru=cache_config.get("enable_lru", True)
+                enable_lru=cache_config.get("enable_lru", True),
+                max_bytes=cache_config.get("max_bytes", 64 * 1024 * 1024),
+                disk_cache=disk_cache,
+                store_id=cache_config.get("store_id"),
             )
+            # 启动预热：从磁盘加载最近使用的条目
+            if disk_cache and cache_config.get("warm_up", True):
+                self.cache.warm_up()
         else:
             self.cache = None
         
-        # 初始化预取器
+        # 初始化语义缓存（需要精确缓存提供存储代际，以及可用的查询向量函数）
+        self.semantic_cache = None
+        semantic_config = (cache_config or {}).get("semantic", {}) if enable_cache else {}
+        if self.cache and semantic_config.get("enabled", True):
+            embedding_func = embedding_func or self._default_embedding_func()
+            if embedding_func:
+                self.semantic_cache = SemanticRetrievalCache(
+                    embedding_func=embedding_func,
+                    similarity_threshold=semantic_config.get("similarity_threshold", 0.92),
+                    max_entries=semantic_config.get("max_entries", 256),
+                    sample_rate=semantic_config.get("sample_rate", 0.05),
+                    false_hit_overlap=semantic_config.get("false_hit_overlap", 0.5),
+                )
+        
+        # 初始化预取器（从召回日志学习查询转移，后台预取）
         if enable_prefetch and self.cache:
+            prefetch_config = (cache_config or {}).get("prefetch", {})
             self.prefetcher = RetrievalPrefetcher(
                 cache=self.cache,
-                retrieval_func=self._retrieval_wrapper
+                retrieval_func=self._retrieval_wrapper,
+                max_predictions=prefetch_config.get("max_predictions", 3),
+                min_transition_count=prefetch_config.get("min_transition_count", 2),
+                max_pending=prefetch_config.get("max_pending", 8),
+                prediction_window=prefetch_config.get("prediction_window", 5),
             )
         else:
             self.prefetcher = None
         
-        logger.info(f"RetrievalOptimizer initialized: cache={enable_cache}, prefetch={enable_prefetch}")
+        logger.info(
+            f"RetrievalOptimizer initialized: cache={enable_cache}, "
+            f"semantic_cache={self.semantic_cache is not None}, prefetch={enable_prefetch}"
+        )
+    
+    def _default_embedding_func(self) -> Optional[Callable[[str], Optional[Sequence[float]]]]:
+        """
+        从检索引擎的原子链接适配器获取查询向量函数
+
+        嵌入模型懒加载：这里只检查是否配置了模型，模型在首次计算查询向量时才加载。
+        """
+        adapter = getattr(self.retrieval_engine, "atom_link_adapter", None)
+        if adapter is None:
+            return None
+        has_model = getattr(adapter, "_has_embedding_model", None)
+        if has_model is not None and not has_model():
+            return None
+
+        def embed(query: str) -> Optional[Sequence[float]]:
+            if getattr(adapter, "embedding_model", None) is None:
+                return None
+            # 优先使用返回 NumPy 数组的接口，避免 list -> array 转换
+            embed_func = getattr(adapter, "_get_embedding_array", None) or getattr(adapter, "_get_embedding", None)
+            return embed_func(query) if embed_func is not None else None
+
+        return embed
     
     def retrieve(
         self,
         query: str,
         top_k: int = 10,
         use_cache: bool = True,
-        enable_prefetch: bool = True
+        enable_prefetch: bool = True,
+        project: Optional[str] = None,
+        context: Optional[Context] = None,
     ) -> List[RetrievalResult]:
         """
         优化后的检索方法
@@ -85,6 +154,8 @@ class RetrievalOptimizer:
             top_k: Top-K 参数（必须 > 0，默认 10）
             use_cache: 是否使用缓存（默认 True）
             enable_prefetch: 是否启用预取（默认 True）
+            project: 项目标识（预取器按项目学习查询模式）
+            context: 上下文（会话/用户/元数据作为缓存键的一部分；带上下文时不使用语义缓存）
             
         Returns:
             检索结果列表
@@ -97,17 +168,42 @@ class RetrievalOptimizer:
         if top_k <= 0:
             raise AdapterError(f"top_k must be positive, got {top_k}", adapter_name="RetrievalOptimizer")
         
-        # 1. 检查缓存
+        # 0. 记录查询并在后台预取预测的后续查询（不阻塞本次检索）
+        if enable_prefetch and self.prefetcher:
+            self.prefetcher.prefetch_related(query, project=project, top_k=top_k)
+        
+        # 1. 检查缓存（记录检索开始时的存储代际，检索期间发生写入则不缓存）
+        generation = self.cache.generation if self.cache else None
+        scope = self._context_scope(context)
+        semantic_cache = self.semantic_cache if scope is None else None
+        semantic_hit = None
+        query_vector = None
         if use_cache and self.cache:
-            cached_results = self.cache.get(query, top_k=top_k)
+            cached_results = self.cache.get(query, top_k=top_k, scope=scope)
             if cached_results is not None:
                 logger.debug(f"Cache hit for query: {query[:50]}")
                 return cached_results
+            
+            # 1.1 语义缓存：相似查询复用结果；抽样命中时执行真实检索进行校验
+            # （查询向量只计算一次，未命中时写入复用；嵌入失败时跳过语义缓存）
+            if semantic_cache:
+                query_vector = semantic_cache.embed(query)
+            if query_vector is not None:
+                semantic_hit = semantic_cache.get(
+                    query, top_k=top_k, generation=generation, vector=query_vector
+                )
+                if semantic_hit is not None and not semantic_hit.sampled:
+                    logger.debug(
+                        f"Semantic cache hit for query: {query[:50]} "
+                        f"(similarity={semantic_hit.similarity:.3f}, cached='{semantic_hit.cached_query[:50]}')"
+                    )
+                    return semantic_hit.results
         
         # 2. 执行检索
         if self.retrieval_engine:
             results = self.retrieval_engine.multi_dimensional_retrieval(
                 query=query,
+                context=context,
                 top_k=top_k
             )
         else:
@@ -115,16 +211,30 @@ class RetrievalOptimizer:
             logger.warning("Retrieval engine not available")
             results = []
         
+        if semantic_hit is not None:
+            if self.semantic_cache.record_verification(semantic_hit.results, results):
+                logger.debug(f"Semantic cache false hit: '{query[:50]}' vs '{semantic_hit.cached_query[:50]}'")
+        
         # 3. 缓存结果
         if use_cache and self.cache:
-            self.cache.put(query, results, top_k=top_k)
-        
-        # 4. 预取相关查询
-        if enable_prefetch and self.prefetcher:
-            self.prefetcher.prefetch_related(query)
+            self.cache.put(query, results, top_k=top_k, generation=generation, scope=scope)
+            if query_vector is not None:
+                semantic_cache.put(
+                    query, results, top_k=top_k, generation=generation, vector=query_vector
+                )
         
         return results
     
+    @staticmethod
+    def _context_scope(context: Optional[Context]) -> Optional[str]:
+        """上下文的缓存键部分（无会话/用户/元数据时为 None，与无上下文查询共享缓存）"""
+        if context is None or not (context.session_id or context.user_id or context.metadata):
+            return None
+        return json.dumps(
+            [context.session_id, context.user_id, context.metadata or {}],
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+    
     def batch_retrieve(
         self,
         queries: List[str],
@@ -229,10 +339,35 @@ class RetrievalOptimizer:
         # 简化实现：使用缓存
         return self.retrieve(query, top_k=top_k)
     
+    def shutdown(self) -> None:
+        """关闭后台预取线程"""
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+    
     def clear_cache(self) -> None:
         """清空缓存"""
         if self.cache:
             self.cache.clear()
+        if self.semantic_cache:
+            self.semantic_cache.clear()
+    
+    def invalidate_cache(self, memory_id: Optional[str] = None) -> None:
+        """
+        存储写入后使缓存失效（O(1)）
+        
+        在 retain/update/delete 等写操作后调用，避免返回过期的检索结果。
+        语义缓存按同一存储代际校验，随之失效。
+        
+        Args:
+            memory_id: 写入的记忆 ID（仅用于写入监听器签名，失效范围为全部缓存）
+        """
+        if self.cache:
+            self.cache.invalidate()
+    
+    def subscribe(self, storage_manager: Any) -> None:
+        """订阅存储管理器的写入通知，存储写入后自动使缓存失效"""
+        if self.cache and hasattr(storage_manager, "add_write_listener"):
+            storage_manager.add_write_listener(self.invalidate_cache)
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -241,6 +376,12 @@ class RetrievalOptimizer:
         if self.cache:
             stats["cache"] = self.cache.get_statistics()
         
+        if self.semantic_cache:
+            stats["semantic_cache"] = self.semantic_cache.get_statistics()
+        
+        if self.prefetcher:
+            stats["prefetch"] = self.prefetcher.get_statistics()
+        
         if self.retrieval_engine:
             # 可以添加检索引擎的统计信息
             pass
@@ -0,0 +1,274 @@
+"""
+自适应检索器选择策略
+
+按查询类别统计每个检索器的结果在最终 Top-K 中的存活率和耗时，
+据此跳过或延后低产出的检索器（ε-greedy 风格的多臂老虎机，带周期性探索）。
+
+设计特点：
+- 按 (查询类别, 检索器) 维度统计：调用次数、命中存活率（EWMA）、平均耗时（EWMA）
+- 冷启动：样本数不足 min_samples 时始终执行
+- 低产出检索器不直接丢弃，而是延后：首轮结果不足 Top-K 时再补跑
+- 周期性探索：每 explore_every 次查询强制全量执行一次，另有 exploration_rate 概率随机探索
+
+工业级特性：
+- 线程安全（使用锁保护统计信息）
+- 统计信息可导出（用于 UniMem.get_metrics）
+"""
+
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def classify_query(query: str) -> str:
+    """
+    查询分类（用于按类别统计检索器产出）
+
+    按查询长度粗分三类：
+    - keyword: 短关键词查询（如人物名、"伏笔"）
+    - phrase: 普通短语/组合查询（如 "第12章 人物 伏笔"）
+    - passage: 长文本查询（如整段章节摘要）
+
+    Args:
+        query: 查询字符串
+
+    Returns:
+        查询类别名称
+    """
+    text = (query or "").strip()
+    if len(text) <= 8:
+        return "keyword"
+    if len(text) <= 64:
+        return "phrase"
+    return "passage"
+
+
+@dataclass
+class RetrieverStats:
+    """单个 (查询类别, 检索器) 的统计信息"""
+    calls: int = 0
+    skips: int = 0
+    deferred_runs: int = 0
+    results: int = 0
+    survived: int = 0
+    yield_ewma: float = 1.0  # 最近调用中有结果进入最终 Top-K 的比例（乐观初始化）
+    latency_ewma: float = 0.0  # 最近调用的平均耗时（秒）
+
+    def record(self, latency: float, returned: int, survived: int, alpha: float) -> None:
+        """记录一次调用"""
+        self.calls += 1
+        self.results += returned
+        self.survived += survived
+        hit = 1.0 if survived > 0 else 0.0
+        if self.calls == 1:
+            self.yield_ewma = hit
+            self.latency_ewma = latency
+        else:
+            self.yield_ewma = (1 - alpha) * self.yield_ewma + alpha * hit
+            self.latency_ewma = (1 - alpha) * self.latency_ewma + alpha * latency
+
+    @property
+    def survival_rate(self) -> float:
+        """返回结果进入最终 Top-K 的比例"""
+        if self.results == 0:
+            return 0.0
+        return self.survived / self.results
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "calls": self.calls,
+            "skips": self.skips,
+            "deferred_runs": self.deferred_runs,
+            "results": self.results,
+            "survived": self.survived,
+            "survival_rate": self.survival_rate,
+            "yield": self.yield_ewma,
+            "avg_latency": self.latency_ewma,
+        }
+
+
+class AdaptiveRetrieverPolicy:
+    """
+    自适应检索器选择策略
+
+    每次检索前调用 select() 把检索器划分为「立即执行」和「延后执行」两组；
+    检索完成后调用 record() 回报每个检索器的耗时和其结果在最终 Top-K 中的存活数。
+
+    低产出判定：样本数 >= min_samples 且 yield < min_yield。
+    """
+
+    def __init__(
+        self,
+        min_samples: int = 20,
+        min_yield: float = 0.05,
+        exploration_rate: float = 0.1,
+        explore_every: int = 50,
+        ewma_alpha: float = 0.1,
+        always_on: Optional[Iterable[str]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化策略
+
+        Args:
+            min_samples: 判定低产出前所需的最少调用次数（默认 20）
+            min_yield: 低产出阈值，yield 低于此值的检索器被延后（默认 0.05）
+            exploration_rate: 随机探索概率，命中时全部检索器都执行（默认 0.1）
+            explore_every: 每个查询类别每 N 次查询强制全量执行一次（默认 50，0 表示关闭）
+            ewma_alpha: EWMA 平滑系数（默认 0.1）
+            always_on: 永不跳过的检索器名称
+            seed: 随机种子（用于测试复现）
+        """
+        self.min_samples = max(int(min_samples), 1)
+        self.min_yield = max(float(min_yield), 0.0)
+        self.exploration_rate = min(max(float(exploration_rate), 0.0), 1.0)
+        self.explore_every = max(int(explore_every), 0)
+        self.ewma_alpha = min(max(float(ewma_alpha), 0.01), 1.0)
+        self.always_on = set(always_on or [])
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._stats: Dict[str, Dict[str, RetrieverStats]] = {}
+        self._query_counts: Dict[str, int] = {}
+        self._explorations = 0
+
+        logger.info(
+            f"AdaptiveRetrieverPolicy initialized: min_samples={self.min_samples}, "
+            f"min_yield={self.min_yield}, exploration_rate={self.exploration_rate}"
+        )
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["AdaptiveRetrieverPolicy"]:
+        """
+        从配置创建策略
+
+        Args:
+            config: retrieval.adaptive_retrievers 配置；enabled 为 False 时返回 None
+
+        Returns:
+            策略实例或 None
+        """
+        config = config or {}
+        if not config.get("enabled", True):
+            return None
+        return cls(
+            min_samples=config.get("min_samples", 20),
+            min_yield=config.get("min_yield", 0.05),
+            exploration_rate=config.get("exploration_rate", 0.1),
+            explore_every=config.get("explore_every", 50),
+            ewma_alpha=config.get("ewma_alpha", 0.1),
+            always_on=config.get("always_on"),
+        )
+
+    def _get_stats(self, query_class: str, name: str) -> RetrieverStats:
+        """获取统计对象（调用方持有锁）"""
+        per_class = self._stats.setdefault(query_class, {})
+        stats = per_class.get(name)
+        if stats is None:
+            stats = RetrieverStats()
+            per_class[name] = stats
+        return stats
+
+    def select(self, query_class: str, names: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        选择本次要执行的检索器
+
+        Args:
+            query_class: 查询类别
+            names: 候选检索器名称
+
+        Returns:
+            (立即执行的检索器列表, 延后执行的检索器列表)
+        """
+        with self._lock:
+            count = self._query_counts.get(query_class, 0) + 1
+            self._query_counts[query_class] = count
+
+            explore = (
+                (self.explore_every and count % self.explore_every == 0)
+                or self._rng.random() < self.exploration_rate
+            )
+            if explore:
+                self._explorations += 1
+                return list(names), []
+
+            active: List[str] = []
+            deferred: List[str] = []
+            for name in names:
+                stats = self._get_stats(query_class, name)
+                if (
+                    name not in self.always_on
+                    and stats.calls >= self.min_samples
+                    and stats.yield_ewma < self.min_yield
+                ):
+                    stats.skips += 1
+                    deferred.append(name)
+                else:
+                    active.append(name)
+
+            # 至少保留一个检索器：选择 yield 最高的
+            if not active and deferred:
+                best = max(deferred, key=lambda n: self._get_stats(query_class, n).yield_ewma)
+                deferred.remove(best)
+                self._get_stats(query_class, best).skips -= 1
+                active.append(best)
+
+            return active, deferred
+
+    def record(
+        self,
+        query_class: str,
+        name: str,
+        latency: float,
+        returned: int,
+        survived: int,
+        deferred: bool = False,
+    ) -> None:
+        """
+        回报一次检索器调用结果
+
+        Args:
+            query_class: 查询类别
+            name: 检索器名称
+            latency: 耗时（秒）
+            returned: 返回的结果数
+            survived: 进入最终 Top-K 的结果数
+            deferred: 是否为延后补跑
+        """
+        with self._lock:
+            stats = self._get_stats(query_class, name)
+            stats.record(latency, returned, survived, self.ewma_alpha)
+            if deferred:
+                stats.deferred_runs += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取策略配置和统计信息"""
+        with self._lock:
+            return {
+                "policy": {
+                    "type": "epsilon_greedy",
+                    "min_samples": self.min_samples,
+                    "min_yield": self.min_yield,
+                    "exploration_rate": self.exploration_rate,
+                    "explore_every": self.explore_every,
+                    "always_on": sorted(self.always_on),
+                },
+                "explorations": self._explorations,
+                "queries": dict(self._query_counts),
+                "retrievers": {
+                    query_class: {name: stats.to_dict() for name, stats in per_class.items()}
+                    for query_class, per_class in self._stats.items()
+                },
+            }
+
+    def reset(self) -> None:
+        """清空统计信息"""
+        with self._lock:
+            self._stats.clear()
+            self._query_counts.clear()
+            self._explorations = 0
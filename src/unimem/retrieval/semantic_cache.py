@@ -0,0 +1,346 @@
+"""
+语义检索缓存
+
+在精确查询缓存（RetrievalCache）之后增加一层基于查询向量相似度的缓存：
+提示词构建器会发出大量近似查询（如 "第12章 人物 伏笔"、"第13章 人物 伏笔"），
+它们无法命中按查询字符串 MD5 生成的精确键，但检索结果往往相同。
+
+设计特点：
+- 查询向量归一化后存放在预分配的 float32 矩阵中，一次矩阵乘法完成最近邻查找
+- 余弦相似度超过阈值且存储代际一致时返回缓存结果
+- LRU 淘汰（OrderedDict 维护槽位顺序，淘汰时复用槽位）
+- 存储代际前进时整体失效
+- 抽样校验：按 sample_rate 对命中重新执行真实检索，比较结果重合度以统计误命中率，
+  并记录最佳相似度分布，便于调整阈值
+
+工业级特性：
+- 线程安全（使用锁保护矩阵和槽位）
+- 缓存统计和监控
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any, Sequence
+
+import numpy as np
+
+from ..memory_types import RetrievalResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SemanticCacheEntry:
+    """语义缓存条目"""
+    query: str
+    results: List[RetrievalResult]
+    top_k: Optional[int]
+    generation: int
+
+
+@dataclass
+class SemanticCacheHit:
+    """语义缓存命中信息"""
+    results: List[RetrievalResult]
+    similarity: float
+    cached_query: str
+    sampled: bool = False  # 是否需要调用方执行真实检索进行抽样校验
+
+
+def result_overlap(cached: Sequence[RetrievalResult], fresh: Sequence[RetrievalResult]) -> float:
+    """
+    计算两组检索结果的记忆 ID 重合度（Jaccard）
+
+    Args:
+        cached: 缓存返回的结果
+        fresh: 真实检索的结果
+
+    Returns:
+        0~1 的重合度；两者都为空时返回 1.0
+    """
+    cached_ids = {r.memory.id for r in cached if getattr(r, "memory", None)}
+    fresh_ids = {r.memory.id for r in fresh if getattr(r, "memory", None)}
+    if not cached_ids and not fresh_ids:
+        return 1.0
+    return len(cached_ids & fresh_ids) / len(cached_ids | fresh_ids)
+
+
+class SemanticRetrievalCache:
+    """语义检索缓存
+
+    按查询向量的余弦相似度复用检索结果。
+    """
+
+    # 相似度分布直方图的桶下界（用于调整阈值）
+    SIMILARITY_BUCKETS = (0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.98)
+
+    def __init__(
+        self,
+        embedding_func: Callable[[str], Optional[Sequence[float]]],
+        similarity_threshold: float = 0.92,
+        max_entries: int = 256,
+        sample_rate: float = 0.05,
+        false_hit_overlap: float = 0.5,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化语义缓存
+
+        Args:
+            embedding_func: 查询向量函数（文本 -> 向量，失败返回 None）
+            similarity_threshold: 命中所需的最小余弦相似度（默认 0.92）
+            max_entries: 最大缓存条目数（默认 256）
+            sample_rate: 命中后抽样校验的概率（默认 0.05）
+            false_hit_overlap: 抽样校验时结果重合度低于此值记为误命中（默认 0.5）
+            seed: 随机种子（用于测试复现）
+        """
+        self.embedding_func = embedding_func
+        self.similarity_threshold = float(similarity_threshold)
+        self.max_entries = max(int(max_entries), 1)
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.false_hit_overlap = float(false_hit_overlap)
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+        # 向量矩阵按首次写入时的维度懒分配
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: List[Optional[SemanticCacheEntry]] = [None] * self.max_entries
+        self._valid = np.zeros(self.max_entries, dtype=bool)
+        self._top_ks = np.zeros(self.max_entries, dtype=np.int64)  # 0 表示不限
+        self._slots: "OrderedDict[str, int]" = OrderedDict()  # 查询 -> 槽位，按 LRU 排列
+        self._free_slots: List[int] = list(range(self.max_entries - 1, -1, -1))
+        self._generation = 0
+
+        # 统计信息
+        self._hits = 0
+        self._misses = 0
+        self._sampled = 0
+        self._false_hits = 0
+        self._overlap_total = 0.0
+        self._similarity_hist: Dict[str, int] = {f"{b:.2f}": 0 for b in self.SIMILARITY_BUCKETS}
+
+        logger.info(
+            f"SemanticRetrievalCache initialized: threshold={self.similarity_threshold}, "
+            f"max_entries={self.max_entries}, sample_rate={self.sample_rate}"
+        )
+
+    def embed(self, query: str) -> Optional[np.ndarray]:
+        """
+        计算归一化查询向量
+
+        未命中时调用方可将同一向量传给 get 和 put，避免对同一查询重复计算嵌入。
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            归一化的 float32 向量，嵌入失败或为零向量时返回 None
+        """
+        try:
+            vector = self.embedding_func(query)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _reset_slots(self) -> None:
+        """丢弃全部条目（调用方持有锁）"""
+        self._slots.clear()
+        self._entries = [None] * self.max_entries
+        self._valid[:] = False
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _sync_generation(self, generation: int) -> None:
+        """存储代际前进时丢弃全部条目（调用方持有锁）"""
+        if generation > self._generation:
+            self._reset_slots()
+            self._generation = generation
+
+    def _record_similarity(self, similarity: float) -> None:
+        """记录最佳相似度分布（调用方持有锁）"""
+        bucket = None
+        for lower in self.SIMILARITY_BUCKETS:
+            if similarity >= lower:
+                bucket = lower
+        if bucket is not None:
+            self._similarity_hist[f"{bucket:.2f}"] += 1
+
+    def get(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        generation: int = 0,
+        vector: Optional[np.ndarray] = None,
+    ) -> Optional[SemanticCacheHit]:
+        """
+        查找语义相近的缓存结果（线程安全）
+
+        Args:
+            query: 查询文本
+            top_k: Top-K 参数（缓存条目的 top_k 必须不小于该值）
+            generation: 当前存储代际
+            vector: embed() 计算的查询向量（None 时内部计算）
+
+        Returns:
+            命中信息，未命中返回 None
+        """
+        if not query or not query.strip():
+            return None
+
+        if vector is None:
+            vector = self.embed(query)
+
+        with self._lock:
+            self._sync_generation(generation)
+            if vector is None or self._matrix is None or not self._slots:
+                self._misses += 1
+                return None
+            if vector.shape[0] != self._matrix.shape[1]:
+                self._misses += 1
+                return None
+
+            # 空槽位和 top_k 不足的条目不参与比较
+            mask = self._valid.copy()
+            if top_k:
+                mask &= (self._top_ks == 0) | (self._top_ks >= top_k)
+            if not mask.any():
+                self._misses += 1
+                return None
+            similarities = self._matrix @ vector
+            similarities[~mask] = -np.inf
+            best_slot = int(np.argmax(similarities))
+            best_similarity = float(similarities[best_slot])
+
+            self._record_similarity(best_similarity)
+            if best_similarity < self.similarity_threshold:
+                self._misses += 1
+                return None
+
+            entry = self._entries[best_slot]
+            self._slots.move_to_end(entry.query)
+            self._hits += 1
+            sampled = self._rng.random() < self.sample_rate
+            results = entry.results[:top_k] if top_k else entry.results
+            return SemanticCacheHit(
+                results=results,
+                similarity=best_similarity,
+                cached_query=entry.query,
+                sampled=sampled,
+            )
+
+    def put(
+        self,
+        query: str,
+        results: List[RetrievalResult],
+        top_k: Optional[int] = None,
+        generation: int = 0,
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        写入缓存（线程安全）
+
+        Args:
+            query: 查询文本
+            results: 检索结果
+            top_k: Top-K 参数
+            generation: 检索开始时的存储代际
+            vector: embed() 计算的查询向量（None 时内部计算）
+        """
+        if not query or not query.strip() or not results:
+            return
+
+        if vector is None:
+            vector = self.embed(query)
+        if vector is None:
+            return
+
+        with self._lock:
+            self._sync_generation(generation)
+            if generation < self._generation:
+                return  # 检索期间发生写入，结果已过期
+
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._matrix.shape[1]:
+                logger.warning("Semantic cache embedding dimension changed, skipping put")
+                return
+
+            slot = self._slots.pop(query, None)
+            if slot is None:
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                else:
+                    # 淘汰最久未使用的条目并复用其槽位
+                    _, slot = self._slots.popitem(last=False)
+
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._top_ks[slot] = top_k or 0
+            self._entries[slot] = SemanticCacheEntry(
+                query=query, results=results, top_k=top_k, generation=self._generation
+            )
+            self._slots[query] = slot
+
+    def record_verification(
+        self,
+        cached: Sequence[RetrievalResult],
+        fresh: Sequence[RetrievalResult],
+    ) -> bool:
+        """
+        记录一次抽样校验结果
+
+        Args:
+            cached: 语义缓存返回的结果
+            fresh: 真实检索的结果
+
+        Returns:
+            是否为误命中
+        """
+        overlap = result_overlap(cached, fresh)
+        false_hit = overlap < self.false_hit_overlap
+        with self._lock:
+            self._sampled += 1
+            self._overlap_total += overlap
+            if false_hit:
+                self._false_hits += 1
+        return false_hit
+
+    def clear(self) -> None:
+        """清空缓存（线程安全）"""
+        with self._lock:
+            self._reset_slots()
+            self._hits = 0
+            self._misses = 0
+            self._sampled = 0
+            self._false_hits = 0
+            self._overlap_total = 0.0
+            self._similarity_hist = {f"{b:.2f}": 0 for b in self.SIMILARITY_BUCKETS}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取缓存统计信息（线程安全）"""
+        with self._lock:
+            total_requests = self._hits + self._misses
+            return {
+                "size": len(self._slots),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "generation": self._generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total_requests if total_requests > 0 else 0.0,
+                "sampled": self._sampled,
+                "false_hits": self._false_hits,
+                "false_hit_rate": self._false_hits / self._sampled if self._sampled > 0 else 0.0,
+                "avg_sample_overlap": self._overlap_total / self._sampled if self._sampled > 0 else 0.0,
+                "best_similarity_histogram": dict(self._similarity_hist),
+            }
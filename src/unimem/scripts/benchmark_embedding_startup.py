@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+嵌入模型启动与吞吐基准测试
+
+比较不同推理后端（torch / onnx / int8 动态量化）的：
+- 冷启动时间（模型加载）
+- 首次编码延迟（含推理初始化）
+- 按批编码吞吐（texts/s）
+
+以及 AtomLinkAdapter 在延迟加载模式下的初始化耗时。
+
+用法：
+  python unimem/scripts/benchmark_embedding_startup.py --model /root/data/AI/pretrain/all-MiniLM-L6-v2
+  python unimem/scripts/benchmark_embedding_startup.py --backends torch int8 --batch-size 32 --batches 20
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# 添加 src 目录到路径
+src_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(src_dir))
+
+from unimem.adapters.atom_link_adapter import (
+    AtomLinkAdapter,
+    EMBEDDING_BACKENDS,
+    SENTENCE_TRANSFORMERS_AVAILABLE,
+    load_sentence_transformer,
+)
+
+SAMPLE_TEXTS = [
+    "第{n}章：林默在旧城区的雨夜里第一次见到苏晴，伏笔埋在那封没有署名的信里。",
+    "世界观设定：灵能网络覆盖整座城市，所有人的记忆都可能被读取和篡改。",
+    "人物关系：林默与苏晴表面是搭档，实际上彼此都在隐瞒各自的身份。",
+    "Scene {n}: the detective walks into the abandoned station and finds the missing ledger.",
+]
+
+
+def make_texts(count: int) -> list:
+    return [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)].format(n=i) for i in range(count)]
+
+
+def bench_backend(model: str, backend: str, batch_size: int, batches: int) -> dict:
+    start = time.perf_counter()
+    encoder = load_sentence_transformer(model, backend)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoder.encode(["warm up"], show_progress_bar=False)
+    first_encode_ms = (time.perf_counter() - start) * 1000.0
+
+    texts = make_texts(batch_size)
+    start = time.perf_counter()
+    for _ in range(batches):
+        encoder.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+    return {
+        "load_s": load_seconds,
+        "first_ms": first_encode_ms,
+        "throughput": batch_size * batches / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def bench_adapter_init(model: str, lazy: bool) -> float:
+    adapter = AtomLinkAdapter(config={
+        "local_model_path": model,
+        "model_name": model,
+        "vector_backend": "memory",
+        "embedding_lazy_load": lazy,
+        "embedding_warm_up": False,
+    })
+    start = time.perf_counter()
+    adapter.initialize()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding model startup benchmark")
+    parser.add_argument("--model", default="/root/data/AI/pretrain/all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batches", type=int, default=10)
+    args = parser.parse_args()
+
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        print("sentence-transformers 未安装，无法运行基准测试")
+        sys.exit(1)
+
+    print(f"model={args.model} batch_size={args.batch_size} batches={args.batches}")
+    print(f"AtomLinkAdapter.initialize eager: {bench_adapter_init(args.model, lazy=False):.2f}s")
+    print(f"AtomLinkAdapter.initialize lazy:  {bench_adapter_init(args.model, lazy=True):.2f}s")
+    print()
+    print(f"{'backend':<10}{'load(s)':>10}{'first(ms)':>12}{'texts/s':>12}")
+    for backend in args.backends:
+        try:
+            result = bench_backend(args.model, backend, args.batch_size, args.batches)
+        except Exception as e:
+            print(f"{backend:<10}  failed: {e}")
+            continue
+        print(f"{backend:<10}{result['load_s']:>10.2f}{result['first_ms']:>12.1f}{result['throughput']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+记忆编解码基准测试
+
+比较各编解码器（json / msgpack / msgpack-raw）对 FoA/DA 记忆的编码、解码吞吐量
+和每条记忆的字节数。短内容对应 FoA 中的对话片段，长内容对应 DA 中的章节摘要。
+
+用法：
+  python unimem/scripts/benchmark_memory_codec.py --count 2000
+  python unimem/scripts/benchmark_memory_codec.py --content-chars 4000
+"""
+
+import sys
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# 添加 src 目录到路径
+src_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(src_dir))
+
+from unimem import memory_codec
+from unimem.memory_types import Memory, MemoryType
+
+
+def make_memories(count: int, content_chars: int):
+    """生成测试记忆"""
+    sentence = "林渊在第十二章埋下的伏笔与师门旧案相关。"
+    content = (sentence * (content_chars // len(sentence) + 1))[:content_chars]
+    return [
+        Memory(
+            id=f"bench-{i}",
+            content=content,
+            timestamp=datetime.now(),
+            memory_type=MemoryType.EXPERIENCE,
+            keywords=["伏笔", "师门"],
+            tags=["伏笔", "人物"],
+            context="第十二章",
+            links={f"bench-{i - 1}", f"bench-{i + 1}"},
+            retrieval_count=i % 7,
+            last_accessed=datetime.now(),
+            metadata={"session_id": "bench", "importance": 0.7, "chapter": 12},
+        )
+        for i in range(count)
+    ]
+
+
+def measure(name, codec, memories):
+    start = time.perf_counter()
+    encoded = [codec.encode(memory) for memory in memories]
+    encode_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for raw in encoded:
+        memory_codec.decode_memory(raw)
+    decode_seconds = time.perf_counter() - start
+    size = sum(len(raw.encode("utf-8") if isinstance(raw, str) else raw) for raw in encoded) / len(encoded)
+    print(f"{name:<12} {len(memories) / encode_seconds:>12.0f} {len(memories) / decode_seconds:>12.0f} {size:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory codec benchmark")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--content-chars", type=int, default=0,
+                        help="内容长度（字符）；为 0 时依次测试 80 和 2000")
+    args = parser.parse_args()
+
+    sizes = [args.content_chars] if args.content_chars else [80, 2000]
+    for content_chars in sizes:
+        memories = make_memories(args.count, content_chars)
+        print(f"count={args.count} content_chars={content_chars}")
+        print(f"{'codec':<12} {'encode/s':>12} {'decode/s':>12} {'bytes':>10}")
+        for name in memory_codec.available_codecs():
+            measure(name, memory_codec.get_codec(name), memories)
+        print()
+
+
+if __name__ == "__main__":
+    main()
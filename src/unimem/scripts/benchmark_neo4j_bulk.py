@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Neo4j 批量写入基准测试
+
+比较逐条写入（create_entity / create_relation / create_memory，每条多次往返）
+与 UNWIND 批量写入（create_*_batch，每块一个事务）导入一部小说解析结果的吞吐量。
+
+需要运行中的 Neo4j（NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD）；测试数据使用
+bench- 前缀的 ID，结束时删除。
+
+用法：
+  python unimem/scripts/benchmark_neo4j_bulk.py --entities 2000 --memories 2000
+  python unimem/scripts/benchmark_neo4j_bulk.py --per-item-limit 200 --chunk-size 1000
+"""
+
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# 添加 src 目录到路径
+src_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(src_dir))
+
+from unimem import neo4j as unimem_neo4j
+from unimem.memory_types import Entity, Relation, Memory, MemoryType
+
+
+def make_data(prefix: str, entities: int, memories: int, seed: int = 42):
+    """生成实体、关系和记忆（每条记忆提及 3 个实体、链接 2 条更早的记忆）"""
+    rng = random.Random(seed)
+    entity_list = [
+        Entity(id=f"{prefix}e{i}", name=f"人物{i}", entity_type="Person", description="小说人物",
+               retrieval_key="", retrieval_value="")
+        for i in range(entities)
+    ]
+    relation_list = [
+        Relation(source=f"{prefix}e{i}", target=f"{prefix}e{rng.randrange(entities)}", keywords=["关系"],
+                 description="人物关系", retrieval_key="", retrieval_value="")
+        for i in range(entities)
+    ]
+    memory_list = []
+    for i in range(memories):
+        memory_list.append(Memory(
+            id=f"{prefix}m{i}",
+            content=f"第{i}段：林渊在师门旧案中埋下伏笔。",
+            timestamp=datetime.now(),
+            memory_type=MemoryType.EXPERIENCE,
+            keywords=["伏笔"],
+            entities=[f"{prefix}e{rng.randrange(entities)}" for _ in range(3)],
+            links={f"{prefix}m{rng.randrange(i)}" for _ in range(2)} if i else set(),
+        ))
+    return entity_list, relation_list, memory_list
+
+
+def cleanup(prefix: str):
+    unimem_neo4j.graph.run(
+        "MATCH (n) WHERE (n:Entity OR n:Memory) AND n.id STARTS WITH $prefix DETACH DELETE n",
+        prefix=prefix,
+    )
+
+
+def report(name, count, seconds):
+    print(f"{name:<28} {count:>8} {seconds:>10.2f} {count / seconds if seconds else 0:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neo4j bulk write benchmark")
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--memories", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=unimem_neo4j.BULK_CHUNK_SIZE)
+    parser.add_argument("--per-item-limit", type=int, default=300,
+                        help="逐条写入只测试前 N 条（逐条路径很慢）")
+    args = parser.parse_args()
+
+    unimem_neo4j.get_graph()
+    unimem_neo4j._ensure_initialized()
+    unimem_neo4j.create_memory_indexes()
+    unimem_neo4j.graph.run("CREATE INDEX entity_id_index IF NOT EXISTS FOR (e:Entity) ON (e.id)")
+
+    print(f"entities={args.entities} memories={args.memories} chunk_size={args.chunk_size}")
+    print(f"{'path':<28} {'rows':>8} {'seconds':>10} {'rows/s':>12}")
+
+    # 逐条写入（基线）
+    entities, relations, memories = make_data("bench-item-", args.entities, args.memories)
+    n = args.per_item_limit
+    for name, items, func in (
+        ("per-item entities", entities[:n], unimem_neo4j.create_entity),
+        ("per-item relations", relations[:n], unimem_neo4j.create_relation),
+        ("per-item memories", memories[:n], unimem_neo4j.create_memory),
+    ):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        report(name, len(items), time.perf_counter() - start)
+    cleanup("bench-item-")
+
+    # UNWIND 批量写入
+    entities, relations, memories = make_data("bench-bulk-", args.entities, args.memories)
+    for name, items, func in (
+        ("bulk entities", entities, unimem_neo4j.create_entities_batch),
+        ("bulk relations", relations, unimem_neo4j.create_relations_batch),
+        ("bulk memories (+edges)", memories, unimem_neo4j.create_memories_batch),
+    ):
+        start = time.perf_counter()
+        func(items, chunk_size=args.chunk_size)
+        report(name, len(items), time.perf_counter() - start)
+    cleanup("bench-bulk-")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Redis FoA/DA 读取基准测试
+
+比较逐条读取（每个 ID 一次 GET + TTL + SETEX）与批量读取（MGET + 流水线写回）
+在一次 top-k 检索中的网络往返次数和耗时。
+
+默认连接 REDIS_HOST/REDIS_PORT 指定的本地 Redis；使用 --fake 时改用 fakeredis，
+并可通过 --rtt-ms 模拟每次往返的网络延迟。
+
+用法：
+  python unimem/scripts/benchmark_redis_reads.py --memories 200 --top-k 10 --rounds 50
+  python unimem/scripts/benchmark_redis_reads.py --fake --rtt-ms 0.3
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# 添加 src 目录到路径
+src_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(src_dir))
+
+from unimem import redis as unimem_redis
+from unimem.memory_types import Memory, MemoryType
+
+
+def make_client(fake: bool):
+    """创建 Redis 客户端（本地 Redis 或 fakeredis）"""
+    if fake:
+        import fakeredis
+        return fakeredis.FakeRedis(decode_responses=True)
+    import redis
+    return redis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        db=int(os.getenv("REDIS_DB", "15")),
+        decode_responses=True,
+    )
+
+
+def instrument(client, rtt_seconds: float) -> list:
+    """统计往返次数（每次发送命令包计一次），并可模拟往返延迟"""
+    counter = [0]
+    pool = client.connection_pool
+    base = pool.connection_class
+
+    class CountingConnection(base):
+        def send_packed_command(self, command, check_health=True):
+            counter[0] += 1
+            if rtt_seconds:
+                time.sleep(rtt_seconds)
+            return super().send_packed_command(command, check_health)
+
+    # 在创建任何连接之前替换连接类
+    pool.connection_class = CountingConnection
+    return counter
+
+
+def read_one_by_one(client, memory_ids):
+    """基线：逐条 GET + TTL + SETEX（批量读取之前的实现）"""
+    memories = []
+    binary = unimem_redis._binary_client(client)
+    for memory_id in memory_ids:
+        key = f"foa:memory:{memory_id}"
+        raw = binary.get(key)
+        if not raw:
+            continue
+        memory = unimem_redis._decode_memory(raw)
+        memory.last_accessed = datetime.now()
+        memory.retrieval_count += 1
+        ttl = client.ttl(key)
+        if ttl > 0:
+            client.set(key, unimem_redis._encode_memory(memory), ex=ttl)
+        memories.append(memory)
+    return memories
+
+
+def measure(name, func, client, counter, top_k, rounds):
+    start_trips = counter[0]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        memory_ids = client.lrange("foa:memories", 0, top_k - 1)
+        func(memory_ids)
+    elapsed = time.perf_counter() - start
+    trips = (counter[0] - start_trips) / rounds
+    print(f"{name:<14} {trips:>10.1f} {elapsed / rounds * 1000:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis FoA batch read benchmark")
+    parser.add_argument("--memories", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--fake", action="store_true", help="使用 fakeredis 代替本地 Redis")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="模拟每次往返的延迟（毫秒）")
+    args = parser.parse_args()
+
+    client = make_client(args.fake)
+    counter = instrument(client, args.rtt_ms / 1000.0)
+    client.flushdb()
+    for i in range(args.memories):
+        memory = Memory(
+            id=f"bench-{i}",
+            content="林渊在第十二章埋下的伏笔与师门旧案相关。" * 4,
+            timestamp=datetime.now(),
+            memory_type=MemoryType.EXPERIENCE,
+            tags=["伏笔", "人物"],
+            metadata={"session_id": "bench"},
+        )
+        unimem_redis.add_to_foa(memory, client=client, ttl=3600)
+
+    print(f"backend={'fakeredis' if args.fake else 'redis'} memories={args.memories} "
+          f"top_k={args.top_k} rounds={args.rounds} rtt_ms={args.rtt_ms}")
+    print(f"{'method':<14} {'round trips':>10} {'ms/search':>12}")
+    measure("one-by-one", lambda ids: read_one_by_one(client, ids), client, counter, args.top_k, args.rounds)
+    measure("mget+pipeline", lambda ids: unimem_redis.get_many_from_foa(ids, client=client), client, counter,
+            args.top_k, args.rounds)
+    client.flushdb()
+
+
+if __name__ == "__main__":
+    main()
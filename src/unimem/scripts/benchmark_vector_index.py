@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+本地向量索引基准测试
+
+以精确的 float32 扁平索引为基线，比较量化（float16 / int8）和 HNSW 模式的
+召回率（recall@k）、检索延迟和向量内存占用。
+
+用法：
+  python unimem/scripts/benchmark_vector_index.py --points 100000 --dim 384 --queries 200
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# 添加 src 目录到路径
+src_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(src_dir))
+
+import numpy as np
+
+from unimem.vector_index import LocalVectorIndex, VectorPoint, HNSWLIB_AVAILABLE
+
+
+def make_dataset(points: int, dim: int, queries: int, seed: int = 0):
+    """生成带聚类结构的随机向量（更接近真实嵌入分布）"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(points // 500, 1), dim)).astype(np.float32)
+    assignment = rng.integers(0, centers.shape[0], size=points)
+    data = centers[assignment] + 0.3 * rng.normal(size=(points, dim)).astype(np.float32)
+    query_idx = rng.integers(0, points, size=queries)
+    query_vectors = data[query_idx] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32)
+    return data, query_vectors
+
+
+def build(data: np.ndarray, batch: int = 1000, **options) -> tuple:
+    index = LocalVectorIndex(**options)
+    start = time.perf_counter()
+    for offset in range(0, data.shape[0], batch):
+        index.upsert(
+            VectorPoint(id=str(i), vector=data[i]) for i in range(offset, min(offset + batch, data.shape[0]))
+        )
+    return index, time.perf_counter() - start
+
+
+def run(index: LocalVectorIndex, queries: np.ndarray, top_k: int) -> tuple:
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, limit=top_k, with_payload=False)
+        latencies.append(time.perf_counter() - start)
+        results.append([hit.id for hit in hits])
+    return results, np.asarray(latencies) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vector index benchmark")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    data, queries = make_dataset(args.points, args.dim, args.queries)
+
+    configs = [
+        ("flat/float32", {"index_type": "flat", "quantization": None}),
+        ("flat/float16", {"index_type": "flat", "quantization": "float16"}),
+        ("flat/int8", {"index_type": "flat", "quantization": "int8"}),
+    ]
+    if HNSWLIB_AVAILABLE:
+        configs.append(("hnsw/float32", {"index_type": "hnsw", "quantization": None}))
+        configs.append(("hnsw/int8", {"index_type": "hnsw", "quantization": "int8"}))
+    else:
+        print("hnswlib 未安装，跳过 HNSW 模式")
+
+    print(f"points={args.points} dim={args.dim} queries={args.queries} top_k={args.top_k}")
+    print(f"{'config':<14}{'build(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'recall@k':>10}{'vec MB':>10}")
+
+    baseline = None
+    for name, options in configs:
+        index, build_seconds = build(data, **options)
+        results, latencies = run(index, queries, args.top_k)
+        if baseline is None:
+            baseline = results
+        recall = np.mean([
+            len(set(got) & set(expected)) / max(len(expected), 1)
+            for got, expected in zip(results, baseline)
+        ])
+        vector_mb = index.get_statistics()["vector_bytes"] / (1024 * 1024)
+        print(
+            f"{name:<14}{build_seconds:>10.2f}{np.percentile(latencies, 50):>10.2f}"
+            f"{np.percentile(latencies, 95):>10.2f}{recall:>10.3f}{vector_mb:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1267 @@
+"""
+UniMem SQLite 图存储
+
+与 unimem/neo4j.py 函数接口一致的嵌入式图存储，用于无法运行 Neo4j 的单机部署和 CI：
+- 实体（Entity）、关系（Relation）的 CRUD 操作
+- 记忆节点及其实体（MENTIONS）/链接（RELATED_TO）边
+- 决策事件（DecisionEvent）
+- 邻居查询、路径查找（递归 CTE 多跳遍历）
+- 文本检索（FTS5 全文索引，按 bm25 相关度排序）
+
+设计特点：
+- 节点和边分表存储，边统一通过 graph_edges 视图（无向）参与多跳遍历
+- 全文索引与 Neo4j 的 cjk 分析器一致：中日韩文本切分为重叠二元组，其他文本按词切分
+- 记忆的属性编码和结果转换复用 neo4j.py 的 _memory_properties / _hydrate_memory，
+  两个后端返回的 Memory 字段一致
+- 语义与 neo4j.py 对齐：create_* 遇到已存在的节点时更新；边只连接已存在的节点
+
+工业级特性：
+- WAL 模式：读写并发，多进程共享同一数据库文件
+- 线程安全（连接由锁保护，多语句写入在一个事务中完成）
+- 失败降级（数据库错误只记录日志，返回 False / 空结果，与 neo4j.py 一致）
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+from datetime import datetime
+
+from .memory_types import Entity, Relation, Memory, MemoryType
+from .text_terms import bigram_terms
+from .neo4j import (
+    BULK_CHUNK_SIZE,
+    _entity_row,
+    _relation_row,
+    _memory_properties,
+    _hydrate_memory,
+    get_current_time,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".unimem", "graph.db")
+
+
+def _fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(terms)")
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+SQLITE_GRAPH_AVAILABLE = _fts5_available()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    entity_type TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    retrieval_key TEXT NOT NULL DEFAULT '',
+    retrieval_value TEXT NOT NULL DEFAULT '',
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entities_type ON entities (entity_type);
+
+CREATE TABLE IF NOT EXISTS relations (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    keywords TEXT NOT NULL DEFAULT '',
+    retrieval_key TEXT NOT NULL DEFAULT '',
+    retrieval_value TEXT NOT NULL DEFAULT '',
+    created_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (source, target)
+);
+CREATE INDEX IF NOT EXISTS idx_relations_target ON relations (target);
+
+CREATE TABLE IF NOT EXISTS memories (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    content TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    memory_type TEXT NOT NULL DEFAULT '',
+    layer TEXT NOT NULL DEFAULT 'ltm',
+    keywords TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '',
+    context TEXT NOT NULL DEFAULT '',
+    retrieval_count INTEGER NOT NULL DEFAULT 0,
+    last_accessed TEXT NOT NULL DEFAULT '',
+    metadata TEXT NOT NULL DEFAULT '{}',
+    source TEXT NOT NULL DEFAULT '',
+    reasoning TEXT NOT NULL DEFAULT '',
+    decision_trace TEXT NOT NULL DEFAULT '',
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp);
+CREATE INDEX IF NOT EXISTS idx_memories_type ON memories (memory_type, timestamp);
+
+CREATE TABLE IF NOT EXISTS memory_entities (
+    memory_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    PRIMARY KEY (memory_id, entity_id)
+);
+CREATE INDEX IF NOT EXISTS idx_memory_entities_entity ON memory_entities (entity_id);
+
+CREATE TABLE IF NOT EXISTS memory_links (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (source, target)
+);
+CREATE INDEX IF NOT EXISTS idx_memory_links_target ON memory_links (target);
+
+CREATE TABLE IF NOT EXISTS decision_events (
+    id TEXT PRIMARY KEY,
+    memory_id TEXT NOT NULL,
+    inputs TEXT NOT NULL DEFAULT '[]',
+    rules_applied TEXT NOT NULL DEFAULT '[]',
+    exceptions TEXT NOT NULL DEFAULT '[]',
+    approvals TEXT NOT NULL DEFAULT '[]',
+    reasoning TEXT NOT NULL DEFAULT '',
+    timestamp TEXT,
+    operation_id TEXT NOT NULL DEFAULT '',
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decision_events_memory ON decision_events (memory_id);
+
+CREATE TABLE IF NOT EXISTS decision_event_entities (
+    event_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    PRIMARY KEY (event_id, entity_id)
+);
+CREATE INDEX IF NOT EXISTS idx_decision_event_entities_entity ON decision_event_entities (entity_id);
+
+-- 全文索引（rowid 与 memories / entities 表的 seq 对应，terms 为切分后的词项）
+-- seq 为显式 INTEGER PRIMARY KEY（rowid 别名），VACUUM 不会重新编号
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(terms);
+CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(terms);
+
+-- 无向边视图（多跳遍历使用），对应 Neo4j 中不区分类型和方向的 -[*]- 模式
+CREATE VIEW IF NOT EXISTS graph_edges (a, b) AS
+    SELECT source, target FROM relations
+    UNION ALL SELECT target, source FROM relations
+    UNION ALL SELECT memory_id, entity_id FROM memory_entities
+    UNION ALL SELECT entity_id, memory_id FROM memory_entities
+    UNION ALL SELECT source, target FROM memory_links
+    UNION ALL SELECT target, source FROM memory_links
+    UNION ALL SELECT id, memory_id FROM decision_events
+    UNION ALL SELECT memory_id, id FROM decision_events
+    UNION ALL SELECT event_id, entity_id FROM decision_event_entities
+    UNION ALL SELECT entity_id, event_id FROM decision_event_entities;
+"""
+
+# 全文索引的文本列（表 -> 拼接为 terms 的两列）
+_FTS_TEXT_COLUMNS = {"memories": ("content", "keywords"), "entities": ("name", "description")}
+
+def _match_expression(text: str) -> str:
+    """用户文本 -> FTS5 MATCH 表达式（词项加引号按字面匹配，OR 连接，相关度由 bm25 排序）"""
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(bigram_terms(text)))
+
+
+class SQLiteGraph:
+    """
+    SQLite 图存储连接
+
+    持有单个连接（check_same_thread=False），所有访问由锁串行化。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开（必要时创建）图数据库
+
+        Args:
+            path: SQLite 文件路径（":memory:" 表示内存数据库，目录不存在时自动创建）
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.ensure_schema()
+        logger.info(f"SQLite graph opened: {path}")
+
+    def ensure_schema(self) -> None:
+        """创建表、索引、全文索引和边视图（已存在时跳过；旧版表结构先迁移）"""
+        with self._lock:
+            self._migrate_fts_keys()
+            self._conn.executescript(_SCHEMA)
+
+    def _migrate_fts_keys(self) -> None:
+        """
+        迁移旧版 memories / entities 表（TEXT 主键、全文索引按隐式 rowid 关联）
+
+        隐式 rowid 在 VACUUM 后可能被重新编号，全文命中会映射到错误的记录。
+        迁移为带 seq（INTEGER PRIMARY KEY）的新表，并按新 seq 重建全文索引。
+        """
+        legacy = []
+        for table in _FTS_TEXT_COLUMNS:
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if columns and "seq" not in columns:
+                legacy.append((table, columns))
+        if not legacy:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 视图引用被替换的表，迁移期间先删除，随后由 _SCHEMA 重建
+            self._conn.execute("DROP VIEW IF EXISTS graph_edges")
+            for table, columns in legacy:
+                column_list = ", ".join(columns)
+                self._conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                self._conn.execute(
+                    re.search(rf"CREATE TABLE IF NOT EXISTS {table} \(.*?\n\);", _SCHEMA, re.S).group(0)
+                )
+                self._conn.execute(
+                    f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_legacy ORDER BY rowid"
+                )
+                self._conn.execute(f"DROP TABLE {table}_legacy")
+                self._conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(terms)")
+                self._conn.execute(f"DELETE FROM {table}_fts")
+                first, second = _FTS_TEXT_COLUMNS[table]
+                rows = self._conn.execute(f"SELECT seq, {first}, {second} FROM {table}").fetchall()
+                self._conn.executemany(
+                    f"INSERT INTO {table}_fts (rowid, terms) VALUES (?, ?)",
+                    [(row[0], " ".join(bigram_terms(f"{row[1]} {row[2]}"))) for row in rows],
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        logger.info(f"SQLite graph migrated full-text keys: {', '.join(table for table, _ in legacy)}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """写事务（BEGIN IMMEDIATE，异常时回滚）"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql: str, parameters: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """执行只读查询，返回字典列表"""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, tuple(parameters)).fetchall()]
+
+    def close(self) -> None:
+        """关闭连接"""
+        with self._lock:
+            self._conn.close()
+
+
+# 全局连接（线程安全）
+_graph: Optional[SQLiteGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_graph(path: Optional[str] = None) -> SQLiteGraph:
+    """
+    获取 SQLite 图存储（单例模式，线程安全）
+
+    支持环境变量：UNIMEM_SQLITE_GRAPH_PATH（默认 ~/.unimem/graph.db）
+
+    Args:
+        path: 数据库路径；与当前打开的路径不同时切换到新数据库
+
+    Returns:
+        SQLiteGraph 实例
+    """
+    global _graph
+    path = path or (_graph.path if _graph else None) or os.getenv("UNIMEM_SQLITE_GRAPH_PATH", DEFAULT_PATH)
+    with _graph_lock:
+        if _graph is None or _graph.path != path:
+            if _graph is not None:
+                _graph.close()
+            _graph = SQLiteGraph(path)
+        return _graph
+
+
+def close_graph() -> None:
+    """关闭全局连接（下次 get_graph 时重新打开）"""
+    global _graph
+    with _graph_lock:
+        if _graph is not None:
+            _graph.close()
+            _graph = None
+
+
+def health_check() -> Dict[str, Any]:
+    """
+    健康检查
+
+    Returns:
+        健康状态字典
+    """
+    try:
+        graph = get_graph()
+        graph.query("SELECT 1")
+        return {
+            "available": True,
+            "status": "healthy",
+            "database": {"name": graph.path, "version": sqlite3.sqlite_version},
+            "timestamp": datetime.now().isoformat(),
+        }
+    except Exception as e:
+        logger.error(f"Health check failed: {e}", exc_info=True)
+        return {
+            "available": False,
+            "status": "unhealthy",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+
+# ==================== 内部辅助 ====================
+
+def _exists(conn: sqlite3.Connection, table: str, item_id: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (item_id,)).fetchone() is not None
+
+
+def _entity_from_row(row: Dict[str, Any], neighbors: Optional[List[str]] = None) -> Entity:
+    return Entity(
+        id=row["id"],
+        name=row.get("name", ""),
+        entity_type=row.get("entity_type", ""),
+        description=row.get("description", ""),
+        retrieval_key=row.get("retrieval_key", ""),
+        retrieval_value=row.get("retrieval_value", ""),
+        neighbors=neighbors or [],
+    )
+
+
+def _relation_from_row(row: Dict[str, Any]) -> Relation:
+    keywords = row.get("keywords", "")
+    return Relation(
+        source=row["source"],
+        target=row["target"],
+        keywords=keywords.split(",") if keywords else [],
+        description=row.get("description", ""),
+        retrieval_key=row.get("retrieval_key", ""),
+        retrieval_value=row.get("retrieval_value", ""),
+    )
+
+
+def _upsert_entity(conn: sqlite3.Connection, row: Dict[str, Any], now: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO entities (id, name, entity_type, description, retrieval_key, retrieval_value, created_at)
+        VALUES (:id, :name, :entity_type, :description, :retrieval_key, :retrieval_value, :now)
+        ON CONFLICT (id) DO UPDATE SET
+            name = excluded.name, entity_type = excluded.entity_type, description = excluded.description,
+            retrieval_key = excluded.retrieval_key, retrieval_value = excluded.retrieval_value,
+            updated_at = :now
+        """,
+        {**row, "now": now},
+    )
+    seq = conn.execute("SELECT seq FROM entities WHERE id = ?", (row["id"],)).fetchone()[0]
+    conn.execute("DELETE FROM entities_fts WHERE rowid = ?", (seq,))
+    conn.execute(
+        "INSERT INTO entities_fts (rowid, terms) VALUES (?, ?)",
+        (seq, " ".join(bigram_terms(f"{row['name']} {row['description']}"))),
+    )
+
+
+def _upsert_relation(conn: sqlite3.Connection, row: Dict[str, Any], now: str) -> bool:
+    """写入关系（源/目标实体不存在时跳过）"""
+    if not (_exists(conn, "entities", row["source"]) and _exists(conn, "entities", row["target"])):
+        return False
+    conn.execute(
+        """
+        INSERT INTO relations (source, target, description, keywords, retrieval_key, retrieval_value, created_at)
+        VALUES (:source, :target, :description, :keywords, :retrieval_key, :retrieval_value, :now)
+        ON CONFLICT (source, target) DO UPDATE SET
+            description = excluded.description, keywords = excluded.keywords,
+            retrieval_key = excluded.retrieval_key, retrieval_value = excluded.retrieval_value,
+            updated_at = :now
+        """,
+        {**row, "now": now},
+    )
+    return True
+
+
+def _upsert_memory_node(conn: sqlite3.Connection, memory: Memory, now: str) -> None:
+    props = _memory_properties(memory)
+    columns = ", ".join(props)
+    conn.execute(
+        f"""
+        INSERT INTO memories (id, {columns}, created_at)
+        VALUES (:id, {", ".join(f":{name}" for name in props)}, :now)
+        ON CONFLICT (id) DO UPDATE SET {", ".join(f"{name} = excluded.{name}" for name in props)}
+        """,
+        {**props, "id": memory.id, "now": now},
+    )
+    seq = conn.execute("SELECT seq FROM memories WHERE id = ?", (memory.id,)).fetchone()[0]
+    conn.execute("DELETE FROM memories_fts WHERE rowid = ?", (seq,))
+    conn.execute(
+        "INSERT INTO memories_fts (rowid, terms) VALUES (?, ?)",
+        (seq, " ".join(bigram_terms(f"{props['content']} {props['keywords']}"))),
+    )
+
+
+def _replace_memory_edges(conn: sqlite3.Connection, memory: Memory) -> None:
+    """替换记忆的 MENTIONS / RELATED_TO 边（只连接已存在的实体和记忆）"""
+    conn.execute("DELETE FROM memory_entities WHERE memory_id = ?", (memory.id,))
+    conn.execute("DELETE FROM memory_links WHERE source = ?", (memory.id,))
+    conn.executemany(
+        "INSERT OR IGNORE INTO memory_entities (memory_id, entity_id) "
+        "SELECT ?, id FROM entities WHERE id = ?",
+        [(memory.id, entity_id) for entity_id in dict.fromkeys(memory.entities or [])],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO memory_links (source, target) "
+        "SELECT ?, id FROM memories WHERE id = ? AND id != ?",
+        [(memory.id, str(link), memory.id) for link in memory.links or ()],
+    )
+
+
+def _hydrate_rows(graph: SQLiteGraph, rows: List[Dict[str, Any]]) -> List[Memory]:
+    """记忆行 -> Memory（实体和链接 ID 各用一条查询批量读取）"""
+    if not rows:
+        return []
+    ids = [row["id"] for row in rows]
+    placeholders = ", ".join("?" for _ in ids)
+    entities: Dict[str, List[str]] = {}
+    for edge in graph.query(
+        f"SELECT memory_id, entity_id FROM memory_entities WHERE memory_id IN ({placeholders})", ids
+    ):
+        entities.setdefault(edge["memory_id"], []).append(edge["entity_id"])
+    links: Dict[str, List[str]] = {}
+    for edge in graph.query(f"SELECT source, target FROM memory_links WHERE source IN ({placeholders})", ids):
+        links.setdefault(edge["source"], []).append(edge["target"])
+    memories = []
+    for row in rows:
+        try:
+            memories.append(_hydrate_memory(row, entities.get(row["id"], []), links.get(row["id"], [])))
+        except Exception as e:
+            logger.warning(f"Failed to hydrate memory {row.get('id', 'unknown')}: {e}")
+    return memories
+
+
+def _chunks(items: List[Any], chunk_size: int) -> List[List[Any]]:
+    chunk_size = max(int(chunk_size), 1)
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+# ==================== 实体操作 ====================
+
+def create_entity(entity: Entity) -> bool:
+    """
+    创建实体节点（已存在时更新）
+
+    Args:
+        entity: Entity 对象
+
+    Returns:
+        是否成功创建
+    """
+    try:
+        with get_graph().transaction() as conn:
+            _upsert_entity(conn, _entity_row(entity), get_current_time())
+        logger.debug(f"Created entity: {entity.id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create entity {entity.id}: {e}", exc_info=True)
+        return False
+
+
+def get_entity(entity_id: str) -> Optional[Entity]:
+    """
+    获取实体节点
+
+    Args:
+        entity_id: 实体ID
+
+    Returns:
+        Entity 对象（neighbors 为出边指向的实体），如果不存在则返回 None
+    """
+    try:
+        graph = get_graph()
+        rows = graph.query("SELECT * FROM entities WHERE id = ?", (entity_id,))
+        if not rows:
+            return None
+        neighbors = [row["target"] for row in graph.query("SELECT target FROM relations WHERE source = ?", (entity_id,))]
+        return _entity_from_row(rows[0], neighbors)
+    except Exception as e:
+        logger.error(f"Failed to get entity {entity_id}: {e}", exc_info=True)
+        return None
+
+
+def update_entity(entity: Entity) -> bool:
+    """
+    更新实体节点（不存在时创建）
+
+    Args:
+        entity: Entity 对象
+
+    Returns:
+        是否成功更新
+    """
+    return create_entity(entity)
+
+
+def delete_entity(entity_id: str) -> bool:
+    """
+    删除实体节点及其所有边
+
+    Args:
+        entity_id: 实体ID
+
+    Returns:
+        是否成功删除
+    """
+    try:
+        with get_graph().transaction() as conn:
+            row = conn.execute("SELECT seq FROM entities WHERE id = ?", (entity_id,)).fetchone()
+            if row is None:
+                logger.warning(f"Entity {entity_id} not found")
+                return False
+            conn.execute("DELETE FROM relations WHERE source = ? OR target = ?", (entity_id, entity_id))
+            conn.execute("DELETE FROM memory_entities WHERE entity_id = ?", (entity_id,))
+            conn.execute("DELETE FROM decision_event_entities WHERE entity_id = ?", (entity_id,))
+            conn.execute("DELETE FROM entities_fts WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM entities WHERE id = ?", (entity_id,))
+        logger.debug(f"Deleted entity: {entity_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete entity {entity_id}: {e}", exc_info=True)
+        return False
+
+
+def find_entities_by_type(entity_type: str, limit: int = 100) -> List[Entity]:
+    """
+    根据类型查找实体
+
+    Args:
+        entity_type: 实体类型
+        limit: 返回数量限制
+
+    Returns:
+        实体列表
+    """
+    try:
+        rows = get_graph().query("SELECT * FROM entities WHERE entity_type = ? LIMIT ?", (entity_type, limit))
+        return [_entity_from_row(row) for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to find entities by type {entity_type}: {e}", exc_info=True)
+        return []
+
+
+# ==================== 关系操作 ====================
+
+def create_relation(relation: Relation) -> bool:
+    """
+    创建关系边（已存在时更新）
+
+    Args:
+        relation: Relation 对象
+
+    Returns:
+        是否成功创建（源或目标实体不存在时返回 False）
+    """
+    try:
+        with get_graph().transaction() as conn:
+            created = _upsert_relation(conn, _relation_row(relation), get_current_time())
+        if not created:
+            logger.error(f"Source or target node not found for relation {relation.source} -> {relation.target}")
+        return created
+    except Exception as e:
+        logger.error(f"Failed to create relation {relation.source} -> {relation.target}: {e}", exc_info=True)
+        return False
+
+
+def get_relation(source_id: str, target_id: str) -> Optional[Relation]:
+    """
+    获取关系
+
+    Args:
+        source_id: 源实体ID
+        target_id: 目标实体ID
+
+    Returns:
+        Relation 对象，如果不存在则返回 None
+    """
+    try:
+        rows = get_graph().query("SELECT * FROM relations WHERE source = ? AND target = ?", (source_id, target_id))
+        return _relation_from_row(rows[0]) if rows else None
+    except Exception as e:
+        logger.error(f"Failed to get relation {source_id} -> {target_id}: {e}", exc_info=True)
+        return None
+
+
+def update_relation(relation: Relation) -> bool:
+    """
+    更新关系（不存在时创建）
+
+    Args:
+        relation: Relation 对象
+
+    Returns:
+        是否成功更新
+    """
+    return create_relation(relation)
+
+
+def delete_relation(source_id: str, target_id: str) -> bool:
+    """
+    删除关系
+
+    Args:
+        source_id: 源实体ID
+        target_id: 目标实体ID
+
+    Returns:
+        是否成功删除
+    """
+    try:
+        with get_graph().transaction() as conn:
+            deleted = conn.execute(
+                "DELETE FROM relations WHERE source = ? AND target = ?", (source_id, target_id)
+            ).rowcount
+        if not deleted:
+            logger.warning(f"Relation {source_id} -> {target_id} not found")
+        return bool(deleted)
+    except Exception as e:
+        logger.error(f"Failed to delete relation {source_id} -> {target_id}: {e}", exc_info=True)
+        return False
+
+
+def get_entity_relations(entity_id: str, direction: str = "both") -> List[Relation]:
+    """
+    获取实体的所有关系
+
+    Args:
+        entity_id: 实体ID
+        direction: 关系方向 ("outgoing", "incoming", "both")
+
+    Returns:
+        关系列表
+    """
+    try:
+        graph = get_graph()
+        relations = []
+        if direction in ("outgoing", "both"):
+            relations.extend(graph.query("SELECT * FROM relations WHERE source = ?", (entity_id,)))
+        if direction in ("incoming", "both"):
+            relations.extend(graph.query("SELECT * FROM relations WHERE target = ?", (entity_id,)))
+        return [_relation_from_row(row) for row in relations]
+    except Exception as e:
+        logger.error(f"Failed to get relations for entity {entity_id}: {e}", exc_info=True)
+        return []
+
+
+# ==================== 批量操作 ====================
+
+def create_entities_batch(entities: List[Entity], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    批量创建实体（每块一个事务）
+
+    Args:
+        entities: 实体列表
+        chunk_size: 每个事务写入的实体数（默认500）
+
+    Returns:
+        成功写入的数量
+    """
+    written = 0
+    now = get_current_time()
+    for chunk in _chunks(entities, chunk_size):
+        try:
+            with get_graph().transaction() as conn:
+                for entity in chunk:
+                    _upsert_entity(conn, _entity_row(entity), now)
+            written += len(chunk)
+        except Exception as e:
+            logger.error(f"create_entities_batch: chunk ({len(chunk)} rows) failed: {e}")
+    logger.info(f"Created {written}/{len(entities)} entities")
+    return written
+
+
+def create_relations_batch(relations: List[Relation], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    批量创建关系（每块一个事务，源/目标实体不存在的关系被跳过）
+
+    Args:
+        relations: 关系列表
+        chunk_size: 每个事务写入的关系数（默认500）
+
+    Returns:
+        成功写入的关系数量
+    """
+    written = 0
+    now = get_current_time()
+    for chunk in _chunks(relations, chunk_size):
+        try:
+            with get_graph().transaction() as conn:
+                written += sum(_upsert_relation(conn, _relation_row(relation), now) for relation in chunk)
+        except Exception as e:
+            logger.error(f"create_relations_batch: chunk ({len(chunk)} rows) failed: {e}")
+    logger.info(f"Created {written}/{len(relations)} relations")
+    return written
+
+
+def create_memories_batch(memories: List[Memory], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    批量创建记忆节点及其实体/链接边（先写入所有节点，再写入边）
+
+    Args:
+        memories: 记忆列表
+        chunk_size: 每个事务写入的记忆数（默认500）
+
+    Returns:
+        成功写入的记忆节点数量
+    """
+    written = 0
+    now = get_current_time()
+    for chunk in _chunks(memories, chunk_size):
+        try:
+            with get_graph().transaction() as conn:
+                for memory in chunk:
+                    _upsert_memory_node(conn, memory, now)
+            written += len(chunk)
+        except Exception as e:
+            logger.error(f"create_memories_batch: chunk ({len(chunk)} rows) failed: {e}")
+    for chunk in _chunks(memories, chunk_size):
+        try:
+            with get_graph().transaction() as conn:
+                for memory in chunk:
+                    _replace_memory_edges(conn, memory)
+        except Exception as e:
+            logger.error(f"create_memories_batch edges: chunk ({len(chunk)} rows) failed: {e}")
+    logger.info(f"Created {written}/{len(memories)} memories")
+    return written
+
+
+# ==================== 图查询操作 ====================
+
+def find_path_between_entities(source_id: str, target_id: str, max_depth: int = 3) -> List[List[str]]:
+    """
+    查找两个实体之间的最短路径（递归 CTE，经过任意类型的边）
+
+    Args:
+        source_id: 源实体ID
+        target_id: 目标实体ID
+        max_depth: 最大路径深度
+
+    Returns:
+        路径列表（每条路径是节点ID列表；与 Neo4j shortestPath 一致，最多一条）
+    """
+    try:
+        graph = get_graph()
+        endpoints = graph.query("SELECT id FROM entities WHERE id IN (?, ?)", (source_id, target_id))
+        if len({row["id"] for row in endpoints}) < 2:
+            return []
+        rows = graph.query(
+            """
+            WITH RECURSIVE walk (node, path, depth) AS (
+                SELECT ?, json_array(?), 0
+                UNION ALL
+                SELECT e.b, json_insert(walk.path, '$[#]', e.b), walk.depth + 1
+                FROM walk JOIN graph_edges e ON e.a = walk.node
+                WHERE walk.depth < ? AND walk.node != ?
+                  AND NOT EXISTS (SELECT 1 FROM json_each(walk.path) WHERE value = e.b)
+            )
+            SELECT path FROM walk WHERE node = ? ORDER BY depth LIMIT 1
+            """,
+            (source_id, source_id, max(int(max_depth), 1), target_id, target_id),
+        )
+        return [json.loads(row["path"]) for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to find path between {source_id} and {target_id}: {e}", exc_info=True)
+        return []
+
+
+def get_entity_neighbors(entity_id: str, depth: int = 1) -> List[Entity]:
+    """
+    获取实体的邻居节点（指定深度，递归 CTE 多跳遍历）
+
+    Args:
+        entity_id: 实体ID
+        depth: 深度（1表示直接邻居）
+
+    Returns:
+        邻居实体列表
+    """
+    try:
+        rows = get_graph().query(
+            """
+            WITH RECURSIVE reach (node, depth) AS (
+                SELECT id, 0 FROM entities WHERE id = ?
+                UNION
+                SELECT e.b, reach.depth + 1
+                FROM reach JOIN graph_edges e ON e.a = reach.node
+                WHERE reach.depth < ?
+            )
+            SELECT DISTINCT entities.* FROM reach JOIN entities ON entities.id = reach.node
+            WHERE reach.depth > 0 AND entities.id != ?
+            LIMIT 100
+            """,
+            (entity_id, max(int(depth), 1), entity_id),
+        )
+        return [_entity_from_row(row) for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to get neighbors for entity {entity_id}: {e}", exc_info=True)
+        return []
+
+
+def search_entities_by_text(text: str, limit: int = 10) -> List[Entity]:
+    """
+    通过文本搜索实体（在名称和描述中搜索，FTS5 全文索引，按相关度排序）
+
+    Args:
+        text: 搜索文本
+        limit: 返回数量限制
+
+    Returns:
+        实体列表（按相关度降序）
+    """
+    expression = _match_expression(text)
+    if not expression:
+        return []
+    try:
+        rows = get_graph().query(
+            """
+            SELECT entities.* FROM entities_fts
+            JOIN entities ON entities.seq = entities_fts.rowid
+            WHERE entities_fts MATCH ?
+            ORDER BY bm25(entities_fts)
+            LIMIT ?
+            """,
+            (expression, limit),
+        )
+        return [_entity_from_row(row) for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to search entities by text '{text}': {e}", exc_info=True)
+        return []
+
+
+# ==================== Memory (LTM) 操作 ====================
+
+def create_memory(memory: Memory) -> bool:
+    """
+    创建记忆节点（已存在时更新），并连接已存在的实体和记忆
+
+    Args:
+        memory: Memory 对象
+
+    Returns:
+        是否成功创建
+    """
+    try:
+        with get_graph().transaction() as conn:
+            _upsert_memory_node(conn, memory, get_current_time())
+            _replace_memory_edges(conn, memory)
+        logger.debug(f"Created memory: {memory.id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create memory {memory.id}: {e}", exc_info=True)
+        return False
+
+
+def get_memory(memory_id: str) -> Optional[Memory]:
+    """
+    获取记忆节点
+
+    Args:
+        memory_id: 记忆ID
+
+    Returns:
+        Memory 对象，如果不存在则返回 None
+    """
+    try:
+        graph = get_graph()
+        memories = _hydrate_rows(graph, graph.query("SELECT * FROM memories WHERE id = ?", (memory_id,)))
+        return memories[0] if memories else None
+    except Exception as e:
+        logger.error(f"Failed to get memory {memory_id}: {e}", exc_info=True)
+        return None
+
+
+def update_memory(memory: Memory) -> bool:
+    """
+    更新记忆节点（不存在时创建），实体和链接边替换为 memory 中的集合
+
+    Args:
+        memory: Memory 对象
+
+    Returns:
+        是否成功更新
+    """
+    return create_memory(memory)
+
+
+def delete_memory(memory_id: str) -> bool:
+    """
+    删除记忆节点及其所有边和决策事件
+
+    Args:
+        memory_id: 记忆ID
+
+    Returns:
+        是否成功删除
+    """
+    try:
+        with get_graph().transaction() as conn:
+            row = conn.execute("SELECT seq FROM memories WHERE id = ?", (memory_id,)).fetchone()
+            if row is None:
+                logger.warning(f"Memory {memory_id} not found")
+                return False
+            conn.execute("DELETE FROM memory_entities WHERE memory_id = ?", (memory_id,))
+            conn.execute("DELETE FROM memory_links WHERE source = ? OR target = ?", (memory_id, memory_id))
+            conn.execute(
+                "DELETE FROM decision_event_entities WHERE event_id IN "
+                "(SELECT id FROM decision_events WHERE memory_id = ?)",
+                (memory_id,),
+            )
+            conn.execute("DELETE FROM decision_events WHERE memory_id = ?", (memory_id,))
+            conn.execute("DELETE FROM memories_fts WHERE rowid = ?", (row[0],))
+            conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
+        logger.debug(f"Deleted memory: {memory_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete memory {memory_id}: {e}", exc_info=True)
+        return False
+
+
+def _search_memories(where: str, parameters: Tuple[Any, ...], limit: int, description: str) -> List[Memory]:
+    try:
+        graph = get_graph()
+        rows = graph.query(
+            f"SELECT memories.* FROM memories {where} ORDER BY memories.timestamp DESC LIMIT ?",
+            parameters + (limit,),
+        )
+        return _hydrate_rows(graph, rows)
+    except Exception as e:
+        logger.error(f"Failed to search memories by {description}: {e}", exc_info=True)
+        return []
+
+
+def get_memories(memory_ids: List[str]) -> List[Memory]:
+    """
+    按 ID 批量获取记忆（不存在的 ID 被忽略）
+
+    Args:
+        memory_ids: 记忆ID列表
+
+    Returns:
+        记忆列表（按时间倒序）
+    """
+    memory_ids = list(dict.fromkeys(memory_ids or []))
+    if not memory_ids:
+        return []
+    return _search_memories(
+        f"WHERE id IN ({', '.join('?' for _ in memory_ids)})", tuple(memory_ids), len(memory_ids), "ids"
+    )
+
+
+def get_recent_memories(limit: int = 100) -> List[Memory]:
+    """
+    获取最近的记忆（按时间倒序）
+
+    Args:
+        limit: 返回数量限制
+
+    Returns:
+        记忆列表
+    """
+    return _search_memories("", (), limit, "recency")
+
+
+def search_memories_by_type(memory_type: MemoryType, limit: int = 100) -> List[Memory]:
+    """
+    根据类型查询记忆
+
+    Args:
+        memory_type: 记忆类型
+        limit: 返回数量限制
+
+    Returns:
+        记忆列表
+    """
+    return _search_memories("WHERE memory_type = ?", (memory_type.value,), limit, f"type '{memory_type}'")
+
+
+def search_memories_by_entity(entity_id: str, limit: int = 100) -> List[Memory]:
+    """
+    查询与实体相关的记忆
+
+    Args:
+        entity_id: 实体ID
+        limit: 返回数量限制
+
+    Returns:
+        记忆列表
+    """
+    return _search_memories(
+        "JOIN memory_entities ON memory_entities.memory_id = memories.id WHERE memory_entities.entity_id = ?",
+        (entity_id,), limit, f"entity '{entity_id}'",
+    )
+
+
+def search_memories_by_time_range(start_time: str, end_time: str, limit: int = 100) -> List[Memory]:
+    """
+    根据时间范围查询记忆
+
+    Args:
+        start_time: 开始时间（ISO 格式字符串）
+        end_time: 结束时间（ISO 格式字符串）
+        limit: 返回数量限制
+
+    Returns:
+        记忆列表
+    """
+    return _search_memories(
+        "WHERE timestamp >= ? AND timestamp <= ?", (start_time, end_time), limit, "time range"
+    )
+
+
+def search_memories_by_text(text: str, limit: int = 100) -> List[Memory]:
+    """
+    通过文本搜索记忆（在内容和关键词中搜索，FTS5 全文索引）
+
+    相关度（bm25 取负，越大越相关）写入 metadata["fulltext_score"]，与 neo4j.py 一致。
+
+    Args:
+        text: 搜索文本（按字面匹配）
+        limit: 返回数量限制
+
+    Returns:
+        记忆列表（按相关度降序）
+    """
+    expression = _match_expression(text)
+    if not expression:
+        return []
+    try:
+        graph = get_graph()
+        rows = graph.query(
+            """
+            SELECT memories.*, -bm25(memories_fts) AS fulltext_score FROM memories_fts
+            JOIN memories ON memories.seq = memories_fts.rowid
+            WHERE memories_fts MATCH ?
+            ORDER BY fulltext_score DESC, memories.timestamp DESC
+            LIMIT ?
+            """,
+            (expression, limit),
+        )
+        # 按 ID 对应（_hydrate_rows 会跳过无法转换的行）
+        scores = {row["id"]: float(row["fulltext_score"]) for row in rows}
+        memories = _hydrate_rows(graph, rows)
+        for memory in memories:
+            memory.metadata["fulltext_score"] = scores[memory.id]
+        return memories
+    except Exception as e:
+        logger.error(f"Failed to search memories by text '{text}': {e}", exc_info=True)
+        return []
+
+
+def get_memory_relationships(memory_id: str, depth: int = 1) -> List[List[str]]:
+    """
+    获取记忆的关系网络
+
+    Args:
+        memory_id: 记忆ID
+        depth: 关系深度
+
+    Returns:
+        路径列表（每条路径是从该记忆出发的节点ID列表，最多50条；
+        Neo4j 后端返回 py2neo Path 对象）
+    """
+    try:
+        rows = get_graph().query(
+            """
+            WITH RECURSIVE walk (node, path, depth) AS (
+                SELECT id, json_array(id), 0 FROM memories WHERE id = ?
+                UNION ALL
+                SELECT e.b, json_insert(walk.path, '$[#]', e.b), walk.depth + 1
+                FROM walk JOIN graph_edges e ON e.a = walk.node
+                WHERE walk.depth < ?
+                  AND NOT EXISTS (SELECT 1 FROM json_each(walk.path) WHERE value = e.b)
+            )
+            SELECT path FROM walk WHERE depth > 0 LIMIT 50
+            """,
+            (memory_id, max(int(depth), 1)),
+        )
+        return [json.loads(row["path"]) for row in rows]
+    except Exception as e:
+        logger.error(f"Failed to get memory relationships for {memory_id}: {e}", exc_info=True)
+        return []
+
+
+def create_memory_indexes() -> bool:
+    """
+    创建索引（表、属性索引和 FTS5 全文索引在打开数据库时已创建，此处确保结构存在）
+
+    Returns:
+        是否成功创建索引
+    """
+    try:
+        get_graph().ensure_schema()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create memory indexes: {e}", exc_info=True)
+        return False
+
+
+# ==================== 决策事件 ====================
+
+def _event_values(decision_trace: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "inputs": json.dumps(decision_trace.get("inputs", []), ensure_ascii=False),
+        "rules_applied": json.dumps(decision_trace.get("rules_applied", []), ensure_ascii=False),
+        "exceptions": json.dumps(decision_trace.get("exceptions", []), ensure_ascii=False),
+        "approvals": json.dumps(decision_trace.get("approvals", []), ensure_ascii=False),
+    }
+
+
+def _replace_event_entities(conn: sqlite3.Connection, event_id: str, entity_ids: List[str]) -> None:
+    conn.execute("DELETE FROM decision_event_entities WHERE event_id = ?", (event_id,))
+    conn.executemany(
+        "INSERT OR IGNORE INTO decision_event_entities (event_id, entity_id) SELECT ?, id FROM entities WHERE id = ?",
+        [(event_id, entity_id) for entity_id in dict.fromkeys(entity_ids)],
+    )
+
+
+def create_decision_event(
+    memory_id: str,
+    decision_trace: Dict[str, Any],
+    reasoning: Optional[str] = None,
+    related_entity_ids: Optional[List[str]] = None
+) -> bool:
+    """
+    创建决策事件（Context Graph增强）
+
+    Args:
+        memory_id: 关联的记忆ID
+        decision_trace: 决策痕迹字典
+        reasoning: 决策理由（可选）
+        related_entity_ids: 相关实体ID列表（可选）
+
+    Returns:
+        是否成功创建（记忆不存在时返回 False）
+    """
+    event_id = f"decision_{memory_id}"
+    try:
+        with get_graph().transaction() as conn:
+            if not _exists(conn, "memories", memory_id):
+                logger.debug(f"Memory {memory_id} not found, cannot create decision event")
+                return False
+            if _exists(conn, "decision_events", event_id):
+                existing = True
+            else:
+                existing = False
+                now = get_current_time()
+                conn.execute(
+                    """
+                    INSERT INTO decision_events (id, memory_id, inputs, rules_applied, exceptions, approvals,
+                                                 reasoning, timestamp, operation_id, created_at)
+                    VALUES (:id, :memory_id, :inputs, :rules_applied, :exceptions, :approvals,
+                            :reasoning, :timestamp, :operation_id, :now)
+                    """,
+                    {
+                        **_event_values(decision_trace),
+                        "id": event_id,
+                        "memory_id": memory_id,
+                        "reasoning": reasoning or "",
+                        "timestamp": decision_trace.get("timestamp", now),
+                        "operation_id": decision_trace.get("operation_id", ""),
+                        "now": now,
+                    },
+                )
+                if related_entity_ids:
+                    _replace_event_entities(conn, event_id, related_entity_ids)
+        if existing:
+            logger.debug(f"Decision event {event_id} already exists, updating instead")
+            return update_decision_event(event_id, decision_trace, reasoning, related_entity_ids)
+        logger.debug(f"Created decision event: {event_id} for memory {memory_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to create decision event for memory {memory_id}: {e}", exc_info=True)
+        return False
+
+
+def update_decision_event(
+    event_id: str,
+    decision_trace: Dict[str, Any],
+    reasoning: Optional[str] = None,
+    related_entity_ids: Optional[List[str]] = None
+) -> bool:
+    """
+    更新决策事件
+
+    Args:
+        event_id: 事件ID
+        decision_trace: 决策痕迹字典
+        reasoning: 决策理由（可选，为空时保留原值）
+        related_entity_ids: 相关实体ID列表（可选，提供时替换原关联）
+
+    Returns:
+        是否成功更新
+    """
+    try:
+        with get_graph().transaction() as conn:
+            if not _exists(conn, "decision_events", event_id):
+                logger.warning(f"Decision event {event_id} not found")
+                return False
+            values = _event_values(decision_trace)
+            conn.execute(
+                "UPDATE decision_events SET inputs = :inputs, rules_applied = :rules_applied, "
+                "exceptions = :exceptions, approvals = :approvals WHERE id = :id",
+                {**values, "id": event_id},
+            )
+            if reasoning:
+                conn.execute("UPDATE decision_events SET reasoning = ? WHERE id = ?", (reasoning, event_id))
+            if related_entity_ids:
+                _replace_event_entities(conn, event_id, related_entity_ids)
+        logger.debug(f"Updated decision event: {event_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to update decision event {event_id}: {e}", exc_info=True)
+        return False
+
+
+def get_decision_events_for_memory(memory_id: str) -> List[Dict[str, Any]]:
+    """
+    获取记忆的所有决策事件
+
+    Args:
+        memory_id: 记忆ID
+
+    Returns:
+        决策事件列表（按时间倒序）
+    """
+    try:
+        rows = get_graph().query(
+            "SELECT * FROM decision_events WHERE memory_id = ? ORDER BY timestamp DESC", (memory_id,)
+        )
+        return [
+            {
+                "id": row["id"],
+                "memory_id": row["memory_id"],
+                "inputs": json.loads(row["inputs"]) if row["inputs"] else [],
+                "rules_applied": json.loads(row["rules_applied"]) if row["rules_applied"] else [],
+                "exceptions": json.loads(row["exceptions"]) if row["exceptions"] else [],
+                "approvals": json.loads(row["approvals"]) if row["approvals"] else [],
+                "reasoning": row["reasoning"],
+                "timestamp": row["timestamp"],
+            }
+            for row in rows
+        ]
+    except Exception as e:
+        logger.error(f"Failed to get decision events for memory {memory_id}: {e}", exc_info=True)
+        return []
@@ -7,10 +7,12 @@
 from .hierarchical_storage import HierarchicalStorage
 from .level_index import LevelIndex
 from .cross_level_retrieval import CrossLevelRetrieval
+from .content_index import ContentIndex
 
 __all__ = [
     "HierarchicalStorage",
     "LevelIndex",
     "CrossLevelRetrieval",
+    "ContentIndex",
 ]
 
@@ -0,0 +1,134 @@
+"""
+层级内容倒排索引
+
+为每个层级的记忆内容建立倒排索引，替代逐条子串扫描，支持按相关度打分检索。
+
+设计特点：
+- CJK 感知切分：中日韩文本索引单字和重叠二元组，查询时使用二元组（单字查询使用单字），
+  其他文本按词小写
+- BM25 打分（k1=1.2, b=0.75），只遍历查询词项的倒排列表
+- 每条记忆保留其词频表，更新和删除只修改相关词项
+"""
+
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from ...text_terms import bigram_terms, is_cjk, split_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def index_terms(text: str) -> List[str]:
+    """文档词项：CJK 单字 + 二元组，其他按词"""
+    terms = []
+    for token in split_tokens(text):
+        if is_cjk(token):
+            terms.extend(token)
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
+
+
+def query_terms(text: str) -> List[str]:
+    """查询词项：CJK 二元组（单字时用单字），其他按词，去重"""
+    return list(dict.fromkeys(bigram_terms(text)))
+
+
+class ContentIndex:
+    """单层级内容倒排索引（线程安全）"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        初始化索引
+
+        Args:
+            k1: BM25 词频饱和参数
+            b: BM25 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}  # 词项 -> {记忆 ID: 词频}
+        self._documents: Dict[str, Counter] = {}  # 记忆 ID -> 词频表
+        self._lengths: Dict[str, int] = {}  # 记忆 ID -> 词项总数
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, memory_id: str) -> bool:
+        with self._lock:
+            return memory_id in self._documents
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    def add(self, memory_id: str, text: str) -> None:
+        """索引记忆内容（已存在时替换）"""
+        counts = Counter(index_terms(text))
+        with self._lock:
+            self._remove_locked(memory_id)
+            self._documents[memory_id] = counts
+            self._lengths[memory_id] = sum(counts.values())
+            self._total_length += self._lengths[memory_id]
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[memory_id] = tf
+
+    def remove(self, memory_id: str) -> bool:
+        """移除记忆"""
+        with self._lock:
+            return self._remove_locked(memory_id)
+
+    def _remove_locked(self, memory_id: str) -> bool:
+        counts = self._documents.pop(memory_id, None)
+        if counts is None:
+            return False
+        self._total_length -= self._lengths.pop(memory_id)
+        for term in counts:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(memory_id, None)
+                if not posting:
+                    del self._postings[term]
+        return True
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        按 BM25 相关度检索
+
+        Args:
+            query: 查询文本
+            top_k: 返回数量
+
+        Returns:
+            (记忆 ID, 分数) 列表，按分数降序
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            total = len(self._documents)
+            if not total:
+                return []
+            avg_length = self._total_length / total or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1.0 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for memory_id, tf in posting.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[memory_id] / avg_length)
+                    scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(max(int(top_k), 1), scores.items(), key=lambda item: item[1])
+
+    def clear(self) -> None:
+        """清空索引"""
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._lengths.clear()
+            self._total_length = 0
@@ -2,11 +2,15 @@
 跨层级检索
 
 实现跨层级的智能检索，支持从多个层级同时检索并融合结果。
+
+设计特点：
+- 各层级检索经 HierarchicalStorage.retrieve_levels 并发执行，共享一个截止时间：
+  超时的层级不阻塞结果返回，截止后各层级也不再回源 LTM
+- 融合分数 = 层级权重 × 层级内归一化的 BM25 分数
 """
 
 import logging
-from typing import List, Dict, Optional
-from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
 
 from ...memory_types import Memory
 from .level_index import ContentLevel
@@ -24,14 +28,16 @@ class CrossLevelRetrieval:
     - 去重：去除重复的记忆
     """
     
-    def __init__(self, hierarchical_storage: HierarchicalStorage):
+    def __init__(self, hierarchical_storage: HierarchicalStorage, timeout: float = 2.0):
         """
         初始化跨层级检索器
         
         Args:
             hierarchical_storage: 分层存储实例
+            timeout: 一次跨层级检索的默认截止时间（秒，默认 2.0）
         """
         self.storage = hierarchical_storage
+        self.timeout = timeout
         
         # 默认层级权重（可以根据需求调整）
         self.level_weights = {
@@ -43,12 +49,36 @@ class CrossLevelRetrieval:
         
         logger.info("CrossLevelRetrieval initialized")
     
+    def _retrieve_levels(
+        self,
+        query: str,
+        levels: List[ContentLevel],
+        top_k: int,
+        timeout: Optional[float] = None,
+    ) -> Dict[ContentLevel, List[Tuple[Memory, float]]]:
+        """
+        并发检索多个层级（共享截止时间）
+        
+        Args:
+            query: 查询文本
+            levels: 层级列表
+            top_k: 每个层级返回的前K个结果
+            timeout: 截止时间（秒），None 时使用 self.timeout
+            
+        Returns:
+            层级 -> (记忆, 分数) 列表；超时或失败的层级为空列表
+        """
+        return self.storage.retrieve_levels(
+            query, levels, top_k=top_k, timeout=self.timeout if timeout is None else timeout
+        )
+    
     def retrieve(
         self,
         query: str,
         levels: Optional[List[ContentLevel]] = None,
         top_k: int = 10,
-        level_weights: Optional[Dict[ContentLevel, float]] = None
+        level_weights: Optional[Dict[ContentLevel, float]] = None,
+        timeout: Optional[float] = None,
     ) -> List[Memory]:
         """
         跨层级检索并融合结果
@@ -58,6 +88,7 @@ class CrossLevelRetrieval:
             levels: 要检索的层级列表，如果为None则检索所有层级
             top_k: 返回前K个结果
             level_weights: 层级权重字典，如果为None则使用默认权重
+            timeout: 截止时间（秒），None 时使用初始化时的 timeout
             
         Returns:
             融合后的记忆列表，按相关性排序
@@ -74,35 +105,32 @@ class CrossLevelRetrieval:
         weights = level_weights if level_weights else self.level_weights
         
         try:
-            # 1. 从各层级检索
-            all_results = []
+            # 1. 并发从各层级检索
+            level_results = self._retrieve_levels(query, levels, top_k * 2, timeout=timeout)
+            
+            # 2. 融合：层级权重 × 层级内归一化分数，去重时保留最高分（基于记忆ID）
+            fused: Dict[str, Tuple[Memory, float]] = {}
             for level in levels:
-                memories = self.storage.retrieve(query, level, top_k=top_k * 2)
+                scored = level_results.get(level) or []
+                if not scored:
+                    continue
                 weight = weights.get(level, 0.5)
-                
-                # 为每个记忆添加层级权重
-                for memory in memories:
+                max_score = max(score for _, score in scored) or 1.0
+                for memory, score in scored:
+                    combined = weight * score / max_score
+                    if memory.id in fused and fused[memory.id][1] >= combined:
+                        continue
                     # 在元数据中记录权重
                     if not memory.metadata:
                         memory.metadata = {}
                     memory.metadata["_retrieval_weight"] = weight
                     memory.metadata["_retrieval_level"] = level.value
-                    all_results.append((memory, weight))
-            
-            # 2. 去重（基于记忆ID）
-            seen_ids = set()
-            unique_results = []
-            for memory, weight in all_results:
-                if memory.id not in seen_ids:
-                    seen_ids.add(memory.id)
-                    unique_results.append((memory, weight))
+                    memory.metadata["_retrieval_score"] = combined
+                    fused[memory.id] = (memory, combined)
             
-            # 3. 按权重和相关性排序（简化：仅按权重）
-            # 实际应该结合向量相似度等
-            unique_results.sort(key=lambda x: x[1], reverse=True)
-            
-            # 4. 返回Top-K
-            result_memories = [mem for mem, _ in unique_results[:top_k]]
+            # 3. 按融合分数排序，返回Top-K
+            ranked = sorted(fused.values(), key=lambda item: item[1], reverse=True)
+            result_memories = [memory for memory, _ in ranked[:top_k]]
             
             logger.debug(f"Cross-level retrieval: {len(result_memories)} memories from {len(levels)} levels")
             return result_memories
@@ -147,11 +175,12 @@ class CrossLevelRetrieval:
             child_levels = self.storage.index_manager.get_child_levels(start_level)
             levels_to_search.extend(child_levels)
         
-        # 执行跨层级检索
-        results = {}
-        for level in levels_to_search:
-            memories = self.storage.retrieve(query, level, top_k=top_k)
-            results[level.value] = memories
+        # 执行跨层级检索（并发，共享截止时间）
+        level_results = self._retrieve_levels(query, levels_to_search, top_k)
+        results = {
+            level.value: [memory for memory, _ in level_results[level]]
+            for level in levels_to_search
+        }
         
         logger.debug(f"Hierarchy retrieval from {start_level.value}: {len(results)} levels")
         return results
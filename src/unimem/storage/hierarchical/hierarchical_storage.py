@@ -3,17 +3,29 @@
 
 实现创作内容的多层级存储，支持 work/outline/chapter/scene 层级结构。
 
+设计特点：
+- 每个层级维护内容倒排索引（CJK 感知，BM25 打分），检索不再逐条扫描缓存
+- 缓存未命中时按层级索引中的记忆 ID 回源 LTM（存储管理器 get_memories），
+  被清出缓存或由其他进程写入的记忆同样可检索
+- 待回源的记忆 ID 在 store/remove/register_existing 时增量维护，检索不再扫描整个层级；
+  LTM 未返回的 ID 记入否定集合，每个 ID 只回源一次（重新 store 时清除）
+- 层级索引（层级归属、父子关系）可持久化到 index_path：初始化时加载，
+  store/remove 后延迟合并保存，close() 时落盘；重启后内容索引按 ID 回源 LTM 重建
+- 跨层级检索在线程池中并发检索各层级，共享一个截止时间（CrossLevelRetrieval 复用同一路径）
+
 工业级特性：
-- 线程安全（使用 RLock 保护共享状态）
+- 线程安全（使用 RLock 保护共享状态；检索只持有索引和缓存的细粒度锁，可并发执行）
 - 统一异常处理（使用适配器异常体系）
 - 性能监控（操作耗时统计）
 - 数据验证（输入验证和类型检查）
 """
 
 import logging
+import os
 import threading
 import time
-from typing import List, Dict, Optional, Any
+import concurrent.futures
+from typing import List, Dict, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
 
 from ...memory_types import Memory
@@ -22,6 +34,7 @@ from ...adapters.base import (
     AdapterNotAvailableError,
 )
 from .level_index import ContentLevel, LevelIndexManager
+from .content_index import ContentIndex
 
 logger = logging.getLogger(__name__)
 
@@ -61,18 +74,36 @@ class HierarchicalStorage:
     - 一致性检查：检查层级间的一致性
     """
     
-    def __init__(self, storage_manager: Any = None):
+    def __init__(
+        self,
+        storage_manager: Any = None,
+        index_path: Optional[str] = None,
+        save_delay: float = 1.0,
+        retrieval_timeout: float = 2.0,
+    ):
         """
         初始化分层存储
         
         Args:
             storage_manager: 底层存储管理器（用于实际存储操作）
+            index_path: 层级索引持久化文件路径（可选，存在时加载）
+            save_delay: store/remove 后延迟保存层级索引的秒数（合并连续写入）
+            retrieval_timeout: 跨层级检索的默认截止时间（秒，默认 2.0）
             
         Raises:
             AdapterError: 如果初始化失败
         """
+        if save_delay < 0:
+            raise AdapterError(f"save_delay must be >= 0, got {save_delay}", adapter_name="HierarchicalStorage")
         self.storage_manager = storage_manager
-        self.index_manager = LevelIndexManager()
+        self.index_path = index_path
+        self.save_delay = save_delay
+        self.retrieval_timeout = retrieval_timeout
+        self.index_manager = self._load_index(index_path)
+        # 跨层级并发检索线程池（每个层级最多一个任务）
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(ContentLevel), thread_name_prefix="unimem-level-retrieval"
+        )
         
         # 线程安全锁
         self._lock = threading.RLock()
@@ -81,23 +112,41 @@ class HierarchicalStorage:
         # 层级记忆缓存（memory_id -> Memory）- 线程安全
         self._memory_cache: Dict[str, Memory] = {}
         
+        # 各层级内容倒排索引（清除缓存后保留，命中的记忆按 ID 回源）
+        self._content_indices: Dict[ContentLevel, ContentIndex] = {level: ContentIndex() for level in ContentLevel}
+        
+        # 已在层级索引中但尚未建立内容索引的记忆 ID（待回源 LTM），以及 LTM 未返回的记忆 ID
+        # （否定集合，避免每次检索重复回源）；均由 _cache_lock 保护
+        self._unindexed: Dict[ContentLevel, Set[str]] = {level: set() for level in ContentLevel}
+        self._ltm_misses: Set[str] = set()
+        # 加载的层级索引没有内容，首次检索时回源 LTM
+        for level in ContentLevel:
+            self._unindexed[level].update(self.index_manager.get_memories_at_level(level))
+        
+        # 层级索引延迟保存（store/remove 标记为脏，定时器到期或 close() 时落盘）
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._index_dirty = False
+        
         # 性能统计
         self._operation_stats: Dict[str, Dict[str, float]] = {
             "store": {"count": 0, "total_time": 0.0},
             "retrieve": {"count": 0, "total_time": 0.0},
             "cross_level_retrieve": {"count": 0, "total_time": 0.0},
+            "ltm_fallthrough": {"count": 0, "total_time": 0.0},
         }
         self._stats_lock = threading.Lock()
         
         logger.info("HierarchicalStorage initialized")
     
-    def store(self, memory: Memory, level: ContentLevel) -> bool:
+    def store(self, memory: Memory, level: ContentLevel, parent_id: Optional[str] = None) -> bool:
         """
         存储记忆到指定层级（线程安全，性能监控）
         
         Args:
             memory: 记忆对象
             level: 内容层级
+            parent_id: 父记忆 ID（可选，如场景所属章节；须已存储在父层级）
             
         Returns:
             是否成功存储
@@ -129,21 +178,28 @@ class HierarchicalStorage:
                             adapter_name="HierarchicalStorage"
                         )
                 
-                # 2. 添加到层级索引
-                if not self.index_manager.add_memory(memory.id, level):
+                # 2. 添加到层级索引（并挂接父记忆）
+                if not self.index_manager.add_memory(memory.id, level, parent_id=parent_id):
                     raise AdapterError(
                         f"Failed to add memory {memory.id} to {level.value} index",
                         adapter_name="HierarchicalStorage"
                     )
                 
-                # 3. 更新缓存（线程安全）
+                # 3. 更新缓存和内容索引（线程安全）
                 with self._cache_lock:
                     self._memory_cache[memory.id] = memory
+                    self._unindexed[level].discard(memory.id)
+                    self._ltm_misses.discard(memory.id)
+                self._content_indices[level].add(memory.id, memory.content)
+                
+                self._schedule_save()
                 
                 # 4. 更新记忆元数据，记录层级信息
                 if not memory.metadata:
                     memory.metadata = {}
                 memory.metadata["content_level"] = level.value
+                if parent_id is not None:
+                    memory.metadata["parent_id"] = parent_id
                 
                 duration = time.time() - start_time
                 self._record_stats("store", duration)
@@ -165,6 +221,30 @@ class HierarchicalStorage:
                     cause=e
                 ) from e
     
+    def register_existing(self, memory_id: str, level: ContentLevel, parent_id: Optional[str] = None) -> bool:
+        """
+        登记已持久化在 LTM 中的记忆（如其他进程写入），只加入层级索引
+        
+        内容索引在首次检索该层级时按 ID 回源 LTM 建立。
+        
+        Args:
+            memory_id: 记忆 ID
+            level: 内容层级
+            parent_id: 父记忆 ID（可选）
+            
+        Returns:
+            是否成功登记
+        """
+        with self._lock:
+            if not self.index_manager.add_memory(memory_id, level, parent_id=parent_id):
+                return False
+            if memory_id not in self._content_indices[level]:
+                with self._cache_lock:
+                    self._unindexed[level].add(memory_id)
+                    self._ltm_misses.discard(memory_id)
+            self._schedule_save()
+            return True
+    
     def retrieve(self, query: str, level: ContentLevel, top_k: int = 10) -> List[Memory]:
         """
         从指定层级检索记忆（线程安全，性能监控）
@@ -175,7 +255,33 @@ class HierarchicalStorage:
             top_k: 返回前K个结果
             
         Returns:
-            记忆列表
+            记忆列表（按相关度降序）
+        """
+        return [memory for memory, _ in self.retrieve_scored(query, level, top_k=top_k)]
+    
+    def retrieve_scored(
+        self,
+        query: str,
+        level: ContentLevel,
+        top_k: int = 10,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[Memory, float]]:
+        """
+        从指定层级检索记忆并返回相关度分数
+        
+        1. 层级索引中尚未建立内容索引的记忆（其他进程写入、重启后）按 ID 回源 LTM 并建立索引
+           （LTM 未返回的记忆 ID 记入否定集合，不再重复回源）
+        2. 在该层级的倒排索引中按 BM25 打分
+        3. 命中但不在缓存中的记忆（已被清出缓存）按 ID 回源 LTM
+        
+        Args:
+            query: 查询文本
+            level: 内容层级
+            top_k: 返回前K个结果
+            deadline: 截止时间（time.monotonic()），超过后跳过 LTM 回源，只返回已缓存的结果
+            
+        Returns:
+            (记忆, 分数) 列表，按分数降序
         """
         if not query or not query.strip():
             logger.warning("Empty query provided")
@@ -191,65 +297,143 @@ class HierarchicalStorage:
         
         start_time = time.time()
         
-        with self._lock:
-            try:
-                # 1. 获取该层级的所有记忆ID
-                memory_ids = self.index_manager.get_memories_at_level(level)
-                
-                if not memory_ids:
-                    logger.debug(f"No memories found at {level.value} level")
-                    return []
-                
-                # 2. 从缓存获取记忆对象（线程安全）
-                memories = []
+        try:
+            # 1. 未建立内容索引的记忆回源 LTM 后建立索引
+            content_index = self._content_indices[level]
+            with self._cache_lock:
+                unindexed = list(self._unindexed[level])
+            if unindexed and not self._past(deadline):
+                loaded = self._load_from_ltm(unindexed)
+                for memory in loaded:
+                    content_index.add(memory.id, memory.content)
+                self._settle_unindexed(level, unindexed, {memory.id for memory in loaded})
+            
+            if not content_index:
+                logger.debug(f"No memories found at {level.value} level")
+                return []
+            
+            # 2. 倒排索引打分（只保留仍属于该层级的记忆）
+            hits = [(memory_id, score) for memory_id, score in content_index.search(query, top_k=top_k)
+                    if self.index_manager.has_memory(memory_id, level)]
+            
+            # 3. 从缓存获取记忆对象，未命中的按 ID 回源 LTM（跳过否定集合中的 ID）
+            with self._cache_lock:
+                cached = {memory_id: self._memory_cache.get(memory_id) for memory_id, _ in hits}
+                missing = [memory_id for memory_id, memory in cached.items()
+                           if memory is None and memory_id not in self._ltm_misses]
+            if missing and not self._past(deadline):
+                cached.update({memory.id: memory for memory in self._load_from_ltm(missing)})
                 with self._cache_lock:
-                    for memory_id in memory_ids:
-                        if memory_id in self._memory_cache:
-                            memories.append(self._memory_cache[memory_id])
-                
-                # TODO: 如果缓存未命中，应该从存储管理器检索（需要存储管理器提供检索接口）
-                # 目前简化实现，只使用缓存
-                
-                # 3. 简单的文本匹配（实际应该使用向量检索）
-                # 这里简化实现，实际应该调用检索引擎
-                matched_memories = []
-                query_lower = query.lower()
-                
-                for memory in memories:
-                    if query_lower in memory.content.lower():
-                        matched_memories.append(memory)
-                
-                # 4. 返回Top-K
-                results = matched_memories[:top_k]
-                
-                duration = time.time() - start_time
-                self._record_stats("retrieve", duration)
-                
-                logger.debug(f"Retrieved {len(results)} memories from {level.value} level (time: {duration:.3f}s)")
-                return results
-                
+                    self._ltm_misses.update(memory_id for memory_id in missing if cached.get(memory_id) is None)
+            results = [(cached[memory_id], score) for memory_id, score in hits if cached.get(memory_id) is not None]
+            
+            duration = time.time() - start_time
+            self._record_stats("retrieve", duration)
+            
+            logger.debug(f"Retrieved {len(results)} memories from {level.value} level (time: {duration:.3f}s)")
+            return results
+            
+        except Exception as e:
+            duration = time.time() - start_time
+            self._record_stats("retrieve", duration)
+            logger.error(f"Error retrieving from {level.value} level: {e}", exc_info=True)
+            return []
+    
+    def _settle_unindexed(self, level: ContentLevel, requested: List[str], loaded: Set[str]) -> None:
+        """回源结束后移出待回源集合；LTM 未返回的 ID 记入否定集合（期间被重新 store 的除外）"""
+        with self._cache_lock:
+            pending = self._unindexed[level]
+            for memory_id in requested:
+                if memory_id not in pending:
+                    continue
+                pending.discard(memory_id)
+                if memory_id not in loaded:
+                    self._ltm_misses.add(memory_id)
+    
+    @staticmethod
+    def _past(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+    
+    def _load_from_ltm(self, memory_ids: List[str]) -> List[Memory]:
+        """按 ID 从存储管理器读取记忆并放入缓存（存储管理器不支持时返回空列表）"""
+        get_memories = getattr(self.storage_manager, "get_memories", None)
+        if not callable(get_memories):
+            return []
+        start_time = time.time()
+        try:
+            memories = [memory for memory in get_memories(memory_ids) or [] if isinstance(memory, Memory)]
+        except Exception as e:
+            logger.warning(f"Failed to load {len(memory_ids)} memories from LTM: {e}")
+            return []
+        finally:
+            self._record_stats("ltm_fallthrough", time.time() - start_time)
+        with self._cache_lock:
+            for memory in memories:
+                self._memory_cache[memory.id] = memory
+        logger.debug(f"Loaded {len(memories)}/{len(memory_ids)} memories from LTM")
+        return memories
+    
+    def retrieve_levels(
+        self,
+        query: str,
+        levels: List[ContentLevel],
+        top_k: int = 10,
+        timeout: Optional[float] = None,
+    ) -> Dict[ContentLevel, List[Tuple[Memory, float]]]:
+        """
+        并发检索多个层级（共享截止时间）
+        
+        截止时间到达时未完成的层级返回空列表，不阻塞结果；截止后各层级也不再回源 LTM。
+        
+        Args:
+            query: 查询文本
+            levels: 层级列表（重复层级只检索一次）
+            top_k: 每个层级返回的前K个结果
+            timeout: 截止时间（秒），None 时使用 retrieval_timeout
+            
+        Returns:
+            层级 -> (记忆, 分数) 列表；超时或失败的层级为空列表
+        """
+        levels = list(dict.fromkeys(levels))
+        deadline = time.monotonic() + (self.retrieval_timeout if timeout is None else timeout)
+        futures = {
+            self._executor.submit(self.retrieve_scored, query, level, top_k, deadline): level
+            for level in levels
+        }
+        done, not_done = concurrent.futures.wait(futures, timeout=max(deadline - time.monotonic(), 0.0))
+        
+        results: Dict[ContentLevel, List[Tuple[Memory, float]]] = {level: [] for level in levels}
+        for future in done:
+            level = futures[future]
+            try:
+                results[level] = future.result()
             except Exception as e:
-                duration = time.time() - start_time
-                self._record_stats("retrieve", duration)
-                logger.error(f"Error retrieving from {level.value} level: {e}", exc_info=True)
-                return []
+                logger.warning(f"Retrieval from {level.value} level failed: {e}")
+        for future in not_done:
+            future.cancel()
+            logger.warning(f"Retrieval from {futures[future].value} level missed the deadline")
+        return results
     
     def cross_level_retrieve(
         self, 
         query: str, 
-        levels: List[ContentLevel]
+        levels: List[ContentLevel],
+        top_k: int = 10,
+        timeout: Optional[float] = None,
     ) -> Dict[str, List[Memory]]:
         """
         跨层级检索（线程安全，性能监控）
         
-        从多个层级同时检索，返回各层级的结果。
+        各层级并发检索（retrieve_levels），整次调用受同一截止时间约束。
         
         Args:
             query: 查询文本
             levels: 要检索的层级列表
+            top_k: 每个层级返回的前K个结果
+            timeout: 截止时间（秒），None 时使用 retrieval_timeout
             
         Returns:
-            字典，key为层级名称，value为该层级的记忆列表
+            字典，key为层级名称，value为该层级的记忆列表（超时的层级为空列表）
         """
         if not query or not query.strip():
             logger.warning("Empty query provided")
@@ -261,14 +445,17 @@ class HierarchicalStorage:
         
         start_time = time.time()
         
-        results = {}
-        
+        valid_levels = []
         for level in levels:
             if not isinstance(level, ContentLevel):
                 logger.warning(f"Invalid level type: {type(level)}, skipping")
                 continue
-            memories = self.retrieve(query, level, top_k=10)
-            results[level.value] = memories
+            valid_levels.append(level)
+        
+        level_results = self.retrieve_levels(query, valid_levels, top_k=top_k, timeout=timeout)
+        results = {
+            level.value: [memory for memory, _ in scored] for level, scored in level_results.items()
+        }
         
         duration = time.time() - start_time
         self._record_stats("cross_level_retrieve", duration)
@@ -310,6 +497,9 @@ class HierarchicalStorage:
                 # 简化检查：如果子层级有记忆但父层级没有，可能存在问题
                 if memory_ids and not parent_memory_ids:
                     issues.append(f"Level {level.value} has memories but parent level {parent_level.value} is empty")
+                
+                # 未挂接父记忆的数量（由父子邻接表维护的计数得出，无需扫描）
+                details["unlinked_count"] = len(memory_ids) - self.index_manager.count_linked(level)
             
             # 3. 检查子层级一致性
             child_levels = self.index_manager.get_child_levels(level)
@@ -342,6 +532,14 @@ class HierarchicalStorage:
                 details={}
             )
     
+    def get_descendants(self, memory_id: str, level: Optional[ContentLevel] = None) -> List[str]:
+        """获取记忆子树中的后代记忆 ID（如大纲下的所有场景），与结果规模线性"""
+        return self.index_manager.get_descendants(memory_id, level)
+    
+    def get_ancestor(self, memory_id: str, level: ContentLevel) -> Optional[str]:
+        """获取记忆在指定层级的祖先记忆 ID（如场景所在章节）"""
+        return self.index_manager.get_ancestor(memory_id, level)
+    
     def get_memory(self, memory_id: str) -> Optional[Memory]:
         """获取指定ID的记忆（线程安全）"""
         with self._cache_lock:
@@ -361,10 +559,14 @@ class HierarchicalStorage:
             try:
                 # 从索引中移除
                 if self.index_manager.remove_memory(memory_id, level):
+                    self._content_indices[level].remove(memory_id)
                     # 从缓存中移除（线程安全）
                     with self._cache_lock:
                         if memory_id in self._memory_cache:
                             del self._memory_cache[memory_id]
+                        self._unindexed[level].discard(memory_id)
+                        self._ltm_misses.discard(memory_id)
+                    self._schedule_save()
                     logger.debug(f"Removed memory {memory_id} from {level.value} level")
                     return True
                 return False
@@ -372,12 +574,64 @@ class HierarchicalStorage:
                 logger.error(f"Error removing memory {memory_id} from {level.value}: {e}", exc_info=True)
                 return False
     
+    @staticmethod
+    def _load_index(index_path: Optional[str]) -> LevelIndexManager:
+        """加载持久化的层级索引（文件不存在或损坏时从空索引开始）"""
+        if not index_path or not os.path.exists(index_path):
+            return LevelIndexManager()
+        try:
+            manager = LevelIndexManager.load(index_path)
+            logger.info(f"Loaded level index from {index_path}: {manager.get_statistics()}")
+            return manager
+        except Exception as e:
+            logger.warning(f"Failed to load level index from {index_path}, starting empty: {e}")
+            return LevelIndexManager()
+    
+    def _schedule_save(self) -> None:
+        """标记层级索引已修改，并在 save_delay 秒后保存（已有待执行的保存时不重复调度）"""
+        if not self.index_path:
+            return
+        with self._save_lock:
+            self._index_dirty = True
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self.save_index)
+            self._save_timer.name = "unimem-level-index-save"
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def save_index(self) -> bool:
+        """立即保存层级索引（未配置 index_path 或没有修改时跳过）"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self.index_path or not self._index_dirty:
+                return False
+            self._index_dirty = False
+        try:
+            self.index_manager.save(self.index_path)
+            return True
+        except Exception as e:
+            with self._save_lock:
+                self._index_dirty = True
+            logger.error(f"Failed to save level index to {self.index_path}: {e}", exc_info=True)
+            return False
+    
+    def close(self) -> None:
+        """关闭分层存储（取消待执行的延迟保存并立即落盘，关闭检索线程池）"""
+        self.save_index()
+        self._executor.shutdown(wait=False)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """获取存储统计信息（线程安全）"""
         with self._lock:
             stats = self.index_manager.get_statistics()
             with self._cache_lock:
                 stats["cached_memories"] = len(self._memory_cache)
+                stats["unindexed_memories"] = {level.value: len(ids) for level, ids in self._unindexed.items()}
+                stats["ltm_misses"] = len(self._ltm_misses)
+            stats["indexed_memories"] = {level.value: len(index) for level, index in self._content_indices.items()}
             
             # 添加操作统计
             with self._stats_lock:
@@ -2,9 +2,20 @@
 层级索引
 
 为不同层级的记忆建立索引，支持快速检索和跨层级查询。
+
+设计特点：
+- 父子邻接表：记忆 ID -> 父记忆 ID、记忆 ID -> 子记忆 ID，
+  "场景所在章节"沿父指针查找（层级深度固定为 4，O(1)），
+  "大纲下的所有内容"按子邻接表展开（与结果规模线性）
+- 子树计数：每条记忆按层级维护后代数量，挂接/摘除时只更新祖先链
+- 持久化：to_dict/from_dict 与 JSON 文件 save/load（原子替换写入）
 """
 
+import os
+import json
 import logging
+import threading
+from collections import Counter
 from typing import Dict, List, Set, Optional, Any
 from enum import Enum
 from dataclasses import dataclass, field
@@ -102,7 +113,8 @@ class LevelIndex:
 class LevelIndexManager:
     """层级索引管理器
     
-    管理所有层级的索引，提供统一的索引操作接口。
+    管理所有层级的索引，提供统一的索引操作接口，并维护记忆之间的父子关系
+    （大纲 -> 章节 -> 场景）。父记忆必须位于子记忆的父层级。
     """
     
     def __init__(self):
@@ -113,33 +125,234 @@ class LevelIndexManager:
         for level in ContentLevel:
             self._indices[level] = LevelIndex(level=level)
         
+        # 父子邻接表与子树计数
+        self._levels: Dict[str, ContentLevel] = {}  # 记忆 ID -> 层级
+        self._parents: Dict[str, str] = {}  # 子记忆 ID -> 父记忆 ID
+        self._children: Dict[str, Dict[str, None]] = {}  # 父记忆 ID -> 子记忆 ID（有序集合）
+        self._subtree_counts: Dict[str, Counter] = {}  # 记忆 ID -> {层级: 后代数量}
+        self._linked_counts: Counter = Counter()  # 层级 -> 已挂接父记忆的记忆数量
+        self._lock = threading.RLock()
+        
         logger.info("LevelIndexManager initialized")
     
     def get_index(self, level: ContentLevel) -> LevelIndex:
         """获取指定层级的索引"""
         return self._indices.get(level)
     
-    def add_memory(self, memory_id: str, level: ContentLevel) -> bool:
-        """添加记忆到指定层级索引"""
+    def add_memory(self, memory_id: str, level: ContentLevel, parent_id: Optional[str] = None) -> bool:
+        """
+        添加记忆到指定层级索引
+        
+        Args:
+            memory_id: 记忆 ID
+            level: 内容层级
+            parent_id: 父记忆 ID（可选，必须位于 level 的父层级）
+        """
         index = self._indices.get(level)
         if not index:
             logger.error(f"Index for level {level.value} not found")
             return False
-        return index.add_memory(memory_id)
+        with self._lock:
+            current = self._levels.get(memory_id)
+            if current is not None and current != level:
+                logger.warning(f"Memory {memory_id} is already indexed at {current.value} level")
+                return False
+            if parent_id is not None and not self._valid_parent(memory_id, level, parent_id):
+                return False
+            if not index.add_memory(memory_id):
+                return False
+            self._levels[memory_id] = level
+            if parent_id is not None:
+                return self.set_parent(memory_id, parent_id)
+            return True
     
     def remove_memory(self, memory_id: str, level: ContentLevel) -> bool:
-        """从指定层级索引中移除记忆"""
+        """从指定层级索引中移除记忆（同时摘除父子关系，子记忆保留但不再有父记忆）"""
         index = self._indices.get(level)
         if not index:
             return False
-        return index.remove_memory(memory_id)
+        with self._lock:
+            if not index.remove_memory(memory_id):
+                return False
+            self._detach(memory_id)
+            for child_id in self._children.pop(memory_id, {}):
+                self._parents.pop(child_id, None)
+                self._linked_counts[self._levels[child_id]] -= 1
+            self._subtree_counts.pop(memory_id, None)
+            self._levels.pop(memory_id, None)
+            return True
+    
+    def set_parent(self, memory_id: str, parent_id: Optional[str]) -> bool:
+        """
+        设置（或更换、清除）记忆的父记忆
+        
+        Args:
+            memory_id: 子记忆 ID
+            parent_id: 父记忆 ID，None 表示清除父子关系
+            
+        Returns:
+            是否成功（两者都须已建立索引，且父记忆位于子记忆的父层级）
+        """
+        with self._lock:
+            level = self._levels.get(memory_id)
+            if level is None:
+                logger.warning(f"Cannot set parent of unindexed memory {memory_id}")
+                return False
+            if parent_id is None:
+                self._detach(memory_id)
+                return True
+            if not self._valid_parent(memory_id, level, parent_id):
+                return False
+            if self._parents.get(memory_id) == parent_id:
+                return True
+            self._detach(memory_id)
+            self._parents[memory_id] = parent_id
+            self._children.setdefault(parent_id, {})[memory_id] = None
+            self._linked_counts[level] += 1
+            self._propagate(parent_id, self._subtree_of(memory_id), 1)
+            return True
+    
+    def _valid_parent(self, memory_id: str, level: ContentLevel, parent_id: str) -> bool:
+        """父记忆须已建立索引且位于 level 的父层级"""
+        expected = self._indices[level].parent_level
+        if expected is not None and self._levels.get(parent_id) == expected:
+            return True
+        logger.warning(
+            f"Parent {parent_id} of {level.value} memory {memory_id} must be indexed at "
+            f"{expected.value if expected else 'no'} level"
+        )
+        return False
+    
+    def _subtree_of(self, memory_id: str) -> Counter:
+        """记忆自身及其后代的按层级计数"""
+        counts = Counter(self._subtree_counts.get(memory_id, ()))
+        counts[self._levels[memory_id]] += 1
+        return counts
+    
+    def _propagate(self, ancestor_id: Optional[str], counts: Counter, sign: int) -> None:
+        """沿祖先链更新子树计数"""
+        while ancestor_id is not None:
+            subtree = self._subtree_counts.setdefault(ancestor_id, Counter())
+            for level, count in counts.items():
+                subtree[level] += sign * count
+                if subtree[level] <= 0:
+                    del subtree[level]
+            ancestor_id = self._parents.get(ancestor_id)
+    
+    def _detach(self, memory_id: str) -> None:
+        """摘除记忆与父记忆的关系"""
+        parent_id = self._parents.pop(memory_id, None)
+        if parent_id is None:
+            return
+        siblings = self._children.get(parent_id)
+        if siblings is not None:
+            siblings.pop(memory_id, None)
+            if not siblings:
+                del self._children[parent_id]
+        self._linked_counts[self._levels[memory_id]] -= 1
+        self._propagate(parent_id, self._subtree_of(memory_id), -1)
+    
+    def get_level(self, memory_id: str) -> Optional[ContentLevel]:
+        """获取记忆所在层级"""
+        with self._lock:
+            return self._levels.get(memory_id)
+    
+    def get_parent(self, memory_id: str) -> Optional[str]:
+        """获取父记忆 ID"""
+        with self._lock:
+            return self._parents.get(memory_id)
+    
+    def get_children(self, memory_id: str) -> List[str]:
+        """获取直接子记忆 ID（按挂接顺序）"""
+        with self._lock:
+            return list(self._children.get(memory_id, ()))
+    
+    def get_ancestor(self, memory_id: str, level: ContentLevel) -> Optional[str]:
+        """
+        获取指定层级的祖先记忆 ID（如场景所在的章节）
+        
+        沿父指针最多走 len(ContentLevel) - 1 步。
+        """
+        with self._lock:
+            current = self._parents.get(memory_id)
+            while current is not None:
+                if self._levels.get(current) == level:
+                    return current
+                current = self._parents.get(current)
+            return None
+    
+    def get_ancestors(self, memory_id: str) -> List[str]:
+        """获取所有祖先记忆 ID（由近及远）"""
+        with self._lock:
+            ancestors = []
+            current = self._parents.get(memory_id)
+            while current is not None:
+                ancestors.append(current)
+                current = self._parents.get(current)
+            return ancestors
+    
+    def is_descendant(self, memory_id: str, ancestor_id: str) -> bool:
+        """判断 memory_id 是否位于 ancestor_id 的子树中"""
+        return ancestor_id in self.get_ancestors(memory_id)
+    
+    def get_descendants(self, memory_id: str, level: Optional[ContentLevel] = None) -> List[str]:
+        """
+        获取子树中的所有后代记忆 ID（如大纲下的所有章节和场景）
+        
+        Args:
+            memory_id: 根记忆 ID
+            level: 只返回该层级的后代（可选）；展开到该层级即停止
+            
+        Returns:
+            后代记忆 ID 列表（广度优先）
+        """
+        with self._lock:
+            descendants = []
+            frontier = list(self._children.get(memory_id, ()))
+            while frontier:
+                next_frontier = []
+                for child_id in frontier:
+                    child_level = self._levels.get(child_id)
+                    if level is None or child_level == level:
+                        descendants.append(child_id)
+                    if level is None or child_level != level:
+                        next_frontier.extend(self._children.get(child_id, ()))
+                frontier = next_frontier
+            return descendants
+    
+    def get_subtree_size(self, memory_id: str, level: Optional[ContentLevel] = None) -> int:
+        """
+        获取后代数量（O(1)）
+        
+        Args:
+            memory_id: 根记忆 ID
+            level: 只统计该层级的后代（可选）
+        """
+        with self._lock:
+            counts = self._subtree_counts.get(memory_id)
+            if not counts:
+                return 0
+            if level is None:
+                return sum(counts.values())
+            return counts.get(level, 0)
+    
+    def count_linked(self, level: ContentLevel) -> int:
+        """获取指定层级中已挂接父记忆的记忆数量（O(1)）"""
+        with self._lock:
+            return self._linked_counts.get(level, 0)
+    
+    def has_memory(self, memory_id: str, level: ContentLevel) -> bool:
+        """检查记忆是否在指定层级索引中"""
+        with self._lock:
+            return self._levels.get(memory_id) == level
     
     def get_memories_at_level(self, level: ContentLevel) -> Set[str]:
         """获取指定层级的所有记忆ID"""
         index = self._indices.get(level)
         if not index:
             return set()
-        return index.memory_ids.copy()
+        with self._lock:
+            return index.memory_ids.copy()
     
     def get_parent_level(self, level: ContentLevel) -> Optional[ContentLevel]:
         """获取父层级"""
@@ -158,7 +371,48 @@ class LevelIndexManager:
     def get_statistics(self) -> Dict[str, int]:
         """获取各层级的统计信息"""
         stats = {}
-        for level, index in self._indices.items():
-            stats[level.value] = index.get_memory_count()
+        with self._lock:
+            for level, index in self._indices.items():
+                stats[level.value] = index.get_memory_count()
         return stats
-
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可 JSON 序列化的字典（子树计数加载时重建）"""
+        with self._lock:
+            return {
+                "levels": {level.value: sorted(index.memory_ids) for level, index in self._indices.items()},
+                "parents": dict(self._parents),
+            }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LevelIndexManager":
+        """从 to_dict 的结果重建索引管理器"""
+        manager = cls()
+        for level_value, memory_ids in (data.get("levels") or {}).items():
+            level = ContentLevel(level_value)
+            for memory_id in memory_ids:
+                manager.add_memory(memory_id, level)
+        # 自底向上挂接：挂接时父记忆尚无父记忆，每条关系只更新一次计数
+        parents = data.get("parents") or {}
+        depth = {level: i for i, level in enumerate(ContentLevel)}
+        ordered = sorted(parents.items(), key=lambda item: -depth.get(manager._levels.get(item[0]), 0))
+        for memory_id, parent_id in ordered:
+            if not manager.set_parent(memory_id, parent_id):
+                logger.warning(f"Dropped invalid parent link {memory_id} -> {parent_id}")
+        return manager
+    
+    def save(self, path: str) -> None:
+        """保存到 JSON 文件（先写临时文件再原子替换）"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logger.debug(f"Saved level index to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> "LevelIndexManager":
+        """从 JSON 文件加载"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
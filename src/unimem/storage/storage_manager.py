@@ -8,6 +8,7 @@
 - 自动层级判断：根据记忆类型和上下文自动判断存储层级
 - 跨层更新：支持跨层更新记忆
 - 统一接口：提供统一的存储和检索接口
+- 写入通知：add/update/cleanup 成功后回调写入监听器（如检索缓存失效）
 - 错误处理：完善的错误处理和降级策略
 
 工业级特性：
@@ -21,7 +22,7 @@
 - 优雅降级（适配器失败时的处理）
 """
 
-from typing import Optional, List, Set, Dict, Any
+from typing import Optional, List, Set, Dict, Any, Callable
 from datetime import datetime
 from dataclasses import dataclass, field
 import threading
@@ -162,8 +163,29 @@ class StorageManager:
         }
         self._stats_lock = threading.Lock()
         
+        # 写入监听器：存储写入成功后以记忆 ID 回调（cleanup 等批量写入时为 None）
+        self._write_listeners: List[Callable[[Optional[str]], None]] = []
+        
         logger.info("StorageManager initialized")
     
+    def add_write_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """
+        注册写入监听器（如检索缓存在存储写入后失效）
+        
+        Args:
+            listener: 回调函数，参数为写入的记忆 ID（批量写入时为 None）
+        """
+        with self._lock:
+            self._write_listeners.append(listener)
+    
+    def notify_write(self, memory_id: Optional[str] = None) -> None:
+        """通知写入监听器存储已变更（监听器异常只记录日志，不影响写入结果）"""
+        for listener in list(self._write_listeners):
+            try:
+                listener(memory_id)
+            except Exception as e:
+                logger.warning(f"Write listener failed for memory {memory_id}: {e}")
+    
     def add_memory(self, memory: Memory, context: Optional[Context] = None) -> bool:
         """
         添加记忆到存储系统（线程安全，支持事务和重试）
@@ -257,6 +279,7 @@ class StorageManager:
                 # 5. 更新缓存（线程安全）
                 with self._cache_lock:
                     self._memory_layers[memory.id] = layers_added
+                self.notify_write(memory.id)
                 
                 duration = time.time() - start_time
                 self._record_stats("add_memory", duration, success=True)
@@ -415,6 +438,27 @@ class StorageManager:
             logger.error(f"Error searching LTM: {e}", exc_info=True)
             return []
     
+    def get_memories(self, memory_ids: List[str]) -> List[Memory]:
+        """
+        按 ID 批量读取 LTM 中的记忆（供分层存储等上层组件在缓存未命中时回源）
+        
+        Args:
+            memory_ids: 记忆 ID 列表
+            
+        Returns:
+            记忆列表（不存在的 ID 被忽略；适配器不支持批量读取时返回空列表）
+        """
+        if not memory_ids:
+            return []
+        get_many = getattr(self.storage_adapter, "get_many_from_ltm", None)
+        if get_many is None:
+            return []
+        try:
+            return get_many(list(memory_ids)) or []
+        except Exception as e:
+            logger.error(f"Error reading {len(memory_ids)} memories from LTM: {e}", exc_info=True)
+            return []
+    
     def update_memory(self, memory: Memory) -> bool:
         """
         更新记忆（线程安全，支持重试）
@@ -526,6 +570,7 @@ class StorageManager:
                 # 更新缓存（线程安全）
                 with self._cache_lock:
                     self._memory_layers[memory.id] = updated_layers
+                self.notify_write(memory.id)
                 
                 duration = time.time() - start_time
                 self._record_stats("update_memory", duration, success=True)
@@ -574,6 +619,8 @@ class StorageManager:
                     ) or 0
                     
                     logger.info(f"Cleaned up {cleaned_count} old memories (max_age: {max_age_hours}h)")
+                    if cleaned_count:
+                        self.notify_write(None)
                     
                     # 注意：这里无法精确知道哪些记忆被删除，所以不清除缓存
                     # 缓存会在下次访问时自动更新（如果记忆不存在会自然清理）
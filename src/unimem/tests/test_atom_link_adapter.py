@@ -24,7 +24,7 @@ if os.environ.get("CONDA_DEFAULT_ENV") != "seeme":
     print("或使用自动测试脚本: python tests/run_tests.py")
     print("="*60 + "\n")
 
-from unimem.adapters.atom_link_adapter import AtomLinkAdapter
+from unimem.adapters.atom_link_adapter import AtomLinkAdapter, EmbeddingCache
 from unimem.memory_types import Memory, Entity, MemoryType, MemoryLayer
 
 
@@ -326,16 +326,21 @@ class TestAtomLinkAdapter(unittest.TestCase):
             "mem2": memory2,
             "mem3": memory3,
         }
+        # 与 add_memory_to_vector_store 一致：登记链接图
+        for memory in self.adapter.memory_store.values():
+            self.adapter.link_graph.set_links(memory.id, memory.links)
         
-        # Mock 初始检索结果
-        self.adapter._search_similar_memories = Mock(return_value=[memory1])
+        # Mock 初始检索结果（记忆, 相似度）
+        self.adapter._search_scored_memories = Mock(return_value=[(memory1, 0.9)])
         
         results = self.adapter.subgraph_link_retrieval("programming", top_k=5)
         
-        # 应该包含初始记忆和通过链接找到的记忆
-        self.assertGreater(len(results), 0)
-        self.assertIn(memory1, results)
-        # 可能包含 mem2（通过链接）
+        # 包含种子记忆和多跳链接找到的记忆，按 PPR 分数降序
+        self.assertEqual([m.id for m in results], ["mem1", "mem2", "mem3"])
+        self.assertGreater(results[1].metadata["subgraph_score"], results[2].metadata["subgraph_score"])
+        # 分数只写入返回的副本，memory_store 中共享的记忆对象不被修改
+        self.assertNotIn("subgraph_score", memory2.metadata)
+        self.assertIs(self.adapter.memory_store["mem2"], memory2)
     
     def test_parse_json_response(self):
         """测试解析 JSON 响应"""
@@ -456,6 +461,132 @@ class TestAtomLinkAdapterIntegration(unittest.TestCase):
         adapter.delete_memory_from_vector_store(memory.id)
 
 
+
+class TestEmbeddingCache(unittest.TestCase):
+    """EmbeddingCache slab/LRU 测试"""
+    
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_size=2)
+        cache.set("a", [1.0, 0.0])
+        cache.set("b", [0.0, 1.0])
+        cache.get("a")
+        cache.set("c", [1.0, 1.0])
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.get_statistics()["evictions"], 1)
+    
+    def test_byte_bound(self):
+        # 4 维 float32 每条 16 字节，64 字节上限只能容纳 4 条
+        cache = EmbeddingCache(max_size=100, max_bytes=64)
+        for i in range(6):
+            cache.set(f"text{i}", [float(i)] * 4)
+        stats = cache.get_statistics()
+        self.assertEqual(stats["capacity"], 4)
+        self.assertEqual(stats["size"], 4)
+        self.assertLessEqual(stats["bytes"], 64)
+    
+    def test_returns_read_only_view(self):
+        cache = EmbeddingCache(max_size=4)
+        cache.set("a", [0.5, 0.25])
+        first = cache.get("a")
+        self.assertIsInstance(first, np.ndarray)
+        self.assertEqual(first.dtype, np.float32)
+        self.assertFalse(first.flags.writeable)
+        # 两次读取共享同一块 slab 内存
+        self.assertTrue(np.shares_memory(first, cache.get("a")))
+
+
+class TestEmbeddingModelLazyLoading(unittest.TestCase):
+    """嵌入模型延迟加载测试"""
+    
+    def setUp(self):
+        self.adapter = AtomLinkAdapter(config={"vector_backend": "memory", "embedding_warm_up": False})
+        self.adapter.initialize()
+        self.loads = 0
+    
+    def _loader(self):
+        self.loads += 1
+        model = MagicMock()
+        model.get_sentence_embedding_dimension.return_value = 8
+        return model
+    
+    def test_loaded_once_on_first_use(self):
+        self.adapter._embedding_model_loader = self._loader
+        self.assertTrue(self.adapter.get_capabilities()["semantic_retrieval"])
+        self.assertEqual(self.loads, 0)
+        
+        model = self.adapter.embedding_model
+        self.assertIs(self.adapter.embedding_model, model)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.adapter.embedding_dimension, 8)
+        self.assertIsNotNone(self.adapter.model_load_seconds)
+    
+    def test_failed_load_not_retried(self):
+        def failing_loader():
+            self.loads += 1
+            raise OSError("model not found")
+        self.adapter._embedding_model_loader = failing_loader
+        self.assertIsNone(self.adapter.embedding_model)
+        self.assertIsNone(self.adapter.embedding_model)
+        self.assertEqual(self.loads, 1)
+        self.assertFalse(self.adapter.get_capabilities()["semantic_retrieval"])
+    
+    def test_explicit_model_disables_lazy_loading(self):
+        self.adapter._embedding_model_loader = self._loader
+        injected = MagicMock()
+        self.adapter.embedding_model = injected
+        self.assertIs(self.adapter.embedding_model, injected)
+        self.assertEqual(self.loads, 0)
+
+
+class TestAtomLinkPointResolution(unittest.TestCase):
+    """Qdrant 点 ID 反向映射与批量解析测试"""
+    
+    def setUp(self):
+        self.adapter = AtomLinkAdapter(config={"collection_name": "test_unimem_memories"})
+        self.adapter.initialize()
+        self.adapter.qdrant_client = MagicMock()
+        self.adapter.embedding_model = MagicMock()
+        self.adapter.embedding_model.encode.return_value = np.array([0.1] * 384)
+        self.adapter._available = True
+        self.adapter.memory_store = {}
+        self.adapter.id_mapping = {}
+        self.adapter.point_id_mapping = {}
+    
+    def _point(self, point_id, payload=None):
+        point = MagicMock()
+        point.id = point_id
+        point.payload = payload
+        return point
+    
+    def test_mapping_kept_in_sync(self):
+        self.adapter._map_point_id("mem1", "p1")
+        self.adapter._map_point_id("mem1", "p2")
+        self.assertEqual(self.adapter.point_id_mapping, {"p2": "mem1"})
+        self.adapter._unmap_point_id("mem1")
+        self.assertEqual(self.adapter.point_id_mapping, {})
+        self.assertEqual(self.adapter.id_mapping, {})
+    
+    def test_resolve_known_and_fetch_unknown(self):
+        memory = Memory(id="mem1", content="已知记忆", timestamp=datetime.now())
+        self.adapter.memory_store["mem1"] = memory
+        self.adapter._map_point_id("mem1", "p1")
+        record = MagicMock()
+        record.id = "p2"
+        record.payload = {"content": "重启后丢失的记忆", "original_id": "mem2", "tags": ["伏笔"]}
+        self.adapter.qdrant_client.search.return_value = [self._point("p2"), self._point("p1"), self._point("p3")]
+        self.adapter.qdrant_client.retrieve.return_value = [record]
+        
+        results = self.adapter._search_similar_memories("query", top_k=3)
+        
+        self.assertEqual([m.id for m in results], ["mem2", "mem1"])
+        self.assertEqual(results[0].tags, ["伏笔"])
+        # 未解析的点一次性批量获取
+        self.adapter.qdrant_client.retrieve.assert_called_once()
+        self.assertEqual(
+            self.adapter.qdrant_client.retrieve.call_args.kwargs["ids"], ["p2", "p3"]
+        )
+
 if __name__ == '__main__':
     unittest.main()
 
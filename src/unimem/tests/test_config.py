@@ -40,6 +40,8 @@ class TestUniMemConfig(unittest.TestCase):
         config = UniMemConfig()
         self.assertIsNotNone(config.get("storage.foa_backend"))
         self.assertIsNotNone(config.get("graph.backend"))
+        # 检索结果缓存无法感知绕过 StorageManager 的写入，默认关闭
+        self.assertFalse(config.get("retrieval.cache.enabled"))
     
     def test_config_from_file(self):
         """测试从文件加载配置"""
@@ -0,0 +1,105 @@
+"""
+磁盘缓存测试
+
+测试 disk_cache.py 中的 SQLite 磁盘缓存，以及 EmbeddingCache 的磁盘二级缓存
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from unimem.disk_cache import DiskCache, content_key
+from unimem.adapters.atom_link_adapter import EmbeddingCache
+
+
+class TestDiskCache(unittest.TestCase):
+    """DiskCache 测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "cache", "unimem.db")
+        self.cache = DiskCache(self.path, max_bytes=1000, evict_check_interval=1)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_content_key(self):
+        self.assertEqual(content_key("model", "text"), content_key("model", "text"))
+        self.assertNotEqual(content_key("model", "text"), content_key("modelt", "ext"))
+
+    def test_put_get_across_connections(self):
+        self.cache.put("ns", "k1", b"v1")
+        self.assertEqual(self.cache.get("ns", "k1"), b"v1")
+        self.assertIsNone(self.cache.get("other", "k1"))
+
+        # 另一个连接（模拟新进程）可读取同一文件
+        other = DiskCache(self.path)
+        try:
+            self.assertEqual(other.get("ns", "k1"), b"v1")
+            self.assertEqual(other.get_many("ns", ["k1", "k2"]), {"k1": b"v1"})
+        finally:
+            other.close()
+
+    def test_generation(self):
+        self.cache.put("ns", "k1", b"v1", generation=0)
+        self.assertEqual(self.cache.bump_generation("ns"), 1)
+        self.assertEqual(self.cache.get_generation("ns"), 1)
+        # 旧代际条目被删除
+        self.assertIsNone(self.cache.get("ns", "k1"))
+        self.cache.put("ns", "k2", b"v2", generation=1)
+        self.assertIsNone(self.cache.get("ns", "k2", generation=2))
+        self.assertEqual(self.cache.get("ns", "k2", generation=1), b"v2")
+
+    def test_size_bound_eviction(self):
+        for i in range(5):
+            self.cache.put("ns", f"k{i}", b"x" * 300)
+        stats = self.cache.get_statistics()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertEqual(self.cache.get("ns", "k4"), b"x" * 300)
+
+    def test_iter_recent_and_clear(self):
+        self.cache.put_many("ns", [("a", b"1"), ("b", b"2")])
+        self.assertEqual(sorted(k for k, _ in self.cache.iter_recent("ns", 10)), ["a", "b"])
+        self.cache.clear("ns")
+        self.assertEqual(list(self.cache.iter_recent("ns", 10)), [])
+
+
+class TestEmbeddingCacheDisk(unittest.TestCase):
+    """EmbeddingCache 磁盘二级缓存测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.disk = DiskCache(os.path.join(self.tmpdir, "embeddings.db"))
+
+    def tearDown(self):
+        self.disk.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_survives_restart(self):
+        cache = EmbeddingCache(max_size=10, disk_cache=self.disk, namespace="embedding:m1")
+        cache.set_many([("第一章", [0.5, 0.25]), ("第二章", [1.0, 0.0])])
+
+        # 新实例（模拟重启）：内存为空，回查磁盘
+        restarted = EmbeddingCache(max_size=10, disk_cache=self.disk, namespace="embedding:m1")
+        self.assertEqual(restarted.size(), 0)
+        self.assertEqual(restarted.get("第一章").tolist(), [0.5, 0.25])
+        found = restarted.get_many(["第二章", "第三章"])
+        self.assertEqual(list(found), ["第二章"])
+        self.assertEqual(found["第二章"].tolist(), [1.0, 0.0])
+
+        # 不同模型的命名空间互不干扰
+        other_model = EmbeddingCache(disk_cache=self.disk, namespace="embedding:m2")
+        self.assertIsNone(other_model.get("第一章"))
+
+    def test_warm_up(self):
+        EmbeddingCache(disk_cache=self.disk, namespace="embedding:m1").set("第一章", [0.5])
+        cache = EmbeddingCache(max_size=10, disk_cache=self.disk, namespace="embedding:m1")
+        self.assertEqual(cache.warm_up(), 1)
+        self.assertEqual(cache.size(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
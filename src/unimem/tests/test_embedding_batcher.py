@@ -0,0 +1,172 @@
+"""
+嵌入微批处理测试
+
+测试 embedding_batcher.py 中的微批处理器，以及 AtomLinkAdapter 的接入
+"""
+
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from unimem.embedding_batcher import EmbeddingBatcher
+from unimem.adapters.atom_link_adapter import AtomLinkAdapter
+
+
+class _RecordingEncoder:
+    """记录每次调用批次大小的编码函数"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return [[float(len(text))] for text in texts]
+
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    """EmbeddingBatcher 测试"""
+
+    def tearDown(self):
+        self.batcher.shutdown()
+
+    def test_concurrent_requests_coalesced(self):
+        encoder = _RecordingEncoder(delay=0.02)
+        self.batcher = EmbeddingBatcher(encoder, max_batch_size=8, linger_ms=50)
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = self.batcher.encode("x" * (i + 1))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {i: [float(i + 1)] for i in range(8)})
+        self.assertLess(len(encoder.batches), 8)
+        stats = self.batcher.get_statistics()
+        self.assertEqual(stats["requests"], 8)
+        self.assertGreater(stats["avg_batch_size"], 1.0)
+        self.assertGreater(stats["batch_fill_ratio"], 1 / 8)
+
+    def test_single_caller_not_delayed(self):
+        self.batcher = EmbeddingBatcher(_RecordingEncoder(), linger_ms=2000)
+        start = time.monotonic()
+        self.assertEqual(self.batcher.encode("abc"), [3.0])
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_encode_many_chunked_and_deduplicated(self):
+        encoder = _RecordingEncoder()
+        self.batcher = EmbeddingBatcher(encoder, max_batch_size=2)
+        vectors = self.batcher.encode_many(["a", "bb", "a", "ccc"])
+        self.assertEqual(vectors, [[1.0], [2.0], [1.0], [3.0]])
+        self.assertEqual(encoder.batches, [["a", "bb"], ["ccc"]])
+
+    def test_error_propagates(self):
+        def failing(texts):
+            raise RuntimeError("model down")
+
+        self.batcher = EmbeddingBatcher(failing)
+        future = self.batcher.submit("a")
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        self.assertEqual(self.batcher.get_statistics()["errors"], 1)
+
+    def test_pending_submits_count_as_waiting_callers(self):
+        release = threading.Event()
+
+        def gated(texts):
+            release.wait(5)
+            return [[float(len(text))] for text in texts]
+
+        self.batcher = EmbeddingBatcher(gated)
+        futures = [self.batcher.submit("a"), self.batcher.submit("bb")]
+        self.assertEqual(self.batcher._active_callers, 2)
+        release.set()
+        self.assertEqual([f.result(timeout=5) for f in futures], [[1.0], [2.0]])
+        deadline = time.monotonic() + 5
+        while self.batcher._active_callers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.batcher._active_callers, 0)
+
+    def test_submitted_requests_coalesced(self):
+        encoder = _RecordingEncoder()
+        self.batcher = EmbeddingBatcher(encoder, max_batch_size=8, linger_ms=2000)
+        barrier = threading.Barrier(8)
+        futures = [None] * 8
+
+        def worker(i):
+            barrier.wait()
+            futures[i] = self.batcher.submit("x" * (i + 1))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([f.result(timeout=5) for f in futures], [[float(i + 1)] for i in range(8)])
+        self.assertLess(len(encoder.batches), 8)
+
+    def test_submit_racing_shutdown_never_hangs(self):
+        self.batcher = EmbeddingBatcher(_RecordingEncoder(), linger_ms=1)
+        futures = []
+        start = threading.Event()
+
+        def submitter():
+            start.wait()
+            for i in range(200):
+                try:
+                    futures.append(self.batcher.submit(str(i)))
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=submitter) for _ in range(4)]
+        for t in threads:
+            t.start()
+        start.set()
+        self.batcher.shutdown()
+        for t in threads:
+            t.join()
+        # 关闭前入队的请求全部完成，之后的提交被拒绝
+        for future in futures:
+            self.assertIsNotNone(future.result(timeout=5))
+        with self.assertRaises(RuntimeError):
+            self.batcher.submit("late")
+
+
+class TestAtomLinkAdapterMicroBatching(unittest.TestCase):
+    """AtomLinkAdapter 微批处理接入测试"""
+
+    def test_embeddings_go_through_batcher(self):
+        adapter = AtomLinkAdapter(config={"vector_backend": "memory"})
+        adapter.initialize()
+        adapter.embedding_model = MagicMock()
+        adapter.embedding_model.encode.side_effect = lambda texts, **kwargs: np.ones((len(texts), 4))
+
+        embedding = adapter._get_embedding("第一章")
+        self.assertEqual(embedding.dtype, np.float32)
+        self.assertEqual(embedding.tolist(), [1.0] * 4)
+        self.assertEqual(len(adapter._get_embeddings_batch(["第二章", "第三章"])), 2)
+
+        # 缓存命中返回独立副本，修改不影响缓存
+        embedding[:] = 0.0
+        cached = adapter._get_embeddings_batch(["第一章"])[0]
+        self.assertIsInstance(cached, np.ndarray)
+        self.assertEqual(cached.tolist(), [1.0] * 4)
+        self.assertEqual(adapter._get_embedding("第一章").tolist(), [1.0] * 4)
+        stats = adapter.get_embedding_statistics()["micro_batching"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["encoded_texts"], 3)
+        adapter.embedding_batcher.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
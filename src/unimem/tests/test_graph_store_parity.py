@@ -0,0 +1,276 @@
+"""
+图存储一致性测试
+
+同一组用例分别针对 sqlite_graph.py 和 neo4j.py 运行，确认两个后端的函数接口和返回结果一致：
+- SQLite 后端使用临时数据库文件，始终运行
+- Neo4j 后端需要 py2neo 和可连接的 Neo4j 服务（设置 RUN_NEO4J_TESTS=1 启用）
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from unimem import neo4j as unimem_neo4j
+from unimem import sqlite_graph
+from unimem.text_terms import bigram_terms
+from unimem.adapters.layered_storage_adapter import LayeredStorageAdapter
+from unimem.memory_types import Entity, Relation, Memory, MemoryType
+
+
+class GraphStoreParityMixin:
+    """两个后端共享的用例（子类提供 store 模块）"""
+
+    store = None
+
+    def _id(self, name):
+        return f"{self.prefix}_{name}"
+
+    def _entity(self, name, entity_type="person", description=""):
+        return Entity(id=self._id(name), name=name, entity_type=entity_type, description=description)
+
+    def _memory(self, name, content, minutes_ago=0, entities=(), links=(), memory_type=MemoryType.EXPERIENCE):
+        return Memory(
+            id=self._id(name),
+            content=content,
+            timestamp=datetime(2025, 3, 1, 12, 0) - timedelta(minutes=minutes_ago),
+            memory_type=memory_type,
+            keywords=["伏笔"],
+            entities=[self._id(e) for e in entities],
+            links={self._id(link) for link in links},
+            metadata={"source": "chapter"},
+        )
+
+    def test_entity_crud(self):
+        self.assertTrue(self.store.create_entity(self._entity("lin", description="主角")))
+        self.assertTrue(self.store.create_entity(self._entity("su")))
+        self.assertTrue(self.store.create_relation(Relation(
+            source=self._id("lin"), target=self._id("su"), keywords=["师徒"], description="师父")))
+
+        entity = self.store.get_entity(self._id("lin"))
+        self.assertEqual(entity.description, "主角")
+        self.assertEqual(entity.neighbors, [self._id("su")])
+        relation = self.store.get_relation(self._id("lin"), self._id("su"))
+        self.assertEqual(relation.keywords, ["师徒"])
+        self.assertEqual(len(self.store.get_entity_relations(self._id("su"), direction="incoming")), 1)
+        self.assertEqual(self.store.get_entity_relations(self._id("su"), direction="outgoing"), [])
+
+        self.assertTrue(self.store.update_entity(self._entity("lin", description="掌门")))
+        self.assertEqual(self.store.get_entity(self._id("lin")).description, "掌门")
+
+        self.assertTrue(self.store.delete_entity(self._id("su")))
+        self.assertIsNone(self.store.get_entity(self._id("su")))
+        self.assertIsNone(self.store.get_relation(self._id("lin"), self._id("su")))
+        self.assertFalse(self.store.delete_entity(self._id("su")))
+
+    def test_relation_requires_existing_endpoints(self):
+        self.store.create_entity(self._entity("lin"))
+        self.assertFalse(self.store.create_relation(Relation(source=self._id("lin"), target=self._id("ghost"))))
+
+    def test_memory_round_trip(self):
+        self.store.create_entity(self._entity("lin"))
+        self.store.create_memory(self._memory("m1", "林风拜入师门"))
+        memory = self._memory("m2", "林风发现玉佩", entities=["lin", "ghost"], links=["m1"])
+        self.assertTrue(self.store.create_memory(memory))
+
+        loaded = self.store.get_memory(self._id("m2"))
+        self.assertEqual(loaded.content, "林风发现玉佩")
+        self.assertEqual(loaded.timestamp, memory.timestamp)
+        self.assertEqual(loaded.memory_type, MemoryType.EXPERIENCE)
+        self.assertEqual(loaded.keywords, ["伏笔"])
+        self.assertEqual(loaded.entities, [self._id("lin")])  # 不存在的实体不连接
+        self.assertEqual(loaded.links, {self._id("m1")})
+        self.assertEqual(loaded.metadata, {"source": "chapter"})
+
+        memory.content = "林风丢失玉佩"
+        memory.links = set()
+        self.assertTrue(self.store.update_memory(memory))
+        loaded = self.store.get_memory(self._id("m2"))
+        self.assertEqual(loaded.content, "林风丢失玉佩")
+        self.assertEqual(loaded.links, set())
+
+        self.assertTrue(self.store.delete_memory(self._id("m2")))
+        self.assertIsNone(self.store.get_memory(self._id("m2")))
+        self.assertFalse(self.store.delete_memory(self._id("m2")))
+
+    def test_memory_searches(self):
+        self.store.create_entity(self._entity("lin"))
+        self.store.create_memory(self._memory("old", "林风初到青云山", minutes_ago=30, entities=["lin"]))
+        self.store.create_memory(self._memory("new", "师父传授剑法", minutes_ago=10, entities=["lin"]))
+        self.store.create_memory(self._memory(
+            "plan", "下一章揭示玉佩来历", minutes_ago=20, memory_type=MemoryType.OPINION))
+
+        by_entity = [m.id for m in self.store.search_memories_by_entity(self._id("lin"))]
+        self.assertEqual(by_entity, [self._id("new"), self._id("old")])
+        by_type = [m.id for m in self.store.search_memories_by_type(MemoryType.OPINION) if m.id.startswith(self.prefix)]
+        self.assertEqual(by_type, [self._id("plan")])
+        in_range = self.store.search_memories_by_time_range("2025-03-01T11:45:00", "2025-03-01T11:55:00")
+        self.assertEqual([m.id for m in in_range if m.id.startswith(self.prefix)], [self._id("new")])
+
+        by_text = self.store.search_memories_by_text("青云山")
+        self.assertIn(self._id("old"), [m.id for m in by_text])
+        self.assertIn("fulltext_score", by_text[0].metadata)
+        self.assertEqual(self.store.search_memories_by_text("   "), [])
+
+    def test_entity_text_search_and_batches(self):
+        entities = [self._entity(f"e{i}", description=f"第{i}位长老") for i in range(5)]
+        self.assertEqual(self.store.create_entities_batch(entities, chunk_size=2), 5)
+        relations = [Relation(source=self._id("e0"), target=self._id(f"e{i}")) for i in range(1, 5)]
+        self.assertEqual(self.store.create_relations_batch(relations, chunk_size=3), 4)
+        memories = [self._memory(f"b{i}", f"长老会议第{i}次", entities=["e0"], links=[f"b{i - 1}"] if i else [])
+                    for i in range(3)]
+        self.assertEqual(self.store.create_memories_batch(memories, chunk_size=2), 3)
+
+        self.assertEqual(self.store.get_memory(self._id("b2")).links, {self._id("b1")})
+        self.assertEqual(len(self.store.get_entity(self._id("e0")).neighbors), 4)
+        found = [e.id for e in self.store.search_entities_by_text("长老")]
+        self.assertTrue(found and all(entity_id in {e.id for e in entities} for entity_id in found))
+
+    def test_paths_and_neighbors(self):
+        for name in ("a", "b", "c", "d"):
+            self.store.create_entity(self._entity(name))
+        self.store.create_relation(Relation(source=self._id("a"), target=self._id("b")))
+        self.store.create_relation(Relation(source=self._id("c"), target=self._id("b")))
+
+        self.assertEqual(
+            self.store.find_path_between_entities(self._id("a"), self._id("c")),
+            [[self._id("a"), self._id("b"), self._id("c")]],
+        )
+        self.assertEqual(self.store.find_path_between_entities(self._id("a"), self._id("d")), [])
+        self.assertEqual({e.id for e in self.store.get_entity_neighbors(self._id("a"))}, {self._id("b")})
+        self.assertEqual(
+            {e.id for e in self.store.get_entity_neighbors(self._id("a"), depth=2)},
+            {self._id("b"), self._id("c")},
+        )
+
+    def test_decision_events(self):
+        self.store.create_entity(self._entity("lin"))
+        self.assertFalse(self.store.create_decision_event(self._id("missing"), {"inputs": []}))
+        self.store.create_memory(self._memory("m", "林风拒绝下山"))
+        trace = {"inputs": ["师命"], "rules_applied": ["门规"], "exceptions": [], "approvals": []}
+        self.assertTrue(self.store.create_decision_event(self._id("m"), trace, "遵守门规", [self._id("lin")]))
+        self.assertTrue(self.store.create_decision_event(self._id("m"), {**trace, "approvals": ["掌门"]}))
+
+        events = self.store.get_decision_events_for_memory(self._id("m"))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["id"], f"decision_{self._id('m')}")
+        self.assertEqual(events[0]["inputs"], ["师命"])
+        self.assertEqual(events[0]["approvals"], ["掌门"])
+        self.assertEqual(events[0]["reasoning"], "遵守门规")
+
+
+class TestSQLiteGraphStore(GraphStoreParityMixin, unittest.TestCase):
+    """SQLite 后端"""
+
+    store = sqlite_graph
+
+    def setUp(self):
+        self.prefix = "t"
+        self.tmpdir = tempfile.mkdtemp()
+        sqlite_graph.get_graph(os.path.join(self.tmpdir, "graph.db"))
+
+    def tearDown(self):
+        sqlite_graph.close_graph()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_cjk_terms(self):
+        self.assertEqual(bigram_terms("青云山 Sword-Art"), ["青云", "云山", "sword", "art"])
+        self.assertEqual(sqlite_graph._match_expression('"剑"'), '"剑"')
+
+    def test_data_survives_reopen(self):
+        self.store.create_memory(self._memory("m", "林风拜入师门"))
+        path = sqlite_graph.get_graph().path
+        sqlite_graph.close_graph()
+        sqlite_graph.get_graph(path)
+        self.assertEqual(self.store.get_memory(self._id("m")).content, "林风拜入师门")
+        self.assertEqual(len(self.store.search_memories_by_text("师门")), 1)
+
+    def test_fulltext_hits_survive_vacuum(self):
+        for i in range(6):
+            self.store.create_entity(self._entity(f"e{i}", description=f"长老{i}" if i == 5 else "弟子"))
+            self.store.create_memory(self._memory(f"m{i}", "青云山论剑" if i == 5 else f"日常修炼{i}"))
+        for i in range(5):
+            self.store.delete_memory(self._id(f"m{i}"))
+            self.store.delete_entity(self._id(f"e{i}"))
+        with sqlite_graph.get_graph()._lock:
+            sqlite_graph.get_graph()._conn.execute("VACUUM")
+        self.assertEqual([m.id for m in self.store.search_memories_by_text("青云山")], [self._id("m5")])
+        self.assertEqual([e.id for e in self.store.search_entities_by_text("长老")], [self._id("e5")])
+
+    def test_legacy_schema_migrated(self):
+        path = sqlite_graph.get_graph().path
+        sqlite_graph.close_graph()
+        os.remove(path)
+        legacy_schema = sqlite_graph._SCHEMA.replace("seq INTEGER PRIMARY KEY,\n    id TEXT NOT NULL UNIQUE,", "id TEXT PRIMARY KEY,")
+        conn = sqlite3.connect(path)
+        conn.executescript(legacy_schema)
+        conn.execute("INSERT INTO memories (id, content, timestamp) VALUES ('legacy', '林风拜入师门', '2025-03-01T12:00:00')")
+        conn.execute("INSERT INTO memories_fts (rowid, terms) VALUES (1, ?)", (" ".join(bigram_terms("林风拜入师门")),))
+        conn.commit()
+        conn.close()
+
+        graph = sqlite_graph.get_graph(path)
+        columns = [row["name"] for row in graph.query("PRAGMA table_info(memories)")]
+        self.assertIn("seq", columns)
+        self.assertEqual([m.id for m in self.store.search_memories_by_text("师门")], ["legacy"])
+        self.assertTrue(self.store.create_memory(self._memory("m", "师门传承")))
+        self.assertEqual(len(self.store.search_memories_by_text("师门")), 2)
+
+    def test_fulltext_scores_follow_their_rows(self):
+        for i, content in enumerate(["青云山", "青云山 青云山 剑", "青云山下"]):
+            self.store.create_memory(self._memory(f"m{i}", content))
+        expected = {m.id: m.metadata["fulltext_score"] for m in self.store.search_memories_by_text("青云山")}
+        hydrate = sqlite_graph._hydrate_memory
+
+        def failing_first(row, *args):
+            if row["id"] == next(iter(expected)):
+                raise ValueError("corrupt row")
+            return hydrate(row, *args)
+
+        with patch.object(sqlite_graph, "_hydrate_memory", side_effect=failing_first):
+            memories = self.store.search_memories_by_text("青云山")
+        self.assertEqual(len(memories), 2)
+        for memory in memories:
+            self.assertEqual(memory.metadata["fulltext_score"], expected[memory.id])
+
+    def test_layered_storage_sqlite_backend(self):
+        adapter = LayeredStorageAdapter({
+            "ltm_backend": "sqlite",
+            "sqlite_graph_path": sqlite_graph.get_graph().path,
+        })
+        adapter.initialize()
+        self.assertEqual(adapter.ltm_backend, "sqlite")
+        memory = self._memory("m", "林风拜入师门")
+        self.assertTrue(adapter.add_to_ltm(memory, MemoryType.EXPERIENCE))
+        self.assertEqual([m.id for m in adapter.search_ltm("师门")], [memory.id])
+        self.assertEqual([m.id for m in adapter.search_ltm("")], [memory.id])
+        self.assertTrue(adapter.remove_from_ltm(memory.id))
+        self.assertEqual(adapter.search_ltm(""), [])
+
+
+@unittest.skipUnless(
+    unimem_neo4j.NEO4J_AVAILABLE and os.getenv("RUN_NEO4J_TESTS") == "1",
+    "需要 py2neo 和 Neo4j 服务（设置 RUN_NEO4J_TESTS=1）",
+)
+class TestNeo4jGraphStore(GraphStoreParityMixin, unittest.TestCase):
+    """Neo4j 后端（测试数据使用唯一 ID 前缀，结束后删除）"""
+
+    store = unimem_neo4j
+
+    def setUp(self):
+        self.prefix = f"parity_{uuid.uuid4().hex[:8]}"
+        unimem_neo4j.create_memory_indexes()
+
+    def tearDown(self):
+        unimem_neo4j.get_graph().run(
+            "MATCH (n) WHERE n.id STARTS WITH $prefix OR n.id STARTS WITH $event DETACH DELETE n",
+            prefix=self.prefix, event=f"decision_{self.prefix}",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
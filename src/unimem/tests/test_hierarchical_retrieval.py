@@ -0,0 +1,173 @@
+"""
+分层检索测试
+
+测试 storage/hierarchical 中的内容倒排索引、LTM 回源和并发跨层级检索
+"""
+
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+
+from unimem.storage.hierarchical import ContentIndex, CrossLevelRetrieval, HierarchicalStorage
+from unimem.storage.hierarchical.content_index import index_terms, query_terms
+from unimem.storage.hierarchical.level_index import ContentLevel
+from unimem.memory_types import Memory, MemoryType
+
+
+def _memory(memory_id, content):
+    return Memory(
+        id=memory_id,
+        content=content,
+        timestamp=datetime(2025, 3, 1, 12, 0),
+        memory_type=MemoryType.EXPERIENCE,
+    )
+
+
+class TestContentIndex(unittest.TestCase):
+    """ContentIndex 测试"""
+
+    def test_cjk_terms(self):
+        self.assertEqual(index_terms("青云门"), ["青", "云", "门", "青云", "云门"])
+        self.assertEqual(query_terms("青云门 Sword"), ["青云", "云门", "sword"])
+        self.assertEqual(query_terms("剑"), ["剑"])
+
+    def test_bm25_ranking(self):
+        index = ContentIndex()
+        index.add("a", "林风在青云门修炼剑法")
+        index.add("b", "青云门青云门，青云门的大殿")
+        index.add("c", "山下集市热闹非凡")
+
+        hits = index.search("青云门", top_k=10)
+        self.assertEqual([memory_id for memory_id, _ in hits], ["b", "a"])
+        self.assertGreater(hits[0][1], hits[1][1])
+        self.assertEqual(index.search("剑", top_k=10)[0][0], "a")
+        self.assertEqual(index.search("", top_k=10), [])
+
+    def test_update_and_remove(self):
+        index = ContentIndex()
+        index.add("a", "青云门")
+        index.add("a", "天音寺")
+        self.assertEqual(index.search("青云", top_k=10), [])
+        self.assertEqual(index.search("天音", top_k=10)[0][0], "a")
+
+        self.assertTrue(index.remove("a"))
+        self.assertFalse(index.remove("a"))
+        self.assertNotIn("a", index)
+        self.assertEqual(len(index), 0)
+
+
+class TestHierarchicalStorageFallthrough(unittest.TestCase):
+    """缓存未命中时按 ID 回源 LTM"""
+
+    def setUp(self):
+        self.ltm = {}
+        self.storage_manager = Mock()
+        self.storage_manager.add_memory = Mock(return_value=True)
+        self.storage_manager.get_memories = Mock(
+            side_effect=lambda ids: [self.ltm[i] for i in ids if i in self.ltm]
+        )
+        self.hierarchical = HierarchicalStorage(storage_manager=self.storage_manager)
+
+    def test_ranked_retrieval(self):
+        self.hierarchical.store(_memory("c1", "林风拜入青云门"), ContentLevel.CHAPTER)
+        self.hierarchical.store(_memory("c2", "青云门大比，青云门弟子云集"), ContentLevel.CHAPTER)
+        self.hierarchical.store(_memory("s1", "青云门外的小镇"), ContentLevel.SCENE)
+
+        results = self.hierarchical.retrieve("青云门", ContentLevel.CHAPTER)
+        self.assertEqual([m.id for m in results], ["c2", "c1"])
+        self.storage_manager.get_memories.assert_not_called()
+
+    def test_evicted_memory_is_loaded_from_ltm(self):
+        memory = _memory("c1", "林风拜入青云门")
+        self.ltm["c1"] = memory
+        self.hierarchical.store(memory, ContentLevel.CHAPTER)
+        self.hierarchical.clear_cache()
+
+        results = self.hierarchical.retrieve("青云", ContentLevel.CHAPTER)
+        self.assertEqual([m.id for m in results], ["c1"])
+        self.storage_manager.get_memories.assert_called_once_with(["c1"])
+        self.assertEqual(self.hierarchical.get_memory("c1").content, "林风拜入青云门")
+
+    def test_unindexed_ids_are_indexed_from_ltm(self):
+        self.ltm["c9"] = _memory("c9", "天音寺的钟声")
+        self.hierarchical.register_existing("c9", ContentLevel.CHAPTER)
+
+        results = self.hierarchical.retrieve("钟声", ContentLevel.CHAPTER)
+        self.assertEqual([m.id for m in results], ["c9"])
+        self.hierarchical.retrieve("钟声", ContentLevel.CHAPTER)
+        self.assertEqual(self.storage_manager.get_memories.call_count, 1)
+
+    def test_ltm_miss_is_not_retried(self):
+        self.hierarchical.register_existing("c9", ContentLevel.CHAPTER)
+        self.hierarchical.retrieve("钟声", ContentLevel.CHAPTER)
+        self.hierarchical.retrieve("钟声", ContentLevel.CHAPTER)
+        self.assertEqual(self.storage_manager.get_memories.call_count, 1)
+
+        # 重新 store 后清除否定集合，被清出缓存后可再次回源
+        memory = _memory("c9", "天音寺的钟声")
+        self.ltm["c9"] = memory
+        self.hierarchical.store(memory, ContentLevel.CHAPTER)
+        self.hierarchical.clear_cache()
+        results = self.hierarchical.retrieve("钟声", ContentLevel.CHAPTER)
+        self.assertEqual([m.id for m in results], ["c9"])
+        self.assertEqual(self.storage_manager.get_memories.call_count, 2)
+
+    def test_deadline_skips_ltm(self):
+        self.ltm["c9"] = _memory("c9", "天音寺的钟声")
+        self.hierarchical.register_existing("c9", ContentLevel.CHAPTER)
+
+        results = self.hierarchical.retrieve_scored("钟声", ContentLevel.CHAPTER, deadline=time.monotonic() - 1)
+        self.assertEqual(results, [])
+        self.storage_manager.get_memories.assert_not_called()
+
+
+class TestCrossLevelRetrieval(unittest.TestCase):
+    """CrossLevelRetrieval 测试"""
+
+    def setUp(self):
+        storage_manager = Mock()
+        storage_manager.add_memory = Mock(return_value=True)
+        self.hierarchical = HierarchicalStorage(storage_manager=storage_manager)
+        self.retrieval = CrossLevelRetrieval(self.hierarchical)
+
+    def tearDown(self):
+        self.hierarchical.close()
+
+    def test_fuses_levels_by_weighted_score(self):
+        self.hierarchical.store(_memory("w1", "青云门的故事"), ContentLevel.WORK)
+        self.hierarchical.store(_memory("s1", "青云门山门前"), ContentLevel.SCENE)
+
+        results = self.retrieval.retrieve("青云门", top_k=5)
+        self.assertEqual([m.id for m in results], ["w1", "s1"])
+        self.assertEqual(results[1].metadata["_retrieval_level"], ContentLevel.SCENE.value)
+        self.assertAlmostEqual(results[0].metadata["_retrieval_score"], 1.0)
+        self.assertAlmostEqual(results[1].metadata["_retrieval_score"], 0.4)
+
+    def test_slow_level_misses_deadline(self):
+        self.hierarchical.store(_memory("s1", "青云门山门前"), ContentLevel.SCENE)
+        original = self.hierarchical.retrieve_scored
+
+        def retrieve_scored(query, level, top_k=10, deadline=None):
+            if level == ContentLevel.WORK:
+                time.sleep(0.5)
+            return original(query, level, top_k, deadline)
+
+        self.hierarchical.retrieve_scored = retrieve_scored
+        start = time.monotonic()
+        results = self.retrieval.retrieve("青云门", timeout=0.1)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual([m.id for m in results], ["s1"])
+
+        # 公开入口 cross_level_retrieve 走同一并发、截止时间路径
+        start = time.monotonic()
+        by_level = self.hierarchical.cross_level_retrieve(
+            "青云门", [ContentLevel.WORK, ContentLevel.SCENE], timeout=0.1
+        )
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(by_level["work"], [])
+        self.assertEqual([m.id for m in by_level["scene"]], ["s1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
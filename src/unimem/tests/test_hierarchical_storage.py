@@ -43,6 +43,22 @@ class TestHierarchicalStorage(unittest.TestCase):
         result = self.hierarchical.store(memory, ContentLevel.WORK)
         self.assertTrue(result)
     
+    def test_store_with_parent(self):
+        """测试存储时挂接父记忆"""
+        def memory(memory_id):
+            return Memory(id=memory_id, content=memory_id, timestamp=datetime.now(), memory_type=MemoryType.EXPERIENCE)
+        
+        self.hierarchical.store(memory("o1"), ContentLevel.OUTLINE)
+        self.hierarchical.store(memory("c1"), ContentLevel.CHAPTER, parent_id="o1")
+        scene = memory("s1")
+        self.hierarchical.store(scene, ContentLevel.SCENE, parent_id="c1")
+        
+        self.assertEqual(scene.metadata["parent_id"], "c1")
+        self.assertEqual(self.hierarchical.get_ancestor("s1", ContentLevel.OUTLINE), "o1")
+        self.assertEqual(self.hierarchical.get_descendants("o1", ContentLevel.SCENE), ["s1"])
+        with self.assertRaises(AdapterError):
+            self.hierarchical.store(memory("s2"), ContentLevel.SCENE, parent_id="o1")
+    
     def test_store_invalid_memory(self):
         """测试无效记忆存储"""
         with self.assertRaises(AdapterError):
@@ -0,0 +1,136 @@
+"""
+分层存储适配器测试
+
+测试 adapters/layered_storage_adapter.py 中内存后端的 FoA/DA 数据结构
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from unimem.adapters.layered_storage_adapter import LayeredStorageAdapter
+from unimem.memory_types import Memory, Context, MemoryType
+
+
+def _memory(memory_id, content="x" * 8, session_id=None):
+    metadata = {"session_id": session_id} if session_id else {}
+    return Memory(id=memory_id, content=content, timestamp=datetime.now(), metadata=metadata)
+
+
+class TestLayeredStorageFoA(unittest.TestCase):
+    """内存 FoA 测试"""
+
+    def setUp(self):
+        self.adapter = LayeredStorageAdapter(config={"foa_max_tokens": 10, "foa_max_memories": 4})
+        self.adapter.initialize()
+
+    def _foa_ids(self, top_k=10, session_id=None):
+        context = Context(session_id=session_id) if session_id else None
+        return [m.id for m in self.adapter.search_foa("", top_k=top_k, context=context)]
+
+    def test_running_token_total_and_fifo_eviction(self):
+        for i in range(5):
+            self.assertTrue(self.adapter.add_to_foa(_memory(f"m{i}")))  # 每条 2 tokens
+        self.assertEqual(self._foa_ids(), ["m1", "m2", "m3", "m4"])
+        self.assertEqual(self.adapter._get_foa_tokens(), 8)
+
+        # 超出 token 预算时淘汰最旧的记忆
+        self.adapter.add_to_foa(_memory("big", content="y" * 24))
+        self.assertEqual(self._foa_ids(), ["m3", "m4", "big"])
+        self.assertEqual(self.adapter._get_foa_tokens(), 10)
+
+    def test_remove_and_readd(self):
+        self.adapter.add_to_foa(_memory("a"))
+        self.adapter.add_to_foa(_memory("b"))
+        self.adapter.add_to_foa(_memory("a"))
+        self.assertEqual(self._foa_ids(), ["b", "a"])
+        self.assertTrue(self.adapter.remove_from_foa("b"))
+        self.assertTrue(self.adapter.remove_from_foa("missing"))
+        self.assertEqual(self._foa_ids(), ["a"])
+        self.assertEqual(self.adapter._get_foa_tokens(), 2)
+
+    def test_session_sub_queues(self):
+        self.adapter.add_to_foa(_memory("s1-a", session_id="s1"))
+        self.adapter.add_to_foa(_memory("s2-a", session_id="s2"))
+        self.adapter.add_to_foa(_memory("s1-b", session_id="s1"))
+        self.assertEqual(self._foa_ids(session_id="s1"), ["s1-a", "s1-b"])
+        self.assertEqual(self._foa_ids(top_k=1, session_id="s1"), ["s1-b"])
+        self.assertEqual(self._foa_ids(top_k=2), ["s2-a", "s1-b"])
+
+        # 淘汰和移除同步更新会话子队列
+        self.adapter.add_to_foa(_memory("s3-a", session_id="s3"))
+        self.adapter.add_to_foa(_memory("s3-b", session_id="s3"))
+        self.assertEqual(self._foa_ids(session_id="s1"), ["s1-b"])
+        self.adapter.remove_from_foa("s2-a")
+        self.assertEqual(self._foa_ids(session_id="s2"), [])
+        self.assertNotIn("s2", self.adapter._foa_sessions)
+
+    def test_session_change_on_readd_unlinks_original_queue(self):
+        memory = _memory("m1", session_id="s1")
+        self.adapter.add_to_foa(memory)
+        memory.metadata["session_id"] = "s2"
+        self.adapter.add_to_foa(memory)
+        self.assertEqual(self._foa_ids(session_id="s1"), [])
+        self.assertEqual(self._foa_ids(session_id="s2"), ["m1"])
+
+        # 记忆对象在入队后被修改，淘汰时仍从入队时的会话子队列移除
+        memory.metadata["session_id"] = "s3"
+        for i in range(4):
+            self.adapter.add_to_foa(_memory(f"n{i}"))
+        self.assertEqual(self._foa_ids(session_id="s2"), [])
+        self.assertEqual(self.adapter._foa_sessions, {})
+
+
+class TestLayeredStorageDA(unittest.TestCase):
+    """内存 DA 二级索引与过期清理测试"""
+
+    def setUp(self):
+        self.adapter = LayeredStorageAdapter(config={})
+        self.adapter.initialize()
+
+    def _add(self, memory_id, session_id=None, tags=None, age_hours=0, memory_type=MemoryType.EXPERIENCE):
+        memory = _memory(memory_id, session_id=session_id)
+        memory.tags = list(tags or [])
+        memory.memory_type = memory_type
+        memory.timestamp = datetime.now() - timedelta(hours=age_hours)
+        self.assertTrue(self.adapter.add_to_da(memory))
+        return memory
+
+    def test_session_type_and_tag_indexes(self):
+        self._add("a", session_id="s1", tags=["伏笔"])
+        self._add("b", session_id="s2", tags=["伏笔", "人物"], memory_type=MemoryType.SEMANTIC)
+        self._add("c", session_id="s1")
+        ids = lambda memories: [m.id for m in memories]
+        self.assertEqual(ids(self.adapter.search_da("", Context(session_id="s1"))), ["a", "c"])
+        self.assertEqual(ids(self.adapter.search_da_by_tag("伏笔")), ["a", "b"])
+        self.assertEqual(ids(self.adapter.search_da_by_type(MemoryType.SEMANTIC)), ["b"])
+        self.assertEqual(ids(self.adapter.search_da_by_type(MemoryType.EXPERIENCE, top_k=1)), ["a"])
+
+        self.adapter.remove_from_da("a")
+        self.assertEqual(ids(self.adapter.search_da_by_tag("伏笔")), ["b"])
+        self.assertEqual(ids(self.adapter.search_da("", Context(session_id="s1"))), ["c"])
+
+    def test_readd_updates_indexes(self):
+        memory = self._add("a", session_id="s1", tags=["旧标签"])
+        memory.tags = ["新标签"]
+        self.adapter.add_to_da(memory)
+        self.assertEqual(self.adapter.search_da_by_tag("旧标签"), [])
+        self.assertEqual(len(self.adapter.search_da_by_tag("新标签")), 1)
+        self.assertNotIn("旧标签", self.adapter._da_by_tag)
+
+    def test_cleanup_uses_expiry_heap(self):
+        self._add("old", session_id="s1", tags=["伏笔"], age_hours=48)
+        self._add("new", session_id="s1", tags=["伏笔"], age_hours=1)
+        # 重新添加后以新的时间戳为准，旧堆条目被丢弃
+        self._add("refreshed", age_hours=48)
+        self._add("refreshed", age_hours=0)
+        self.adapter.remove_from_da("new")
+
+        self.assertEqual(self.adapter.cleanup_old_memories(max_age_hours=24), 1)
+        self.assertEqual(set(self.adapter.da_storage), {"refreshed"})
+        self.assertEqual(self.adapter.search_da_by_tag("伏笔"), [])
+        self.assertEqual(self.adapter._da_by_session, {})
+        self.assertEqual(self.adapter.cleanup_old_memories(max_age_hours=24), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+层级索引测试
+
+测试 storage/hierarchical/level_index.py 中的父子邻接表、子树计数和持久化
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+
+from unimem.memory_types import Memory, MemoryType
+from unimem.storage.hierarchical import HierarchicalStorage
+from unimem.storage.hierarchical.level_index import ContentLevel, LevelIndexManager
+
+
+class TestLevelIndexHierarchy(unittest.TestCase):
+    """LevelIndexManager 父子关系测试"""
+
+    def setUp(self):
+        self.manager = LevelIndexManager()
+        self.manager.add_memory("work", ContentLevel.WORK)
+        self.manager.add_memory("o1", ContentLevel.OUTLINE, parent_id="work")
+        self.manager.add_memory("c1", ContentLevel.CHAPTER, parent_id="o1")
+        self.manager.add_memory("c2", ContentLevel.CHAPTER, parent_id="o1")
+        self.manager.add_memory("s1", ContentLevel.SCENE, parent_id="c1")
+        self.manager.add_memory("s2", ContentLevel.SCENE, parent_id="c1")
+        self.manager.add_memory("s3", ContentLevel.SCENE, parent_id="c2")
+
+    def test_parent_and_children(self):
+        self.assertEqual(self.manager.get_parent("s3"), "c2")
+        self.assertEqual(self.manager.get_children("c1"), ["s1", "s2"])
+        self.assertEqual(self.manager.get_level("c2"), ContentLevel.CHAPTER)
+
+    def test_ancestors(self):
+        self.assertEqual(self.manager.get_ancestor("s2", ContentLevel.CHAPTER), "c1")
+        self.assertEqual(self.manager.get_ancestor("s2", ContentLevel.WORK), "work")
+        self.assertIsNone(self.manager.get_ancestor("work", ContentLevel.WORK))
+        self.assertEqual(self.manager.get_ancestors("s1"), ["c1", "o1", "work"])
+        self.assertTrue(self.manager.is_descendant("s3", "o1"))
+        self.assertFalse(self.manager.is_descendant("s3", "c1"))
+
+    def test_descendants_and_subtree_size(self):
+        self.assertEqual(self.manager.get_descendants("o1"), ["c1", "c2", "s1", "s2", "s3"])
+        self.assertEqual(self.manager.get_descendants("o1", ContentLevel.SCENE), ["s1", "s2", "s3"])
+        self.assertEqual(self.manager.get_descendants("work", ContentLevel.CHAPTER), ["c1", "c2"])
+        self.assertEqual(self.manager.get_subtree_size("work"), 6)
+        self.assertEqual(self.manager.get_subtree_size("o1", ContentLevel.SCENE), 3)
+        self.assertEqual(self.manager.get_subtree_size("s1"), 0)
+
+    def test_reparent_updates_counts(self):
+        self.assertTrue(self.manager.set_parent("s1", "c2"))
+        self.assertEqual(self.manager.get_subtree_size("c1"), 1)
+        self.assertEqual(self.manager.get_subtree_size("c2"), 2)
+        self.assertEqual(self.manager.get_subtree_size("work"), 6)
+
+        self.assertTrue(self.manager.set_parent("c2", None))
+        self.assertEqual(self.manager.get_subtree_size("o1"), 2)
+        self.assertEqual(self.manager.get_subtree_size("work", ContentLevel.SCENE), 1)
+        self.assertEqual(self.manager.count_linked(ContentLevel.CHAPTER), 1)
+
+    def test_invalid_parent_is_rejected(self):
+        self.assertFalse(self.manager.set_parent("s1", "o1"))
+        self.assertFalse(self.manager.add_memory("s9", ContentLevel.SCENE, parent_id="missing"))
+        self.assertNotIn("s9", self.manager.get_memories_at_level(ContentLevel.SCENE))
+        self.assertFalse(self.manager.add_memory("s1", ContentLevel.CHAPTER))
+
+    def test_remove_memory_detaches_subtree(self):
+        self.assertTrue(self.manager.remove_memory("c1", ContentLevel.CHAPTER))
+        self.assertIsNone(self.manager.get_parent("s1"))
+        self.assertEqual(self.manager.get_children("o1"), ["c2"])
+        self.assertEqual(self.manager.get_subtree_size("o1"), 2)
+        self.assertEqual(self.manager.count_linked(ContentLevel.SCENE), 1)
+
+    def test_persistence_round_trip(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "index", "levels.json")
+            self.manager.save(path)
+            loaded = LevelIndexManager.load(path)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        self.assertEqual(loaded.get_statistics(), self.manager.get_statistics())
+        self.assertEqual(loaded.get_ancestor("s3", ContentLevel.OUTLINE), "o1")
+        self.assertEqual(loaded.get_subtree_size("work"), 6)
+        self.assertEqual(loaded.get_subtree_size("o1", ContentLevel.SCENE), 3)
+        self.assertEqual(loaded.count_linked(ContentLevel.SCENE), 3)
+
+
+class TestHierarchicalStorageRestart(unittest.TestCase):
+    """HierarchicalStorage 重启后层级索引保持"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, True)
+        self.path = os.path.join(self.tmpdir, "levels.json")
+        self.ltm = {}
+        self.storage_manager = Mock()
+        self.storage_manager.add_memory = Mock(side_effect=lambda m: self.ltm.setdefault(m.id, m) is m)
+        self.storage_manager.get_memories = Mock(
+            side_effect=lambda ids: [self.ltm[i] for i in ids if i in self.ltm]
+        )
+
+    def _store(self, storage, memory_id, content, level, parent_id=None):
+        memory = Memory(id=memory_id, content=content, timestamp=datetime(2025, 3, 1),
+                        memory_type=MemoryType.EXPERIENCE)
+        storage.store(memory, level, parent_id=parent_id)
+
+    def test_maps_survive_restart(self):
+        storage = HierarchicalStorage(self.storage_manager, index_path=self.path, save_delay=60)
+        self._store(storage, "o1", "第一卷大纲", ContentLevel.OUTLINE)
+        self._store(storage, "c1", "林风拜入青云门", ContentLevel.CHAPTER, parent_id="o1")
+        self._store(storage, "s1", "青云门外的小镇", ContentLevel.SCENE, parent_id="c1")
+        self._store(storage, "s2", "山门前的石阶", ContentLevel.SCENE, parent_id="c1")
+        storage.remove_memory("s2", ContentLevel.SCENE)
+        self.assertFalse(os.path.exists(self.path))  # 延迟保存尚未到期
+        storage.close()
+
+        restarted = HierarchicalStorage(self.storage_manager, index_path=self.path)
+        self.assertEqual(restarted.index_manager.get_statistics(), storage.index_manager.get_statistics())
+        self.assertEqual(restarted.get_ancestor("s1", ContentLevel.OUTLINE), "o1")
+        self.assertEqual(restarted.get_descendants("o1"), ["c1", "s1"])
+        self.assertFalse(restarted.index_manager.has_memory("s2", ContentLevel.SCENE))
+
+        # 内容索引按 ID 回源 LTM 重建
+        results = restarted.retrieve("青云门", ContentLevel.CHAPTER)
+        self.assertEqual([m.id for m in results], ["c1"])
+
+    def test_debounced_save(self):
+        storage = HierarchicalStorage(self.storage_manager, index_path=self.path, save_delay=0)
+        self._store(storage, "c1", "林风拜入青云门", ContentLevel.CHAPTER)
+        for _ in range(100):
+            if os.path.exists(self.path):
+                break
+            time.sleep(0.01)
+        self.assertTrue(LevelIndexManager.load(self.path).has_memory("c1", ContentLevel.CHAPTER))
+        self.assertFalse(storage.save_index())  # 已落盘，没有待保存的修改
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+链接演化批处理测试
+
+测试 link_evolution.py 中的决策缓存、邻居截断和批量异步评估器，
+以及 AtomLinkAdapter.generate_links 的 sync/batched 模式
+"""
+
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from unimem.link_evolution import (
+    BatchedLinkEvaluator,
+    LinkDecision,
+    LinkDecisionCache,
+    decision_key,
+    format_neighbors,
+    truncate_to_tokens,
+)
+from unimem.adapters.atom_link_adapter import AtomLinkAdapter
+from unimem.memory_types import Memory
+
+
+def _memory(memory_id, content="内容"):
+    return Memory(id=memory_id, content=content, timestamp=datetime.now())
+
+
+class TestLinkEvolutionHelpers(unittest.TestCase):
+    """决策键、截断和决策缓存测试"""
+
+    def test_truncate_and_format_respect_budget(self):
+        self.assertEqual(truncate_to_tokens("短文本", 100), "短文本")
+        self.assertEqual(len(truncate_to_tokens("x" * 1000, 10)), 41)
+        text = format_neighbors([_memory("n1", "a" * 4000), _memory("n2", "b" * 4000)], token_budget=100)
+        self.assertIn("memory_id:n1", text)
+        self.assertIn("memory_id:n2", text)
+        self.assertLess(len(text), 1000)
+
+    def test_decision_key_ignores_neighbor_order(self):
+        note = _memory("m", "新章节")
+        neighbors = [_memory("a"), _memory("b")]
+        self.assertEqual(decision_key(note, neighbors), decision_key(note, list(reversed(neighbors))))
+        self.assertNotEqual(decision_key(note, neighbors), decision_key(note, neighbors[:1]))
+        self.assertNotEqual(decision_key(note, neighbors), decision_key(_memory("m", "另一章"), neighbors))
+
+    def test_cache_lru_and_fallback_not_cached(self):
+        cache = LinkDecisionCache(max_size=1)
+        cache.put("k1", LinkDecision(links=["a"]))
+        cache.put("k2", LinkDecision(links=["b"]))
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.get("k2").links, ["b"])
+        cache.put("k3", LinkDecision(links=["c"], fallback=True))
+        self.assertIsNone(cache.get("k3"))
+
+
+class TestBatchedLinkEvaluator(unittest.TestCase):
+    """BatchedLinkEvaluator 测试"""
+
+    def setUp(self):
+        self.calls = []
+        self.applied = []
+        self.cache = LinkDecisionCache()
+
+    def tearDown(self):
+        self.evaluator.shutdown()
+
+    def _evaluate(self, batch):
+        self.calls.append([pending.note.id for pending in batch])
+        return {pending.note.id: LinkDecision(links=[n.id for n in pending.neighbors]) for pending in batch}
+
+    def test_notes_grouped_into_one_call(self):
+        self.evaluator = BatchedLinkEvaluator(
+            self._evaluate, lambda note, d: self.applied.append((note.id, d.links)),
+            cache=self.cache, max_batch_size=4, linger_ms=200,
+        )
+        for i in range(3):
+            self.evaluator.submit(_memory(f"m{i}", f"内容{i}"), [_memory("n1")])
+        self.assertTrue(self.evaluator.flush(timeout=5))
+        self.assertEqual(self.calls, [["m0", "m1", "m2"]])
+        self.assertEqual(sorted(self.applied), [("m0", ["n1"]), ("m1", ["n1"]), ("m2", ["n1"])])
+        self.assertEqual(self.evaluator.get_statistics()["avg_batch_size"], 3.0)
+
+    def test_duplicate_keys_evaluated_once(self):
+        self.evaluator = BatchedLinkEvaluator(
+            self._evaluate, lambda note, d: self.applied.append(note.id),
+            cache=self.cache, max_batch_size=4, linger_ms=100,
+        )
+        self.evaluator.submit(_memory("m1", "同一内容"), [_memory("n1")])
+        self.evaluator.submit(_memory("m2", "同一内容"), [_memory("n1")])
+        self.assertTrue(self.evaluator.flush(timeout=5))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(self.calls[0]), 1)
+        self.assertEqual(sorted(self.applied), ["m1", "m2"])
+        self.assertEqual(self.evaluator.get_statistics()["deduplicated"], 1)
+
+    def test_failure_does_not_stop_worker(self):
+        def failing(batch):
+            raise RuntimeError("LLM unavailable")
+        self.evaluator = BatchedLinkEvaluator(failing, lambda note, d: self.applied.append(note.id), linger_ms=0)
+        self.evaluator.submit(_memory("m1"), [_memory("n1")])
+        self.assertTrue(self.evaluator.flush(timeout=5))
+        self.assertEqual(self.applied, [])
+        self.assertEqual(self.evaluator.get_statistics()["errors"], 1)
+
+
+class TestAtomLinkAdapterLinkEvolution(unittest.TestCase):
+    """AtomLinkAdapter.generate_links 决策缓存与 batched 模式测试"""
+
+    def _adapter(self, **config):
+        adapter = AtomLinkAdapter(config={"vector_backend": "memory", "embedding_warm_up": False, **config})
+        adapter.initialize()
+        adapter._available = True
+        self.neighbors = [_memory("n1", "邻居一"), _memory("n2", "邻居二")]
+        adapter._search_similar_memories = lambda query, top_k=10: list(self.neighbors)
+        return adapter
+
+    @staticmethod
+    def _response(payload):
+        return (None, json.dumps(payload, ensure_ascii=False))
+
+    @patch("unimem.adapters.atom_link_adapter.ark_deepseek_v3_2")
+    def test_sync_decision_cached(self, mock_llm):
+        mock_llm.return_value = self._response({
+            "should_evolve": True, "actions": ["strengthen"],
+            "suggested_connections": ["n1", "unknown"], "tags_to_update": ["伏笔"],
+        })
+        adapter = self._adapter()
+        note = _memory("m1", "第12章")
+        self.assertEqual(adapter.generate_links(note), {"n1"})
+        self.assertEqual(note.tags, ["伏笔"])
+        self.assertEqual(adapter.generate_links(_memory("m2", "第12章")), {"n1"})
+        self.assertEqual(mock_llm.call_count, 1)
+
+    @patch("unimem.adapters.atom_link_adapter.ark_deepseek_v3_2")
+    def test_batched_mode_applies_links_via_callback(self, mock_llm):
+        mock_llm.return_value = self._response({"results": [
+            {"note_id": "m1", "should_evolve": True, "actions": ["strengthen"], "suggested_connections": ["n2"]},
+            {"note_id": "m2", "should_evolve": False},
+        ]})
+        adapter = self._adapter(link_evolution_mode="batched", link_evolution_linger_ms=200)
+        applied = {}
+        adapter.set_link_callback(lambda memory, links: applied.setdefault(memory.id, links))
+        try:
+            self.assertEqual(adapter.generate_links(_memory("m1", "第12章")), set())
+            self.assertEqual(adapter.generate_links(_memory("m2", "第13章")), set())
+            self.assertTrue(adapter.flush_link_evaluations(timeout=5))
+            self.assertEqual(mock_llm.call_count, 1)
+            self.assertEqual(applied, {"m1": {"n2"}})
+            # 决策已缓存：重复 retain 同步返回
+            self.assertEqual(adapter.generate_links(_memory("m3", "第12章")), {"n2"})
+            self.assertEqual(mock_llm.call_count, 1)
+        finally:
+            adapter.link_evaluator.shutdown()
+
+    def test_tag_only_decision_persisted(self):
+        adapter = self._adapter()
+        applied = []
+        adapter.set_link_callback(lambda memory, links: applied.append(links))
+        note = _memory("m1", "第12章")
+        with patch.object(adapter, "update_memory_in_vector_store") as persist:
+            adapter._on_link_decision(note, LinkDecision(links=[], tags=["伏笔"]))
+            self.assertEqual(note.tags, ["伏笔"])
+            persist.assert_called_once_with(note)
+            # 标签和链接都没有变化时不写入
+            adapter._on_link_decision(note, LinkDecision(links=[], tags=["伏笔"]))
+            self.assertEqual(persist.call_count, 1)
+        self.assertEqual(applied, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+链接图测试
+
+测试 link_graph.py 中的 CSR 邻接增量重建和个性化 PageRank
+"""
+
+import unittest
+
+from unimem.link_graph import LinkGraph
+
+
+class TestLinkGraph(unittest.TestCase):
+    """LinkGraph 测试"""
+
+    def setUp(self):
+        self.graph = LinkGraph()
+        # a - b - c - d 链，外加 b - e
+        self.graph.set_links("a", ["b"])
+        self.graph.set_links("b", ["c", "e"])
+        self.graph.set_links("c", ["d"])
+
+    def _ranked_ids(self, seeds, **kwargs):
+        return [memory_id for memory_id, _ in self.graph.personalized_pagerank(seeds, **kwargs)]
+
+    def test_multi_hop_scores_decay_with_distance(self):
+        scores = dict(self.graph.personalized_pagerank({"a": 1.0}))
+        self.assertGreater(scores["a"], scores["b"])
+        self.assertGreater(scores["b"], scores["c"])
+        self.assertGreater(scores["c"], scores["d"])
+        self.assertAlmostEqual(sum(scores.values()), 1.0, places=5)
+
+    def test_restart_weights_follow_seed_similarity(self):
+        ranked = self._ranked_ids({"a": 0.9, "d": 0.1})
+        self.assertEqual(ranked[0], "a")
+        self.assertLess(ranked.index("b"), ranked.index("d"))
+
+    def test_node_budget_and_hops(self):
+        self.assertEqual(len(self._ranked_ids({"a": 1.0}, max_nodes=3)), 3)
+        self.assertEqual(set(self._ranked_ids({"a": 1.0}, max_hops=1)), {"a", "b"})
+
+    def test_incremental_updates(self):
+        self.graph.personalized_pagerank({"a": 1.0})
+        self.graph.set_links("c", [])
+        self.assertEqual(set(self._ranked_ids({"a": 1.0})), {"a", "b", "c", "e"})
+        self.graph.remove("b")
+        self.assertEqual(self._ranked_ids({"a": 1.0}), ["a"])
+        # 增量节点未超过阈值，不重建 CSR
+        self.assertEqual(self.graph.get_statistics()["rebuilds"], 0)
+
+        self.graph.compact()
+        self.assertEqual(self.graph.get_statistics()["delta_nodes"], 0)
+        self.assertEqual(self._ranked_ids({"a": 1.0}), ["a"])
+        self.graph.set_links("a", ["c"])
+        self.assertEqual(set(self._ranked_ids({"a": 1.0})), {"a", "c"})
+
+    def test_compacts_past_threshold(self):
+        graph = LinkGraph(compact_min_nodes=2, compact_ratio=0.0)
+        graph.set_links("a", ["b"])
+        graph.personalized_pagerank({"a": 1.0})
+        self.assertEqual(graph.get_statistics()["rebuilds"], 0)
+        graph.set_links("c", ["d"])
+        graph.personalized_pagerank({"a": 1.0})
+        stats = graph.get_statistics()
+        self.assertEqual(stats["rebuilds"], 1)
+        self.assertEqual(stats["delta_nodes"], 0)
+        self.assertEqual(set(dict(graph.personalized_pagerank({"c": 1.0}))), {"c", "d"})
+
+    def test_unknown_seeds_do_not_touch_graph(self):
+        scores = dict(self.graph.personalized_pagerank({"a": 0.5, "x": 0.5}))
+        self.assertIn("x", scores)
+        self.assertGreater(scores["x"], 0.0)
+        self.assertEqual(self.graph.get_statistics()["nodes"], 5)
+        self.assertEqual(self.graph.personalized_pagerank({"x": 1.0}), [("x", 1.0)])
+
+if __name__ == "__main__":
+    unittest.main()
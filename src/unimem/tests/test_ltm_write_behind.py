@@ -0,0 +1,261 @@
+"""
+LTM 写后队列测试
+
+使用 SQLite 图存储（sqlite_graph）或模拟的图存储测试 LTMWriteBehindQueue：
+日志持久化与重放、批内合并、失败重试与死信、read-your-writes 覆盖层
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from unimem import sqlite_graph
+from unimem.adapters.layered_storage_adapter import LayeredStorageAdapter
+from unimem.ltm_write_behind import LTMWriteBehindQueue
+from unimem.memory_types import Memory, MemoryType
+
+
+def _memory(memory_id, content="林风拜入青云门", minutes_ago=0):
+    return Memory(
+        id=memory_id,
+        content=content,
+        timestamp=datetime(2025, 3, 1, 12, 0) - timedelta(minutes=minutes_ago),
+        memory_type=MemoryType.EXPERIENCE,
+    )
+
+
+class TestLTMWriteBehindQueue(unittest.TestCase):
+    """写后队列测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.journal = os.path.join(self.tmpdir, "journal.db")
+        sqlite_graph.get_graph(os.path.join(self.tmpdir, "graph.db"))
+        self.queues = []
+
+    def tearDown(self):
+        for queue in self.queues:
+            queue.close(timeout=0)
+        sqlite_graph.close_graph()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _queue(self, store=sqlite_graph, **kwargs):
+        kwargs.setdefault("start", False)
+        queue = LTMWriteBehindQueue(store, path=self.journal, retry_delay=0.0, **kwargs)
+        self.queues.append(queue)
+        return queue
+
+    def _failing_store(self, failures, error=ConnectionError("graph unavailable")):
+        store = MagicMock()
+        calls = {"count": 0}
+
+        def create_memories_batch(memories, chunk_size):
+            calls["count"] += 1
+            if calls["count"] <= failures:
+                raise error
+            return len(memories)
+
+        store.create_memories_batch.side_effect = create_memories_batch
+        return store
+
+    def _poison_store(self, bad_id):
+        """包含 bad_id 的批次总是失败（非连接错误），其余正常写入"""
+        store = MagicMock()
+        store.written = []
+
+        def create_memories_batch(memories, chunk_size):
+            if any(m.id == bad_id for m in memories):
+                raise ValueError(f"cannot encode {bad_id}")
+            store.written.extend(m.id for m in memories)
+            return len(memories)
+
+        store.create_memories_batch.side_effect = create_memories_batch
+        return store
+
+    def test_background_worker_writes_to_store(self):
+        queue = self._queue(start=True, flush_interval=0.01)
+        queue.enqueue_upsert(_memory("m1"))
+        self.assertTrue(queue.flush(timeout=5))
+        self.assertEqual(sqlite_graph.get_memory("m1").content, "林风拜入青云门")
+        self.assertIsNone(queue.get("m1"))
+        stats = queue.get_statistics()
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["written"], 1)
+
+    def test_coalesces_writes_per_memory(self):
+        store = MagicMock()
+        store.create_memories_batch.side_effect = lambda memories, chunk_size: len(memories)
+        queue = self._queue(store)
+        queue.enqueue_upsert(_memory("m1", "第一版"))
+        queue.enqueue_delete("m1")
+        queue.enqueue_upsert(_memory("m1", "第三版"))
+        queue.enqueue_delete("m2")
+
+        self.assertEqual(queue.drain_once(), 4)
+        written = store.create_memories_batch.call_args[0][0]
+        self.assertEqual([m.content for m in written], ["第三版"])
+        store.delete_memory.assert_called_once_with("m2")
+        self.assertEqual(queue.get_statistics()["coalesced"], 2)
+
+    def test_decision_events_follow_memory_nodes(self):
+        queue = self._queue()
+        queue.enqueue_upsert(_memory("m1"))
+        queue.enqueue_decision_event("m1", {"inputs": ["师命"]}, "遵守门规")
+        queue.drain_once()
+        events = sqlite_graph.get_decision_events_for_memory("m1")
+        self.assertEqual(events[0]["inputs"], ["师命"])
+
+    def test_failed_batch_is_retried(self):
+        store = self._failing_store(failures=1)
+        queue = self._queue(store)
+        queue.enqueue_upsert(_memory("m1"))
+
+        self.assertEqual(queue.drain_once(), 0)
+        self.assertIsNotNone(queue.get("m1"))  # 失败期间仍可读到
+        self.assertEqual(queue.drain_once(), 1)
+        self.assertIsNone(queue.get("m1"))
+        self.assertEqual(queue.get_statistics()["failed_batches"], 1)
+
+    def test_store_outage_retries_forever(self):
+        store = self._failing_store(failures=30)
+        queue = self._queue(store, max_attempts=2)
+        for i in range(5):
+            queue.enqueue_upsert(_memory(f"m{i}"))
+        for _ in range(30):
+            self.assertEqual(queue.drain_once(), 0)
+
+        stats = queue.get_statistics()
+        self.assertEqual(stats["pending"], 5)
+        self.assertEqual(stats["dead_letter_size"], 0)
+        self.assertGreater(stats["store_unavailable_seconds"], 0.0)
+        self.assertIsNotNone(queue.get("m0"))
+
+        self.assertEqual(queue.drain_once(), 5)
+        self.assertIsNone(queue.get("m0"))
+        self.assertEqual(queue.get_statistics()["store_unavailable_seconds"], 0.0)
+
+    def test_unhealthy_store_is_treated_as_outage(self):
+        store = self._failing_store(failures=100, error=RuntimeError("wrote 0/1 memories"))
+        store.health_check.return_value = {"available": False}
+        queue = self._queue(store, max_attempts=1)
+        queue.enqueue_upsert(_memory("m1"))
+        queue.drain_once()
+        self.assertEqual(queue.get_statistics()["dead_letter_size"], 0)
+        self.assertEqual(queue.pending(), 1)
+
+    def test_only_poison_row_moves_to_dead_letter(self):
+        store = self._poison_store("bad")
+        queue = self._queue(store, max_attempts=2)
+        for memory_id in ("m1", "m2", "bad", "m3", "m4"):
+            queue.enqueue_upsert(_memory(memory_id))
+
+        self.assertEqual(queue.drain_once(), 2)  # m1, m2 写入；bad 之后的行等待
+        self.assertEqual(store.written, ["m1", "m2"])
+        self.assertEqual(queue.drain_once(), 2)  # bad 第二次失败移入死信，m3, m4 写入
+        self.assertEqual(store.written, ["m1", "m2", "m3", "m4"])
+
+        stats = queue.get_statistics()
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["dead_letter_size"], 1)
+        self.assertEqual(stats["dead_lettered"], 1)
+        self.assertEqual(queue.get("bad").content, "林风拜入青云门")  # 仍可读
+
+    def test_replay_dead_letter(self):
+        store = self._poison_store("bad")
+        queue = self._queue(store, max_attempts=1)
+        queue.enqueue_upsert(_memory("bad"))
+        queue.drain_once()
+        self.assertEqual(queue.get_statistics()["dead_letter_size"], 1)
+
+        reopened = self._queue(store, max_attempts=1)
+        self.assertIsNotNone(reopened.get("bad"))  # 重启后死信记忆仍在覆盖层中
+
+        store.create_memories_batch.side_effect = lambda memories, chunk_size: len(memories)
+        self.assertEqual(reopened.replay_dead_letter(), 1)
+        self.assertEqual(reopened.drain_once(), 1)
+        self.assertIsNone(reopened.get("bad"))
+        self.assertEqual(reopened.get_statistics()["dead_letter_size"], 0)
+
+    def test_newer_write_supersedes_dead_letter(self):
+        store = self._poison_store("never")
+        queue = self._queue(store, max_attempts=1)
+        queue.enqueue_upsert(_memory("m1"))
+        store.create_memories_batch.side_effect = ValueError("bad payload")
+        queue.drain_once()
+        self.assertEqual(queue.get_statistics()["dead_letter_size"], 1)
+
+        store.create_memories_batch.side_effect = lambda memories, chunk_size: len(memories)
+        queue.enqueue_upsert(_memory("m1", "第二版"))
+        queue.drain_once()
+        self.assertEqual(queue.get_statistics()["dead_letter_size"], 0)
+        self.assertIsNone(queue.get("m1"))
+
+    def test_journal_survives_restart(self):
+        queue = self._queue()
+        queue.enqueue_upsert(_memory("m1"))
+        queue.enqueue_upsert(_memory("m2"))
+        queue.enqueue_delete("m2")
+        queue.close(timeout=0)
+
+        reopened = self._queue()
+        self.assertEqual(reopened.get("m1").content, "林风拜入青云门")
+        self.assertTrue(reopened.is_deleted("m2"))
+        self.assertEqual(reopened.pending(), 3)
+        reopened.drain_once()
+        self.assertIsNotNone(sqlite_graph.get_memory("m1"))
+        self.assertIsNone(sqlite_graph.get_memory("m2"))
+
+    def test_overlay_merges_pending_writes(self):
+        sqlite_graph.create_memory(_memory("stored", "青云门收徒", minutes_ago=30))
+        sqlite_graph.create_memory(_memory("removed", "青云门闭关", minutes_ago=20))
+        queue = self._queue()
+        queue.enqueue_upsert(_memory("stored", "青云门收徒大典", minutes_ago=30))
+        queue.enqueue_delete("removed")
+        queue.enqueue_upsert(_memory("pending", "青云门来了新弟子", minutes_ago=10))
+        queue.enqueue_upsert(_memory("other", "山下集市"))
+
+        results = queue.apply_overlay(sqlite_graph.search_memories_by_text("青云门"), "青云门", limit=10)
+        self.assertEqual([m.id for m in results], ["pending", "stored"])
+        self.assertEqual(results[1].content, "青云门收徒大典")
+        self.assertEqual(len(queue.apply_overlay([], "", limit=10)), 3)
+
+
+class TestLayeredStorageWriteBehind(unittest.TestCase):
+    """LayeredStorageAdapter 写后队列集成测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.adapter = LayeredStorageAdapter({
+            "ltm_backend": "sqlite",
+            "sqlite_graph_path": os.path.join(self.tmpdir, "graph.db"),
+            "ltm_write_behind": True,
+            "ltm_journal_path": os.path.join(self.tmpdir, "journal.db"),
+            "ltm_write_behind_interval": 0.01,
+        })
+        self.adapter.initialize()
+
+    def tearDown(self):
+        self.adapter.reset()
+        sqlite_graph.close_graph()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_read_your_writes_and_drain(self):
+        memory = _memory("m1")
+        self.assertTrue(self.adapter.add_to_ltm(memory, MemoryType.EXPERIENCE))
+        self.assertEqual([m.id for m in self.adapter.search_ltm("青云")], ["m1"])
+
+        self.assertTrue(self.adapter.ltm_queue.flush(timeout=5))
+        self.assertIsNotNone(sqlite_graph.get_memory("m1"))
+
+        self.assertTrue(self.adapter.remove_from_ltm("m1"))
+        self.assertEqual(self.adapter.search_ltm("青云"), [])
+        self.assertTrue(self.adapter.ltm_queue.flush(timeout=5))
+        self.assertIsNone(sqlite_graph.get_memory("m1"))
+        self.assertEqual(self.adapter.get_ltm_write_behind_statistics()["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
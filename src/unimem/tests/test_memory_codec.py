@@ -0,0 +1,103 @@
+"""
+记忆编解码测试
+
+测试 memory_codec.py 中 JSON / msgpack / zstd 格式的往返一致性和按头字节分派的解码
+"""
+
+import json
+import unittest
+from datetime import datetime, timezone
+
+from unimem import memory_codec
+from unimem.memory_codec import (
+    HEADER_MSGPACK,
+    HEADER_MSGPACK_ZSTD,
+    JSONMemoryCodec,
+    MemoryCodec,
+    MSGPACK_AVAILABLE,
+    ZSTD_AVAILABLE,
+    decode_memory,
+    get_codec,
+)
+from unimem.memory_types import Memory, MemoryType, MemoryLayer
+
+
+def _memory(content="林渊在第十二章埋下伏笔"):
+    return Memory(
+        id="m1",
+        content=content,
+        timestamp=datetime(2025, 3, 1, 12, 30, 15, 123456),
+        memory_type=MemoryType.EXPERIENCE,
+        layer=MemoryLayer.DA,
+        keywords=["伏笔"],
+        tags=["人物", "师门"],
+        context="第十二章",
+        links={"m0", "m2"},
+        retrieval_count=3,
+        last_accessed=datetime(2025, 3, 2, tzinfo=timezone.utc),
+        metadata={"session_id": "s1", "score": 0.5, "created": datetime(2025, 1, 1)},
+        reasoning="推理",
+    )
+
+
+class TestMemoryCodec(unittest.TestCase):
+    """编解码往返测试"""
+
+    def assertSameMemory(self, decoded, original):
+        self.assertEqual(decoded.id, original.id)
+        self.assertEqual(decoded.content, original.content)
+        self.assertEqual(decoded.timestamp, original.timestamp)
+        self.assertEqual(decoded.memory_type, original.memory_type)
+        self.assertEqual(decoded.layer, original.layer)
+        self.assertEqual(decoded.tags, original.tags)
+        self.assertEqual(decoded.links, original.links)
+        self.assertEqual(decoded.retrieval_count, original.retrieval_count)
+        self.assertEqual(decoded.last_accessed, original.last_accessed)
+        self.assertEqual(decoded.metadata["session_id"], "s1")
+        self.assertEqual(decoded.reasoning, original.reasoning)
+
+    def test_json_roundtrip_and_legacy_values(self):
+        memory = _memory()
+        raw = JSONMemoryCodec().encode(memory)
+        self.assertSameMemory(decode_memory(raw), memory)
+        # 旧值可能以 str（decode_responses=True）或 bytes 返回
+        self.assertSameMemory(decode_memory(raw.encode("utf-8")), memory)
+        self.assertEqual(json.loads(raw)["metadata"]["created"], "2025-01-01T00:00:00")
+
+    @unittest.skipUnless(MSGPACK_AVAILABLE, "msgpack not installed")
+    def test_msgpack_roundtrip_is_smaller(self):
+        memory = _memory()
+        raw = get_codec("msgpack").encode(memory)
+        self.assertEqual(raw[0], HEADER_MSGPACK)
+        self.assertLess(len(raw), len(JSONMemoryCodec().encode(memory).encode("utf-8")))
+        self.assertSameMemory(decode_memory(raw), memory)
+
+    @unittest.skipUnless(MSGPACK_AVAILABLE and ZSTD_AVAILABLE, "msgpack/zstandard not installed")
+    def test_large_content_compressed(self):
+        memory = _memory("师门旧案。" * 500)
+        raw = get_codec("msgpack").encode(memory)
+        self.assertEqual(raw[0], HEADER_MSGPACK_ZSTD)
+        self.assertLess(len(raw), len(memory.content.encode("utf-8")) // 4)
+        self.assertSameMemory(decode_memory(raw), memory)
+        self.assertEqual(get_codec("msgpack-raw").encode(memory)[0], HEADER_MSGPACK)
+
+    def test_unknown_codec_and_header(self):
+        self.assertIsInstance(get_codec("missing"), JSONMemoryCodec)
+        with self.assertRaises(ValueError):
+            decode_memory(b"\x7f\x00")
+        self.assertIn("json", memory_codec.available_codecs())
+
+    def test_codec_base_is_abstract(self):
+        with self.assertRaises(TypeError):
+            MemoryCodec()
+
+        class EncodeOnly(MemoryCodec):
+            def encode(self, memory):
+                return ""
+
+        with self.assertRaises(TypeError):
+            EncodeOnly()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Neo4j 批量写入测试
+
+使用模拟的 Graph 测试 neo4j.py 中基于 UNWIND 的批量写入：
+分块、每块一个事务、按块重试和失败隔离（不需要运行中的 Neo4j）
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from unimem import neo4j as unimem_neo4j
+from unimem.memory_types import Entity, Memory, MemoryType, Relation
+
+
+def _entity(i):
+    return Entity(id=f"e{i}", name=f"人物{i}", entity_type="Person", description="", retrieval_key="",
+                  retrieval_value="")
+
+
+class TestNeo4jBulkWrites(unittest.TestCase):
+    """UNWIND 批量写入测试"""
+
+    def setUp(self):
+        self.graph = MagicMock()
+        self.transactions = []
+        self.graph.begin.side_effect = self._begin
+        patches = [
+            patch.object(unimem_neo4j, "graph", self.graph),
+            patch.object(unimem_neo4j, "_ensure_initialized", lambda: None),
+            patch.object(unimem_neo4j, "_retry_delay", 0),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _begin(self):
+        tx = MagicMock()
+        self.transactions.append(tx)
+        return tx
+
+    def _statements(self):
+        return [call.args for tx in self.transactions for call in tx.run.call_args_list]
+
+    def test_entities_chunked_one_transaction_per_chunk(self):
+        written = unimem_neo4j.create_entities_batch([_entity(i) for i in range(1200)], chunk_size=500)
+        self.assertEqual(written, 1200)
+        statements = self._statements()
+        self.assertEqual([len(params["rows"]) for _, params in statements], [500, 500, 200])
+        self.assertTrue(all("UNWIND $rows AS row" in query for query, _ in statements))
+        self.assertEqual(statements[0][1]["rows"][0]["name"], "人物0")
+        self.assertEqual(self.graph.commit.call_count, 3)
+
+    def test_relations_keywords_flattened(self):
+        relation = Relation(source="e1", target="e2", keywords=["师徒", "旧案"], description="师徒",
+                            retrieval_key="", retrieval_value="")
+        self.assertEqual(unimem_neo4j.create_relations_batch([relation]), 1)
+        query, params = self._statements()[0]
+        self.assertIn("MERGE (s)-[r:RELATED_TO]->(t)", query)
+        self.assertEqual(params["rows"][0]["keywords"], "师徒,旧案")
+
+    def test_memories_nodes_before_edges_grouped_by_type(self):
+        memories = [
+            Memory(id="m1", content="a", timestamp=datetime.now(), memory_type=MemoryType.EXPERIENCE,
+                   entities=["e1"], links={"m2"}),
+            Memory(id="m2", content="b", timestamp=datetime.now(), memory_type=MemoryType.EPISODIC),
+            Memory(id="m3", content="c", timestamp=datetime.now()),
+        ]
+        self.assertEqual(unimem_neo4j.create_memories_batch(memories), 3)
+        statements = self._statements()
+        node_queries = [query for query, _ in statements[:3]]
+        self.assertIn("SET m:`EXPERIENCE`", node_queries[0])
+        self.assertIn("SET m:`EPISODIC`", node_queries[1])
+        self.assertNotIn("SET m:`", node_queries[2])
+        self.assertEqual(statements[0][1]["rows"][0]["props"]["memory_type"], "experience")
+        # 边在所有节点之后写入，同一块的 MENTIONS / RELATED_TO 在一个事务中
+        self.assertEqual(len(self.transactions), 4)
+        edge_queries = [call.args for call in self.transactions[-1].run.call_args_list]
+        self.assertIn("MENTIONS", edge_queries[0][0])
+        self.assertIn("RELATED_TO", edge_queries[1][0])
+        self.assertEqual(edge_queries[1][1]["rows"][0]["links"], ["m2"])
+
+    def test_transient_failure_retried_per_chunk(self):
+        failures = [unimem_neo4j.TransientError("deadlock")]
+
+        def begin():
+            tx = self._begin()
+            if failures:
+                tx.run.side_effect = failures.pop()
+            return tx
+
+        self.graph.begin.side_effect = begin
+        written = unimem_neo4j.create_entities_batch([_entity(i) for i in range(4)], chunk_size=2)
+        self.assertEqual(written, 4)
+        self.assertEqual(self.graph.rollback.call_count, 1)
+        self.assertEqual(self.graph.commit.call_count, 2)
+
+    @unittest.skipUnless(unimem_neo4j.NEO4J_AVAILABLE, "py2neo not installed")
+    def test_client_error_skips_only_failed_chunk(self):
+        def begin():
+            tx = self._begin()
+            if len(self.transactions) == 1:
+                tx.run.side_effect = unimem_neo4j.ClientError("syntax")
+            return tx
+
+        self.graph.begin.side_effect = begin
+        written = unimem_neo4j.create_entities_batch([_entity(i) for i in range(4)], chunk_size=2)
+        self.assertEqual(written, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
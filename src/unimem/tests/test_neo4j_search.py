@@ -0,0 +1,177 @@
+"""
+Neo4j 记忆查询测试
+
+使用模拟的 Graph 测试 neo4j.py 中记忆查询的一次往返水合（hydration）：
+节点、实体 ID 和链接 ID 在同一条查询中返回，不再逐条调用 get_memory
+"""
+
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from unimem import neo4j as unimem_neo4j
+from unimem.adapters import layered_storage_adapter
+from unimem.adapters.layered_storage_adapter import LayeredStorageAdapter
+from unimem.memory_types import Memory, MemoryType
+
+
+def _record(memory_id, entities=(), links=(), **props):
+    node = {
+        "id": memory_id,
+        "content": f"内容 {memory_id}",
+        "timestamp": "2025-03-01T12:00:00",
+        "memory_type": "experience",
+        "layer": "ltm",
+        "keywords": "伏笔,师门",
+        "tags": "",
+        "metadata": json.dumps({"source": "chapter"}),
+        "retrieval_count": 2,
+        **props,
+    }
+    return {"m": node, "entities": list(entities), "links": list(links)}
+
+
+class TestNeo4jHydratedSearch(unittest.TestCase):
+    """一次往返的记忆查询测试"""
+
+    def setUp(self):
+        self.graph = MagicMock()
+        patches = [
+            patch.object(unimem_neo4j, "graph", self.graph),
+            patch.object(unimem_neo4j, "node_matcher", MagicMock()),
+            patch.object(unimem_neo4j, "_ensure_initialized", lambda: None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _returns(self, *records):
+        self.graph.run.return_value.data.return_value = list(records)
+
+    def test_search_by_type_single_query(self):
+        self._returns(_record("m1", entities=["e1", None], links=["m2"]), _record("m2"))
+        memories = unimem_neo4j.search_memories_by_type(MemoryType.EXPERIENCE, limit=5)
+        self.assertEqual(self.graph.run.call_count, 1)
+        query, params = self.graph.run.call_args.args
+        self.assertIn("collect(DISTINCT e.id) AS entities", query)
+        self.assertEqual(params, {"memory_type": "experience", "limit": 5})
+        self.assertEqual([m.id for m in memories], ["m1", "m2"])
+        self.assertEqual(memories[0].entities, ["e1"])
+        self.assertEqual(memories[0].links, {"m2"})
+        self.assertEqual(memories[0].keywords, ["伏笔", "师门"])
+        self.assertEqual(memories[0].metadata, {"source": "chapter"})
+
+    def test_entity_and_time_range_are_parameterized(self):
+        self._returns()
+        unimem_neo4j.search_memories_by_entity("e1' OR 1=1 //", limit=3)
+        query, params = self.graph.run.call_args.args
+        self.assertNotIn("OR 1=1", query)
+        self.assertEqual(params["entity_id"], "e1' OR 1=1 //")
+        unimem_neo4j.search_memories_by_time_range("2025-01-01", "2025-12-31", limit=3)
+        self.assertEqual(self.graph.run.call_args.args[1]["start_time"], "2025-01-01")
+
+    def test_text_search_uses_fulltext_index_with_scores(self):
+        record = _record("m1")
+        record["score"] = 2.5
+        self._returns(record)
+        memories = unimem_neo4j.search_memories_by_text('师门 "旧案" OR *', limit=4)
+        query, params = self.graph.run.call_args.args
+        self.assertIn("db.index.fulltext.queryNodes($index, $query)", query)
+        self.assertNotIn("旧案", query)
+        self.assertEqual(params["index"], unimem_neo4j.MEMORY_FULLTEXT_INDEX)
+        self.assertEqual(params["query"], '师门 \\"旧案\\" or \\*')
+        self.assertEqual(memories[0].metadata["fulltext_score"], 2.5)
+
+    def test_text_search_falls_back_without_index(self):
+        fallback = MagicMock()
+        fallback.data.return_value = [_record("m1")]
+        self.graph.run.side_effect = [Exception("There is no such fulltext schema index"), fallback]
+        memories = unimem_neo4j.search_memories_by_text("伏笔")
+        query, params = self.graph.run.call_args.args
+        self.assertIn("m.content CONTAINS $text", query)
+        self.assertEqual(params["text"], "伏笔")
+        self.assertEqual([m.id for m in memories], ["m1"])
+        self.assertEqual(unimem_neo4j.search_memories_by_text("  "), [])
+
+    def test_fulltext_fallback_warns_once(self):
+        fallback = MagicMock()
+        fallback.data.return_value = []
+        self.graph.run.side_effect = [Exception("no such index"), fallback] * 2
+        with patch.object(unimem_neo4j, "_fulltext_fallback_warned", set()), \
+                self.assertLogs(unimem_neo4j.logger, level="DEBUG") as logs:
+            unimem_neo4j.search_memories_by_text("伏笔")
+            unimem_neo4j.search_memories_by_text("伏笔")
+        warnings = [r for r in logs.records if r.levelname == "WARNING"]
+        self.assertEqual(len(warnings), 1)
+
+    def test_fulltext_query_neutralizes_boolean_operators(self):
+        self.assertEqual(unimem_neo4j._fulltext_query("NOT 师门 AND OR"), "not 师门 and or")
+        self.assertEqual(unimem_neo4j._fulltext_query("ANDROID"), "ANDROID")
+
+    def test_entity_text_search_parameterized(self):
+        self._returns({"e": {"id": "e1", "name": "林渊"}, "score": 1.0})
+        entities = unimem_neo4j.search_entities_by_text("林渊'")
+        query, params = self.graph.run.call_args.args
+        self.assertNotIn("林渊", query)
+        self.assertEqual(params["index"], unimem_neo4j.ENTITY_FULLTEXT_INDEX)
+        self.assertEqual([e.name for e in entities], ["林渊"])
+
+    def test_create_indexes_includes_fulltext(self):
+        self.assertTrue(unimem_neo4j.create_memory_indexes())
+        queries = [call.args[0] for call in self.graph.run.call_args_list]
+        fulltext = [q for q in queries if "FULLTEXT" in q]
+        self.assertEqual(len(fulltext), 2)
+        self.assertIn("ON EACH [n.content, n.keywords]", fulltext[0])
+        self.assertIn("'cjk'", fulltext[0])
+
+    def test_connect_creates_indexes(self):
+        connected = MagicMock()
+        with patch.object(unimem_neo4j, "NEO4J_AVAILABLE", True), \
+                patch.object(unimem_neo4j, "Graph", MagicMock(return_value=connected)), \
+                patch.object(unimem_neo4j, "NodeMatcher", MagicMock()), \
+                patch.object(unimem_neo4j, "RelationshipMatcher", MagicMock()), \
+                patch.object(unimem_neo4j, "_graph", None), \
+                patch.object(unimem_neo4j, "_node_matcher", None), \
+                patch.object(unimem_neo4j, "_relationship_matcher", None), \
+                patch.object(unimem_neo4j, "relationship_matcher", None):
+            self.assertIs(unimem_neo4j.get_graph(), connected)
+        queries = [call.args[0] for call in connected.run.call_args_list]
+        self.assertTrue(any("CREATE FULLTEXT INDEX memory_fulltext IF NOT EXISTS" in q for q in queries))
+
+    def test_get_memory_uses_hydrator(self):
+        self._returns(_record("m1", entities=["e1"], decision_trace=json.dumps({"inputs": ["a"]})))
+        memory = unimem_neo4j.get_memory("m1")
+        self.assertEqual(self.graph.run.call_count, 1)
+        self.assertEqual(memory.decision_trace, {"inputs": ["a"]})
+        self._returns()
+        self.assertIsNone(unimem_neo4j.get_memory("missing"))
+
+
+class TestLayeredStorageSearchLTM(unittest.TestCase):
+    """LayeredStorageAdapter.search_ltm 的 Neo4j 路径测试"""
+
+    def setUp(self):
+        self.adapter = LayeredStorageAdapter(config={})
+        self.adapter.initialize()
+        self.adapter.ltm_backend = "neo4j"
+        self.memories = [Memory(id="m1", content="c", timestamp=datetime.now())]
+
+    def test_search_ltm_uses_query(self):
+        search = MagicMock(return_value=self.memories)
+        with patch.object(layered_storage_adapter, "NEO4J_AVAILABLE", True), \
+                patch.object(layered_storage_adapter, "neo4j_search_memories_by_text", search):
+            memories = self.adapter.search_ltm("伏笔", top_k=3)
+        search.assert_called_once_with("伏笔", limit=3)
+        self.assertEqual([m.id for m in memories], ["m1"])
+
+    def test_empty_query_returns_recent(self):
+        recent = MagicMock(return_value=self.memories)
+        with patch.object(layered_storage_adapter, "NEO4J_AVAILABLE", True), \
+                patch.object(layered_storage_adapter, "neo4j_get_recent_memories", recent):
+            self.adapter.search_ltm("", top_k=3)
+        recent.assert_called_once_with(limit=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+"""
+Redis 存储测试
+
+使用 fakeredis 测试 redis.py 中的 FoA/DA 读写（未安装 fakeredis 时跳过）
+"""
+
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+from unimem import redis as unimem_redis
+from unimem.memory_codec import JSONMemoryCodec, MSGPACK_AVAILABLE
+from unimem.memory_types import Memory, MemoryType
+
+
+def _memory(memory_id, session_id=None, tags=None):
+    metadata = {"session_id": session_id} if session_id else {}
+    return Memory(
+        id=memory_id,
+        content=f"content {memory_id}",
+        timestamp=datetime.now(),
+        memory_type=MemoryType.EXPERIENCE,
+        tags=list(tags or []),
+        metadata=metadata,
+    )
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE and unimem_redis.REDIS_AVAILABLE, "fakeredis not installed")
+class TestRedisBatchReads(unittest.TestCase):
+    """MGET/流水线批量读取测试"""
+
+    def setUp(self):
+        self.client = fakeredis.FakeRedis(decode_responses=True)
+        for i in range(5):
+            unimem_redis.add_to_foa(_memory(f"m{i}", session_id="s1"), client=self.client, ttl=600)
+            unimem_redis.add_to_da(_memory(f"m{i}", session_id="s1", tags=["伏笔"]), client=self.client, ttl=600)
+
+    def test_get_many_preserves_order_and_skips_missing(self):
+        self.client.delete("foa:memory:m2")
+        memories = unimem_redis.get_many_from_foa(["m3", "m2", "m1", "m3"], client=self.client)
+        self.assertEqual([m.id for m in memories], ["m3", "m1"])
+
+    def test_access_stats_written_back_with_ttl_kept(self):
+        unimem_redis.get_many_from_da(["m0"], client=self.client)
+        memory = unimem_redis.get_from_da("m0", client=self.client)
+        self.assertEqual(memory.retrieval_count, 2)
+        self.assertGreater(self.client.ttl("da:memory:m0"), 0)
+
+    def test_access_write_back_skips_concurrently_updated_values(self):
+        newer = _memory("m0", session_id="s1")
+        newer.content = "newer"
+        real_mget = unimem_redis._binary_client(self.client).mget
+
+        def mget_then_concurrent_write(keys):
+            values = real_mget(keys)
+            unimem_redis.add_to_foa(newer, client=self.client, ttl=600)
+            return values
+
+        binary = unimem_redis._binary_client(self.client)
+        with patch.object(binary, "mget", side_effect=mget_then_concurrent_write):
+            stale = unimem_redis.get_many_from_foa(["m0"], client=self.client)
+        self.assertEqual(stale[0].content, "content m0")
+        current = unimem_redis.get_many_from_foa(["m0"], client=self.client, refresh_access=False)
+        self.assertEqual(current[0].content, "newer")
+        self.assertEqual(current[0].retrieval_count, 0)
+
+    def test_access_write_back_does_not_recreate_deleted_keys(self):
+        real_mget = unimem_redis._binary_client(self.client).mget
+
+        def mget_then_delete(keys):
+            values = real_mget(keys)
+            self.client.delete("da:memory:m1")
+            return values
+
+        binary = unimem_redis._binary_client(self.client)
+        with patch.object(binary, "mget", side_effect=mget_then_delete):
+            unimem_redis.get_many_from_da(["m1"], client=self.client)
+        self.assertFalse(self.client.exists("da:memory:m1"))
+
+    def test_list_readers_use_batch_path(self):
+        foa = unimem_redis.get_foa_memories(limit=3, client=self.client)
+        self.assertEqual([m.id for m in foa], ["m4", "m3", "m2"])
+        session = unimem_redis.get_foa_memories_by_session("s1", limit=10, client=self.client)
+        self.assertEqual(len(session), 5)
+        tagged = unimem_redis.get_da_memories_by_tag("伏笔", limit=10, client=self.client)
+        self.assertEqual({m.id for m in tagged}, {f"m{i}" for i in range(5)})
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE and unimem_redis.REDIS_AVAILABLE and MSGPACK_AVAILABLE,
+                     "fakeredis/msgpack not installed")
+class TestRedisBinaryCodec(unittest.TestCase):
+    """二进制编码值与旧 JSON 值共存测试"""
+
+    def setUp(self):
+        self.client = fakeredis.FakeRedis(decode_responses=True)
+
+    def test_binary_values_read_through_text_client(self):
+        with patch.dict("os.environ", {"REDIS_MEMORY_CODEC": "msgpack"}):
+            unimem_redis.add_to_foa(_memory("m1", session_id="s1"), client=self.client, ttl=600)
+        raw = unimem_redis._binary_client(self.client).get("foa:memory:m1")
+        self.assertEqual(raw[0], 0x01)
+        memories = unimem_redis.get_foa_memories_by_session("s1", client=self.client)
+        self.assertEqual([m.id for m in memories], ["m1"])
+
+    def test_legacy_json_value_still_decodes(self):
+        self.client.set("da:memory:old", JSONMemoryCodec().encode(_memory("old")), ex=600)
+        memory = unimem_redis.get_from_da("old", client=self.client)
+        self.assertEqual(memory.id, "old")
+        self.assertEqual(memory.retrieval_count, 1)
+        # 写回访问统计时使用当前编码器
+        self.assertNotEqual(unimem_redis._binary_client(self.client).get("da:memory:old")[:1], b"{")
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE and unimem_redis.REDIS_AVAILABLE, "fakeredis not installed")
+class TestRedisAtomicAdmission(unittest.TestCase):
+    """Lua 原子准入与淘汰测试"""
+
+    def setUp(self):
+        self.client = fakeredis.FakeRedis(decode_responses=True)
+
+    def _assert_foa_consistent(self, max_memories):
+        listed = self.client.lrange("foa:memories", 0, -1)
+        payloads = {key.split(":", 2)[2] for key in self.client.keys("foa:memory:*")}
+        self.assertLessEqual(len(listed), max_memories)
+        self.assertEqual(len(listed), len(set(listed)))
+        self.assertEqual(set(listed), payloads)
+        session_of = self.client.hgetall("foa:session_of")
+        for key in self.client.keys("foa:session:*"):
+            session_ids = set(self.client.lrange(key, 0, -1))
+            self.assertLessEqual(session_ids, payloads)
+            session = key[len("foa:session:"):]
+            self.assertEqual({i for i, s in session_of.items() if s == session}, session_ids)
+        self.assertEqual(set(self.client.zrange("foa:expiry", 0, -1)), payloads)
+
+    def test_concurrent_foa_admission_leaves_no_dangling_ids(self):
+        errors = []
+
+        def writer(worker):
+            try:
+                for i in range(40):
+                    memory = _memory(f"w{worker}-{i % 25}", session_id=f"s{i % 3}")
+                    unimem_redis.add_to_foa(memory, client=self.client, ttl=600, max_memories=20)
+                    if i % 7 == 0:
+                        unimem_redis.remove_from_foa(f"w{(worker + 1) % 4}-{i % 25}", client=self.client)
+            except Exception as e:  # pragma: no cover - 失败时在主线程断言
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self._assert_foa_consistent(20)
+        self.assertEqual(len(self.client.lrange("foa:memories", 0, -1)), 20)
+
+    def test_expired_ids_purged_on_admission(self):
+        unimem_redis.add_to_foa(_memory("old", session_id="s1"), client=self.client, ttl=600)
+        # 模拟记忆值已过期
+        self.client.zadd("foa:expiry", {"old": 0})
+        self.client.delete("foa:memory:old")
+        unimem_redis.add_to_foa(_memory("new", session_id="s1"), client=self.client, ttl=600)
+        self.assertEqual(self.client.lrange("foa:memories", 0, -1), ["new"])
+        self.assertEqual(self.client.lrange("foa:session:s1", 0, -1), ["new"])
+        self._assert_foa_consistent(10)
+
+    def test_session_trim_drops_session_mapping(self):
+        for i in range(4):
+            unimem_redis.add_to_foa(
+                _memory(f"m{i}", session_id="s1"), client=self.client, ttl=600, max_session_memories=2
+            )
+        self.assertEqual(self.client.lrange("foa:session:s1", 0, -1), ["m3", "m2"])
+        self.assertEqual(self.client.hgetall("foa:session_of"), {"m3": "s1", "m2": "s1"})
+        # 被裁出会话列表的记忆仍在 FoA 中
+        self.assertEqual(len(self.client.lrange("foa:memories", 0, -1)), 4)
+        self._assert_foa_consistent(10)
+
+    def test_concurrent_da_admission_evicts_with_indexes(self):
+        def writer(worker):
+            for i in range(30):
+                memory = _memory(f"w{worker}-{i}", session_id="s1", tags=[f"t{i % 2}"])
+                unimem_redis.add_to_da(memory, client=self.client, ttl=600, max_memories=15)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        live = self.client.smembers("da:memories")
+        self.assertEqual(len(live), 15)
+        self.assertEqual({key.split(":", 2)[2] for key in self.client.keys("da:memory:*")}, live)
+        indexed = self.client.smembers("da:tag:t0") | self.client.smembers("da:tag:t1")
+        self.assertEqual(indexed, live)
+        self.assertEqual(self.client.smembers("da:session:s1"), live)
+
+    def test_da_readmission_replaces_indexes(self):
+        unimem_redis.add_to_da(_memory("m1", tags=["a"]), client=self.client, ttl=600)
+        unimem_redis.add_to_da(_memory("m1", tags=["b"]), client=self.client, ttl=600)
+        self.assertEqual(self.client.smembers("da:tag:a"), set())
+        self.assertEqual(self.client.smembers("da:tag:b"), {"m1"})
+        self.assertTrue(unimem_redis.remove_from_da("m1", client=self.client))
+        self.assertEqual(self.client.keys("da:*"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
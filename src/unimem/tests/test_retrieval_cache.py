@@ -4,12 +4,23 @@
 测试 retrieval/retrieval_cache.py 中的缓存功能
 """
 
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 from unittest.mock import Mock
 from datetime import datetime, timedelta
 
-from unimem.retrieval.retrieval_cache import RetrievalCache, CacheEntry
+from unimem.retrieval.retrieval_cache import (
+    RetrievalCache,
+    CacheEntry,
+    RetrievalPrefetcher,
+    estimate_results_bytes,
+    normalize_query_template,
+)
 from unimem.memory_types import Memory, MemoryType, RetrievalResult
+from unimem.disk_cache import DiskCache
 
 
 class TestCacheEntry(unittest.TestCase):
@@ -175,6 +186,212 @@ class TestRetrievalCache(unittest.TestCase):
         self.assertGreater(stats["misses"], 0)
 
 
+class TestRetrievalCacheEviction(unittest.TestCase):
+    """RetrievalCache O(1) 淘汰、代际失效和字节上限测试"""
+    
+    def _results(self, memory_id: str, content: str = "Test") -> list:
+        memory = Memory(
+            id=memory_id,
+            content=content,
+            timestamp=datetime.now(),
+            memory_type=MemoryType.EXPERIENCE
+        )
+        return [RetrievalResult(memory=memory, score=0.9, retrieval_method="test")]
+    
+    def test_lru_order_updated_on_get(self):
+        """访问过的条目不会被优先淘汰"""
+        cache = RetrievalCache(max_size=2, enable_lru=True)
+        cache.put("query_0", self._results("m0"))
+        cache.put("query_1", self._results("m1"))
+        self.assertIsNotNone(cache.get("query_0"))
+        cache.put("query_2", self._results("m2"))
+        
+        self.assertIsNotNone(cache.get("query_0"))
+        self.assertIsNone(cache.get("query_1"))
+        self.assertEqual(cache.get_statistics()["evictions"], 1)
+    
+    def test_fifo_ignores_access(self):
+        """FIFO 模式按写入顺序淘汰"""
+        cache = RetrievalCache(max_size=2, enable_lru=False)
+        cache.put("query_0", self._results("m0"))
+        cache.put("query_1", self._results("m1"))
+        cache.get("query_0")
+        cache.put("query_2", self._results("m2"))
+        self.assertIsNone(cache.get("query_0"))
+        self.assertIsNotNone(cache.get("query_1"))
+    
+    def test_generation_invalidation(self):
+        """存储写入后旧条目失效"""
+        cache = RetrievalCache(max_size=10)
+        cache.put("query", self._results("m0"))
+        generation = cache.invalidate()
+        self.assertEqual(generation, 1)
+        self.assertIsNone(cache.get("query"))
+        self.assertEqual(cache.get_statistics()["size"], 0)
+    
+    def test_put_with_stale_generation_skipped(self):
+        """检索期间发生写入时不缓存结果"""
+        cache = RetrievalCache(max_size=10)
+        generation = cache.generation
+        cache.invalidate()
+        cache.put("query", self._results("m0"), generation=generation)
+        self.assertIsNone(cache.get("query"))
+    
+    def test_byte_bound(self):
+        """按近似字节数淘汰"""
+        one_entry = estimate_results_bytes(self._results("m0", "x" * 1000))
+        cache = RetrievalCache(max_size=100, max_bytes=one_entry * 2)
+        for i in range(3):
+            cache.put(f"query_{i}", self._results(f"m{i}", "x" * 1000))
+        stats = cache.get_statistics()
+        self.assertEqual(stats["size"], 2)
+        self.assertLessEqual(stats["bytes"], one_entry * 2)
+        self.assertIsNone(cache.get("query_0"))
+        
+        # 单条超过上限的结果不缓存
+        cache.put("huge", self._results("big", "x" * one_entry * 3))
+        self.assertIsNone(cache.get("huge"))
+
+
+class TestRetrievalCacheDisk(unittest.TestCase):
+    """RetrievalCache 磁盘二级缓存测试"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.disk = DiskCache(os.path.join(self.tmpdir, "retrieval.db"))
+    
+    def tearDown(self):
+        self.disk.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+    
+    def _results(self, memory_id: str) -> list:
+        memory = Memory(
+            id=memory_id,
+            content="第12章 伏笔",
+            timestamp=datetime.now(),
+            memory_type=MemoryType.EXPERIENCE,
+        )
+        return [RetrievalResult(memory=memory, score=0.8, retrieval_method="semantic")]
+    
+    def test_round_trip_after_restart(self):
+        RetrievalCache(disk_cache=self.disk).put("q1", self._results("m1"), top_k=5)
+        
+        restarted = RetrievalCache(disk_cache=self.disk)
+        results = restarted.get("q1", top_k=5)
+        self.assertIsNotNone(results)
+        self.assertEqual(results[0].memory.id, "m1")
+        self.assertEqual(results[0].memory.content, "第12章 伏笔")
+        self.assertEqual(results[0].score, 0.8)
+        self.assertEqual(restarted.get_statistics()["disk_hits"], 1)
+    
+    def test_invalidate_shared_across_instances(self):
+        first = RetrievalCache(disk_cache=self.disk)
+        first.put("q1", self._results("m1"), top_k=5)
+        second = RetrievalCache(disk_cache=self.disk)
+        first.invalidate()
+        second._generation_checked_at = 0.0  # 跳过刷新节流
+        self.assertIsNone(second.get("q1", top_k=5))
+    
+    def test_warm_up(self):
+        writer = RetrievalCache(disk_cache=self.disk)
+        writer.put("q1", self._results("m1"), top_k=5)
+        writer.put("q2", self._results("m2"), top_k=5)
+        
+        cache = RetrievalCache(max_size=10, disk_cache=self.disk)
+        self.assertEqual(cache.warm_up(), 2)
+        self.assertEqual(cache.get_statistics()["size"], 2)
+    
+    def test_stores_are_isolated(self):
+        neo4j_cache = RetrievalCache(disk_cache=self.disk, store_id="neo4j:bolt://a/neo4j")
+        sqlite_cache = RetrievalCache(disk_cache=self.disk, store_id="sqlite:/tmp/graph.db")
+        neo4j_cache.put("q1", self._results("m1"), top_k=5)
+        sqlite_cache.put("q1", self._results("m2"), top_k=5)
+        
+        sqlite_cache.invalidate()
+        restarted = RetrievalCache(disk_cache=self.disk, store_id="neo4j:bolt://a/neo4j")
+        self.assertEqual(restarted.get("q1", top_k=5)[0].memory.id, "m1")
+        self.assertIsNone(RetrievalCache(disk_cache=self.disk, store_id="sqlite:/tmp/graph.db").get("q1", top_k=5))
+
+
+class TestRetrievalPrefetcher(unittest.TestCase):
+    """RetrievalPrefetcher 查询转移学习测试"""
+    
+    def setUp(self):
+        self.cache = RetrievalCache(max_size=100)
+        self.retrieval_func = Mock(side_effect=lambda query, **kwargs: [
+            RetrievalResult(
+                memory=Memory(id=query, content=query, timestamp=datetime.now(), memory_type=MemoryType.EXPERIENCE),
+                score=1.0,
+                retrieval_method="test",
+            )
+        ])
+        self.prefetcher = RetrievalPrefetcher(self.cache, self.retrieval_func, min_transition_count=2)
+    
+    def tearDown(self):
+        self.prefetcher.shutdown()
+    
+    def test_normalize_query_template(self):
+        """中文序数和阿拉伯数字归一化为同一模板"""
+        self.assertEqual(normalize_query_template("第十二章  人物 伏笔"), ("第{n}章 人物 伏笔", (12,)))
+        self.assertEqual(normalize_query_template("第12章 人物 伏笔"), ("第{n}章 人物 伏笔", (12,)))
+        self.assertEqual(normalize_query_template("世界观"), ("世界观", ()))
+    
+    def test_predict_from_learned_transitions(self):
+        """从日志中学到模板转移和章节偏移"""
+        self.prefetcher.fit([
+            "第1章 人物 伏笔", "第1章 场景",
+            "第2章 人物 伏笔", "第2章 场景",
+            "第3章 人物 伏笔", "第3章 场景", "世界观",
+        ], project="novel")
+        self.assertEqual(self.prefetcher.predict_queries("第十章 人物 伏笔", project="novel"), ["第10章 场景"])
+        # 章节递进：场景 -> 下一章人物
+        self.assertEqual(self.prefetcher.predict_queries("第3章 场景", project="novel"), ["第4章 人物 伏笔"])
+        # 其他项目没有学到任何转移
+        self.assertEqual(self.prefetcher.predict_queries("第十章 人物 伏笔", project="other"), [])
+    
+    def test_background_prefetch_and_precision(self):
+        """后台预取写入缓存，真实出现的预测计入精度"""
+        self.prefetcher.fit(["第1章 人物", "第1章 场景", "第2章 人物", "第2章 场景"])
+        submitted = self.prefetcher.prefetch_related("第3章 人物", top_k=5)
+        self.assertEqual(submitted, 1)
+        self.prefetcher.shutdown(wait=True)
+        
+        self.assertIsNotNone(self.cache.get("第3章 场景", top_k=5))
+        self.prefetcher.record_query("第3章 场景")
+        stats = self.prefetcher.get_statistics()
+        self.assertEqual(stats["predictions"], 1)
+        self.assertEqual(stats["useful_predictions"], 1)
+        self.assertEqual(stats["precision"], 1.0)
+        self.assertEqual(stats["prefetched"], 1)
+
+    def test_predict_concurrent_with_learning(self):
+        """后台学习新增偏移时预测不受影响"""
+        self.prefetcher.fit(["第1章 人物", "第1章 场景", "第2章 人物", "第2章 场景"])
+        stop = threading.Event()
+        errors = []
+
+        def learn():
+            chapter = 3
+            while not stop.is_set():
+                # 每次跳跃不同的章节数，不断向偏移分布加入新键
+                self.prefetcher.record_query(f"第{chapter}章 人物")
+                chapter += chapter % 7 + 1
+                self.prefetcher.record_query(f"第{chapter}章 场景")
+
+        learner = threading.Thread(target=learn)
+        learner.start()
+        try:
+            for _ in range(2000):
+                try:
+                    self.prefetcher.predict_queries("第5章 人物")
+                except RuntimeError as e:
+                    errors.append(e)
+        finally:
+            stop.set()
+            learner.join()
+        self.assertEqual(errors, [])
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,155 @@
+"""
+自适应检索器策略测试
+
+测试 retrieval/retriever_policy.py 中的选择策略，以及 RetrievalEngine 的跳过/延后逻辑
+"""
+
+import unittest
+from unittest.mock import Mock
+from datetime import datetime
+
+from unimem.retrieval.retriever_policy import AdaptiveRetrieverPolicy, RetrieverStats, classify_query
+from unimem.retrieval.retrieval_engine import RetrievalEngine
+from unimem.memory_types import Memory, MemoryType
+
+
+def _memory(memory_id: str) -> Memory:
+    return Memory(
+        id=memory_id,
+        content=f"content {memory_id}",
+        timestamp=datetime.now(),
+        memory_type=MemoryType.EXPERIENCE,
+    )
+
+
+class TestClassifyQuery(unittest.TestCase):
+    """查询分类测试"""
+
+    def test_classes(self):
+        self.assertEqual(classify_query("林默"), "keyword")
+        self.assertEqual(classify_query("第12章 人物 伏笔 回收情况"), "phrase")
+        self.assertEqual(classify_query("剧情" * 40), "passage")
+
+
+class TestRetrieverStats(unittest.TestCase):
+    """RetrieverStats 测试"""
+
+    def test_record(self):
+        stats = RetrieverStats()
+        stats.record(0.2, returned=4, survived=1, alpha=0.5)
+        stats.record(0.4, returned=4, survived=0, alpha=0.5)
+        self.assertEqual(stats.calls, 2)
+        self.assertAlmostEqual(stats.survival_rate, 1 / 8)
+        self.assertAlmostEqual(stats.yield_ewma, 0.5)
+        self.assertAlmostEqual(stats.latency_ewma, 0.3)
+
+
+class TestAdaptiveRetrieverPolicy(unittest.TestCase):
+    """AdaptiveRetrieverPolicy 测试"""
+
+    def setUp(self):
+        self.policy = AdaptiveRetrieverPolicy(
+            min_samples=3, min_yield=0.2, exploration_rate=0.0, explore_every=0, seed=0
+        )
+        self.names = ["semantic", "entity"]
+
+    def _train(self, n: int = 3):
+        for _ in range(n):
+            self.policy.record("phrase", "semantic", 0.01, returned=5, survived=3)
+            self.policy.record("phrase", "entity", 0.01, returned=0, survived=0)
+
+    def test_cold_start_runs_all(self):
+        active, deferred = self.policy.select("phrase", self.names)
+        self.assertEqual(active, self.names)
+        self.assertEqual(deferred, [])
+
+    def test_low_yield_deferred(self):
+        self._train()
+        active, deferred = self.policy.select("phrase", self.names)
+        self.assertEqual(active, ["semantic"])
+        self.assertEqual(deferred, ["entity"])
+        # 其他查询类别不受影响
+        active, deferred = self.policy.select("keyword", self.names)
+        self.assertEqual(deferred, [])
+
+    def test_always_on(self):
+        self.policy.always_on.add("entity")
+        self._train()
+        _, deferred = self.policy.select("phrase", self.names)
+        self.assertEqual(deferred, [])
+
+    def test_periodic_exploration(self):
+        self.policy.explore_every = 2
+        self._train()
+        _, first = self.policy.select("phrase", self.names)
+        _, second = self.policy.select("phrase", self.names)
+        self.assertEqual(first, ["entity"])
+        self.assertEqual(second, [])
+        self.assertEqual(self.policy.get_statistics()["explorations"], 1)
+
+    def test_from_config_disabled(self):
+        self.assertIsNone(AdaptiveRetrieverPolicy.from_config({"enabled": False}))
+        self.assertIsNotNone(AdaptiveRetrieverPolicy.from_config(None))
+
+
+class TestRetrievalEngineAdaptive(unittest.TestCase):
+    """RetrievalEngine 自适应选择测试"""
+
+    def setUp(self):
+        self.graph_adapter = Mock()
+        self.graph_adapter.entity_retrieval.return_value = []
+        self.graph_adapter.abstract_retrieval.return_value = []
+        self.atom_link_adapter = Mock()
+        self.atom_link_adapter.semantic_retrieval.side_effect = (
+            lambda query, top_k: [_memory(f"m{i}") for i in range(top_k)]
+        )
+        self.atom_link_adapter.subgraph_link_retrieval.return_value = []
+        self.retrieval_adapter = Mock()
+        self.retrieval_adapter.temporal_retrieval.return_value = []
+        self.retrieval_adapter.rrf_fusion.side_effect = lambda lists: [m for l in lists for m in l]
+        self.retrieval_adapter.rerank.side_effect = lambda query, memories: memories
+
+        self.policy = AdaptiveRetrieverPolicy(
+            min_samples=2, min_yield=0.5, exploration_rate=0.0, explore_every=0
+        )
+        self.engine = RetrievalEngine(
+            graph_adapter=self.graph_adapter,
+            atom_link_adapter=self.atom_link_adapter,
+            retrieval_adapter=self.retrieval_adapter,
+            retriever_policy=self.policy,
+        )
+
+    def test_skips_empty_retrievers(self):
+        for _ in range(2):
+            results = self.engine.multi_dimensional_retrieval("第12章 人物 伏笔", top_k=3)
+            self.assertEqual(len(results), 3)
+        self.assertEqual(self.graph_adapter.entity_retrieval.call_count, 2)
+
+        self.engine.multi_dimensional_retrieval("第12章 人物 伏笔", top_k=3)
+        # entity 已被延后，semantic 结果足够，无需补跑
+        self.assertEqual(self.graph_adapter.entity_retrieval.call_count, 2)
+        self.assertEqual(self.atom_link_adapter.semantic_retrieval.call_count, 3)
+
+        stats = self.engine.get_policy_statistics()
+        self.assertTrue(stats["enabled"])
+        phrase_stats = stats["retrievers"]["phrase"]
+        self.assertEqual(phrase_stats["semantic"]["survived"], 9)
+        self.assertEqual(phrase_stats["entity"]["skips"], 1)
+
+    def test_deferred_run_when_insufficient(self):
+        for _ in range(2):
+            self.engine.multi_dimensional_retrieval("第12章 人物 伏笔", top_k=3)
+        self.engine.multi_dimensional_retrieval("第12章 人物 伏笔", top_k=3)
+        calls = self.graph_adapter.entity_retrieval.call_count
+
+        # semantic 不返回结果时，延后的检索器补跑
+        self.atom_link_adapter.semantic_retrieval.side_effect = None
+        self.atom_link_adapter.semantic_retrieval.return_value = []
+        self.engine.multi_dimensional_retrieval("第12章 人物 伏笔", top_k=3)
+        self.assertEqual(self.graph_adapter.entity_retrieval.call_count, calls + 1)
+        stats = self.engine.get_policy_statistics()["retrievers"]["phrase"]
+        self.assertEqual(stats["entity"]["deferred_runs"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
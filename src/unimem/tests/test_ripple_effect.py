@@ -0,0 +1,205 @@
+"""
+涟漪效应测试
+
+测试 update/ripple_effect.py 中的批量传播、工作量上限和后台合并传播
+"""
+
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+
+from unimem.update.ripple_effect import RippleEffectUpdater, RippleTrigger, RippleWorker
+from unimem.update.update_manager import UpdateManager
+from unimem.core import UniMem
+from unimem.memory_types import Memory
+
+
+def _memory(memory_id, links=None):
+    return Memory(id=memory_id, content=f"content {memory_id}", timestamp=datetime.now(), links=set(links or []))
+
+
+class FakeAtomLinkAdapter:
+    """按 "<id>" -> ["<id>a", "<id>b", ...] 生成相关记忆的链接适配器，记录批量调用"""
+
+    def __init__(self, fanout=2):
+        self.fanout = fanout
+        self.batch_calls = []
+        self.evolved = []
+
+    def find_related_memories_batch(self, memories, top_k=10):
+        self.batch_calls.append([m.id for m in memories])
+        return [
+            [_memory(f"{m.id}.{i}") for i in range(min(self.fanout, top_k))]
+            for m in memories
+        ]
+
+    def find_related_memories(self, memory, top_k=10):
+        raise AssertionError("per-memory lookup")
+
+    def evolve_memory(self, memory, related, new_context):
+        self.evolved.append(memory.id)
+        return memory
+
+
+class TestRippleEffectUpdater(unittest.TestCase):
+    """RippleEffectUpdater 测试"""
+
+    def setUp(self):
+        self.atom_link = FakeAtomLinkAdapter()
+        self.update_adapter = Mock()
+        self.updater = RippleEffectUpdater(atom_link_adapter=self.atom_link, update_adapter=self.update_adapter)
+
+    def test_one_batched_lookup_per_wave(self):
+        triggers = [
+            RippleTrigger(center=_memory("a", ["x"]), links={"x"}),
+            RippleTrigger(center=_memory("b", ["y"]), links={"y"}),
+        ]
+        stats = self.updater.propagate(triggers)
+
+        self.assertEqual(stats["wave1"], 4)
+        self.assertEqual(stats["wave2"], 8)
+        self.assertEqual(stats["wave3"], 16)
+        self.assertEqual(len(self.atom_link.batch_calls), 3)
+        self.assertEqual(self.atom_link.batch_calls[0], ["a", "b"])
+        self.assertEqual(len(self.atom_link.evolved), 12)
+        self.assertEqual(len(self.update_adapter.add_to_sleep_queue.call_args[0][0]), 16)
+
+    def test_work_is_bounded_per_trigger(self):
+        updater = RippleEffectUpdater(atom_link_adapter=self.atom_link, max_nodes_per_trigger=5)
+        stats = updater.trigger_ripple(_memory("a", ["x"]), [], [], {"x"})
+
+        self.assertEqual(stats["wave1"] + stats["wave2"] + stats["wave3"], 5)
+        self.assertEqual(stats["budget_exhausted"], 1)
+        self.assertEqual(len(self.atom_link.evolved), 5)
+
+    def test_budget_is_enforced_per_trigger(self):
+        # a 的邻居很多，b 的邻居很少：a 不能占用 b 剩余的预算
+        atom_link = FakeAtomLinkAdapter(fanout=4)
+        updater = RippleEffectUpdater(atom_link_adapter=atom_link, max_nodes_per_trigger=3)
+        triggers = [
+            RippleTrigger(center=_memory("a", ["x"]), links={"x"}),
+            RippleTrigger(center=_memory("b", ["y"]), links={"y"}),
+        ]
+        stats = updater.propagate(triggers)
+
+        self.assertEqual(stats["wave1"], 6)
+        self.assertEqual(stats["wave2"], 0)
+        self.assertEqual(stats["budget_exhausted"], 1)
+        self.assertEqual(sorted(atom_link.evolved), ["a.0", "a.1", "a.2", "b.0", "b.1", "b.2"])
+
+    def test_falls_back_to_per_memory_lookup(self):
+        atom_link = Mock(spec=["find_related_memories", "evolve_memory"])
+        atom_link.find_related_memories.return_value = []
+        updater = RippleEffectUpdater(atom_link_adapter=atom_link)
+        stats = updater.trigger_ripple(_memory("a", ["x"]), [], [], {"x"})
+
+        self.assertEqual(stats["wave1"], 0)
+        atom_link.find_related_memories.assert_called_once()
+
+    def test_no_links_no_propagation(self):
+        stats = self.updater.trigger_ripple(_memory("a"), [], [], set())
+        self.assertEqual(stats["wave1"], 0)
+        self.assertEqual(self.atom_link.batch_calls, [])
+
+
+class TestRippleWorker(unittest.TestCase):
+    """RippleWorker 测试"""
+
+    def setUp(self):
+        self.updater = Mock()
+        self.updater.propagate.side_effect = lambda batch: {"wave1": len(batch), "wave2": 0, "wave3": 0}
+        self.workers = []
+
+    def tearDown(self):
+        for worker in self.workers:
+            worker.shutdown(timeout=1)
+
+    def _worker(self, **kwargs):
+        worker = RippleWorker(self.updater, **kwargs)
+        self.workers.append(worker)
+        return worker
+
+    def test_coalesces_triggers_within_window(self):
+        worker = self._worker(coalesce_window=60.0)
+        worker.submit(_memory("a", ["x"]), links={"x"})
+        worker.submit(_memory("a", ["y"]), links={"y"})
+        worker.submit(_memory("b"))
+        self.assertTrue(worker.flush(timeout=5))
+
+        self.updater.propagate.assert_called_once()
+        batch = self.updater.propagate.call_args[0][0]
+        self.assertEqual([t.center.id for t in batch], ["a", "b"])
+        self.assertEqual(batch[0].links, {"x", "y"})
+        stats = worker.get_statistics()
+        self.assertEqual(stats["submitted"], 3)
+        self.assertEqual(stats["coalesced"], 1)
+        self.assertEqual(stats["processed"], 2)
+        self.assertEqual(stats["nodes"], 2)
+
+    def test_window_expiry_propagates_in_background(self):
+        worker = self._worker(coalesce_window=0.01)
+        worker.submit(_memory("a"))
+        deadline = time.monotonic() + 5
+        while self.updater.propagate.call_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.updater.propagate.call_count, 1)
+
+    def test_queue_depth_and_lag(self):
+        worker = self._worker(start=False)
+        worker.submit(_memory("a"))
+        time.sleep(0.02)
+        stats = worker.get_statistics()
+        self.assertEqual(stats["queue_depth"], 1)
+        self.assertGreater(stats["lag_seconds"], 0.0)
+        self.assertEqual(worker.pending(), 1)
+
+    def test_failed_batch_is_counted(self):
+        self.updater.propagate.side_effect = RuntimeError("vector store down")
+        worker = self._worker(coalesce_window=0.0)
+        worker.submit(_memory("a"))
+        self.assertTrue(worker.flush(timeout=5))
+        self.assertEqual(worker.get_statistics()["errors"], 1)
+
+
+class TestUpdateManagerAsyncRipple(unittest.TestCase):
+    """UpdateManager async 模式测试"""
+
+    def test_trigger_is_queued(self):
+        atom_link = FakeAtomLinkAdapter()
+        manager = UpdateManager(atom_link_adapter=atom_link, ripple_config={"mode": "async", "coalesce_window": 60.0})
+        try:
+            self.assertTrue(manager.trigger_ripple(_memory("a", ["x"]), [], [], {"x"}))
+            self.assertEqual(manager.get_ripple_statistics()["queue_depth"], 1)
+            self.assertEqual(atom_link.batch_calls, [])
+
+            self.assertTrue(manager.flush_ripples(timeout=5))
+            self.assertEqual(atom_link.batch_calls[0], ["a"])
+            self.assertEqual(manager.get_ripple_statistics()["processed"], 1)
+        finally:
+            manager.shutdown()
+
+
+class TestUniMemFlush(unittest.TestCase):
+    """UniMem.flush / close 排空涟漪队列"""
+
+    def test_close_drains_ripple_worker(self):
+        atom_link = FakeAtomLinkAdapter()
+        unimem = UniMem.__new__(UniMem)  # 只验证生命周期，不初始化适配器
+        unimem.update_manager = UpdateManager(
+            atom_link_adapter=atom_link, ripple_config={"mode": "async", "coalesce_window": 60.0}
+        )
+        unimem.retrieval_optimizer = None
+        unimem.update_manager.trigger_ripple(_memory("a", ["x"]), [], [], {"x"})
+
+        self.assertTrue(unimem.flush(timeout=5))
+        self.assertEqual(atom_link.batch_calls[0], ["a"])
+
+        unimem.update_manager.trigger_ripple(_memory("b", ["y"]), [], [], {"y"})
+        unimem.close(timeout=5)
+        self.assertEqual(unimem.update_manager.get_ripple_statistics()["processed"], 2)
+        self.assertFalse(unimem.update_manager.ripple_worker._worker.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+语义检索缓存测试
+
+测试 retrieval/semantic_cache.py 中的语义缓存，以及 RetrievalOptimizer 的两级缓存
+"""
+
+import unittest
+from unittest.mock import Mock
+from datetime import datetime
+
+from unimem.retrieval.semantic_cache import SemanticRetrievalCache, result_overlap
+from unimem.retrieval.retrieval_optimizer import RetrievalOptimizer
+from unimem.storage.storage_manager import StorageManager
+from unimem.memory_types import Context, Memory, MemoryType, RetrievalResult
+
+
+# 近似查询映射到相近向量，无关查询映射到正交向量
+VECTORS = {
+    "第12章 人物 伏笔": [1.0, 0.0, 0.0],
+    "第13章 人物 伏笔": [0.98, 0.05, 0.0],
+    "世界观 设定": [0.0, 1.0, 0.0],
+}
+
+
+def _embed(text):
+    return VECTORS.get(text, [0.0, 0.0, 1.0])
+
+
+def _results(*ids):
+    return [
+        RetrievalResult(
+            memory=Memory(id=i, content=f"content {i}", timestamp=datetime.now(), memory_type=MemoryType.EXPERIENCE),
+            score=0.9,
+            retrieval_method="test",
+        )
+        for i in ids
+    ]
+
+
+class TestSemanticRetrievalCache(unittest.TestCase):
+    """SemanticRetrievalCache 测试"""
+
+    def setUp(self):
+        self.cache = SemanticRetrievalCache(_embed, similarity_threshold=0.95, max_entries=2, sample_rate=0.0)
+
+    def test_similar_query_hit(self):
+        self.cache.put("第12章 人物 伏笔", _results("m1", "m2"), top_k=10)
+        hit = self.cache.get("第13章 人物 伏笔", top_k=10)
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.cached_query, "第12章 人物 伏笔")
+        self.assertGreater(hit.similarity, 0.95)
+        self.assertIsNone(self.cache.get("世界观 设定", top_k=10))
+
+    def test_top_k_must_be_covered(self):
+        self.cache.put("第12章 人物 伏笔", _results("m1"), top_k=5)
+        self.assertIsNone(self.cache.get("第13章 人物 伏笔", top_k=10))
+        self.assertIsNotNone(self.cache.get("第13章 人物 伏笔", top_k=3))
+
+    def test_generation_mismatch_invalidates(self):
+        self.cache.put("第12章 人物 伏笔", _results("m1"), top_k=10, generation=0)
+        self.assertIsNone(self.cache.get("第12章 人物 伏笔", top_k=10, generation=1))
+        # 旧代际的写入被丢弃
+        self.cache.put("第12章 人物 伏笔", _results("m1"), top_k=10, generation=0)
+        self.assertEqual(self.cache.get_statistics()["size"], 0)
+
+    def test_lru_slot_reuse(self):
+        self.cache.put("第12章 人物 伏笔", _results("m1"))
+        self.cache.put("世界观 设定", _results("m2"))
+        self.cache.put("其他", _results("m3"))
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats["size"], 2)
+        self.assertIsNone(self.cache.get("第12章 人物 伏笔"))
+        self.assertIsNotNone(self.cache.get("其他"))
+
+    def test_verification_metrics(self):
+        self.assertEqual(result_overlap(_results("a", "b"), _results("a", "b")), 1.0)
+        self.assertTrue(self.cache.record_verification(_results("a"), _results("b")))
+        self.assertFalse(self.cache.record_verification(_results("a"), _results("a")))
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats["sampled"], 2)
+        self.assertEqual(stats["false_hits"], 1)
+        self.assertAlmostEqual(stats["false_hit_rate"], 0.5)
+
+
+class TestRetrievalOptimizerSemanticCache(unittest.TestCase):
+    """RetrievalOptimizer 语义缓存集成测试"""
+
+    def setUp(self):
+        self.engine = Mock()
+        self.engine.multi_dimensional_retrieval.return_value = _results("m1", "m2")
+        self.optimizer = RetrievalOptimizer(
+            retrieval_engine=self.engine,
+            enable_prefetch=False,
+            cache_config={"semantic": {"similarity_threshold": 0.95, "sample_rate": 0.0}},
+            embedding_func=_embed,
+        )
+
+    def test_near_duplicate_served_from_semantic_cache(self):
+        self.optimizer.retrieve("第12章 人物 伏笔", top_k=10)
+        results = self.optimizer.retrieve("第13章 人物 伏笔", top_k=10)
+        self.assertEqual([r.memory.id for r in results], ["m1", "m2"])
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 1)
+        self.assertEqual(self.optimizer.get_statistics()["semantic_cache"]["hits"], 1)
+
+    def test_invalidate_cache_bypasses_semantic_tier(self):
+        self.optimizer.retrieve("第12章 人物 伏笔", top_k=10)
+        self.optimizer.invalidate_cache()
+        self.optimizer.retrieve("第13章 人物 伏笔", top_k=10)
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 2)
+
+    def test_sampled_hit_runs_real_retrieval(self):
+        self.optimizer.semantic_cache.sample_rate = 1.0
+        self.optimizer.retrieve("第12章 人物 伏笔", top_k=10)
+        self.engine.multi_dimensional_retrieval.return_value = _results("m3")
+        results = self.optimizer.retrieve("第13章 人物 伏笔", top_k=10)
+        self.assertEqual([r.memory.id for r in results], ["m3"])
+        stats = self.optimizer.get_statistics()["semantic_cache"]
+        self.assertEqual(stats["false_hits"], 1)
+
+    def test_miss_embeds_query_once(self):
+        embed = Mock(side_effect=_embed)
+        self.optimizer.semantic_cache.embedding_func = embed
+        self.optimizer.retrieve("第12章 人物 伏笔", top_k=10)
+        self.assertEqual(embed.call_count, 1)
+        self.assertEqual(self.optimizer.get_statistics()["semantic_cache"]["size"], 1)
+
+    def test_default_embedding_func_loads_model_on_first_use(self):
+        class LazyAdapter:
+            loads = 0
+
+            def _has_embedding_model(self):
+                return True
+
+            @property
+            def embedding_model(self):
+                LazyAdapter.loads += 1
+                return object()
+
+            def _get_embedding_array(self, text):
+                return _embed(text)
+
+        engine = Mock(spec=["multi_dimensional_retrieval", "atom_link_adapter"])
+        engine.atom_link_adapter = LazyAdapter()
+        engine.multi_dimensional_retrieval.return_value = _results("m1")
+        optimizer = RetrievalOptimizer(retrieval_engine=engine, enable_prefetch=False)
+        self.assertIsNotNone(optimizer.semantic_cache)
+        self.assertEqual(LazyAdapter.loads, 0)
+        optimizer.retrieve("第12章 人物 伏笔", top_k=5)
+        self.assertEqual(LazyAdapter.loads, 1)
+
+
+class TestRetrievalOptimizerWriteInvalidation(unittest.TestCase):
+    """存储写入后检索缓存失效"""
+
+    def setUp(self):
+        storage_adapter = Mock()
+        storage_adapter.add_to_foa.return_value = True
+        storage_adapter.add_to_ltm.return_value = True
+        self.storage = StorageManager(storage_adapter=storage_adapter, memory_type_adapter=Mock())
+        self.engine = Mock(spec=["multi_dimensional_retrieval"])
+        self.engine.multi_dimensional_retrieval.return_value = _results("m1")
+        self.optimizer = RetrievalOptimizer(retrieval_engine=self.engine, enable_prefetch=False)
+        self.optimizer.subscribe(self.storage)
+
+    def test_write_causes_cache_miss(self):
+        self.optimizer.retrieve("伏笔", top_k=5)
+        self.optimizer.retrieve("伏笔", top_k=5)
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 1)
+
+        memory = _results("m2")[0].memory
+        self.assertTrue(self.storage.add_memory(memory))
+        self.optimizer.retrieve("伏笔", top_k=5)
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 2)
+
+        self.assertTrue(self.storage.update_memory(memory))
+        self.optimizer.retrieve("伏笔", top_k=5)
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 3)
+        self.assertEqual(self.optimizer.get_statistics()["cache"]["invalidations"], 2)
+
+    def test_context_is_part_of_cache_key(self):
+        self.optimizer.retrieve("伏笔", top_k=5, context=Context(session_id="s1"))
+        self.optimizer.retrieve("伏笔", top_k=5, context=Context(session_id="s2"))
+        self.optimizer.retrieve("伏笔", top_k=5, context=Context(session_id="s1"))
+        self.assertEqual(self.engine.multi_dimensional_retrieval.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
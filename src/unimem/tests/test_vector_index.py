@@ -0,0 +1,208 @@
+"""
+本地向量索引测试
+
+测试 vector_index.py 中的本地向量索引，以及 AtomLinkAdapter 的 local 向量后端
+"""
+
+import gc
+import shutil
+import tempfile
+import unittest
+import weakref
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from unimem import vector_index
+from unimem.vector_index import (
+    LocalVectorClient, LocalVectorIndex, VectorPoint, VectorSearchRequest, HNSWLIB_AVAILABLE,
+)
+from unimem.adapters.atom_link_adapter import AtomLinkAdapter
+from unimem.memory_types import Memory
+
+
+def _points(vectors, offset=0):
+    return [
+        VectorPoint(id=f"p{offset + i}", vector=v, payload={"tags": ["odd" if (offset + i) % 2 else "even"]})
+        for i, v in enumerate(vectors)
+    ]
+
+
+class TestLocalVectorIndex(unittest.TestCase):
+    """LocalVectorIndex 测试"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(200, 16)).astype(np.float32)
+
+    def _check_index(self, index):
+        index.upsert(_points(self.vectors))
+        hits = index.search(self.vectors[3], limit=3)
+        self.assertEqual(hits[0].id, "p3")
+        self.assertAlmostEqual(hits[0].score, 1.0, places=2)
+        self.assertGreaterEqual(hits[0].score, hits[1].score)
+
+    def test_flat_and_quantized(self):
+        for quantization in (None, "float16", "int8"):
+            with self.subTest(quantization=quantization):
+                self._check_index(LocalVectorIndex(quantization=quantization))
+
+    @unittest.skipUnless(HNSWLIB_AVAILABLE, "hnswlib not installed")
+    def test_hnsw(self):
+        index = LocalVectorIndex(index_type="hnsw")
+        self._check_index(index)
+        index.delete(["p3"])
+        self.assertNotEqual(index.search(self.vectors[3], limit=1)[0].id, "p3")
+
+    def test_delete_swaps_last_row(self):
+        index = LocalVectorIndex()
+        index.upsert(_points(self.vectors[:3]))
+        self.assertEqual(index.delete(["p0", "missing"]), 1)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search(self.vectors[2], limit=1)[0].id, "p2")
+        self.assertEqual([r.id for r in index.retrieve(["p0", "p1"])], ["p1"])
+
+    def test_update_replaces_vector_and_payload(self):
+        index = LocalVectorIndex()
+        index.upsert(_points(self.vectors[:2]))
+        index.upsert([VectorPoint(id="p0", vector=self.vectors[1], payload={"tags": ["new"]})])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.retrieve(["p0"])[0].payload, {"tags": ["new"]})
+
+    def test_duplicate_ids_in_one_batch_keep_last(self):
+        for index_type in ("flat", "hnsw"):
+            if index_type == "hnsw" and not HNSWLIB_AVAILABLE:
+                continue
+            with self.subTest(index_type=index_type):
+                index = LocalVectorIndex(index_type=index_type)
+                index.upsert(_points(self.vectors[:3]))
+                written = index.upsert([
+                    VectorPoint(id="p0", vector=self.vectors[5], payload={"tags": ["first"]}),
+                    VectorPoint(id="p9", vector=self.vectors[9]),
+                    VectorPoint(id="p0", vector=self.vectors[7], payload={"tags": ["last"]}),
+                ])
+                self.assertEqual(written, 2)
+                self.assertEqual(len(index), 4)
+                self.assertEqual(index.retrieve(["p0"])[0].payload, {"tags": ["last"]})
+                self.assertEqual(index.search(self.vectors[7], limit=1)[0].id, "p0")
+                self.assertNotEqual(index.search(self.vectors[5], limit=1)[0].id, "p0")
+
+    def test_payload_filter(self):
+        index = LocalVectorIndex()
+        index.upsert(_points(self.vectors[:10]))
+        hits = index.search(self.vectors[3], limit=5, query_filter={"tags": "even"})
+        self.assertTrue(hits)
+        self.assertTrue(all(int(h.id[1:]) % 2 == 0 for h in hits))
+
+    def test_search_batch_matches_search(self):
+        for quantization, index_type in ((None, "flat"), ("int8", "flat"), (None, "hnsw")):
+            if index_type == "hnsw" and not HNSWLIB_AVAILABLE:
+                continue
+            with self.subTest(quantization=quantization, index_type=index_type):
+                index = LocalVectorIndex(quantization=quantization, index_type=index_type)
+                index.upsert(_points(self.vectors))
+                queries = [self.vectors[3], np.zeros(16), self.vectors[7]]
+                batch = index.search_batch(queries, limit=4)
+                self.assertEqual(batch[1], [])
+                for query, hits in zip((queries[0], queries[2]), (batch[0], batch[2])):
+                    self.assertEqual([h.id for h in hits], [h.id for h in index.search(query, limit=4)])
+
+    def test_client_search_batch_with_filter(self):
+        client = LocalVectorClient()
+        client.upsert("memories", _points(self.vectors[:10]))
+        results = client.search_batch("memories", [
+            VectorSearchRequest(vector=self.vectors[3], limit=2),
+            VectorSearchRequest(vector=self.vectors[3], limit=5, filter={"tags": "even"}),
+        ])
+        self.assertEqual(results[0][0].id, "p3")
+        self.assertEqual(len(results[0]), 2)
+        self.assertTrue(all(int(h.id[1:]) % 2 == 0 for h in results[1]))
+
+    def test_dimension_mismatch(self):
+        index = LocalVectorIndex(dimension=16)
+        with self.assertRaises(ValueError):
+            index.upsert([VectorPoint(id="x", vector=[1.0, 0.0])])
+
+
+class TestLocalVectorClientPersistence(unittest.TestCase):
+    """LocalVectorClient 持久化测试"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_reload_from_disk(self):
+        vectors = np.eye(4, dtype=np.float32)
+        client = LocalVectorClient(path=self.tmpdir, quantization="int8", autosave_every=0)
+        client.upsert("memories", _points(vectors))
+        client.delete("memories", ["p1"])
+        client.flush()
+
+        reloaded = LocalVectorClient(path=self.tmpdir, quantization="int8")
+        self.assertEqual(reloaded.count("memories"), 3)
+        self.assertEqual(reloaded.search("memories", vectors[2], limit=1)[0].id, "p2")
+        # mmap 加载后仍可写入
+        reloaded.upsert("memories", [VectorPoint(id="p9", vector=[1.0, 1.0, 0.0, 0.0])])
+        self.assertEqual(reloaded.count("memories"), 4)
+
+    def test_exit_flush_tracks_clients_weakly(self):
+        client = LocalVectorClient(path=self.tmpdir, autosave_every=0)
+        client.upsert("memories", _points(np.eye(4, dtype=np.float32)))
+        self.assertIn(client, vector_index._open_clients)
+
+        vector_index._flush_open_clients()
+        self.assertEqual(LocalVectorClient(path=self.tmpdir).count("memories"), 4)
+
+        client.close()
+        self.assertNotIn(client, vector_index._open_clients)
+        # 未关闭的客户端也不会因退出钩子而无法回收
+        transient = weakref.ref(LocalVectorClient(path=self.tmpdir))
+        gc.collect()
+        self.assertIsNone(transient())
+
+
+class TestAtomLinkAdapterLocalBackend(unittest.TestCase):
+    """AtomLinkAdapter local 向量后端测试"""
+
+    def setUp(self):
+        self.adapter = AtomLinkAdapter(config={"vector_backend": "memory", "embedding_dimension": 3})
+        self.adapter.initialize()
+        # 用确定性的嵌入替代真实模型
+        vectors = {"林默": [1.0, 0.0, 0.0], "苏晴": [0.0, 1.0, 0.0]}
+        self.adapter.embedding_model = MagicMock()
+        self.adapter._get_embedding = lambda text, use_cache=True: next(
+            (v for k, v in vectors.items() if k in text), [0.0, 0.0, 1.0]
+        )
+        self.adapter._available = True
+
+    def test_add_search_delete(self):
+        self.assertIsInstance(self.adapter.qdrant_client, LocalVectorClient)
+        for memory_id, content in (("mem1", "林默出场"), ("mem2", "苏晴出场")):
+            memory = Memory(id=memory_id, content=content, timestamp=datetime.now())
+            self.assertTrue(self.adapter.add_memory_to_vector_store(memory))
+
+        results = self.adapter._search_similar_memories("林默", top_k=1)
+        self.assertEqual([m.id for m in results], ["mem1"])
+
+        self.assertTrue(self.adapter.delete_memory_from_vector_store("mem1"))
+        results = self.adapter._search_similar_memories("林默", top_k=2)
+        self.assertEqual([m.id for m in results], ["mem2"])
+
+    def test_find_related_memories_batch(self):
+        memories = {}
+        for memory_id, content in (("mem1", "林默出场"), ("mem2", "苏晴出场"), ("mem3", "林默拔剑")):
+            memories[memory_id] = Memory(id=memory_id, content=content, timestamp=datetime.now())
+            self.adapter.add_memory_to_vector_store(memories[memory_id])
+        self.adapter._get_embeddings_batch = lambda texts, use_cache=True: [self.adapter._get_embedding(t) for t in texts]
+        self.adapter.qdrant_client.search = MagicMock(side_effect=AssertionError("per-query search"))
+
+        memories["mem2"].links = {"mem3"}
+        related = self.adapter.find_related_memories_batch([memories["mem1"], memories["mem2"]], top_k=1)
+        self.assertEqual([[m.id for m in r] for r in related], [["mem3"], ["mem3"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+UniMem 文本词项切分
+
+全文索引和倒排索引共用的 CJK 感知切分规则，供 sqlite_graph（FTS5 词项）、
+ltm_write_behind（待写入记忆的文本匹配）和 storage.hierarchical.content_index（层级倒排索引）使用。
+
+设计特点：
+- 中日韩字符连续段作为一个切分单元，其他文本按词（字母数字）切分，统一小写
+- bigram_terms 与 Neo4j cjk 分析器一致：中日韩文本取重叠二元组，单字保留原样
+"""
+
+import re
+from typing import List
+
+# 中日韩字符（平假名/片假名、CJK 扩展 A、CJK 统一汉字、谚文音节、CJK 兼容汉字）
+CJK_CHARS = "぀-ヿ㐀-䶿一-鿿가-힯豈-﫿"
+TOKEN_PATTERN = re.compile(rf"[{CJK_CHARS}]+|[^\W_{CJK_CHARS}]+")
+CJK_RUN = re.compile(rf"[{CJK_CHARS}]+")
+
+
+def split_tokens(text: str) -> List[str]:
+    """
+    切分为小写的切分单元（中日韩字符连续段或单词）
+
+    Args:
+        text: 文本
+
+    Returns:
+        切分单元列表
+    """
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def is_cjk(token: str) -> bool:
+    """切分单元是否为中日韩字符段"""
+    return CJK_RUN.fullmatch(token) is not None
+
+
+def bigram_terms(text: str) -> List[str]:
+    """
+    切分全文索引词项（与 Neo4j cjk 分析器一致：中日韩文本取重叠二元组，其他按词小写）
+
+    Args:
+        text: 文本
+
+    Returns:
+        词项列表
+    """
+    terms = []
+    for token in split_tokens(text):
+        if is_cjk(token) and len(token) > 1:
+            terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.append(token)
+    return terms
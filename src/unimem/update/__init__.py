@@ -5,9 +5,10 @@
 """
 
 from .update_manager import UpdateManager
-from .ripple_effect import RippleEffectUpdater
+from .ripple_effect import RippleEffectUpdater, RippleWorker
 
 __all__ = [
     "UpdateManager",
     "RippleEffectUpdater",
+    "RippleWorker",
 ]
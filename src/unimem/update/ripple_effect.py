@@ -6,7 +6,10 @@
 设计特点：
 - 多层传播：支持多层涟漪传播（wave1, wave2, wave3）
 - 优先级控制：不同层级的更新有不同的优先级
-- 异步处理：弱相关节点异步处理，不阻塞主流程
+- 异步处理：RippleWorker 在后台线程中传播，retain 只负责提交；
+  时间窗口内同一记忆的多次触发合并为一次，多条触发合并为一批传播
+- 批量检索：每一波的相关记忆查找合并为一次多向量检索（find_related_memories_batch）
+- 工作量上限：每次触发最多涉及 max_nodes_per_trigger 个节点
 - 衰减机制：使用衰减因子控制传播强度
 - 错误处理：单个节点更新失败不影响整体流程
 
@@ -18,10 +21,15 @@
 - 参数验证和输入检查
 - 统一异常处理
 - 关键参数保护
+- 队列深度、排队延迟等统计
 """
 
+import time
 import logging
-from typing import List, Set, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set, Optional, Tuple
 
 from ..memory_types import Memory, Entity, Relation
 from ..adapters import GraphAdapter, AtomLinkAdapter, UpdateAdapter
@@ -30,6 +38,24 @@ from ..adapters.base import AdapterError, AdapterConfigurationError
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class RippleTrigger:
+    """一次涟漪触发（中心记忆及其实体、关系、链接）"""
+    center: Memory
+    entities: List[Entity] = field(default_factory=list)
+    relations: List[Relation] = field(default_factory=list)
+    links: Set[str] = field(default_factory=set)
+    submitted_at: float = field(default_factory=time.monotonic)
+    
+    def merge(self, other: "RippleTrigger") -> None:
+        """合并同一记忆的后续触发（使用最新的记忆对象，实体/关系/链接取并集）"""
+        self.center = other.center
+        known = {entity.id for entity in self.entities}
+        self.entities.extend(entity for entity in other.entities if entity.id not in known)
+        self.relations.extend(other.relations)
+        self.links |= other.links
+
+
 class RippleEffectUpdater:
     """
     涟漪效应更新器：实现连锁更新机制
@@ -45,6 +71,7 @@ class RippleEffectUpdater:
         update_adapter: Optional[UpdateAdapter] = None,
         max_depth: int = 3,
         decay_factor: float = 0.5,
+        max_nodes_per_trigger: int = 50,
     ):
         """
         初始化涟漪效应更新器
@@ -55,6 +82,7 @@ class RippleEffectUpdater:
             update_adapter: 更新机制适配器（参考 LightMem）
             max_depth: 最大传播深度（默认 3）
             decay_factor: 衰减因子（默认 0.5，控制传播强度）
+            max_nodes_per_trigger: 每次触发最多涉及的节点数（三波合计，默认 50）
             
         Raises:
             AdapterConfigurationError: 如果参数无效
@@ -69,14 +97,23 @@ class RippleEffectUpdater:
                 f"decay_factor must be between 0.0 and 1.0, got {decay_factor}",
                 adapter_name="RippleEffectUpdater"
             )
+        if max_nodes_per_trigger < 1:
+            raise AdapterConfigurationError(
+                f"max_nodes_per_trigger must be >= 1, got {max_nodes_per_trigger}",
+                adapter_name="RippleEffectUpdater"
+            )
         
         self.graph_adapter = graph_adapter
         self.atom_link_adapter = atom_link_adapter
         self.update_adapter = update_adapter
         self.max_depth = max_depth
         self.decay_factor = decay_factor
+        self.max_nodes_per_trigger = max_nodes_per_trigger
         
-        logger.info(f"RippleEffectUpdater initialized (max_depth={max_depth}, decay_factor={decay_factor})")
+        logger.info(
+            f"RippleEffectUpdater initialized (max_depth={max_depth}, decay_factor={decay_factor}, "
+            f"max_nodes_per_trigger={max_nodes_per_trigger})"
+        )
     
     def trigger_ripple(
         self,
@@ -84,9 +121,9 @@ class RippleEffectUpdater:
         entities: List[Entity],
         relations: List[Relation],
         links: Set[str],
-    ) -> None:
+    ) -> Dict[str, int]:
         """
-        触发涟漪效应更新
+        触发涟漪效应更新（同步执行）
         
         当新记忆添加时，触发涟漪效应，更新相关的记忆和实体。
         支持多层传播，不同层级有不同的优先级和更新策略。
@@ -97,37 +134,74 @@ class RippleEffectUpdater:
             relations: 关联的关系列表
             links: 链接的记忆ID集合
             
+        Returns:
+            各波涉及的节点数
+            
         Raises:
             AdapterError: 如果参数无效
         """
         if not center:
             raise AdapterError("center cannot be None", adapter_name="RippleEffectUpdater")
         
-        logger.info(f"Triggering ripple effect for memory {center.id}")
+        return self.propagate([RippleTrigger(
+            center=center,
+            entities=list(entities or []),
+            relations=list(relations or []),
+            links=set(links or set()),
+        )])
+    
+    def propagate(self, triggers: List[RippleTrigger]) -> Dict[str, int]:
+        """
+        对一批触发执行涟漪传播
+        
+        每一波的相关记忆查找合并为一次批量检索。工作量上限按触发分别计算：
+        节点归属于发现它的触发，每个触发三波合计最多涉及 max_nodes_per_trigger 个节点，
+        一个触发的邻居再多也不会占用同批其他触发的预算。
+        
+        Args:
+            triggers: 触发列表
+            
+        Returns:
+            各波涉及的节点数及是否达到工作量上限
+        """
+        stats = {"wave1": 0, "wave2": 0, "wave3": 0, "budget_exhausted": 0}
+        if not triggers:
+            return stats
+        
+        center_ids = ", ".join(trigger.center.id for trigger in triggers)
+        logger.info(f"Triggering ripple effect for {len(triggers)} memories: {center_ids}")
+        
+        budgets = [self.max_nodes_per_trigger] * len(triggers)
+        seen_ids: Set[str] = {trigger.center.id for trigger in triggers}
         
         try:
             # 第一层涟漪：直接相关节点（高优先级，实时更新）
-            wave1 = self._get_direct_related(center, entities or [], links or set())
+            # 每一波只做一次批量检索：结果既是本波演化的邻居，也是下一波的候选
+            wave1, owners1 = self._get_direct_related(triggers, seen_ids, budgets, stats)
+            neighbors1 = self._get_neighbors(wave1, top_k=10) if wave1 and self.max_depth >= 2 else None
             if wave1:
-                self._update_wave(wave1, priority='high')
+                self._update_wave(wave1, priority='high', neighbors=[n[:5] for n in neighbors1] if neighbors1 else None)
                 logger.debug(f"Wave 1: Updated {len(wave1)} nodes")
             else:
                 logger.debug("Wave 1: No direct related nodes found")
+            stats["wave1"] = len(wave1)
             
             # 第二层涟漪：间接相关节点（中优先级，实时更新）
-            if wave1 and self.max_depth >= 2:
-                wave2 = self._get_indirect_related(wave1, max_hops=2)
+            wave2: List[Memory] = []
+            neighbors2 = None
+            if neighbors1 and any(budgets):
+                wave2, owners2 = self._collect_new(neighbors1, owners1, seen_ids, budgets, stats)
                 if wave2:
-                    self._update_wave(wave2, priority='medium')
+                    neighbors2 = self._get_neighbors(wave2, top_k=5)
+                    self._update_wave(wave2, priority='medium', neighbors=neighbors2)
                     logger.debug(f"Wave 2: Updated {len(wave2)} nodes")
                 else:
                     logger.debug("Wave 2: No indirect related nodes found")
-            else:
-                wave2 = []
+            stats["wave2"] = len(wave2)
             
-            # 第三层涟漪：弱相关节点（低优先级，异步处理）
-            if wave2 and self.max_depth >= 3:
-                wave3 = self._get_weak_related(wave2, max_hops=3)
+            # 第三层涟漪：弱相关节点（低优先级，进入睡眠更新队列）
+            if neighbors2 and self.max_depth >= 3 and any(budgets):
+                wave3, _ = self._collect_new(neighbors2, owners2, seen_ids, budgets, stats)
                 if wave3:
                     if self.update_adapter:
                         self.update_adapter.add_to_sleep_queue(wave3)
@@ -136,158 +210,126 @@ class RippleEffectUpdater:
                         logger.warning("Update adapter not available, cannot queue wave 3")
                 else:
                     logger.debug("Wave 3: No weak related nodes found")
+                stats["wave3"] = len(wave3)
             
-            logger.info(f"Ripple effect completed for memory {center.id}")
+            logger.info(f"Ripple effect completed for {len(triggers)} memories")
+            return stats
         except Exception as e:
-            logger.error(f"Error triggering ripple effect for memory {center.id}: {e}", exc_info=True)
+            logger.error(f"Error triggering ripple effect for memories {center_ids}: {e}", exc_info=True)
             raise
     
-    def _get_direct_related(
-        self,
-        center: Memory,
-        entities: List[Entity],
-        links: Set[str],
-    ) -> List[Memory]:
+    def _find_related_many(self, memories: List[Memory], top_k: int) -> List[List[Memory]]:
         """
-        获取直接相关节点
+        批量查找相关记忆（一次多向量检索）
+        
+        适配器不支持 find_related_memories_batch 时逐条调用 find_related_memories。
+        """
+        if not memories or not self.atom_link_adapter:
+            return [[] for _ in memories]
+        find_batch = getattr(self.atom_link_adapter, "find_related_memories_batch", None)
+        if callable(find_batch):
+            results = find_batch(memories, top_k=top_k)
+            if isinstance(results, list) and len(results) == len(memories):
+                return results
+        return [self.atom_link_adapter.find_related_memories(memory, top_k=top_k) for memory in memories]
+    
+    @staticmethod
+    def _collect_new(
+        batches: List[List[Memory]],
+        owners: List[int],
+        seen_ids: Set[str],
+        budgets: List[int],
+        stats: Dict[str, int],
+    ) -> Tuple[List[Memory], List[int]]:
+        """
+        合并检索结果，跳过已涉及的记忆（更新 seen_ids）
         
-        通过实体和链接找到与中心记忆直接相关的记忆。
+        每批结果计入其来源所属触发的剩余预算，预算用尽的触发不再扩展
+        （被跳过的记忆不记入 seen_ids，仍可由其他触发收录）。
         
         Args:
-            center: 中心记忆
-            entities: 关联的实体列表
-            links: 链接的记忆ID集合
+            batches: 每个来源节点的相关记忆
+            owners: 每个来源节点所属触发的下标
+            seen_ids: 已涉及的记忆ID（会被更新）
+            budgets: 每个触发的剩余节点预算（会被更新）
+            stats: 传播统计（预算用尽时置 budget_exhausted）
             
         Returns:
-            直接相关的记忆列表
+            (新记忆列表, 每条新记忆所属触发的下标)
         """
         related: List[Memory] = []
-        seen_ids: Set[str] = {center.id}  # 避免重复添加中心记忆
-        
-        # 1. 通过网络链接适配器找到相关记忆（参考 A-Mem）
-        if self.atom_link_adapter and links:
-            try:
-                # 使用 find_related_memories 方法找到相关记忆
-                # 注意：这里使用中心记忆的链接来查找相关记忆
-                related_memories = self.atom_link_adapter.find_related_memories(center, top_k=20)
-                for memory in related_memories:
-                    if memory.id not in seen_ids:
-                        related.append(memory)
-                        seen_ids.add(memory.id)
-            except Exception as e:
-                logger.warning(f"Error finding related memories via links: {e}", exc_info=True)
-        
-        # 2. 通过图结构适配器找到相关实体对应的记忆
-        if self.graph_adapter and entities:
-            try:
-                for entity in entities:
-                    # 通过实体ID获取关联的记忆
-                    entity_memories = self.graph_adapter.get_entities_for_memory(center.id)
-                    # 注意：这里获取的是与中心记忆共享实体的其他记忆
-                    # 如果适配器支持，可以进一步扩展
-                    # 目前使用 find_related_memories 作为降级方案
-                    if self.atom_link_adapter:
-                        # 创建一个临时记忆用于查找
-                        temp_memory = Memory(
-                            id=center.id,
-                            content=center.content,
-                            timestamp=center.timestamp,
-                            entities=[entity.id],
-                        )
-                        entity_related = self.atom_link_adapter.find_related_memories(temp_memory, top_k=10)
-                        for memory in entity_related:
-                            if memory.id not in seen_ids:
-                                related.append(memory)
-                                seen_ids.add(memory.id)
-            except Exception as e:
-                logger.warning(f"Error finding related memories via entities: {e}", exc_info=True)
-        
-        return related
+        related_owners: List[int] = []
+        for memories, owner in zip(batches, owners):
+            for memory in memories or []:
+                if memory.id in seen_ids:
+                    continue
+                if budgets[owner] <= 0:
+                    stats["budget_exhausted"] = 1
+                    break
+                related.append(memory)
+                related_owners.append(owner)
+                seen_ids.add(memory.id)
+                budgets[owner] -= 1
+        return related, related_owners
     
-    def _get_indirect_related(
+    def _get_direct_related(
         self,
-        wave: List[Memory],
-        max_hops: int = 2,
-    ) -> List[Memory]:
+        triggers: List[RippleTrigger],
+        seen_ids: Set[str],
+        budgets: List[int],
+        stats: Dict[str, int],
+    ) -> Tuple[List[Memory], List[int]]:
         """
-        获取间接相关节点
+        获取直接相关节点
         
-        通过多层跳转找到间接相关的记忆。
+        通过链接和向量检索找到与中心记忆直接相关的记忆。
+        有链接或有实体（且图结构适配器可用）的中心记忆合并为一次批量检索。
         
         Args:
-            wave: 当前层的记忆列表
-            max_hops: 最大跳数
+            triggers: 触发列表
+            seen_ids: 已涉及的记忆ID（会被更新）
+            budgets: 每个触发的剩余节点预算（会被更新）
+            stats: 传播统计
             
         Returns:
-            间接相关的记忆列表
+            (直接相关的记忆列表, 每条记忆所属触发的下标)
         """
-        if not wave:
-            return []
-        
-        related: List[Memory] = []
-        seen_ids: Set[str] = set()
-        
-        # 记录当前层的所有记忆ID，避免重复
-        for memory in wave:
-            seen_ids.add(memory.id)
-        
-        # 对每个记忆，找到其相关记忆
-        for memory in wave:
-            if self.atom_link_adapter:
-                try:
-                    indirect = self.atom_link_adapter.find_related_memories(memory, top_k=10)
-                    for mem in indirect:
-                        if mem.id not in seen_ids:
-                            related.append(mem)
-                            seen_ids.add(mem.id)
-                except Exception as e:
-                    logger.warning(f"Error finding indirect related memories for {memory.id}: {e}", exc_info=True)
-        
-        return related
+        owners = [
+            i for i, trigger in enumerate(triggers)
+            if trigger.links or (self.graph_adapter and trigger.entities)
+        ]
+        if not owners or not self.atom_link_adapter:
+            return [], []
+        try:
+            batches = self._find_related_many([triggers[i].center for i in owners], top_k=20)
+            return self._collect_new(batches, owners, seen_ids, budgets, stats)
+        except Exception as e:
+            logger.warning(f"Error finding direct related memories: {e}", exc_info=True)
+            return [], []
     
-    def _get_weak_related(
-        self,
-        wave: List[Memory],
-        max_hops: int = 3,
-    ) -> List[Memory]:
+    def _get_neighbors(self, wave: List[Memory], top_k: int) -> List[List[Memory]]:
         """
-        获取弱相关节点
-        
-        类似间接相关，但使用更大的跳数，用于异步处理。
+        一次批量检索一波节点的相关记忆
         
         Args:
             wave: 当前层的记忆列表
-            max_hops: 最大跳数（默认 3）
+            top_k: 每条记忆的返回数量
             
         Returns:
-            弱相关的记忆列表
+            每条记忆的相关记忆列表（失败时为空列表）
         """
-        # 使用更大的跳数，但实际实现与间接相关类似
-        # 可以通过调整 top_k 参数来控制弱相关的数量
-        if not wave:
-            return []
-        
-        related: List[Memory] = []
-        seen_ids: Set[str] = set()
-        
-        for memory in wave:
-            seen_ids.add(memory.id)
-        
-        for memory in wave:
-            if self.atom_link_adapter:
-                try:
-                    # 使用较小的 top_k，只获取最相关的弱相关记忆
-                    weak = self.atom_link_adapter.find_related_memories(memory, top_k=5)
-                    for mem in weak:
-                        if mem.id not in seen_ids:
-                            related.append(mem)
-                            seen_ids.add(mem.id)
-                except Exception as e:
-                    logger.warning(f"Error finding weak related memories for {memory.id}: {e}", exc_info=True)
-        
-        return related
+        try:
+            return self._find_related_many(wave, top_k=top_k)
+        except Exception as e:
+            logger.warning(f"Error finding related memories for wave of {len(wave)}: {e}", exc_info=True)
+            return [[] for _ in wave]
     
-    def _update_wave(self, wave: List[Memory], priority: str = 'medium') -> None:
+    def _update_wave(
+        self,
+        wave: List[Memory],
+        priority: str = 'medium',
+        neighbors: Optional[List[List[Memory]]] = None,
+    ) -> None:
         """
         更新一波节点
         
@@ -296,6 +338,7 @@ class RippleEffectUpdater:
         Args:
             wave: 要更新的记忆列表
             priority: 优先级（high/medium/low）
+            neighbors: 每个节点的相关记忆（已批量检索时传入，否则在此批量检索）
         """
         if not wave:
             return
@@ -303,11 +346,13 @@ class RippleEffectUpdater:
         updated_count = 0
         error_count = 0
         
-        for node in wave:
+        if neighbors is None:
+            neighbors = self._get_neighbors(wave, top_k=5) if self.atom_link_adapter else [[] for _ in wave]
+        
+        for node, related in zip(wave, neighbors):
             try:
                 # 网络链接适配器：演化记忆（参考 A-Mem）
                 if self.atom_link_adapter:
-                    related = self.atom_link_adapter.find_related_memories(node, top_k=5)
                     evolved = self.atom_link_adapter.evolve_memory(
                         memory=node,
                         related=related,
@@ -333,3 +378,208 @@ class RippleEffectUpdater:
         
         logger.debug(f"Wave update completed: {updated_count} updated, {error_count} errors (priority: {priority})")
 
+
+
+class RippleWorker:
+    """
+    涟漪传播后台工作线程
+    
+    submit 立即返回；同一记忆在合并窗口内的多次触发合并为一次，
+    窗口结束后最多 max_batch_size 条触发合并为一批交给 RippleEffectUpdater.propagate。
+    """
+    
+    def __init__(
+        self,
+        updater: RippleEffectUpdater,
+        coalesce_window: float = 0.5,
+        max_batch_size: int = 16,
+        start: bool = True,
+    ):
+        """
+        初始化工作线程
+        
+        Args:
+            updater: 涟漪效应更新器
+            coalesce_window: 合并窗口（秒，默认 0.5）：最早的触发等待该时间后才传播
+            max_batch_size: 单批最多触发数（默认 16）
+            start: 是否立即启动后台线程
+        """
+        self.updater = updater
+        self.coalesce_window = max(float(coalesce_window), 0.0)
+        self.max_batch_size = max(int(max_batch_size), 1)
+        
+        self._pending: "OrderedDict[str, RippleTrigger]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._in_flight = 0
+        self._flushing = 0  # 正在 flush 的调用数（期间跳过合并窗口）
+        
+        # 统计信息
+        self._submitted = 0
+        self._coalesced = 0
+        self._processed = 0
+        self._batches = 0
+        self._errors = 0
+        self._nodes = 0
+        self._budget_exhausted = 0
+        self._lag_total = 0.0
+        self._max_lag = 0.0
+        
+        if start:
+            self.start()
+    
+    def start(self) -> None:
+        """启动后台线程"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("RippleWorker is shut down")
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="unimem-ripple", daemon=True)
+                self._worker.start()
+    
+    def submit(
+        self,
+        center: Memory,
+        entities: Optional[List[Entity]] = None,
+        relations: Optional[List[Relation]] = None,
+        links: Optional[Set[str]] = None,
+    ) -> None:
+        """
+        提交一次触发（立即返回）
+        
+        Args:
+            center: 中心记忆
+            entities: 关联的实体列表
+            relations: 关联的关系列表
+            links: 链接的记忆ID集合
+            
+        Raises:
+            AdapterError: 如果 center 为空或工作线程已关闭
+        """
+        if not center:
+            raise AdapterError("center cannot be None", adapter_name="RippleWorker")
+        trigger = RippleTrigger(
+            center=center,
+            entities=list(entities or []),
+            relations=list(relations or []),
+            links=set(links or set()),
+        )
+        with self._condition:
+            if self._closed:
+                raise AdapterError("RippleWorker is shut down", adapter_name="RippleWorker")
+            self._submitted += 1
+            existing = self._pending.get(center.id)
+            if existing is not None:
+                existing.merge(trigger)
+                self._coalesced += 1
+            else:
+                self._pending[center.id] = trigger
+            self._condition.notify_all()
+    
+    def _take_batch(self) -> Optional[List[RippleTrigger]]:
+        """等待合并窗口结束后取出一批触发；关闭且队列为空时返回 None"""
+        with self._condition:
+            while True:
+                if not self._pending:
+                    if self._closed:
+                        return None
+                    self._condition.wait()
+                    continue
+                oldest = next(iter(self._pending.values()))
+                remaining = oldest.submitted_at + self.coalesce_window - time.monotonic()
+                if remaining > 0 and not self._closed and not self._flushing:
+                    self._condition.wait(timeout=remaining)
+                    continue
+                batch = []
+                while self._pending and len(batch) < self.max_batch_size:
+                    batch.append(self._pending.popitem(last=False)[1])
+                self._in_flight = len(batch)
+                return batch
+    
+    def _run(self) -> None:
+        """后台线程：按批传播"""
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            error = False
+            result: Dict[str, int] = {}
+            try:
+                result = self.updater.propagate(batch) or {}
+            except Exception as e:
+                error = True
+                logger.error(f"Ripple propagation of {len(batch)} triggers failed: {e}")
+            with self._condition:
+                self._in_flight = 0
+                self._batches += 1
+                self._processed += len(batch)
+                self._errors += 1 if error else 0
+                self._nodes += sum(result.get(wave, 0) for wave in ("wave1", "wave2", "wave3"))
+                self._budget_exhausted += result.get("budget_exhausted", 0)
+                for trigger in batch:
+                    lag = started - trigger.submitted_at
+                    self._lag_total += lag
+                    self._max_lag = max(self._max_lag, lag)
+                self._condition.notify_all()
+    
+    def pending(self) -> int:
+        """排队中和传播中的触发数"""
+        with self._condition:
+            return len(self._pending) + self._in_flight
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即传播所有排队的触发（跳过合并窗口）并等待完成
+        
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+            
+        Returns:
+            是否全部处理完
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(timeout=remaining)
+                return True
+            finally:
+                self._flushing -= 1
+    
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """停止后台线程（排队的触发会被处理完）"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._condition.notify_all()
+        if worker is not None and wait:
+            worker.join(timeout)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息（队列深度、排队延迟等）"""
+        with self._condition:
+            now = time.monotonic()
+            oldest = next(iter(self._pending.values()), None)
+            return {
+                "queue_depth": len(self._pending),
+                "in_flight": self._in_flight,
+                "lag_seconds": now - oldest.submitted_at if oldest is not None else 0.0,
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "processed": self._processed,
+                "batches": self._batches,
+                "errors": self._errors,
+                "nodes": self._nodes,
+                "budget_exhausted": self._budget_exhausted,
+                "avg_lag_ms": self._lag_total / self._processed * 1000.0 if self._processed else 0.0,
+                "max_lag_ms": self._max_lag * 1000.0,
+            }
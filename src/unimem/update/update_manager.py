@@ -4,7 +4,8 @@
 管理涟漪效应和睡眠更新
 
 设计特点：
-- 涟漪效应更新：新记忆触发的连锁更新机制（参考 LightMem + A-Mem）
+- 涟漪效应更新：新记忆触发的连锁更新机制（参考 LightMem + A-Mem）；
+  async 模式下由 RippleWorker 在后台合并、批量传播，不阻塞 retain
 - 睡眠更新：批量处理非关键记忆的优化（参考 LightMem）
 - 统一接口：提供统一的更新接口，简化调用
 - 错误处理：完善的错误处理和降级策略
@@ -15,15 +16,18 @@
 """
 
 import logging
-from typing import List, Set, Optional
+from typing import Any, Dict, List, Set, Optional
 
 from ..memory_types import Memory, Entity, Relation
 from ..adapters import GraphAdapter, AtomLinkAdapter, UpdateAdapter
-from ..adapters.base import AdapterError, AdapterNotAvailableError
-from .ripple_effect import RippleEffectUpdater
+from ..adapters.base import AdapterError, AdapterNotAvailableError, AdapterConfigurationError
+from .ripple_effect import RippleEffectUpdater, RippleWorker
 
 logger = logging.getLogger(__name__)
 
+# 涟漪传播模式：sync 在调用线程中传播；async 提交给后台 RippleWorker
+RIPPLE_MODES = ("sync", "async")
+
 
 class UpdateManager:
     """
@@ -43,6 +47,7 @@ class UpdateManager:
         graph_adapter: Optional[GraphAdapter] = None,
         atom_link_adapter: Optional[AtomLinkAdapter] = None,
         update_adapter: Optional[UpdateAdapter] = None,
+        ripple_config: Optional[Dict[str, Any]] = None,
     ):
         """
         初始化更新管理器
@@ -51,18 +56,41 @@ class UpdateManager:
             graph_adapter: 图结构适配器（预留）
             atom_link_adapter: 原子链接适配器（参考 A-Mem）
             update_adapter: 更新机制适配器（参考 LightMem + A-Mem）
+            ripple_config: 涟漪效应配置（mode / max_depth / decay_factor / max_nodes_per_trigger /
+                coalesce_window / max_batch_size），默认同步传播
+                
+        Raises:
+            AdapterConfigurationError: 如果涟漪传播模式无效
         """
         self.graph_adapter = graph_adapter
         self.atom_link_adapter = atom_link_adapter
         self.update_adapter = update_adapter
         
+        ripple_config = ripple_config or {}
+        self.ripple_mode = str(ripple_config.get("mode", "sync")).lower()
+        if self.ripple_mode not in RIPPLE_MODES:
+            raise AdapterConfigurationError(
+                f"Invalid ripple mode: {self.ripple_mode} (must be one of {RIPPLE_MODES})",
+                adapter_name="UpdateManager"
+            )
+        
         self.ripple_updater = RippleEffectUpdater(
             graph_adapter=graph_adapter,
             atom_link_adapter=atom_link_adapter,
             update_adapter=update_adapter,
+            max_depth=int(ripple_config.get("max_depth", 3)),
+            decay_factor=float(ripple_config.get("decay_factor", 0.5)),
+            max_nodes_per_trigger=int(ripple_config.get("max_nodes_per_trigger", 50)),
         )
+        self.ripple_worker: Optional[RippleWorker] = None
+        if self.ripple_mode == "async":
+            self.ripple_worker = RippleWorker(
+                self.ripple_updater,
+                coalesce_window=float(ripple_config.get("coalesce_window", 0.5)),
+                max_batch_size=int(ripple_config.get("max_batch_size", 16)),
+            )
         
-        logger.info("UpdateManager initialized")
+        logger.info(f"UpdateManager initialized (ripple mode: {self.ripple_mode})")
     
     def trigger_ripple(
         self,
@@ -75,6 +103,7 @@ class UpdateManager:
         触发涟漪效应更新
         
         当新记忆添加时，触发涟漪效应更新，更新相关的记忆和实体。
+        async 模式下只提交给后台工作线程，立即返回。
         
         Args:
             center: 中心记忆（新记忆）
@@ -92,6 +121,10 @@ class UpdateManager:
             raise AdapterError("center cannot be None", adapter_name="UpdateManager")
         
         try:
+            if self.ripple_worker is not None:
+                self.ripple_worker.submit(center, entities, relations, links)
+                logger.debug(f"Ripple effect queued for memory {center.id}")
+                return True
             self.ripple_updater.trigger_ripple(
                 center=center,
                 entities=entities or [],
@@ -104,6 +137,32 @@ class UpdateManager:
             logger.error(f"Error triggering ripple effect for memory {center.id}: {e}", exc_info=True)
             return False
     
+    def flush_ripples(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待排队的涟漪传播完成（同步模式下直接返回 True）
+        
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+            
+        Returns:
+            是否全部处理完
+        """
+        if self.ripple_worker is None:
+            return True
+        return self.ripple_worker.flush(timeout=timeout)
+    
+    def get_ripple_statistics(self) -> Dict[str, Any]:
+        """获取涟漪传播统计（async 模式下包含队列深度和排队延迟）"""
+        stats: Dict[str, Any] = {"mode": self.ripple_mode}
+        if self.ripple_worker is not None:
+            stats.update(self.ripple_worker.get_statistics())
+        return stats
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """停止涟漪传播工作线程（排队的触发会被处理完）"""
+        if self.ripple_worker is not None:
+            self.ripple_worker.shutdown(wait=wait)
+    
     def add_to_sleep_queue(self, memories: List[Memory]) -> bool:
         """
         添加到睡眠更新队列
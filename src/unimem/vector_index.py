@@ -0,0 +1,788 @@
+"""
+UniMem 本地向量索引
+
+进程内的向量存储，作为 Qdrant 的本地替代（单机部署、离线测试）。
+LocalVectorClient 实现 AtomLinkAdapter 使用的 Qdrant 客户端接口子集
+（upsert / search / search_batch / retrieve / delete / count，支持 payload 过滤），
+适配器无需区分后端。
+
+设计特点：
+- 扁平索引（flat）：向量归一化后存放在连续 NumPy 矩阵中，一次矩阵乘法完成余弦相似度计算；
+  批量检索把多个查询向量拼成矩阵，一次矩阵乘法完成全部查询
+- 可选量化：float16（内存减半）或 int8（按向量对称缩放，内存降为 1/4）
+- HNSW 模式：安装 hnswlib 时可用，适用于大规模集合；未安装时回退到扁平索引
+- 删除使用末行交换（O(1)），不留空洞
+- 持久化：向量矩阵保存为 .npy，加载时以写时复制（copy-on-write）方式 mmap，启动无需全量读入
+
+工业级特性：
+- 线程安全（每个集合一把锁）
+- 定期自动保存 + 进程退出时保存（模块级单个 atexit 钩子，弱引用跟踪未关闭的客户端）
+- 统计信息
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 支持的量化方式
+QUANTIZATIONS = (None, "float16", "int8")
+# 支持的索引类型
+INDEX_TYPES = ("flat", "hnsw")
+
+# 需要在进程退出时保存的客户端（弱引用，不阻止回收；close() 后移除）
+_open_clients: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def _flush_open_clients() -> None:
+    """进程退出时保存所有未关闭的持久化客户端"""
+    for client in list(_open_clients):
+        client.flush()
+
+
+atexit.register(_flush_open_clients)
+
+
+@dataclass
+class VectorPoint:
+    """向量点（与 qdrant_client.models.PointStruct 字段一致）"""
+    id: Any
+    vector: Union[Sequence[float], np.ndarray]
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class VectorSearchRequest:
+    """批量检索中的单个查询（与 qdrant_client.models.SearchRequest 字段一致）"""
+    vector: Union[Sequence[float], np.ndarray]
+    limit: int = 10
+    filter: Any = None
+    with_payload: bool = True
+    score_threshold: Optional[float] = None
+
+
+@dataclass
+class ScoredVectorPoint:
+    """检索结果点（与 qdrant_client 的 ScoredPoint / Record 字段一致）"""
+    id: str
+    score: float
+    payload: Optional[Dict[str, Any]] = None
+    vector: Optional[List[float]] = None
+
+
+def _matches_filter(payload: Dict[str, Any], query_filter: Any) -> bool:
+    """
+    判断 payload 是否满足过滤条件
+
+    支持两种形式：
+    - 字典：{字段: 值} 或 {字段: [候选值, ...]}，所有字段都需满足；
+      payload 字段为列表时按包含关系匹配
+    - Qdrant Filter：仅支持 must 中的 FieldCondition（MatchValue / MatchAny）
+    """
+    if query_filter is None:
+        return True
+    if not isinstance(query_filter, dict):
+        conditions = {}
+        for condition in getattr(query_filter, "must", None) or []:
+            match = getattr(condition, "match", None)
+            if hasattr(match, "any"):
+                conditions[condition.key] = list(match.any)
+            else:
+                conditions[condition.key] = getattr(match, "value", None)
+        query_filter = conditions
+
+    for key, expected in query_filter.items():
+        actual = payload.get(key)
+        candidates = expected if isinstance(expected, (list, tuple, set)) else [expected]
+        if isinstance(actual, (list, tuple, set)):
+            if not any(value in actual for value in candidates):
+                return False
+        elif actual not in candidates:
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    """
+    单个集合的本地向量索引
+
+    相似度为余弦相似度（与 Qdrant 集合的 Distance.COSINE 一致）。
+    """
+
+    # 分块计算相似度的行数（量化矩阵反量化时限制临时内存）
+    CHUNK_ROWS = 65536
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        quantization: Optional[str] = None,
+        index_type: str = "flat",
+        path: Optional[str] = None,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
+    ):
+        """
+        初始化向量索引
+
+        Args:
+            dimension: 向量维度（None 时在首次写入时确定）
+            quantization: 量化方式（None / "float16" / "int8"）
+            index_type: 索引类型（"flat" / "hnsw"）
+            path: 持久化目录（None 表示仅内存）
+            hnsw_m: HNSW 每个节点的连接数
+            hnsw_ef_construction: HNSW 构建时的候选集大小
+            hnsw_ef_search: HNSW 检索时的候选集大小
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Invalid quantization: {quantization}. Must be one of {QUANTIZATIONS}")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Invalid index_type: {index_type}. Must be one of {INDEX_TYPES}")
+        if index_type == "hnsw" and not HNSWLIB_AVAILABLE:
+            logger.warning("hnswlib not available, falling back to flat index")
+            index_type = "flat"
+
+        self.dimension = int(dimension) if dimension else None
+        self.quantization = quantization
+        self.index_type = index_type
+        self.path = path
+        self.hnsw_m = int(hnsw_m)
+        self.hnsw_ef_construction = int(hnsw_ef_construction)
+        self.hnsw_ef_search = int(hnsw_ef_search)
+
+        self._lock = threading.RLock()
+        self._size = 0
+        self._vectors: Optional[np.ndarray] = None  # capacity x dimension
+        self._scales: Optional[np.ndarray] = None  # int8 量化的每行缩放系数
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}  # 点 ID -> 行号
+
+        # HNSW 标签在删除/交换行时保持不变
+        self._hnsw = None
+        self._labels: List[int] = []
+        self._label_rows: Dict[int, int] = {}
+        self._next_label = 0
+
+        self._dirty = False
+        self._stats = {"upserts": 0, "deletes": 0, "searches": 0}
+
+        if path and os.path.exists(os.path.join(path, "meta.json")):
+            self._load()
+
+    @property
+    def _dtype(self):
+        return {None: np.float32, "float16": np.float16, "int8": np.int8}[self.quantization]
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ---- 向量编码 ----
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        """按行归一化（零向量保持为零）"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return vectors / norms
+
+    def _encode(self, vectors: np.ndarray):
+        """量化已归一化的向量，返回 (存储矩阵, 缩放系数)"""
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0.0] = 1.0
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(self._dtype), None
+
+    def _decode(self, start: int, end: int) -> np.ndarray:
+        """反量化指定行区间为 float32"""
+        block = self._vectors[start:end].astype(np.float32)
+        if self.quantization == "int8":
+            block *= self._scales[start:end, None]
+        return block
+
+    def _ensure_capacity(self, needed: int) -> None:
+        """容量不足时按倍数扩容（mmap 加载的矩阵在此时复制到内存）"""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        vectors = np.zeros((new_capacity, self.dimension), dtype=self._dtype)
+        if self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        if self.quantization == "int8":
+            scales = np.ones(new_capacity, dtype=np.float32)
+            if self._size:
+                scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+
+    def _init_hnsw(self, capacity: int):
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        index.init_index(max_elements=max(capacity, 64), ef_construction=self.hnsw_ef_construction, M=self.hnsw_m)
+        index.set_ef(self.hnsw_ef_search)
+        return index
+
+    def _build_hnsw(self) -> None:
+        """根据当前向量重建 HNSW 图"""
+        self._hnsw = self._init_hnsw(self._size * 2)
+        if self._size:
+            self._hnsw.add_items(self._decode(0, self._size), np.asarray(self._labels, dtype=np.int64))
+
+    # ---- 写入 ----
+
+    def upsert(self, points: Iterable[Any]) -> int:
+        """
+        写入或更新向量点
+
+        Args:
+            points: 具有 id / vector / payload 属性的点（VectorPoint 或 PointStruct）
+
+        Returns:
+            写入的点数（同一批次内重复的 ID 只保留最后一次出现，按一个点计）
+        """
+        # 同一 ID 在批次内重复时以最后一次为准，否则 HNSW 会对尚未加入索引的标签执行 mark_deleted
+        points = list({str(point.id): point for point in points}.values())
+        if not points:
+            return 0
+        vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("All vectors must have the same dimension")
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = int(vectors.shape[1])
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension mismatch: expected {self.dimension}, got {vectors.shape[1]}")
+
+            normalized = self._normalize(vectors)
+            encoded, scales = self._encode(normalized)
+            self._ensure_capacity(self._size + len(points))
+            if self.index_type == "hnsw" and self._hnsw is None:
+                self._build_hnsw()
+
+            new_labels = []
+            for i, point in enumerate(points):
+                point_id = str(point.id)
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(dict(point.payload or {}))
+                    self._labels.append(-1)
+                else:
+                    self._payloads[row] = dict(point.payload or {})
+                    if self._hnsw is not None:
+                        self._hnsw.mark_deleted(self._labels[row])
+                        del self._label_rows[self._labels[row]]
+                self._vectors[row] = encoded[i]
+                if scales is not None:
+                    self._scales[row] = scales[i]
+
+                label = self._next_label
+                self._next_label += 1
+                self._labels[row] = label
+                self._label_rows[label] = row
+                new_labels.append(label)
+
+            if self._hnsw is not None:
+                # 已标记删除的节点仍占用容量
+                needed = self._hnsw.get_current_count() + len(new_labels)
+                if needed > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(max(needed, self._hnsw.get_max_elements() * 2))
+                self._hnsw.add_items(normalized, np.asarray(new_labels, dtype=np.int64))
+
+            self._stats["upserts"] += len(points)
+            self._dirty = True
+        return len(points)
+
+    def delete(self, point_ids: Iterable[Any]) -> int:
+        """
+        删除向量点（末行交换到被删位置，O(1)）
+
+        Returns:
+            实际删除的点数
+        """
+        removed = 0
+        with self._lock:
+            for point_id in point_ids:
+                row = self._rows.pop(str(point_id), None)
+                if row is None:
+                    continue
+                label = self._labels[row]
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(label)
+                self._label_rows.pop(label, None)
+
+                last = self._size - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    if self._scales is not None:
+                        self._scales[row] = self._scales[last]
+                    self._ids[row] = self._ids[last]
+                    self._payloads[row] = self._payloads[last]
+                    self._labels[row] = self._labels[last]
+                    self._rows[self._ids[row]] = row
+                    self._label_rows[self._labels[row]] = row
+                self._ids.pop()
+                self._payloads.pop()
+                self._labels.pop()
+                self._size -= 1
+                removed += 1
+            self._stats["deletes"] += removed
+            if removed:
+                self._dirty = True
+        return removed
+
+    # ---- 读取 ----
+
+    def _flat_scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """计算查询与指定行（None 表示全部）的余弦相似度"""
+        if rows is not None:
+            block = self._vectors[rows].astype(np.float32)
+            if self.quantization == "int8":
+                block *= self._scales[rows, None]
+            return block @ query
+        if self.quantization is None:
+            return self._vectors[:self._size] @ query
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, self.CHUNK_ROWS):
+            end = min(start + self.CHUNK_ROWS, self._size)
+            scores[start:end] = self._decode(start, end) @ query
+        return scores
+
+    def _candidate_rows(self, query_filter: Any) -> Optional[np.ndarray]:
+        """满足 payload 过滤条件的行号（无过滤时返回 None）"""
+        if query_filter is None:
+            return None
+        return np.fromiter(
+            (row for row in range(self._size) if _matches_filter(self._payloads[row], query_filter)),
+            dtype=np.int64,
+        )
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        limit: int = 10,
+        query_filter: Any = None,
+        with_payload: bool = True,
+        score_threshold: Optional[float] = None,
+    ) -> List[ScoredVectorPoint]:
+        """
+        检索最相似的向量点
+
+        Args:
+            query_vector: 查询向量
+            limit: 返回数量
+            query_filter: payload 过滤条件（见 _matches_filter）
+            with_payload: 是否返回 payload
+            score_threshold: 最小相似度（可选）
+
+        Returns:
+            按相似度降序排列的结果
+        """
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+        query = query / norm
+
+        with self._lock:
+            self._stats["searches"] += 1
+            if not self._size or limit <= 0:
+                return []
+            if query.shape[0] != self.dimension:
+                raise ValueError(f"Query dimension mismatch: expected {self.dimension}, got {query.shape[0]}")
+
+            if self._hnsw is not None and query_filter is None:
+                k = min(limit, self._size)
+                self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                rows = [self._label_rows[int(label)] for label in labels[0]]
+                scores = [1.0 - float(d) for d in distances[0]]
+            else:
+                candidates = self._candidate_rows(query_filter)
+                if candidates is not None and candidates.size == 0:
+                    return []
+                all_scores = self._flat_scores(query, candidates)
+                k = min(limit, all_scores.shape[0])
+                top = np.argpartition(-all_scores, k - 1)[:k]
+                top = top[np.argsort(-all_scores[top])]
+                rows = candidates[top].tolist() if candidates is not None else top.tolist()
+                scores = all_scores[top].tolist()
+
+            results = []
+            for row, score in zip(rows, scores):
+                if score_threshold is not None and score < score_threshold:
+                    break
+                results.append(ScoredVectorPoint(
+                    id=self._ids[row],
+                    score=float(score),
+                    payload=dict(self._payloads[row]) if with_payload else None,
+                ))
+            return results
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        limit: int = 10,
+        with_payload: bool = True,
+        score_threshold: Optional[float] = None,
+    ) -> List[List[ScoredVectorPoint]]:
+        """
+        批量检索（无 payload 过滤）
+
+        扁平索引把查询拼成矩阵做一次矩阵乘法，HNSW 索引一次 knn_query 查询全部向量。
+
+        Args:
+            query_vectors: 查询向量列表
+            limit: 每个查询的返回数量
+            with_payload: 是否返回 payload
+            score_threshold: 最小相似度（可选）
+
+        Returns:
+            每个查询的结果（与输入顺序一致，零向量查询结果为空）
+        """
+        results: List[List[ScoredVectorPoint]] = [[] for _ in query_vectors]
+        if not len(query_vectors):
+            return results
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        norms = np.linalg.norm(queries, axis=1)
+        valid = np.flatnonzero(norms > 0.0)
+        if not valid.size:
+            return results
+        queries = queries[valid] / norms[valid, None]
+
+        with self._lock:
+            self._stats["searches"] += len(valid)
+            if not self._size or limit <= 0:
+                return results
+            if queries.shape[1] != self.dimension:
+                raise ValueError(f"Query dimension mismatch: expected {self.dimension}, got {queries.shape[1]}")
+
+            k = min(limit, self._size)
+            if self._hnsw is not None:
+                self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+                labels, distances = self._hnsw.knn_query(queries, k=k)
+                rows = [[self._label_rows[int(label)] for label in row] for row in labels]
+                scores = (1.0 - distances).tolist()
+            else:
+                if self.quantization is None:
+                    all_scores = self._vectors[:self._size] @ queries.T
+                else:
+                    all_scores = np.empty((self._size, queries.shape[0]), dtype=np.float32)
+                    for start in range(0, self._size, self.CHUNK_ROWS):
+                        end = min(start + self.CHUNK_ROWS, self._size)
+                        all_scores[start:end] = self._decode(start, end) @ queries.T
+                top = np.argpartition(-all_scores, k - 1, axis=0)[:k]
+                top_scores = np.take_along_axis(all_scores, top, axis=0)
+                order = np.argsort(-top_scores, axis=0)
+                rows = np.take_along_axis(top, order, axis=0).T.tolist()
+                scores = np.take_along_axis(top_scores, order, axis=0).T.tolist()
+
+            for position, query_rows, query_scores in zip(valid.tolist(), rows, scores):
+                for row, score in zip(query_rows, query_scores):
+                    if score_threshold is not None and score < score_threshold:
+                        break
+                    results[position].append(ScoredVectorPoint(
+                        id=self._ids[row],
+                        score=float(score),
+                        payload=dict(self._payloads[row]) if with_payload else None,
+                    ))
+            return results
+
+    def retrieve(self, point_ids: Iterable[Any], with_payload: bool = True, with_vectors: bool = False) -> List[ScoredVectorPoint]:
+        """按 ID 获取向量点（不存在的 ID 跳过）"""
+        results = []
+        with self._lock:
+            for point_id in point_ids:
+                row = self._rows.get(str(point_id))
+                if row is None:
+                    continue
+                results.append(ScoredVectorPoint(
+                    id=self._ids[row],
+                    score=1.0,
+                    payload=dict(self._payloads[row]) if with_payload else None,
+                    vector=self._decode(row, row + 1)[0].tolist() if with_vectors else None,
+                ))
+        return results
+
+    # ---- 持久化 ----
+
+    def save(self) -> None:
+        """保存到持久化目录（原子替换文件）"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            dimension = self.dimension or 0
+            vectors = self._vectors[:self._size] if self._vectors is not None else np.zeros((0, dimension), self._dtype)
+            self._atomic_save_npy("vectors.npy", vectors)
+            if self.quantization == "int8":
+                scales = self._scales[:self._size] if self._scales is not None else np.zeros(0, np.float32)
+                self._atomic_save_npy("scales.npy", scales)
+            if self._hnsw is not None:
+                tmp = os.path.join(self.path, "hnsw.bin.tmp")
+                self._hnsw.save_index(tmp)
+                os.replace(tmp, os.path.join(self.path, "hnsw.bin"))
+            meta = {
+                "dimension": self.dimension,
+                "quantization": self.quantization,
+                "ids": self._ids,
+                "payloads": self._payloads,
+                "labels": self._labels,
+                "next_label": self._next_label,
+            }
+            tmp = os.path.join(self.path, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, default=str)
+            os.replace(tmp, os.path.join(self.path, "meta.json"))
+            self._dirty = False
+
+    def _atomic_save_npy(self, name: str, array: np.ndarray) -> None:
+        tmp = os.path.join(self.path, name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def _load(self) -> None:
+        """从持久化目录加载（向量矩阵以写时复制方式 mmap）"""
+        with open(os.path.join(self.path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("quantization") != self.quantization:
+            logger.warning(
+                f"Vector index at {self.path} uses quantization={meta.get('quantization')}, "
+                f"ignoring configured {self.quantization}"
+            )
+            self.quantization = meta.get("quantization")
+        self.dimension = meta.get("dimension")
+        self._ids = list(meta["ids"])
+        self._payloads = list(meta["payloads"])
+        self._labels = list(meta["labels"])
+        self._next_label = int(meta["next_label"])
+        self._size = len(self._ids)
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._label_rows = {label: row for row, label in enumerate(self._labels)}
+        if self._size:
+            self._vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="c")
+            if self.quantization == "int8":
+                self._scales = np.load(os.path.join(self.path, "scales.npy"), mmap_mode="c")
+
+        if self.index_type == "hnsw" and self.dimension:
+            hnsw_path = os.path.join(self.path, "hnsw.bin")
+            if os.path.exists(hnsw_path):
+                self._hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+                self._hnsw.load_index(hnsw_path)
+                self._hnsw.set_ef(self.hnsw_ef_search)
+            else:
+                self._build_hnsw()
+        logger.info(f"Loaded local vector index from {self.path}: {self._size} points")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "points": self._size,
+                "dimension": self.dimension,
+                "quantization": self.quantization,
+                "index_type": self.index_type,
+                "vector_bytes": int(self._size * (self.dimension or 0) * np.dtype(self._dtype).itemsize),
+            })
+            return stats
+
+
+class LocalVectorClient:
+    """
+    本地向量存储客户端
+
+    按集合名管理 LocalVectorIndex，方法签名与 QdrantClient 中 AtomLinkAdapter
+    使用的部分保持一致。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        quantization: Optional[str] = None,
+        index_type: str = "flat",
+        autosave_every: int = 100,
+        **index_options: Any,
+    ):
+        """
+        初始化本地向量存储
+
+        Args:
+            path: 持久化根目录（每个集合一个子目录；None 表示仅内存）
+            quantization: 量化方式（None / "float16" / "int8"）
+            index_type: 索引类型（"flat" / "hnsw"）
+            autosave_every: 每 N 次写操作自动保存一次（0 表示仅在退出时保存）
+            **index_options: 传给 LocalVectorIndex 的 HNSW 参数
+        """
+        self.path = path
+        self.quantization = quantization
+        self.index_type = index_type
+        self.autosave_every = max(int(autosave_every), 0)
+        self.index_options = index_options
+        self._collections: Dict[str, LocalVectorIndex] = {}
+        self._lock = threading.Lock()
+        self._writes_since_save = 0
+        if path:
+            _open_clients.add(self)
+
+    def _collection(self, collection_name: str) -> LocalVectorIndex:
+        with self._lock:
+            index = self._collections.get(collection_name)
+            if index is None:
+                index = LocalVectorIndex(
+                    quantization=self.quantization,
+                    index_type=self.index_type,
+                    path=os.path.join(self.path, collection_name) if self.path else None,
+                    **self.index_options,
+                )
+                self._collections[collection_name] = index
+            return index
+
+    def _after_write(self, index: LocalVectorIndex) -> None:
+        if not self.path or not self.autosave_every:
+            return
+        with self._lock:
+            self._writes_since_save += 1
+            if self._writes_since_save < self.autosave_every:
+                return
+            self._writes_since_save = 0
+        index.save()
+
+    def create_collection(self, collection_name: str, dimension: Optional[int] = None) -> None:
+        """创建集合（已存在时忽略）"""
+        index = self._collection(collection_name)
+        if dimension and index.dimension is None:
+            index.dimension = int(dimension)
+
+    def upsert(self, collection_name: str, points: Iterable[Any], **kwargs: Any) -> int:
+        """写入或更新向量点"""
+        index = self._collection(collection_name)
+        count = index.upsert(points)
+        self._after_write(index)
+        return count
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: Sequence[float],
+        limit: int = 10,
+        query_filter: Any = None,
+        with_payload: bool = True,
+        score_threshold: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[ScoredVectorPoint]:
+        """检索最相似的向量点"""
+        return self._collection(collection_name).search(
+            query_vector,
+            limit=limit,
+            query_filter=query_filter,
+            with_payload=with_payload,
+            score_threshold=score_threshold,
+        )
+
+    def search_batch(
+        self,
+        collection_name: str,
+        requests: Sequence[Any],
+        **kwargs: Any,
+    ) -> List[List[ScoredVectorPoint]]:
+        """
+        批量检索（requests 为 VectorSearchRequest 或 qdrant SearchRequest）
+
+        无过滤条件且参数相同的查询合并为一次矩阵检索，带过滤条件的查询逐个执行。
+        """
+        index = self._collection(collection_name)
+        results: List[List[ScoredVectorPoint]] = [[] for _ in requests]
+        groups: Dict[tuple, List[int]] = {}
+        for position, request in enumerate(requests):
+            if getattr(request, "filter", None) is not None:
+                results[position] = index.search(
+                    request.vector,
+                    limit=request.limit,
+                    query_filter=request.filter,
+                    with_payload=bool(getattr(request, "with_payload", True)),
+                    score_threshold=getattr(request, "score_threshold", None),
+                )
+                continue
+            key = (
+                int(request.limit),
+                bool(getattr(request, "with_payload", True)),
+                getattr(request, "score_threshold", None),
+            )
+            groups.setdefault(key, []).append(position)
+        for (limit, with_payload, score_threshold), positions in groups.items():
+            batch = index.search_batch(
+                [requests[position].vector for position in positions],
+                limit=limit,
+                with_payload=with_payload,
+                score_threshold=score_threshold,
+            )
+            for position, points in zip(positions, batch):
+                results[position] = points
+        return results
+
+    def retrieve(
+        self,
+        collection_name: str,
+        ids: Iterable[Any],
+        with_payload: bool = True,
+        with_vectors: bool = False,
+        **kwargs: Any,
+    ) -> List[ScoredVectorPoint]:
+        """按 ID 获取向量点"""
+        return self._collection(collection_name).retrieve(ids, with_payload=with_payload, with_vectors=with_vectors)
+
+    def delete(self, collection_name: str, points_selector: Any, **kwargs: Any) -> int:
+        """删除向量点（points_selector 为 ID 列表或 PointIdsList）"""
+        point_ids = getattr(points_selector, "points", points_selector)
+        index = self._collection(collection_name)
+        count = index.delete(point_ids)
+        self._after_write(index)
+        return count
+
+    def count(self, collection_name: str, **kwargs: Any) -> int:
+        """集合中的点数"""
+        return len(self._collection(collection_name))
+
+    def flush(self) -> None:
+        """保存所有集合"""
+        with self._lock:
+            indexes = list(self._collections.values())
+            self._writes_since_save = 0
+        for index in indexes:
+            try:
+                index.save()
+            except Exception as e:
+                logger.error(f"Failed to save local vector index {index.path}: {e}")
+
+    def close(self) -> None:
+        """保存所有集合并停止退出时保存（幂等）"""
+        _open_clients.discard(self)
+        self.flush()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取所有集合的统计信息"""
+        with self._lock:
+            indexes = dict(self._collections)
+        return {name: index.get_statistics() for name, index in indexes.items()}